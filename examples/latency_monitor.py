@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Measure end-to-end latency, loss and reordering of location updates.
+
+Run the publisher with `mqtt.sequence: true` so location updates carry
+`seq` and `send_ns`, then:
+
+    python examples/latency_monitor.py --broker localhost --interval 10 \
+        --report latency.json --prometheus latency.prom
+
+Latency is the subscriber's wall clock minus the publisher's, so both hosts
+need synchronized clocks (or run on the same host).
+"""
+
+import json
+import signal
+import sys
+import time
+from pathlib import Path
+
+import paho.mqtt.client as mqtt
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.latency import LatencyTracker, parse_location
+
+
+class LatencyMonitor:
+    def __init__(self, broker='localhost', port=1883, topic='rtls/location/+', qos=1):
+        self.broker = broker
+        self.port = port
+        self.topic = topic
+        self.qos = qos
+        self.tracker = LatencyTracker()
+        self.unsequenced = 0
+        self.client = mqtt.Client(client_id='rtls_latency_monitor')
+        self.client.on_connect = self.on_connect
+        self.client.on_message = self.on_message
+        self.running = True
+
+        signal.signal(signal.SIGINT, self.signal_handler)
+
+    def signal_handler(self, signum, frame):
+        print("\nShutting down...")
+        self.running = False
+
+    def on_connect(self, client, userdata, flags, rc):
+        if rc == 0:
+            print(f"Connected to MQTT broker at {self.broker}:{self.port}")
+            client.subscribe(self.topic, qos=self.qos)
+        else:
+            print(f"Failed to connect, return code {rc}")
+
+    def on_message(self, client, userdata, msg):
+        # Take the receive time before decoding so parsing is not counted as latency
+        recv_ns = time.time_ns()
+        # Retained messages are old state replayed on subscribe, not live traffic
+        if msg.retain:
+            return
+        try:
+            trace = parse_location(msg.payload)
+        except Exception as e:
+            print(f"Error decoding message on {msg.topic}: {e}")
+            return
+        if trace is None:
+            self.unsequenced += 1
+            return
+        self.tracker.observe(msg.topic, trace[0], trace[1], recv_ns)
+
+    def print_summary(self):
+        summary = self.tracker.summary()
+        latency = summary['latency_ms']
+        print(f"{summary['received']} msgs over {summary['topics']} topics | "
+              f"latency p50 {latency['p50']} ms, p99 {latency['p99']} ms, p99.9 {latency['p99.9']} ms | "
+              f"lost {summary['lost']}, dup {summary['duplicates']}, reordered {summary['reordered']}"
+              + (f" | {self.unsequenced} without seq" if self.unsequenced else ""))
+
+    def run(self, interval=10.0, report=None, prometheus=None):
+        self.client.connect(self.broker, self.port, 60)
+        self.client.loop_start()
+        try:
+            next_summary = time.time() + interval
+            while self.running:
+                time.sleep(0.2)
+                if time.time() >= next_summary:
+                    self.print_summary()
+                    next_summary += interval
+        finally:
+            self.client.loop_stop()
+            self.client.disconnect()
+
+        self.print_summary()
+        if report:
+            Path(report).write_text(json.dumps(self.tracker.report(), indent=2))
+            print(f"Report written to {report}")
+        if prometheus:
+            Path(prometheus).write_text(self.tracker.prometheus())
+            print(f"Prometheus histogram written to {prometheus}")
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--broker', default='localhost')
+    parser.add_argument('--port', type=int, default=1883)
+    parser.add_argument('--topic', default='rtls/location/+', help='Location topics to measure')
+    parser.add_argument('--qos', type=int, default=1)
+    parser.add_argument('--interval', type=float, default=10.0, help='Seconds between summaries')
+    parser.add_argument('--report', help='Write per-topic JSON report here on exit')
+    parser.add_argument('--prometheus', help='Write the latency histogram in Prometheus text format here on exit')
+    args = parser.parse_args()
+    monitor = LatencyMonitor(broker=args.broker, port=args.port, topic=args.topic, qos=args.qos)
+    monitor.run(interval=args.interval, report=args.report, prometheus=args.prometheus)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Read the publisher's tag state from shared memory.
+
+Run the publisher with `shared_state.enabled: true` on the same host, then:
+
+    python examples/shared_state_reader.py --name rtls_state --interval 1
+"""
+
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.shared_state import SharedStateReader
+
+
+def main(name='rtls_state', interval=1.0):
+    reader = SharedStateReader(name)
+    last_tick = None
+    try:
+        while True:
+            start = time.perf_counter()
+            snapshot = reader.read()
+            read_ms = (time.perf_counter() - start) * 1e3
+            if snapshot.seq != last_tick:
+                last_tick = snapshot.seq
+                zones = Counter(zone_id for zone_id in snapshot.zone_ids.tolist() if zone_id is not None)
+                busiest = ', '.join(f"{zone_id}={count}" for zone_id, count in zones.most_common(3))
+                print(f"tick {snapshot.seq} at {snapshot.timestamp}: {len(snapshot)} tags "
+                      f"read in {read_ms:.2f} ms ({reader.retries} retries so far) | {busiest}")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--name', default='rtls_state', help='Shared memory segment name')
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds between reads')
+    args = parser.parse_args()
+    main(name=args.name, interval=args.interval)
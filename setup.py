@@ -33,7 +33,7 @@ setup(
     install_requires=requirements,
     entry_points={
         "console_scripts": [
-            "rtls-publisher=src.main:main",
+            "rtls-publisher=src.cli:main",
             "rtls-subscriber=examples.subscriber_example:main",
         ],
     },
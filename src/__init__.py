@@ -3,16 +3,20 @@
 __version__ = "0.1.0"
 __author__ = "Your Name"
 
-from .mqtt_client import MQTTClient
-from .rtls_generator import RTLSGenerator
-from .models import (
-    Position,
-    Zone,
-    Tag,
-    LocationUpdate,
-    ZoneAlert,
-    SystemStatus
-)
+import importlib
+
+# Public names are loaded on first access so that importing the package (or
+# a light submodule such as src.cli) does not pull in paho or NumPy
+_LAZY_ATTRIBUTES = {
+    'MQTTClient': '.mqtt_client',
+    'RTLSGenerator': '.rtls_generator',
+    'Position': '.models',
+    'Zone': '.models',
+    'Tag': '.models',
+    'LocationUpdate': '.models',
+    'ZoneAlert': '.models',
+    'SystemStatus': '.models'
+}
 
 __all__ = [
     'MQTTClient',
@@ -23,4 +27,17 @@ __all__ = [
     'LocationUpdate',
     'ZoneAlert',
     'SystemStatus'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
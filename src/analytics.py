@@ -0,0 +1,211 @@
+"""Streaming zone dwell-time and flow analytics."""
+
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+
+OUTSIDE = '_outside'
+
+
+class DwellHistogram:
+    """Log-bucketed dwell times, one row of buckets per zone.
+
+    Bucket edges grow geometrically from `min_dwell`, so any percentile is
+    answered within `growth - 1` relative error from a fixed number of
+    counters, however many dwells were recorded.
+    """
+
+    def __init__(self, zones: int, min_dwell: float = 1.0, max_dwell: float = 7 * 86400,
+                 growth: float = 2 ** 0.25):
+        self.min_dwell = min_dwell
+        self.log_growth = math.log(growth)
+        # Bucket 0 holds dwells under min_dwell; the last one everything beyond max_dwell
+        self.buckets = int(math.ceil(math.log(max_dwell / min_dwell) / self.log_growth)) + 2
+        # Representative value per bucket: the geometric middle of its edges
+        edges = min_dwell * growth ** np.arange(self.buckets - 1)
+        self.values = np.concatenate([[min_dwell / 2], np.sqrt(edges[:-1] * edges[1:]), [edges[-1]]])
+        self.counts = np.zeros((zones, self.buckets), dtype=np.int64)
+        self.sums = np.zeros(zones)
+
+    def bucket(self, dwell: float) -> int:
+        """Bucket index for one dwell time."""
+        if dwell < self.min_dwell:
+            return 0
+        return min(self.buckets - 1, int(math.log(dwell / self.min_dwell) / self.log_growth) + 1)
+
+    def add(self, zone: int, dwell: float):
+        """Count one finished dwell."""
+        self.counts[zone, self.bucket(dwell)] += 1
+        self.sums[zone] += dwell
+
+    def clear(self):
+        """Reset all counters."""
+        self.counts[:] = 0
+        self.sums[:] = 0.0
+
+
+def percentiles(counts: np.ndarray, values: np.ndarray, qs: Sequence[float]) -> np.ndarray:
+    """Percentiles (0-100) per row of bucket counts; NaN for empty rows."""
+    totals = counts.sum(axis=1)
+    cumulative = np.cumsum(counts, axis=1)
+    result = np.full((len(counts), len(qs)), np.nan)
+    for j, q in enumerate(qs):
+        rank = np.maximum(1, np.ceil(totals * q / 100.0))
+        index = (cumulative < rank[:, None]).sum(axis=1)
+        result[:, j] = np.where(totals > 0, values[np.minimum(index, len(values) - 1)], np.nan)
+    return result
+
+
+class ZoneAnalytics:
+    """Rolling per-zone dwell and flow statistics from zone transitions.
+
+    The rolling window is split into `slots` sub-intervals, each holding its
+    own dwell histogram, entry/exit counts and zone-to-zone transition
+    counts; the oldest slot is cleared as time moves on. Memory is fixed by
+    the number of zones and slots, not by the event rate.
+    """
+
+    def __init__(self, config: Dict, zone_ids: List[str]):
+        self.window = config.get('window', 900.0)
+        self.slots = config.get('slots', 15)
+        self.publish_interval = config.get('publish_interval', 60.0)
+        self.quantiles = list(config.get('percentiles', [50, 90, 99]))
+        self.slot_seconds = self.window / self.slots
+        if self.slot_seconds <= 0:
+            raise ValueError("Analytics window and slots must be positive")
+        self._histogram_args = (config.get('min_dwell', 1.0), config.get('max_dwell', 7 * 86400))
+
+        self.entered: Dict[str, Tuple[str, float]] = {}
+        self.rollup_due = False
+        self._since_publish = 0.0
+        self._slot = 0
+        self._slot_start = 0.0
+        self.zone_ids: List[str] = []
+        self._allocate(1)
+        self.set_zones(zone_ids)
+
+    def _allocate(self, size: int):
+        """Fresh counters for `size` columns (zones plus outside)."""
+        self.histograms = [DwellHistogram(size, *self._histogram_args) for _ in range(self.slots)]
+        self.entries = np.zeros((self.slots, size), dtype=np.int64)
+        self.exits = np.zeros((self.slots, size), dtype=np.int64)
+        self.transitions = np.zeros((self.slots, size, size), dtype=np.int64)
+        self.occupancy = np.zeros(size, dtype=np.int64)
+
+    def set_zones(self, zone_ids: List[str]):
+        """Lay out counters for a zone list, keeping history of zones that remain."""
+        old_ids = self.zone_ids
+        histograms, entries, exits, transitions = self.histograms, self.entries, self.exits, self.transitions
+
+        self.zone_ids = list(zone_ids)
+        # Column 0 of the flow counters and transition matrix is "outside any zone"
+        self.index = {zone_id: i + 1 for i, zone_id in enumerate(self.zone_ids)}
+        self.index[None] = 0
+        self._allocate(len(self.zone_ids) + 1)
+
+        kept = [(i + 1, self.index[zone_id]) for i, zone_id in enumerate(old_ids) if zone_id in self.index]
+        src = np.array([0] + [old for old, _ in kept])
+        dst = np.array([0] + [new for _, new in kept])
+        for new, previous in zip(self.histograms, histograms):
+            new.counts[dst] = previous.counts[src]
+            new.sums[dst] = previous.sums[src]
+        self.entries[:, dst] = entries[:, src]
+        self.exits[:, dst] = exits[:, src]
+        self.transitions[:, dst[:, None], dst[None, :]] = transitions[:, src[:, None], src[None, :]]
+
+        # Tags in zones that no longer exist are now outside
+        for tag_id, (zone_id, _) in list(self.entered.items()):
+            if zone_id not in self.index:
+                del self.entered[tag_id]
+        for zone_id, _ in self.entered.values():
+            self.occupancy[self.index[zone_id]] += 1
+
+    def seed(self, tags: Sequence[Tuple[str, Optional[str]]], now: float):
+        """Start dwell clocks for tags that are already in a zone."""
+        for tag_id, zone_id in tags:
+            if zone_id is not None and zone_id in self.index and tag_id not in self.entered:
+                self.entered[tag_id] = (zone_id, now)
+                self.occupancy[self.index[zone_id]] += 1
+
+    def forget(self, tag_id: str):
+        """Drop a removed tag without recording an exit."""
+        entry = self.entered.pop(tag_id, None)
+        if entry is not None:
+            self.occupancy[self.index[entry[0]]] -= 1
+
+    def _rotate(self, now: float):
+        """Advance to the slot covering `now`, clearing slots that fell out of the window."""
+        steps = int((now - self._slot_start) // self.slot_seconds)
+        for _ in range(min(steps, self.slots)):
+            self._slot = (self._slot + 1) % self.slots
+            self.histograms[self._slot].clear()
+            self.entries[self._slot] = 0
+            self.exits[self._slot] = 0
+            self.transitions[self._slot] = 0
+        self._slot_start += steps * self.slot_seconds
+
+    def update(self, transitions: Sequence[Tuple[str, Optional[str], Optional[str]]], now: float, dt: float):
+        """Record one tick of (tag id, old zone, new zone) transitions at time `now`."""
+        self._rotate(now)
+        slot = self._slot
+        histogram = self.histograms[slot]
+        for tag_id, old_zone, new_zone in transitions:
+            source = self.index.get(old_zone, 0)
+            target = self.index.get(new_zone, 0)
+            entry = self.entered.pop(tag_id, None)
+            if entry is not None:
+                histogram.add(self.index[entry[0]], now - entry[1])
+                self.occupancy[self.index[entry[0]]] -= 1
+            if source:
+                self.exits[slot, source] += 1
+            if target:
+                self.entries[slot, target] += 1
+                self.entered[tag_id] = (new_zone, now)
+                self.occupancy[target] += 1
+            self.transitions[slot, source, target] += 1
+
+        self._since_publish += dt
+        # Tolerate float drift when the interval is a multiple of the tick
+        self.rollup_due = self._since_publish + 1e-9 >= self.publish_interval
+        if self.rollup_due:
+            self._since_publish = 0.0
+
+    def rollup(self, now: float) -> Dict[str, Any]:
+        """JSON-ready summary of the rolling window."""
+        # Only count the elapsed part of the window while it is still filling
+        span = min(self.window, max(now, self.slot_seconds))
+        per_minute = 60.0 / span
+        counts = sum(h.counts for h in self.histograms)
+        sums = sum(h.sums for h in self.histograms)
+        dwells = counts.sum(axis=1)
+        quantiles = percentiles(counts, self.histograms[0].values, self.quantiles)
+        entries = self.entries.sum(axis=0)
+        exits = self.exits.sum(axis=0)
+        transitions = self.transitions.sum(axis=0)
+
+        names = [OUTSIDE] + self.zone_ids
+        zones = {}
+        for i, zone_id in enumerate(self.zone_ids, start=1):
+            dwell = {'count': int(dwells[i]), 'mean': round(float(sums[i] / dwells[i]), 1) if dwells[i] else None}
+            for q, value in zip(self.quantiles, quantiles[i].tolist()):
+                dwell[f"p{q:g}"] = None if math.isnan(value) else round(value, 1)
+            zones[zone_id] = {
+                'occupancy': int(self.occupancy[i]),
+                'entries_per_min': round(float(entries[i]) * per_minute, 2),
+                'exits_per_min': round(float(exits[i]) * per_minute, 2),
+                'dwell_seconds': dwell
+            }
+
+        sources, targets = np.nonzero(transitions)
+        matrix: Dict[str, Dict[str, int]] = {}
+        for source, target, count in zip(sources.tolist(), targets.tolist(), transitions[sources, targets].tolist()):
+            matrix.setdefault(names[source], {})[names[target]] = count
+
+        return {
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'window_seconds': round(span, 1),
+            'zones': zones,
+            'transitions': matrix
+        }
@@ -0,0 +1,409 @@
+"""Command line interface for the RTLS publisher.
+
+Each subcommand imports only the modules it needs, so `validate` never loads
+paho and `replay` never loads NumPy.
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .profiling import PROFILE_MODES
+
+
+COMMANDS = ('run', 'bench', 'record', 'replay', 'ramp', 'soak', 'validate', 'clear-retained')
+PROTOCOLS = ('3.1.1', '5')
+
+
+def _open_recording(path: str, mode: str):
+    """Open a JSON Lines recording, gzip-compressed if it ends in .gz."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _scale_tags(config: Dict, count: int) -> Dict:
+    """Clone the configured tags round-robin until there are `count` of them."""
+    tags = config['rtls']['tags']
+    if not count or not tags:
+        return config
+    scaled = []
+    for i in range(count):
+        tag = dict(tags[i % len(tags)])
+        position = dict(tag['initial_position'])
+        # Spread clones out so they do not all start on the same point
+        position['x'] = position['x'] + (i // len(tags)) % 17 * 0.5
+        position['y'] = position['y'] + (i // len(tags)) // 17 % 17 * 0.5
+        tag.update(id=f"{tag['id']}_{i}", initial_position=position)
+        scaled.append(tag)
+    config['rtls']['tags'] = scaled
+    return config
+
+
+def cmd_run(args) -> int:
+    """Run the publisher (single site or multi-site)."""
+    from .main import MultiSitePublisher, RTLSPublisher
+    from .profiling import TickProfiler
+
+    # Override log level if verbose
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    profiler = None
+    if args.profile:
+        profiler = TickProfiler(args.profile, args.profile_ticks, args.profile_output)
+
+    # Create and start publisher
+    if args.sites:
+        publisher = MultiSitePublisher(args.config, args.sites, profiler)
+    else:
+        publisher = RTLSPublisher(args.config, profiler)
+    publisher.start()
+    return 0
+
+
+def cmd_bench(args) -> int:
+    """Time generator ticks and location encoding without a broker."""
+    from .config_reload import load_yaml_config
+    from .models import LocationUpdate
+    from .profiling import StageTimer
+    from .rtls_generator import RTLSGenerator
+
+    config = _scale_tags(load_yaml_config(args.config), args.tags)
+    generator = RTLSGenerator(config)
+    codec = None
+    if args.payload_format == 'binary':
+        from .codec import LocationCodec
+        codec = LocationCodec()
+
+    timer = StageTimer()
+    generator.timer = timer
+    for _ in range(args.ticks):
+        with timer.stage('tick'):
+            with timer.stage('step'):
+                generator.step(args.dt)
+            with timer.stage('encode'):
+                for tag in generator.updated:
+                    location = LocationUpdate.from_tag(tag)
+                    if codec:
+                        codec.encode(location)
+                    else:
+                        location.to_json()
+
+    print(f"{len(generator.tags)} tags, {args.ticks} ticks")
+    print(timer.summary(args.ticks))
+    return 0
+
+
+def cmd_record(args) -> int:
+    """Run the simulation offline and write every tick to a recording."""
+    from .config_reload import load_yaml_config
+    from .models import LocationUpdate
+    from .rtls_generator import RTLSGenerator
+
+    config = _scale_tags(load_yaml_config(args.config), args.tags)
+    generator = RTLSGenerator(config)
+    dt = args.dt or config['rtls']['update_interval']
+
+    with _open_recording(args.output, 'w') as f:
+        for _ in range(args.ticks):
+            alerts = generator.step(dt)
+            record = {
+                'seq': generator.tick,
+                'dt': dt,
+                'locations': [asdict(LocationUpdate.from_tag(tag)) for tag in generator.updated],
+                'alerts': [asdict(alert) for alert in alerts]
+            }
+            f.write(json.dumps(record) + '\n')
+
+    print(f"Recorded {args.ticks} ticks of {len(generator.tags)} tags to {args.output}")
+    return 0
+
+
+def cmd_replay(args) -> int:
+    """Publish a recording to the broker at its recorded (or scaled) rate."""
+    from .config_reload import load_yaml_config
+    from .models import LocationUpdate, ZoneAlert
+    from .mqtt_client import MQTTClient
+
+    config = load_yaml_config(args.config)
+    logging.basicConfig(level=logging.INFO)
+    client = MQTTClient(config)
+    if not client.connect():
+        print("Failed to connect to MQTT broker", file=sys.stderr)
+        return 1
+
+    ticks = 0
+    try:
+        while True:
+            with _open_recording(args.recording, 'r') as f:
+                for line in f:
+                    start = time.time()
+                    record = json.loads(line)
+                    for location in record['locations']:
+                        client.publish_location(LocationUpdate(**location))
+                    for alert in record['alerts']:
+                        client.publish_alert(ZoneAlert(**alert))
+                    client.service_spool(record['dt'])
+                    ticks += 1
+
+                    if args.speed > 0:
+                        time.sleep(max(0.0, record['dt'] / args.speed - (time.time() - start)))
+            if not args.loop:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.disconnect()
+
+    print(f"Replayed {ticks} ticks from {args.recording}")
+    return 0
+
+
+def cmd_ramp(args) -> int:
+    """Find the largest tag population the publisher and broker sustain per update interval."""
+    from .config_reload import load_yaml_config
+    from .mqtt_client import MQTTClient
+    from .ramp import CapacityRamp, write_report
+
+    config = load_yaml_config(args.config)
+    logging.basicConfig(level=logging.INFO)
+    ramp_config = dict(config.get('ramp', {}))
+    for key in ('intervals', 'start_tags', 'step_tags', 'max_tags', 'step_seconds'):
+        if getattr(args, key) is not None:
+            ramp_config[key] = getattr(args, key)
+    ramp = CapacityRamp(config, MQTTClient(config), ramp_config)
+
+    if not ramp.mqtt_client.connect():
+        print("Failed to connect to MQTT broker", file=sys.stderr)
+        return 1
+    try:
+        report = ramp.run()
+    except KeyboardInterrupt:
+        return 1
+    finally:
+        ramp.mqtt_client.disconnect()
+
+    print(write_report(report, args.output))
+    print(f"Report written to {args.output}")
+    return 0
+
+
+def cmd_soak(args) -> int:
+    """Soak the publisher against a broker stand-in and check its memory stays flat."""
+    from .config_reload import load_yaml_config
+    from .soak import SoakHarness
+
+    soak_config = dict(load_yaml_config(args.config).get('soak', {}))
+    for key in ('hours', 'speedup', 'max_growth_mb_per_hour'):
+        if getattr(args, key) is not None:
+            soak_config[key] = getattr(args, key)
+    report = SoakHarness(args.config, soak_config).run()
+    Path(args.output).write_text(json.dumps(report, indent=2))
+
+    print(f"{'PASS' if report['passed'] else 'FAIL'}: RSS {report['rss_growth_mb_per_hour']:+.2f} MB/h, "
+          f"traced {report['traced_growth_mb_per_hour']:+.2f} MB/h over {report['simulated_hours']} simulated hours "
+          f"({report['real_seconds']} s, {report['outages']} broker outages)")
+    for site in report['top_allocation_growth']:
+        print(f"  {site['size_diff_kb']:+10.1f} KB {site['count_diff']:+8d}  {site['site']}")
+    print(f"Report written to {args.output}")
+    return 0 if report['passed'] else 1
+
+
+def configured_retained_topics(config: Dict) -> List[str]:
+    """Retained topics the publisher would write for a configuration."""
+    rtls = config['rtls']
+    topics = ['rtls/status', 'rtls/analytics/zones']
+    topics += [f"rtls/location/{tag['id']}" for tag in rtls.get('tags', [])]
+    for zone in rtls.get('zones', []):
+        topics += [f"rtls/zone/{zone['id']}/tags", f"rtls/heatmap/{zone['id']}"]
+    return topics
+
+
+def cmd_clear_retained(args) -> int:
+    """Clear the retained topics in the registry (and optionally the configured ones)."""
+    from .config_reload import load_yaml_config
+    from .mqtt_client import MQTTClient
+
+    config = load_yaml_config(args.config)
+    logging.basicConfig(level=logging.INFO)
+    client = MQTTClient(config)
+    if args.from_config:
+        for topic in configured_retained_topics(config):
+            client.retained.add(client._topic(topic))
+    if not client.connect():
+        print("Failed to connect to MQTT broker", file=sys.stderr)
+        return 1
+
+    try:
+        total = len(client.retained)
+        cleared = client.clear_retained_messages()
+    finally:
+        client.disconnect()
+
+    print(f"Cleared {cleared} of {total} retained topics")
+    return 0 if cleared == total else 1
+
+
+def validate_config(config: Dict) -> List[str]:
+    """Check a configuration and return a list of problems."""
+    if not isinstance(config, dict) or 'rtls' not in config:
+        return ["missing rtls section"]
+
+    errors = []
+    mqtt_config = config.get('mqtt')
+    if mqtt_config is not None:
+        for key in ('broker', 'port', 'client_id'):
+            if key not in mqtt_config:
+                errors.append(f"mqtt.{key} is required")
+        if mqtt_config.get('payload_format', 'json') not in ('json', 'binary'):
+            errors.append("mqtt.payload_format must be json or binary")
+        if str(mqtt_config.get('protocol', '3.1.1')) not in PROTOCOLS:
+            errors.append(f"mqtt.protocol must be one of {', '.join(PROTOCOLS)}")
+
+    rtls = config['rtls']
+    for section in ('zones', 'tags'):
+        ids = [item.get('id') for item in rtls.get(section, [])]
+        duplicates = sorted({i for i in ids if ids.count(i) > 1})
+        if duplicates:
+            errors.append(f"duplicate {section[:-1]} ids: {', '.join(map(str, duplicates))}")
+    for zone in rtls.get('zones', []):
+        if 'bounds' not in zone and 'polygon' not in zone:
+            errors.append(f"zone {zone.get('id')} needs bounds or a polygon")
+    if errors:
+        return errors
+
+    # Building the generator checks everything else (movement models, routes, scenarios)
+    from .rtls_generator import RTLSGenerator
+    try:
+        RTLSGenerator(config)
+    except (KeyError, TypeError, ValueError) as e:
+        errors.append(f"{type(e).__name__}: {e}")
+    return errors
+
+
+def cmd_validate(args) -> int:
+    """Validate one or more configuration files."""
+    from .config_reload import load_yaml_config
+
+    failed = False
+    for path in args.configs:
+        try:
+            config = load_yaml_config(path)
+        except Exception as e:
+            print(f"FAIL {path}: {e}")
+            failed = True
+            continue
+
+        errors = validate_config(config)
+        if errors:
+            failed = True
+            print(f"FAIL {path}")
+            for error in errors:
+                print(f"  - {error}")
+        else:
+            rtls = config['rtls']
+            print(f"OK   {path} ({len(rtls.get('zones', []))} zones, {len(rtls.get('tags', []))} tags)")
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser with all subcommands."""
+    parser = argparse.ArgumentParser(
+        prog='rtls-publisher',
+        description="MQTT RTLS Mock Data Publisher (defaults to `run` when no command is given)"
+    )
+    commands = parser.add_subparsers(dest='command')
+
+    run = commands.add_parser('run', help='Publish simulated RTLS data to MQTT')
+    run.add_argument('-c', '--config', default='config/config.yaml', help='Path to configuration file')
+    run.add_argument('-v', '--verbose', action='store_true', help='Enable verbose logging')
+    run.add_argument('--sites', nargs='+', metavar='PATH',
+                     help='Site configuration files or directories to run in one process')
+    run.add_argument('--profile', nargs='?', const='stages', choices=PROFILE_MODES,
+                     help='Profile the tick loop: per-stage timings (default), cprofile or sample')
+    run.add_argument('--profile-ticks', type=int, default=100,
+                     help='Number of ticks to profile before stopping (0 to run until interrupted)')
+    run.add_argument('--profile-output', default='profile', help='Directory for profiling reports')
+    run.set_defaults(handler=cmd_run)
+
+    bench = commands.add_parser('bench', help='Benchmark the generator without a broker')
+    bench.add_argument('-c', '--config', default='config/config.yaml', help='Path to configuration file')
+    bench.add_argument('--ticks', type=int, default=50, help='Number of ticks to run')
+    bench.add_argument('--tags', type=int, default=0, help='Scale the configured tags up to this many')
+    bench.add_argument('--dt', type=float, default=1.0, help='Simulated seconds per tick')
+    bench.add_argument('--payload-format', choices=('json', 'binary'), default='json',
+                       help='Location encoding to time')
+    bench.set_defaults(handler=cmd_bench)
+
+    record = commands.add_parser('record', help='Record simulated ticks to a JSON Lines file')
+    record.add_argument('-c', '--config', default='config/config.yaml', help='Path to configuration file')
+    record.add_argument('-o', '--output', required=True, help='Recording path (.jsonl or .jsonl.gz)')
+    record.add_argument('--ticks', type=int, default=60, help='Number of ticks to record')
+    record.add_argument('--tags', type=int, default=0, help='Scale the configured tags up to this many')
+    record.add_argument('--dt', type=float, default=None,
+                        help='Simulated seconds per tick (default: rtls.update_interval)')
+    record.set_defaults(handler=cmd_record)
+
+    replay = commands.add_parser('replay', help='Publish a recording to MQTT')
+    replay.add_argument('recording', help='Recording made with `record`')
+    replay.add_argument('-c', '--config', default='config/config.yaml', help='Configuration with the mqtt section')
+    replay.add_argument('--speed', type=float, default=1.0,
+                        help='Playback speed multiplier (0 publishes as fast as possible)')
+    replay.add_argument('--loop', action='store_true', help='Repeat the recording until interrupted')
+    replay.set_defaults(handler=cmd_replay)
+
+    ramp = commands.add_parser('ramp', help='Grow the tag population until an SLO breaks and report capacity')
+    ramp.add_argument('-c', '--config', default='config/config.yaml', help='Path to configuration file')
+    ramp.add_argument('-o', '--output', default='ramp-report.json', help='JSON report path')
+    ramp.add_argument('--intervals', type=float, nargs='+', default=None, metavar='SECONDS',
+                      help='Update intervals to ramp (default: ramp.intervals or rtls.update_interval)')
+    ramp.add_argument('--start-tags', dest='start_tags', type=int, default=None, help='Initial population')
+    ramp.add_argument('--step-tags', dest='step_tags', type=int, default=None, help='Tags added per step')
+    ramp.add_argument('--max-tags', dest='max_tags', type=int, default=None, help='Stop growing at this many tags')
+    ramp.add_argument('--step-seconds', dest='step_seconds', type=float, default=None,
+                      help='Wall-clock seconds measured per step')
+    ramp.set_defaults(handler=cmd_ramp)
+
+    soak = commands.add_parser('soak', help='Run for hours of accelerated time and check memory growth')
+    soak.add_argument('-c', '--config', default='config/config.yaml', help='Path to configuration file')
+    soak.add_argument('-o', '--output', default='soak-report.json', help='JSON report path')
+    soak.add_argument('--hours', type=float, default=None, help='Simulated hours to run')
+    soak.add_argument('--speedup', type=float, default=None,
+                      help='Simulated seconds per real second (0 runs ticks back to back)')
+    soak.add_argument('--max-growth', dest='max_growth_mb_per_hour', type=float, default=None,
+                      help='Fail above this RSS growth in MB per simulated hour')
+    soak.set_defaults(handler=cmd_soak)
+
+    validate = commands.add_parser('validate', help='Check configuration files')
+    validate.add_argument('configs', nargs='+', metavar='CONFIG', help='Configuration files to check')
+    validate.set_defaults(handler=cmd_validate)
+
+    clear = commands.add_parser('clear-retained', help='Remove retained messages left on the broker')
+    clear.add_argument('-c', '--config', default='config/config.yaml', help='Configuration with the mqtt section')
+    clear.add_argument('--from-config', action='store_true',
+                       help='Also clear the topics of the configured tags and zones')
+    clear.set_defaults(handler=cmd_clear_retained)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for `rtls-publisher`."""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # No subcommand means `run`, so `python -m src.main -c config.yaml` keeps working
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ('-h', '--help')):
+        argv.insert(0, 'run')
+
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Compact binary encoding for location updates."""
+
+import struct
+from datetime import datetime, timezone
+from typing import Union
+
+from .models import LocationUpdate
+
+
+PAYLOAD_FORMATS = ('json', 'binary')
+
+MAGIC = b'RL'
+VERSION = 1
+FLAG_ZONE = 0x01
+FLAG_TRACE = 0x02
+
+# magic, version, flags, timestamp (us since epoch), x, y, z, speed, heading,
+# battery, rssi, tag id length, zone id length; the ids follow as UTF-8
+LOCATION_HEADER = struct.Struct('<2sBBqfffffBbBB')
+# With FLAG_TRACE, after the ids: sequence number, send time (ns since epoch)
+LOCATION_TRACE = struct.Struct('<Iq')
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _timestamp_us(timestamp: str) -> int:
+    """Microseconds since the epoch for an ISO-8601 UTC timestamp."""
+    moment = datetime.fromisoformat(timestamp.rstrip('Z'))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = moment - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+class LocationCodec:
+    """Encode location updates into a reusable buffer.
+
+    Each message is packed with `struct.pack_into` into one preallocated
+    bytearray. The returned payload is an immutable copy of the used bytes,
+    because paho keeps a reference to the payload until the broker
+    acknowledges it; everything else on the encode path is reused.
+    """
+
+    def __init__(self, capacity: int = 512):
+        self.buffer = bytearray(capacity)
+        self.view = memoryview(self.buffer)
+
+    def encode(self, location: LocationUpdate) -> bytes:
+        """Encode one location update."""
+        tag_id = location.tag_id.encode('utf-8')
+        zone_id = location.zone_id.encode('utf-8') if location.zone_id is not None else b''
+        if len(tag_id) > 255 or len(zone_id) > 255:
+            raise ValueError(f"Tag and zone ids must be at most 255 bytes: {location.tag_id!r}")
+
+        traced = location.seq is not None
+        size = LOCATION_HEADER.size + len(tag_id) + len(zone_id) + (LOCATION_TRACE.size if traced else 0)
+        if size > len(self.buffer):
+            self.buffer = bytearray(size * 2)
+            self.view = memoryview(self.buffer)
+
+        position = location.location
+        LOCATION_HEADER.pack_into(
+            self.buffer, 0,
+            MAGIC, VERSION,
+            (FLAG_ZONE if location.zone_id is not None else 0) | (FLAG_TRACE if traced else 0),
+            _timestamp_us(location.timestamp),
+            position['x'], position['y'], position['z'],
+            location.speed, location.heading,
+            location.battery, location.rssi,
+            len(tag_id), len(zone_id)
+        )
+        offset = LOCATION_HEADER.size
+        self.view[offset:offset + len(tag_id)] = tag_id
+        offset += len(tag_id)
+        self.view[offset:offset + len(zone_id)] = zone_id
+        if traced:
+            LOCATION_TRACE.pack_into(self.buffer, offset + len(zone_id), location.seq, location.send_ns or 0)
+        return bytes(self.view[:size])
+
+    @staticmethod
+    def decode(payload: Union[bytes, bytearray, memoryview]) -> LocationUpdate:
+        """Decode a binary location update (floats come back rounded)."""
+        (magic, version, flags, timestamp, x, y, z, speed, heading,
+         battery, rssi, tag_len, zone_len) = LOCATION_HEADER.unpack_from(payload, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a version {VERSION} binary location payload")
+
+        offset = LOCATION_HEADER.size
+        tag_id = bytes(payload[offset:offset + tag_len]).decode('utf-8')
+        offset += tag_len
+        zone_id = bytes(payload[offset:offset + zone_len]).decode('utf-8') if flags & FLAG_ZONE else None
+        seq = send_ns = None
+        if flags & FLAG_TRACE:
+            seq, send_ns = LOCATION_TRACE.unpack_from(payload, offset + zone_len)
+
+        seconds, micros = divmod(timestamp, 1_000_000)
+        moment = datetime.fromtimestamp(seconds, timezone.utc).replace(microsecond=micros, tzinfo=None)
+        return LocationUpdate(
+            tag_id=tag_id,
+            timestamp=moment.isoformat() + 'Z',
+            location={'x': round(x, 2), 'y': round(y, 2), 'z': round(z, 2)},
+            zone_id=zone_id,
+            speed=round(speed, 2),
+            heading=round(heading, 1),
+            battery=battery,
+            rssi=rssi,
+            seq=seq,
+            send_ns=send_ns
+        )
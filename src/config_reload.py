@@ -0,0 +1,103 @@
+"""Background configuration file watcher for hot reloads."""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+import yaml
+
+
+def load_yaml_config(path: Path) -> Dict:
+    """Load a YAML configuration file."""
+    with open(path, 'r') as f:
+        return yaml.safe_load(f)
+
+
+class ConfigWatcher:
+    """Poll a config file and hand parsed configs to the tick loop.
+
+    File stat and YAML parsing happen on a background thread; the tick loop
+    only picks up the latest parsed config with `poll()`, so a reload never
+    stalls a tick on disk I/O.
+    """
+
+    def __init__(self, path: str, interval: float = 2.0,
+                 loader: Callable[[Path], Dict] = load_yaml_config):
+        self.path = Path(path)
+        self.interval = interval
+        self.loader = loader
+        self.logger = logging.getLogger(__name__)
+
+        self._signature = self._stat()
+        self._pending: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._force = False
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        """Get the file modification signature, or None if it is missing."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def start(self):
+        """Start watching in a daemon thread."""
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='config-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def request_reload(self):
+        """Reload on the next check even if the file looks unchanged."""
+        self._force = True
+        self._wake.set()
+
+    def check(self) -> bool:
+        """Reload the file if it changed; returns True if a config was queued."""
+        signature = self._stat()
+        if signature is None:
+            return False
+        if signature == self._signature and not self._force:
+            return False
+
+        self._force = False
+        self._signature = signature
+        try:
+            config = self.loader(self.path)
+        except (OSError, yaml.YAMLError) as e:
+            self.logger.error(f"Failed to reload configuration {self.path}: {e}")
+            return False
+
+        if not isinstance(config, dict) or 'rtls' not in config:
+            self.logger.error(f"Ignoring configuration without an rtls section: {self.path}")
+            return False
+
+        with self._lock:
+            self._pending = config
+        return True
+
+    def poll(self) -> Optional[Dict]:
+        """Take the latest reloaded config, if any (non-blocking)."""
+        with self._lock:
+            config, self._pending = self._pending, None
+        return config
+
+    def _run(self):
+        """Watcher thread loop."""
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self._stopped.is_set():
+                self.check()
@@ -0,0 +1,242 @@
+"""Per-tag trail ring buffers and decaying per-zone occupancy heatmaps."""
+
+import math
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from .models import Zone
+
+
+HEATMAP_MAGIC = b'RH'
+HEATMAP_VERSION = 1
+
+# magic, version, flags, timestamp (us since epoch), x_min, y_min, cell size,
+# columns, rows, scale, zone id length; the zone id and then columns x rows
+# little-endian uint16 cells (row-major, value = cell * scale) follow
+HEATMAP_HEADER = struct.Struct('<2sBBqfffHHfB')
+
+
+def encode_heatmap(zone_id: str, grid: np.ndarray, x_min: float, y_min: float,
+                   cell_size: float, timestamp_us: Optional[int] = None) -> bytes:
+    """Encode one occupancy grid as a compact binary frame."""
+    zone = zone_id.encode('utf-8')
+    peak = float(grid.max()) if grid.size else 0.0
+    scale = peak / 65535 if peak > 0 else 1.0
+    rows, columns = grid.shape
+    header = HEATMAP_HEADER.pack(
+        HEATMAP_MAGIC, HEATMAP_VERSION, 0,
+        int(time.time() * 1e6) if timestamp_us is None else timestamp_us,
+        x_min, y_min, cell_size, columns, rows, scale, len(zone)
+    )
+    cells = np.rint(grid / scale).astype('<u2')
+    return header + zone + cells.tobytes()
+
+
+def decode_heatmap(payload: bytes) -> Dict[str, Any]:
+    """Decode a heatmap frame; `grid` is a (rows, columns) float32 array."""
+    (magic, version, _, timestamp, x_min, y_min, cell_size,
+     columns, rows, scale, zone_len) = HEATMAP_HEADER.unpack_from(payload, 0)
+    if magic != HEATMAP_MAGIC or version != HEATMAP_VERSION:
+        raise ValueError(f"Not a version {HEATMAP_VERSION} heatmap frame")
+
+    offset = HEATMAP_HEADER.size
+    zone_id = bytes(payload[offset:offset + zone_len]).decode('utf-8')
+    offset += zone_len
+    cells = np.frombuffer(payload, dtype='<u2', count=rows * columns, offset=offset)
+    return {
+        'zone_id': zone_id,
+        'timestamp_us': timestamp,
+        'x_min': x_min,
+        'y_min': y_min,
+        'cell_size': cell_size,
+        'grid': cells.reshape(rows, columns).astype(np.float32) * np.float32(scale)
+    }
+
+
+class TrailBuffer:
+    """The last `length` reported positions of every tag in one array.
+
+    Trails live in a preallocated (capacity, length) ring of (t, x, y, z)
+    samples with a write head per tag, so recording a tick is a handful of
+    fancy-indexed assignments. Rows of removed tags are reused.
+    """
+
+    def __init__(self, length: int = 32, capacity: int = 1024):
+        if length < 1:
+            raise ValueError("Trail length must be at least 1")
+        self.length = length
+        self.samples = np.zeros((capacity, length, 4), dtype=np.float32)
+        self.heads = np.zeros(capacity, dtype=np.int64)
+        self.counts = np.zeros(capacity, dtype=np.int64)
+        self.rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._lock = threading.Lock()
+        # Rows of the last recorded id list; usually the same tags every tick
+        self._last_ids: List[str] = []
+        self._last_rows = np.empty(0, dtype=np.int64)
+
+    def _row(self, tag_id: str) -> int:
+        """Row of a tag, allocating (and growing the buffer) on first use."""
+        row = self.rows.get(tag_id)
+        if row is not None:
+            return row
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = len(self.rows)
+            if row >= len(self.samples):
+                self.samples = np.concatenate([self.samples, np.zeros_like(self.samples)])
+                self.heads = np.concatenate([self.heads, np.zeros_like(self.heads)])
+                self.counts = np.concatenate([self.counts, np.zeros_like(self.counts)])
+        self.rows[tag_id] = row
+        return row
+
+    def record(self, tag_ids: Sequence[str], positions: np.ndarray, t: float):
+        """Append one sample at time `t` for each tag."""
+        if not len(tag_ids):
+            return
+        with self._lock:
+            if tag_ids == self._last_ids:
+                rows = self._last_rows
+            else:
+                rows = np.fromiter((self._row(tag_id) for tag_id in tag_ids), dtype=np.int64, count=len(tag_ids))
+                self._last_ids, self._last_rows = list(tag_ids), rows
+            heads = self.heads[rows]
+            self.samples[rows, heads, 0] = t
+            self.samples[rows, heads, 1:] = positions
+            self.heads[rows] = (heads + 1) % self.length
+            self.counts[rows] = np.minimum(self.counts[rows] + 1, self.length)
+
+    def remove(self, tag_id: str):
+        """Forget a tag's trail."""
+        with self._lock:
+            row = self.rows.pop(tag_id, None)
+            if row is not None:
+                self.heads[row] = self.counts[row] = 0
+                self._free.append(row)
+                self._last_ids = []
+
+    def trail(self, tag_id: str) -> np.ndarray:
+        """A tag's samples oldest first as an (n, 4) array of t, x, y, z."""
+        with self._lock:
+            row = self.rows.get(tag_id)
+            if row is None:
+                return np.empty((0, 4), dtype=np.float32)
+            count, head = int(self.counts[row]), int(self.heads[row])
+            order = (np.arange(head - count, head)) % self.length
+            return self.samples[row, order].copy()
+
+
+class OccupancyGrids:
+    """Exponentially decaying 2D occupancy counts for every zone.
+
+    All zone grids are views into one flat buffer, so a tick is a single
+    decay multiply plus one `np.bincount` over every tag's cell. Cells hold
+    tag-seconds of presence, halved every `half_life` seconds.
+    """
+
+    def __init__(self, zones: List[Zone], cell_size: float = 1.0, half_life: float = 300.0):
+        if cell_size <= 0 or half_life <= 0:
+            raise ValueError("Heatmap cell_size and half_life must be positive")
+        self.cell_size = cell_size
+        self.half_life = half_life
+        self.zone_ids: List[str] = []
+        self.values = np.zeros(0)
+        self.set_zones(zones)
+
+    def set_zones(self, zones: List[Zone]):
+        """Lay out grids for a zone list, keeping history of zones whose grid is unchanged."""
+        old = {zone_id: (shape, grid) for zone_id, shape, grid in self._grids()}
+
+        self.zone_ids = [zone.id for zone in zones]
+        self.origins = np.array([(zone.x_min, zone.y_min) for zone in zones], dtype=float).reshape(-1, 2)
+        self.shapes = np.array([
+            (max(1, math.ceil((zone.y_max - zone.y_min) / self.cell_size)),
+             max(1, math.ceil((zone.x_max - zone.x_min) / self.cell_size)))
+            for zone in zones
+        ], dtype=np.int64).reshape(-1, 2)
+        sizes = self.shapes[:, 0] * self.shapes[:, 1]
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        self.values = np.zeros(int(self.offsets[-1]), dtype=np.float64)
+
+        for zone_id, shape, grid in self._grids():
+            previous = old.get(zone_id)
+            if previous is not None and previous[0] == shape:
+                grid[:] = previous[1]
+
+    def _grids(self):
+        """(zone id, shape, grid view) per zone."""
+        for k, zone_id in enumerate(self.zone_ids):
+            rows, columns = self.shapes[k].tolist()
+            start = self.offsets[k]
+            yield zone_id, (rows, columns), self.values[start:start + rows * columns].reshape(rows, columns)
+
+    def update(self, positions: np.ndarray, zone_index: np.ndarray, dt: float):
+        """Decay the grids and add `dt` of presence for each tag in a zone.
+
+        `zone_index` holds each tag's position in the zone list, or -1.
+        """
+        self.values *= 0.5 ** (dt / self.half_life)
+        inside = zone_index >= 0
+        if not inside.any() or not len(self.values):
+            return
+
+        k = zone_index[inside]
+        local = (positions[inside, :2] - self.origins[k]) / self.cell_size
+        rows = np.clip(local[:, 1].astype(np.int64), 0, self.shapes[k, 0] - 1)
+        columns = np.clip(local[:, 0].astype(np.int64), 0, self.shapes[k, 1] - 1)
+        cells = self.offsets[k] + rows * self.shapes[k, 1] + columns
+        self.values += np.bincount(cells, minlength=len(self.values)) * dt
+
+    def grid(self, zone_id: str) -> np.ndarray:
+        """One zone's grid (rows along y, columns along x)."""
+        for grid_zone, _, grid in self._grids():
+            if grid_zone == zone_id:
+                return grid
+        raise KeyError(zone_id)
+
+    def frames(self, timestamp_us: Optional[int] = None) -> List[Tuple[str, bytes]]:
+        """Binary frames for all zones."""
+        return [
+            (zone_id, encode_heatmap(zone_id, grid, *self.origins[k].tolist(), self.cell_size, timestamp_us))
+            for k, (zone_id, _, grid) in enumerate(self._grids())
+        ]
+
+
+class HeatmapMonitor:
+    """Trails for reported tags plus zone heatmaps published at a low rate."""
+
+    def __init__(self, config: Dict, zones: List[Zone]):
+        self.trails = TrailBuffer(config.get('trail_length', 32))
+        self.grids = OccupancyGrids(zones, config.get('cell_size', 1.0), config.get('half_life', 300.0))
+        self.publish_interval = config.get('publish_interval', 10.0)
+        self.frames_due = False
+        self._since_publish = 0.0
+
+    def update(self, tag_ids: Sequence[str], positions: np.ndarray, all_positions: np.ndarray,
+               zone_index: np.ndarray, elapsed: float, dt: float):
+        """Record trails of the reported tags and accumulate occupancy of all tags."""
+        self.trails.record(tag_ids, positions, elapsed)
+        self.grids.update(all_positions, zone_index, dt)
+
+        self._since_publish += dt
+        # Tolerate float drift when the interval is a multiple of the tick
+        self.frames_due = self._since_publish + 1e-9 >= self.publish_interval
+        if self.frames_due:
+            self._since_publish = 0.0
+
+
+def handle_trails_query(monitor: HeatmapMonitor, query: Dict[str, str]) -> Dict[str, Any]:
+    """Serve `GET /trails?tags=a,b` as JSON lists of [t, x, y, z] samples."""
+    tag_ids = [tag_id for tag_id in query.get('tags', '').split(',') if tag_id]
+    if not tag_ids:
+        tag_ids = list(monitor.trails.rows)
+    return {
+        'trails': {
+            tag_id: np.round(monitor.trails.trail(tag_id).astype(float), 2).tolist()
+            for tag_id in tag_ids
+        }
+    }
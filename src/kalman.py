@@ -0,0 +1,109 @@
+"""Batched constant-velocity Kalman filtering of published positions."""
+
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+
+class KalmanFilter:
+    """Constant-velocity Kalman filter for every tag, updated in one pass.
+
+    Each axis has a [position, velocity] state driven by white-noise
+    acceleration (`process_noise`, m/s^2) and observed through position
+    measurements with `measurement_noise` (m) standard deviation. Because
+    all axes share the same model and are measured together, one 2x2
+    covariance per tag serves all three axes; it is kept as three arrays
+    (`p00`, `p01`, `p11`) so predict and update are plain array arithmetic.
+    """
+
+    def __init__(self, process_noise: float = 0.5, measurement_noise: float = 0.1,
+                 initial_velocity_std: float = 2.0, capacity: int = 1024):
+        self.q = process_noise ** 2
+        self.r = measurement_noise ** 2
+        self.initial_velocity_var = initial_velocity_std ** 2
+        self.position = np.zeros((capacity, 3))
+        self.velocity = np.zeros((capacity, 3))
+        self.p00 = np.zeros(capacity)
+        self.p01 = np.zeros(capacity)
+        self.p11 = np.zeros(capacity)
+        self.rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        # Rows of the last updated id list; usually the same tags every tick
+        self._last_ids: List[str] = []
+        self._last_rows = np.empty(0, dtype=np.int64)
+
+    def _grow(self):
+        """Double the state arrays."""
+        for name in ('position', 'velocity', 'p00', 'p01', 'p11'):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+
+    def _rows(self, tag_ids: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows for the tags and a mask of tags seen for the first time."""
+        if tag_ids == self._last_ids:
+            return self._last_rows, np.zeros(len(tag_ids), dtype=bool)
+
+        rows = np.empty(len(tag_ids), dtype=np.int64)
+        new = np.zeros(len(tag_ids), dtype=bool)
+        for i, tag_id in enumerate(tag_ids):
+            row = self.rows.get(tag_id)
+            if row is None:
+                if self._free:
+                    row = self._free.pop()
+                else:
+                    row = len(self.rows)
+                    if row >= len(self.p00):
+                        self._grow()
+                self.rows[tag_id] = row
+                new[i] = True
+            rows[i] = row
+        self._last_ids, self._last_rows = list(tag_ids), rows
+        return rows, new
+
+    def remove(self, tag_id: str):
+        """Forget a tag's filter state."""
+        row = self.rows.pop(tag_id, None)
+        if row is not None:
+            self._free.append(row)
+            self._last_ids = []
+
+    def update(self, tag_ids: Sequence[str], measurements: np.ndarray,
+               dt: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Predict each tag forward by its `dt` and fold in its position measurement.
+
+        Returns filtered positions (n, 3), velocities (n, 3), and position and
+        velocity standard deviations (n,) per axis.
+        """
+        rows, new = self._rows(tag_ids)
+        dt = np.broadcast_to(np.asarray(dt, dtype=float), (len(rows),))
+
+        # Predict: x = F x, P = F P F' + Q
+        velocity = self.velocity[rows]
+        position = self.position[rows] + velocity * dt[:, None]
+        p00, p01, p11 = self.p00[rows], self.p01[rows], self.p11[rows]
+        dt2 = dt * dt
+        p00 = p00 + 2 * dt * p01 + dt2 * p11 + self.q * dt2 * dt2 / 4
+        p01 = p01 + dt * p11 + self.q * dt2 * dt / 2
+        p11 = p11 + self.q * dt2
+
+        # Update: K = P H' / (H P H' + R), H = [1, 0]
+        s = p00 + self.r
+        k0, k1 = p00 / s, p01 / s
+        innovation = measurements - position
+        position += k0[:, None] * innovation
+        velocity += k1[:, None] * innovation
+        p11 = p11 - k1 * p01
+        p01 = (1 - k0) * p01
+        p00 = (1 - k0) * p00
+
+        # First measurement of a tag initialises its state instead
+        if new.any():
+            position[new] = measurements[new]
+            velocity[new] = 0.0
+            p00[new] = self.r
+            p01[new] = 0.0
+            p11[new] = self.initial_velocity_var
+
+        self.position[rows] = position
+        self.velocity[rows] = velocity
+        self.p00[rows], self.p01[rows], self.p11[rows] = p00, p01, p11
+        return position, velocity, np.sqrt(p00), np.sqrt(p11)
@@ -0,0 +1,240 @@
+"""Batched random-walk movement kernels with an optional Numba backend."""
+
+import logging
+import math
+from typing import Dict, Optional
+
+import numpy as np
+
+from .zone_index import ZoneIndex
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+logger = logging.getLogger(__name__)
+
+# `prange` is a plain range in Python and a parallel loop once compiled
+prange = numba.prange if numba is not None else range
+
+BACKENDS = ('python', 'numpy', 'numba', 'auto')
+
+# Movement kind per tag; idle covers every model other than random_walk
+KIND_IDLE = 0
+KIND_ASSET = 1
+KIND_VEHICLE = 2
+KIND_PERSON = 3
+KIND_OTHER = 4
+TYPE_KINDS = {'asset': KIND_ASSET, 'vehicle': KIND_VEHICLE, 'person': KIND_PERSON}
+
+# Uniform draws per tag: heading, speed, asset move, z jitter gate, z jitter,
+# battery drain, rssi noise
+DRAWS = 7
+
+
+def resolve_backend(name: str) -> str:
+    """Map a configured backend to one that can run here."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown movement backend: {name}")
+    if name == 'auto':
+        return 'numba' if numba is not None else 'numpy'
+    if name == 'numba' and numba is None:
+        logger.warning("Numba is not installed; using the NumPy movement kernel")
+        return 'numpy'
+    return name
+
+
+def kind_code(tag_type: str, movement: str) -> int:
+    """Kernel movement kind for a tag type and movement model."""
+    if movement != 'random_walk':
+        return KIND_IDLE
+    return TYPE_KINDS.get(tag_type, KIND_OTHER)
+
+
+def walk_numpy(state: Dict[str, np.ndarray], dt: np.ndarray, draws: np.ndarray,
+               max_speeds: np.ndarray, turn_rate: float, acceleration: float,
+               zone_index: ZoneIndex) -> np.ndarray:
+    """Step the tags in `state` in place and return their new zone rows.
+
+    Same rules as the per-tag generator path: battery drain, RSSI noise,
+    heading/speed random walk, bouncing off the walls of the zone the tag
+    starts in (box reflection, polygon turn-back) and person z jitter.
+    """
+    positions, kind = state['positions'], state['kind']
+    battery, rssi = state['battery'], state['rssi']
+    battery -= (draws[:, 5] < 0.001) & (battery > 0)
+    np.clip(rssi + np.floor(draws[:, 6] * 11).astype(rssi.dtype) - 5, -90, -40, out=rssi)
+
+    moving = np.flatnonzero((kind >= KIND_VEHICLE) | ((kind == KIND_ASSET) & (draws[:, 2] < 0.01)))
+    if len(moving):
+        u = draws[moving]
+        step = dt[moving]
+        heading = (state['heading'][moving] + (2 * u[:, 0] - 1) * turn_rate * step) % 360
+        speed = np.clip(state['speed'][moving] + (2 * u[:, 1] - 1) * acceleration * step,
+                        0, max_speeds[kind[moving]])
+        old = positions[moving]
+        rad = np.radians(heading)
+        x = old[:, 0] + speed * np.cos(rad) * step
+        y = old[:, 1] + speed * np.sin(rad) * step
+        z = old[:, 2].copy()
+
+        home = zone_index.classify(old)
+        is_polygon = np.array([zone.polygon is not None for zone in zone_index.zones] + [False])
+        box = np.flatnonzero(~is_polygon[home] & (home >= 0))
+        if len(box):
+            b = zone_index.bounds[home[box]]
+            bx, by = x[box], y[box]
+            hit = box[(bx <= b[:, 0]) | (bx >= b[:, 1])]
+            heading[hit] = (180 - heading[hit]) % 360
+            x[box] = np.clip(bx, b[:, 0], b[:, 1])
+            hit = box[(by <= b[:, 2]) | (by >= b[:, 3])]
+            heading[hit] = (-heading[hit]) % 360
+            y[box] = np.clip(by, b[:, 2], b[:, 3])
+        for k, zone in enumerate(zone_index.zones):
+            polygon = zone_index.polygons.get(zone.id)
+            rows = np.flatnonzero(home == k) if polygon is not None else ()
+            if len(rows):
+                back = rows[~polygon.contains(x[rows], y[rows])]
+                heading[back] = (heading[back] + 180) % 360
+                x[back], y[back] = old[back, 0], old[back, 1]
+
+        jitter = np.flatnonzero((kind[moving] == KIND_PERSON) & (u[:, 3] < 0.1))
+        z[jitter] = np.clip(z[jitter] + (2 * u[jitter, 4] - 1) * 0.1, 0, 2)
+
+        state['heading'][moving] = heading
+        state['speed'][moving] = speed
+        positions[moving] = np.column_stack((x, y, z))
+
+    return zone_index.classify(positions)
+
+
+class ZoneTable:
+    """Zones flattened into plain arrays for the compiled kernel."""
+
+    def __init__(self, zone_index: ZoneIndex):
+        self.zone_index = zone_index
+        self.bounds = zone_index.bounds
+        self.is_polygon = np.array([zone.polygon is not None for zone in zone_index.zones], dtype=np.bool_)
+        edges = [np.empty((0, 4))]
+        offsets = [0]
+        for zone in zone_index.zones:
+            if zone.polygon is not None:
+                vertices = np.asarray(zone.polygon, dtype=float)
+                edges.append(np.column_stack((vertices, np.roll(vertices, -1, axis=0))))
+            offsets.append(offsets[-1] + (len(edges[-1]) if zone.polygon is not None else 0))
+        self.edges = np.ascontiguousarray(np.concatenate(edges))
+        self.edge_offsets = np.array(offsets, dtype=np.int64)
+
+
+def _in_zone(k, x, y, z, bounds, is_polygon, edges, edge_offsets):
+    """Whether a point lies in zone row `k` (box, then even-odd polygon test)."""
+    if not (bounds[k, 0] <= x <= bounds[k, 1] and bounds[k, 2] <= y <= bounds[k, 3]
+            and bounds[k, 4] <= z <= bounds[k, 5]):
+        return False
+    if not is_polygon[k]:
+        return True
+    inside = False
+    for e in range(edge_offsets[k], edge_offsets[k + 1]):
+        ax, ay, bx, by = edges[e, 0], edges[e, 1], edges[e, 2], edges[e, 3]
+        if (ay > y) != (by > y) and x < ax + (y - ay) * (bx - ax) / (by - ay):
+            inside = not inside
+    return inside
+
+
+def _classify_point(x, y, z, bounds, is_polygon, edges, edge_offsets):
+    """Row of the first zone containing a point, or -1."""
+    for k in range(len(bounds)):
+        if _in_zone(k, x, y, z, bounds, is_polygon, edges, edge_offsets):
+            return k
+    return -1
+
+
+def _walk_loop(positions, heading, speed, battery, rssi, kind, dt, draws, max_speeds,
+               turn_rate, acceleration, bounds, is_polygon, edges, edge_offsets, zone_rows):
+    """Fused per-tag pass: state noise, movement, bounce and classification.
+
+    Draw columns and rules match `walk_numpy`; every iteration only touches
+    its own row, so the loop runs in parallel once compiled.
+    """
+    for i in prange(len(kind)):
+        if draws[i, 5] < 0.001 and battery[i] > 0:
+            battery[i] -= 1
+        rssi[i] = min(-40, max(-90, rssi[i] + int(math.floor(draws[i, 6] * 11)) - 5))
+
+        x, y, z = positions[i, 0], positions[i, 1], positions[i, 2]
+        k = kind[i]
+        if k >= KIND_VEHICLE or (k == KIND_ASSET and draws[i, 2] < 0.01):
+            step = dt[i]
+            h = (heading[i] + (2 * draws[i, 0] - 1) * turn_rate * step) % 360.0
+            s = min(max(speed[i] + (2 * draws[i, 1] - 1) * acceleration * step, 0.0), max_speeds[k])
+            rad = math.radians(h)
+            nx = x + s * math.cos(rad) * step
+            ny = y + s * math.sin(rad) * step
+
+            home = _classify_point(x, y, z, bounds, is_polygon, edges, edge_offsets)
+            if home >= 0 and is_polygon[home]:
+                if not _in_zone(home, nx, ny, z, bounds, is_polygon, edges, edge_offsets):
+                    h = (h + 180.0) % 360.0
+                    nx, ny = x, y
+            elif home >= 0:
+                if nx <= bounds[home, 0] or nx >= bounds[home, 1]:
+                    h = (180.0 - h) % 360.0
+                    nx = min(max(nx, bounds[home, 0]), bounds[home, 1])
+                if ny <= bounds[home, 2] or ny >= bounds[home, 3]:
+                    h = (-h) % 360.0
+                    ny = min(max(ny, bounds[home, 2]), bounds[home, 3])
+
+            if k == KIND_PERSON and draws[i, 3] < 0.1:
+                z = min(max(z + (2 * draws[i, 4] - 1) * 0.1, 0.0), 2.0)
+            heading[i], speed[i] = h, s
+            positions[i, 0], positions[i, 1], positions[i, 2] = nx, ny, z
+            x, y = nx, ny
+
+        zone_rows[i] = _classify_point(x, y, z, bounds, is_polygon, edges, edge_offsets)
+
+
+if numba is not None:
+    _in_zone = numba.njit(cache=True)(_in_zone)
+    _classify_point = numba.njit(cache=True)(_classify_point)
+    _walk_loop_jit = numba.njit(parallel=True, cache=True)(_walk_loop)
+else:
+    _walk_loop_jit = None
+
+
+class MovementKernel:
+    """Step all random-walk tags of a tick as arrays.
+
+    The generator gathers the stepped tags into `state` (positions, heading,
+    speed, battery, rssi and kind), the kernel updates it in place and
+    returns each tag's new zone row, and the generator writes it back.
+    """
+
+    def __init__(self, backend: str, movement_config: Dict, seed: Optional[int] = None):
+        self.backend = resolve_backend(backend)
+        self.turn_rate = float(movement_config['turn_rate'])
+        self.acceleration = float(movement_config['acceleration'])
+        self.max_speeds = np.array([0.0, 1.0, movement_config['max_speed'], 2.0, 2.0], dtype=float)
+        self.rng = np.random.default_rng(seed)
+        self._table: Optional[ZoneTable] = None
+
+    def _zone_table(self, zone_index: ZoneIndex) -> ZoneTable:
+        """Flattened zones, rebuilt when the generator swaps its index."""
+        if self._table is None or self._table.zone_index is not zone_index:
+            self._table = ZoneTable(zone_index)
+        return self._table
+
+    def step(self, state: Dict[str, np.ndarray], dt: np.ndarray, zone_index: ZoneIndex) -> np.ndarray:
+        """Advance the tags in `state` by their `dt` and return their zone rows."""
+        draws = self.rng.random((len(state['kind']), DRAWS))
+        if self.backend == 'numpy':
+            return walk_numpy(state, dt, draws, self.max_speeds, self.turn_rate, self.acceleration, zone_index)
+
+        table = self._zone_table(zone_index)
+        zone_rows = np.empty(len(draws), dtype=np.int64)
+        _walk_loop_jit(
+            state['positions'], state['heading'], state['speed'], state['battery'], state['rssi'],
+            state['kind'], dt, draws, self.max_speeds, self.turn_rate, self.acceleration,
+            table.bounds, table.is_polygon, table.edges, table.edge_offsets, zone_rows
+        )
+        return zone_rows
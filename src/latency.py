@@ -0,0 +1,173 @@
+"""End-to-end latency, loss and reordering of sequenced location updates."""
+
+import json
+import math
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .analytics import percentiles
+from .codec import LocationCodec
+
+
+# Sequence numbers this far behind the newest one can still be told apart as late or duplicate
+WINDOW = 64
+_WINDOW_MASK = (1 << WINDOW) - 1
+
+
+def parse_location(payload: bytes) -> Optional[tuple]:
+    """(seq, send_ns) of a JSON or binary location payload, None when it carries no sequence."""
+    if not payload:
+        return None
+    if payload[:1] == b'{':
+        message = json.loads(payload)
+        seq = message.get('seq')
+        return (seq, message.get('send_ns')) if seq is not None else None
+    location = LocationCodec.decode(payload)
+    return (location.seq, location.send_ns) if location.seq is not None else None
+
+
+class LatencyTracker:
+    """Per-topic latency histograms plus loss, duplicate and reorder counts.
+
+    Latencies go into log buckets growing by `growth` from `min_latency` to
+    `max_latency` seconds, one row of counters per topic, so percentiles are
+    exact to within `growth - 1` at a fixed cost per topic. Sequence state
+    per topic is the highest number seen plus a bitmask of the `WINDOW`
+    numbers below it: a number above the highest counts the skipped ones as
+    lost, one below it is a duplicate if its bit is set and otherwise a late
+    (reordered) arrival that is taken back out of the lost count. A topic
+    restarting at 1 (publisher restart) starts over.
+    """
+
+    def __init__(self, min_latency: float = 1e-5, max_latency: float = 60.0, growth: float = 2 ** 0.25):
+        self.min_latency = min_latency
+        self.log_growth = math.log(growth)
+        # Bucket 0 holds latencies under min_latency (and negative ones from clock skew)
+        self.buckets = int(math.ceil(math.log(max_latency / min_latency) / self.log_growth)) + 2
+        self.edges = min_latency * growth ** np.arange(self.buckets - 1)
+        self.values = np.concatenate([[min_latency / 2], np.sqrt(self.edges[:-1] * self.edges[1:]), [self.edges[-1]]])
+
+        self.topics: Dict[str, int] = {}
+        self.counts = np.zeros((64, self.buckets), dtype=np.int64)
+        # Per topic: [received, lost, duplicates, reordered, restarts, highest seq, seen bitmask]
+        self.state: List[List[int]] = []
+        self.negative = 0
+        self.latency_sum = 0.0
+        self.started = time.time()
+
+    def _row(self, topic: str) -> int:
+        """Row of a topic, allocating on first use."""
+        row = self.topics.get(topic)
+        if row is None:
+            row = self.topics[topic] = len(self.state)
+            self.state.append([0, 0, 0, 0, 0, 0, 0])
+            if row >= len(self.counts):
+                self.counts = np.concatenate([self.counts, np.zeros_like(self.counts)])
+        return row
+
+    def bucket(self, latency: float) -> int:
+        """Bucket index for one latency in seconds."""
+        if latency < self.min_latency:
+            return 0
+        return min(self.buckets - 1, int(math.log(latency / self.min_latency) / self.log_growth) + 1)
+
+    def observe(self, topic: str, seq: int, send_ns: Optional[int], recv_ns: Optional[int] = None):
+        """Record one received message."""
+        row = self._row(topic)
+        state = self.state[row]
+        state[0] += 1
+
+        highest = state[5]
+        if seq > highest:
+            shift = seq - highest
+            if highest:
+                state[1] += shift - 1
+            state[6] = ((state[6] << shift) | 1) & _WINDOW_MASK if shift < WINDOW else 1
+            state[5] = seq
+        elif seq == 1 and highest > 1:
+            # Publishers number from 1, so this is a restart even inside the window
+            state[4] += 1
+            state[5], state[6] = 1, 1
+        else:
+            behind = highest - seq
+            if behind < WINDOW and state[6] >> behind & 1:
+                state[2] += 1
+                return
+            state[3] += 1
+            state[1] = max(0, state[1] - 1)
+            if behind < WINDOW:
+                state[6] |= 1 << behind
+
+        if send_ns is not None:
+            latency = ((time.time_ns() if recv_ns is None else recv_ns) - send_ns) / 1e9
+            if latency < 0:
+                self.negative += 1
+            self.latency_sum += latency
+            self.counts[row, self.bucket(latency)] += 1
+
+    def summary(self, qs: Sequence[float] = (50, 99, 99.9)) -> Dict[str, Any]:
+        """Totals and latency percentiles (ms) over all topics."""
+        counts = self.counts[:len(self.state)].sum(axis=0, keepdims=True)
+        totals = np.array([state[:5] for state in self.state], dtype=np.int64).reshape(-1, 5).sum(axis=0)
+        return {
+            'topics': len(self.state),
+            'received': int(totals[0]),
+            'lost': int(totals[1]),
+            'duplicates': int(totals[2]),
+            'reordered': int(totals[3]),
+            'restarts': int(totals[4]),
+            'negative_latency': self.negative,
+            'latency_ms': self._percentiles(counts, qs)[0]
+        }
+
+    def _percentiles(self, counts: np.ndarray, qs: Sequence[float]) -> List[Dict[str, Optional[float]]]:
+        """Percentile dicts (ms) per row of bucket counts."""
+        result = percentiles(counts, self.values, qs) * 1e3
+        return [
+            {f"p{q:g}": None if math.isnan(value) else round(value, 3) for q, value in zip(qs, row)}
+            for row in result.tolist()
+        ]
+
+    def report(self, qs: Sequence[float] = (50, 99, 99.9)) -> Dict[str, Any]:
+        """JSON-ready report: totals, per-topic stats and the overall latency histogram."""
+        counts = self.counts[:len(self.state)]
+        per_topic = self._percentiles(counts, qs)
+        overall = counts.sum(axis=0)
+        return {
+            'summary': self.summary(qs),
+            'duration_s': round(time.time() - self.started, 1),
+            'histogram': {
+                # Upper bucket edges in ms; the last bucket is unbounded
+                'le_ms': [round(edge, 6) for edge in (self.edges * 1e3).tolist()] + [None],
+                'counts': overall.tolist()
+            },
+            'topics': {
+                topic: {
+                    'received': self.state[row][0],
+                    'lost': self.state[row][1],
+                    'duplicates': self.state[row][2],
+                    'reordered': self.state[row][3],
+                    'restarts': self.state[row][4],
+                    'latency_ms': per_topic[row]
+                }
+                for topic, row in self.topics.items()
+            }
+        }
+
+    def prometheus(self, name: str = 'rtls_e2e_latency_seconds') -> str:
+        """Overall latency histogram and sequence counters in Prometheus text format."""
+        counts = self.counts[:len(self.state)].sum(axis=0)
+        cumulative = np.cumsum(counts).tolist()
+        lines = [f"# TYPE {name} histogram"]
+        for edge, count in zip(self.edges.tolist(), cumulative):
+            lines.append(f'{name}_bucket{{le="{edge:.6g}"}} {count}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {cumulative[-1]}')
+        lines.append(f"{name}_sum {self.latency_sum:.6f}")
+        lines.append(f"{name}_count {cumulative[-1]}")
+        summary = self.summary()
+        for key in ('received', 'lost', 'duplicates', 'reordered', 'restarts'):
+            lines.append(f"# TYPE rtls_e2e_{key}_total counter")
+            lines.append(f"rtls_e2e_{key}_total {summary[key]}")
+        return '\n'.join(lines) + '\n'
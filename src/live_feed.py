@@ -0,0 +1,334 @@
+"""Embedded asyncio WebSocket / Server-Sent-Events live feed."""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl
+import numpy as np
+
+from .snapshot import TagSnapshot
+
+
+_WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+_WS_TEXT = 0x1
+_WS_CLOSE = 0x8
+_WS_PING = 0x9
+_WS_PONG = 0xA
+
+
+def websocket_accept(key: str) -> str:
+    """Compute the Sec-WebSocket-Accept value for a handshake key."""
+    digest = hashlib.sha1((key + _WS_GUID).encode('ascii')).digest()
+    return base64.b64encode(digest).decode('ascii')
+
+
+def websocket_frame(payload: bytes, opcode: int = _WS_TEXT) -> bytes:
+    """Encode a single unmasked server-to-client frame."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def read_websocket_frame(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """Read one (masked) client frame and return its opcode and payload."""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', await reader.readexactly(8))[0]
+
+    mask = await reader.readexactly(4) if second & 0x80 else b''
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return first & 0x0F, payload
+
+
+class FeedFilter:
+    """Per-client viewport, zone and type filter with a rate cap."""
+
+    def __init__(self, zones=None, types=None, bbox=None, rate: float = 0.0):
+        self.zones = tuple(zones or ())
+        self.types = tuple(types or ())
+        self.bbox = tuple(bbox) if bbox else None
+        self.rate = rate
+
+    @classmethod
+    def from_query(cls, query: Dict[str, str], max_rate: float) -> 'FeedFilter':
+        """Parse `zones`, `types`, `bbox=x0,y0,x1,y1` and `rate` parameters."""
+        split = lambda value: [v for v in value.split(',') if v] if value else []
+        bbox = [float(v) for v in split(query.get('bbox'))] or None
+        if bbox is not None and len(bbox) != 4:
+            raise ValueError("bbox needs four values: x_min,y_min,x_max,y_max")
+
+        rate = float(query.get('rate', max_rate))
+        if max_rate > 0:
+            rate = min(rate, max_rate) if rate > 0 else max_rate
+        return cls(split(query.get('zones')), split(query.get('types')), bbox, rate)
+
+    @property
+    def key(self) -> Tuple:
+        """Hashable identity used to share encoded frames between clients."""
+        return self.zones, self.types, self.bbox
+
+    def select(self, snapshot: TagSnapshot) -> np.ndarray:
+        """Get the row indices of the snapshot that pass the filter."""
+        mask = np.ones(len(snapshot), dtype=bool)
+        if self.zones:
+            in_zone = np.zeros_like(mask)
+            for zone_id in self.zones:
+                in_zone |= snapshot.zone_ids == zone_id
+            mask &= in_zone
+        if self.types:
+            of_type = np.zeros_like(mask)
+            for tag_type in self.types:
+                of_type |= snapshot.types == tag_type
+            mask &= of_type
+        if self.bbox:
+            x0, y0, x1, y1 = self.bbox
+            x, y = snapshot.positions[:, 0], snapshot.positions[:, 1]
+            mask &= (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+        return np.flatnonzero(mask)
+
+
+class LiveFeedServer:
+    """Stream per-tick snapshot frames straight from the publisher.
+
+    Runs an asyncio server on its own thread. `GET /events` serves SSE,
+    `GET /ws` upgrades to WebSocket and `GET /snapshot` returns a single
+    frame; all accept the `FeedFilter` query parameters. Clients always get
+    the latest frame, so slow or rate-limited clients skip frames instead
+    of queueing them.
+    """
+
+    def __init__(self, config: Dict):
+        self.host = config.get('host', '0.0.0.0')
+        self.port = config.get('port', 8765)
+        self.max_rate = config.get('max_rate', 10.0)
+        self.logger = logging.getLogger(__name__)
+        self.routes: Dict[str, Callable[[Dict[str, str]], Any]] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._frame: Optional[TagSnapshot] = None
+        self._frame_event: Optional[asyncio.Event] = None
+        self._encoded: Dict[Tuple, bytes] = {}
+        self.client_count = 0
+
+    def add_route(self, path: str, handler: Callable[[Dict[str, str]], Any]):
+        """Serve the JSON-serializable result of handler(query) on a GET path.
+
+        A handler returning None answers 404, for routes whose feature is off.
+        """
+        self.routes[path] = handler
+
+    def start(self):
+        """Start the server thread and wait until it is listening."""
+        self._thread = threading.Thread(target=self._run, name='live-feed', daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+
+    def stop(self):
+        """Stop the server thread."""
+        if self._loop and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def publish(self, snapshot: TagSnapshot):
+        """Hand the latest snapshot to connected clients (thread-safe)."""
+        if self._loop and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._set_frame, snapshot)
+
+    def _run(self):
+        """Event loop thread."""
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._frame_event = asyncio.Event()
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+            self.logger.info(f"Live feed listening on {self.host}:{self.port}")
+        except OSError as e:
+            self.logger.error(f"Live feed failed to start: {e}")
+            self._ready.set()
+            return
+
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            pending = asyncio.all_tasks(self._loop)
+            for task in pending:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.close()
+
+    def _set_frame(self, snapshot: TagSnapshot):
+        """Swap in a new frame and wake every waiting client."""
+        self._frame = snapshot
+        self._encoded.clear()
+        event, self._frame_event = self._frame_event, asyncio.Event()
+        event.set()
+
+    def _encode(self, snapshot: TagSnapshot, feed_filter: FeedFilter) -> bytes:
+        """Encode a filtered frame, shared by clients with the same filter."""
+        key = (snapshot.seq, feed_filter.key)
+        encoded = self._encoded.get(key)
+        if encoded is None:
+            indices = feed_filter.select(snapshot)
+            encoded = json.dumps({
+                'seq': snapshot.seq,
+                'timestamp': snapshot.timestamp,
+                'tag_count': len(indices),
+                'tags': snapshot.to_records(indices)
+            }).encode('utf-8')
+            self._encoded[key] = encoded
+        return encoded
+
+    async def _frames(self, feed_filter: FeedFilter):
+        """Yield encoded frames for one client at its rate cap."""
+        interval = 1.0 / feed_filter.rate if feed_filter.rate > 0 else 0.0
+        last_seq = None
+        while True:
+            while self._frame is None or self._frame.seq == last_seq:
+                await self._frame_event.wait()
+            frame = self._frame
+            last_seq = frame.seq
+            sent_at = time.monotonic()
+            yield self._encode(frame, feed_filter)
+            if interval:
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - sent_at)))
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Dispatch one HTTP connection."""
+        self.client_count += 1
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            if len(request_line) < 2 or request_line[0] != 'GET':
+                await self._respond(writer, 405, b'{"error": "method not allowed"}')
+                return
+
+            url = urlsplit(request_line[1])
+            query = dict(parse_qsl(url.query))
+            if url.path in self.routes:
+                await self._serve_route(writer, url.path, query)
+                return
+
+            try:
+                feed_filter = FeedFilter.from_query(query, self.max_rate)
+            except ValueError as e:
+                await self._respond(writer, 400, json.dumps({'error': str(e)}).encode('utf-8'))
+                return
+
+            if url.path == '/events':
+                await self._serve_sse(writer, feed_filter)
+            elif url.path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+                await self._serve_websocket(reader, writer, headers, feed_filter)
+            elif url.path == '/snapshot' and self._frame is not None:
+                await self._respond(writer, 200, self._encode(self._frame, feed_filter))
+            else:
+                await self._respond(writer, 404, b'{"error": "not found"}')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutting down; end the connection quietly
+            pass
+        finally:
+            self.client_count -= 1
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, body: bytes):
+        """Write a complete JSON response."""
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+        writer.write(
+            f"HTTP/1.1 {status} {reason.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Access-Control-Allow-Origin: *\r\n"
+            f"Connection: close\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+
+    async def _serve_route(self, writer: asyncio.StreamWriter, path: str, query: Dict[str, str]):
+        """Serve a registered JSON route."""
+        try:
+            result = self.routes[path](query)
+        except (KeyError, ValueError) as e:
+            await self._respond(writer, 400, json.dumps({'error': str(e)}).encode('utf-8'))
+            return
+        if result is None:
+            await self._respond(writer, 404, b'{"error": "not enabled"}')
+            return
+        await self._respond(writer, 200, json.dumps(result).encode('utf-8'))
+
+    async def _serve_sse(self, writer: asyncio.StreamWriter, feed_filter: FeedFilter):
+        """Stream frames as Server-Sent Events."""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Access-Control-Allow-Origin: *\r\n"
+            b"Connection: keep-alive\r\n\r\n"
+        )
+        await writer.drain()
+        async for frame in self._frames(feed_filter):
+            writer.write(b"data: " + frame + b"\n\n")
+            await writer.drain()
+
+    async def _serve_websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                               headers: Dict[str, str], feed_filter: FeedFilter):
+        """Upgrade to WebSocket and stream frames until the client closes."""
+        accept = websocket_accept(headers.get('sec-websocket-key', ''))
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\n"
+            b"Upgrade: websocket\r\n"
+            b"Connection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept.encode('ascii') + b"\r\n\r\n"
+        )
+        await writer.drain()
+
+        async def send_frames():
+            async for frame in self._frames(feed_filter):
+                writer.write(websocket_frame(frame))
+                await writer.drain()
+
+        sender = asyncio.ensure_future(send_frames())
+        sender.add_done_callback(lambda task: task.cancelled() or task.exception())
+        try:
+            while True:
+                opcode, payload = await read_websocket_frame(reader)
+                if opcode == _WS_CLOSE:
+                    writer.write(websocket_frame(payload[:2], _WS_CLOSE))
+                    await writer.drain()
+                    break
+                if opcode == _WS_PING:
+                    writer.write(websocket_frame(payload, _WS_PONG))
+        finally:
+            sender.cancel()
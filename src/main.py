@@ -6,24 +6,91 @@ import sys
 import time
 from datetime import datetime
 from pathlib import Path
+from typing import Dict, List, Optional
 import yaml
 
 from .mqtt_client import MQTTClient
 from .rtls_generator import RTLSGenerator
 from .models import SystemStatus
+from .config_reload import ConfigWatcher, load_yaml_config
+from .live_feed import LiveFeedServer
+from .shared_state import SharedStateWriter
+from .query import handle_tags_query, handle_nearest_query
+from .heatmap import handle_trails_query
+from .multisite import MQTTConnectionPool, load_site_configs
+from .profiling import NULL_TIMER, StageTimer, TickProfiler
+
+
+def publish_tick(mqtt_client: MQTTClient, generator: RTLSGenerator, alerts: list,
+                 logger: logging.Logger, timer: StageTimer = NULL_TIMER):
+    """Publish one tick of locations, alerts, proximity events and zone occupancy."""
+    # Publish location updates for the tags that reported this tick
+    with timer.stage('locations'):
+        for tag in generator.updated:
+            with timer.stage('from_tag'):
+                location = generator.get_location_update(tag.id)
+            if location:
+                with timer.stage('publish_location'):
+                    mqtt_client.publish_location(location)
+    
+    # Publish zone alerts for transitions that occurred
+    with timer.stage('alerts'):
+        for alert in alerts:
+            mqtt_client.publish_alert(alert)
+            logger.info(f"Zone transition: {alert.tag_name} {alert.event_type} {alert.zone_name}")
+    
+    # Publish tag-to-tag proximity events
+    with timer.stage('proximity'):
+        for event in generator.proximity_events:
+            mqtt_client.publish_proximity(event)
+    
+    # Publish rule violations started or cleared this tick
+    with timer.stage('rules'):
+        for event in generator.rule_events:
+            mqtt_client.publish_rule_event(event)
+            if event.event_type == 'started':
+                logger.info(f"Rule {event.rule_id} triggered by {event.tag_id}")
+    
+    # Update zone occupancy (retained, so with report rates only changed zones are sent)
+    with timer.stage('zone_tags'):
+        for zone in generator.zones:
+            if generator.rates and zone.id not in generator.changed_zones:
+                continue
+            tags_in_zone = generator.get_tags_in_zone(zone.id)
+            mqtt_client.publish_zone_tags(zone.id, tags_in_zone)
+    
+    # Zone dwell and flow rollup every analytics.publish_interval
+    if generator.analytics and generator.analytics.rollup_due:
+        with timer.stage('analytics'):
+            mqtt_client.publish_analytics(generator.analytics.rollup(generator.elapsed))
+    
+    # Zone heatmaps at their own, lower rate
+    if generator.heatmaps and generator.heatmaps.frames_due:
+        with timer.stage('heatmaps'):
+            for zone_id, frame in generator.heatmaps.grids.frames():
+                mqtt_client.publish_heatmap(zone_id, frame)
 
 
 class RTLSPublisher:
     """Main RTLS data publisher application."""
     
-    def __init__(self, config_path: str = "config/config.yaml"):
+    def __init__(self, config_path: str = "config/config.yaml",
+                 profiler: Optional[TickProfiler] = None):
         self.running = False
+        self.config_path = config_path
         self.config = self._load_config(config_path)
         self._setup_logging()
         
         self.mqtt_client = MQTTClient(self.config)
         self.rtls_generator = RTLSGenerator(self.config)
+        self.profiler = profiler
+        self.timer = profiler.timer if profiler else NULL_TIMER
+        self.mqtt_client.timer = self.timer
+        self.rtls_generator.timer = self.timer
         self.update_interval = self.config['rtls']['update_interval']
+        self.config_watcher = self._init_config_watcher()
+        self.live_feed = self._init_live_feed()
+        self.shared_state = self._init_shared_state()
         
         # Set up signal handlers
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -38,6 +105,81 @@ class RTLSPublisher:
         with open(path, 'r') as f:
             return yaml.safe_load(f)
     
+    def _init_config_watcher(self) -> Optional[ConfigWatcher]:
+        """Set up the optional config hot-reload watcher."""
+        reload_config = self.config.get('reload', {})
+        if not reload_config.get('enabled', False):
+            return None
+        return ConfigWatcher(self.config_path, interval=reload_config.get('interval', 2.0))
+    
+    def _init_live_feed(self) -> Optional[LiveFeedServer]:
+        """Set up the optional embedded WebSocket/SSE live feed and query API."""
+        feed_config = self.config.get('live_feed', {})
+        generator = self.rtls_generator
+        if not feed_config.get('enabled', False) and generator.query_index is None and generator.heatmaps is None:
+            return None
+        
+        # Look the index and trails up per request: reloads replace or disable them
+        server = LiveFeedServer(feed_config)
+        server.add_route('/tags', lambda query: self._serve_query(handle_tags_query, query))
+        server.add_route('/tags/nearest', lambda query: self._serve_query(handle_nearest_query, query))
+        server.add_route('/trails', self._serve_trails)
+        return server
+    
+    def _serve_query(self, handler, query: Dict[str, str]) -> Optional[Dict]:
+        """Answer a query route from the current index, or None (404) when queries are off."""
+        query_index = self.rtls_generator.query_index
+        return None if query_index is None else handler(query_index, query)
+    
+    def _serve_trails(self, query: Dict[str, str]) -> Optional[Dict]:
+        """Answer the trails route from the current heatmaps, or None (404) when they are off."""
+        heatmaps = self.rtls_generator.heatmaps
+        return None if heatmaps is None else handle_trails_query(heatmaps, query)
+    
+    def _init_shared_state(self) -> Optional[SharedStateWriter]:
+        """Set up the optional shared-memory state export for local readers."""
+        shared_config = self.config.get('shared_state', {})
+        if not shared_config.get('enabled', False):
+            return None
+        capacity = shared_config.get('capacity', max(1024, 2 * len(self.rtls_generator.tags)))
+        return SharedStateWriter(
+            shared_config.get('name', 'rtls_state'), capacity, shared_config.get('catalog_bytes')
+        )
+    
+    def _apply_config_reload(self):
+        """Apply a reloaded configuration between ticks."""
+        config = self.config_watcher.poll()
+        if config is None:
+            return
+        
+        try:
+            changes = self.rtls_generator.apply_config(config)
+        except (KeyError, TypeError, ValueError) as e:
+            self.logger.error(f"Rejected configuration reload: {e}")
+            return
+        
+        if config.get('mqtt') != self.config.get('mqtt'):
+            self.logger.warning("MQTT settings changed; restart the publisher to apply them")
+        self.config = config
+        self.update_interval = config['rtls']['update_interval']
+        
+        # Drop retained state for tags and zones that no longer exist
+        for tag_id in changes['tags_removed']:
+            self.mqtt_client.clear_retained(f"rtls/location/{tag_id}")
+        for zone_id in changes['zones_removed']:
+            self.mqtt_client.clear_retained(f"rtls/zone/{zone_id}/tags")
+            self.mqtt_client.clear_retained(f"rtls/heatmap/{zone_id}")
+        self.mqtt_client.forget_topics(changes['tags_removed'], changes['zones_removed'])
+        
+        # Queries or heatmaps enabled by the reload need the server they are served on
+        if self.live_feed is None:
+            self.live_feed = self._init_live_feed()
+            if self.live_feed and self.running:
+                self.live_feed.start()
+        
+        summary = ', '.join(f"{key}={len(ids)}" for key, ids in changes.items() if ids)
+        self.logger.info(f"Configuration reloaded ({summary or 'no tag or zone changes'})")
+    
     def _setup_logging(self):
         """Set up logging configuration."""
         log_config = self.config.get('logging', {})
@@ -61,6 +203,10 @@ class RTLSPublisher:
             self.logger.error("Failed to connect to MQTT broker")
             return
         
+        # Remove retained state left by earlier runs; this run republishes its own
+        if self.config['mqtt'].get('retained', {}).get('clear_on_start', False):
+            self.mqtt_client.clear_retained_messages()
+        
         # Publish initial status
         status = SystemStatus(
             timestamp=datetime.utcnow().isoformat() + 'Z',
@@ -71,33 +217,29 @@ class RTLSPublisher:
         )
         self.mqtt_client.publish_status(status)
         
+        if self.config_watcher:
+            self.config_watcher.start()
+            self.mqtt_client.subscribe(
+                "rtls/control/reload",
+                lambda message: self.config_watcher.request_reload()
+            )
+        
+        if self.live_feed:
+            self.live_feed.start()
+        
         self.running = True
         self.logger.info("RTLS Publisher started successfully")
+        if self.profiler:
+            self.profiler.start()
         
         # Main loop
         try:
             while self.running:
                 start_time = time.time()
+                self.run_tick()
                 
-                # Update all tags
-                for tag in self.rtls_generator.get_all_tags():
-                    # Update position
-                    alert = self.rtls_generator.update_tag_position(tag, self.update_interval)
-                    
-                    # Publish location update
-                    location = self.rtls_generator.get_location_update(tag.id)
-                    if location:
-                        self.mqtt_client.publish_location(location)
-                    
-                    # Publish zone alert if transition occurred
-                    if alert:
-                        self.mqtt_client.publish_alert(alert)
-                        self.logger.info(f"Zone transition: {alert.tag_name} {alert.event_type} {alert.zone_name}")
-                
-                # Update zone occupancy
-                for zone in self.rtls_generator.zones:
-                    tags_in_zone = self.rtls_generator.get_tags_in_zone(zone.id)
-                    self.mqtt_client.publish_zone_tags(zone.id, tags_in_zone)
+                if self.profiler and self.profiler.tick_done():
+                    break
                 
                 # Calculate sleep time to maintain update rate
                 elapsed = time.time() - start_time
@@ -111,10 +253,48 @@ class RTLSPublisher:
         finally:
             self.stop()
     
+    def run_tick(self):
+        """Step the simulation once and publish the results."""
+        with self.timer.stage('tick'):
+            if self.config_watcher:
+                with self.timer.stage('reload'):
+                    self._apply_config_reload()
+            
+            # Update all tags and publish the results
+            with self.timer.stage('step'):
+                alerts = self.rtls_generator.step(self.update_interval)
+            with self.timer.stage('publish'):
+                publish_tick(self.mqtt_client, self.rtls_generator, alerts, self.logger, self.timer)
+            with self.timer.stage('spool'):
+                self.mqtt_client.service_spool(self.update_interval)
+            
+            # Stream the tick to live feed clients
+            if self.live_feed:
+                with self.timer.stage('live_feed'):
+                    self.live_feed.publish(self.rtls_generator.snapshot())
+            
+            # Expose the tick to readers on this host
+            if self.shared_state:
+                with self.timer.stage('shared_state'):
+                    self.shared_state.publish(self.rtls_generator.snapshot(), self.rtls_generator.elapsed)
+    
     def stop(self):
         """Stop the RTLS publisher."""
         self.running = False
         
+        if self.profiler:
+            self.profiler.finish()
+        
+        if self.config_watcher:
+            self.config_watcher.stop()
+        
+        if self.live_feed:
+            self.live_feed.stop()
+        
+        if self.shared_state:
+            self.shared_state.close()
+            self.shared_state = None
+        
         # Publish shutdown status
         status = SystemStatus(
             timestamp=datetime.utcnow().isoformat() + 'Z',
@@ -130,32 +310,155 @@ class RTLSPublisher:
         self.logger.info("RTLS Publisher stopped")
 
 
+class Site:
+    """One simulated site in a multi-site run."""
+    
+    def __init__(self, site_id: str, config: Dict, mqtt_client: MQTTClient):
+        self.id = site_id
+        self.generator = RTLSGenerator(config)
+        self.mqtt_client = mqtt_client
+        self.update_interval = config['rtls']['update_interval']
+        self.elapsed = 0.0
+
+
+class MultiSitePublisher:
+    """Run many site configurations in one process over pooled MQTT connections.
+    
+    Each site keeps its own generator and publishes under `site/<id>/rtls/...`.
+    The loop ticks at the fastest site's interval and steps every site that
+    is due, so slower sites keep their configured update rate.
+    """
+    
+    def __init__(self, config_path: str, site_paths: List[str],
+                 profiler: Optional[TickProfiler] = None):
+        self.running = False
+        self.profiler = profiler
+        self.timer = profiler.timer if profiler else NULL_TIMER
+        self.config = load_yaml_config(Path(config_path))
+        self._setup_logging()
+        
+        sites_config = self.config.get('sites', {})
+        site_configs = load_site_configs(site_paths or sites_config.get('paths', []))
+        if not site_configs:
+            raise ValueError("No site configurations found")
+        
+        self.pool = MQTTConnectionPool(self.config, sites_config.get('pool_size', 1))
+        self.sites = [
+            Site(site_id, site_config, self.pool.client_for(i, site_id))
+            for i, (site_id, site_config) in enumerate(site_configs.items())
+        ]
+        self.update_interval = min(site.update_interval for site in self.sites)
+        for connection in self.pool.connections:
+            connection.timer = self.timer
+        for site in self.sites:
+            site.mqtt_client.timer = self.timer
+            site.generator.timer = self.timer
+        
+        # Set up signal handlers
+        signal.signal(signal.SIGINT, self._signal_handler)
+        signal.signal(signal.SIGTERM, self._signal_handler)
+    
+    def _setup_logging(self):
+        """Set up logging configuration."""
+        log_config = self.config.get('logging', {})
+        logging.basicConfig(
+            level=getattr(logging, log_config.get('level', 'INFO')),
+            format=log_config.get('format', '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        )
+        self.logger = logging.getLogger(__name__)
+    
+    def _signal_handler(self, signum, frame):
+        """Handle shutdown signals."""
+        self.logger.info(f"Received signal {signum}, shutting down...")
+        self.stop()
+    
+    def _publish_status(self, site: Site, connected: bool, message: str):
+        """Publish one site's system status."""
+        status = SystemStatus(
+            timestamp=datetime.utcnow().isoformat() + 'Z',
+            active_tags=len(site.generator.get_all_tags()) if connected else 0,
+            update_rate=site.update_interval if connected else 0,
+            broker_connected=connected,
+            message=message
+        )
+        site.mqtt_client.publish_status(status)
+    
+    def tick(self):
+        """Step and publish every site that is due this tick."""
+        for site in self.sites:
+            site.elapsed += self.update_interval
+            # Tolerate float drift when intervals are multiples of the tick
+            if site.elapsed + 1e-9 < site.update_interval:
+                continue
+            site.elapsed -= site.update_interval
+            with self.timer.stage('step'):
+                alerts = site.generator.step(site.update_interval)
+            with self.timer.stage('publish'):
+                publish_tick(site.mqtt_client, site.generator, alerts, self.logger, self.timer)
+    
+    def start(self):
+        """Start publishing all sites."""
+        self.logger.info(f"Starting MQTT RTLS Publisher for {len(self.sites)} sites "
+                         f"over {len(self.pool.connections)} connections...")
+        
+        if not self.pool.connect():
+            self.logger.error("Failed to connect to MQTT broker")
+            return
+        
+        if self.config['mqtt'].get('retained', {}).get('clear_on_start', False):
+            for connection in self.pool.connections:
+                connection.clear_retained_messages()
+        
+        for site in self.sites:
+            self._publish_status(site, True, "System started")
+        
+        self.running = True
+        if self.profiler:
+            self.profiler.start()
+        try:
+            while self.running:
+                start_time = time.time()
+                with self.timer.stage('tick'):
+                    self.tick()
+                    with self.timer.stage('spool'):
+                        for connection in self.pool.connections:
+                            connection.service_spool(self.update_interval)
+                if self.profiler and self.profiler.tick_done():
+                    break
+                
+                elapsed = time.time() - start_time
+                sleep_time = max(0, self.update_interval - elapsed)
+                if sleep_time > 0:
+                    time.sleep(sleep_time)
+                else:
+                    self.logger.warning(f"Tick took {elapsed:.3f}s, longer than the {self.update_interval}s interval")
+                    
+        except Exception as e:
+            self.logger.error(f"Error in main loop: {e}", exc_info=True)
+        finally:
+            self.stop()
+    
+    def stop(self):
+        """Stop publishing and disconnect the pool."""
+        if not self.running:
+            return
+        self.running = False
+        
+        if self.profiler:
+            self.profiler.finish()
+        
+        for site in self.sites:
+            self._publish_status(site, False, "System shutting down")
+        
+        self.pool.disconnect()
+        self.logger.info("RTLS Publisher stopped")
+
+
 def main():
-    """Main entry point."""
-    import argparse
-    
-    parser = argparse.ArgumentParser(description="MQTT RTLS Mock Data Publisher")
-    parser.add_argument(
-        '-c', '--config',
-        default='config/config.yaml',
-        help='Path to configuration file'
-    )
-    parser.add_argument(
-        '-v', '--verbose',
-        action='store_true',
-        help='Enable verbose logging'
-    )
-    
-    args = parser.parse_args()
-    
-    # Override log level if verbose
-    if args.verbose:
-        logging.getLogger().setLevel(logging.DEBUG)
-    
-    # Create and start publisher
-    publisher = RTLSPublisher(args.config)
-    publisher.start()
+    """Main entry point (same as `rtls-publisher run`)."""
+    from .cli import main as cli_main
+    sys.exit(cli_main())
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
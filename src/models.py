@@ -1,8 +1,8 @@
 """Data models for RTLS system."""
 
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import json
 
 
@@ -20,6 +20,13 @@ class Position:
                 (self.z - other.z) ** 2) ** 0.5
 
 
+@dataclass
+class Anchor:
+    """Fixed ranging anchor used by the sensor layer."""
+    id: str
+    position: Position
+
+
 @dataclass
 class Zone:
     """Zone definition with boundaries."""
@@ -31,12 +38,28 @@ class Zone:
     y_max: float
     z_min: float
     z_max: float
+    anchors: List[Anchor] = field(default_factory=list)
+    polygon: Optional[List[Tuple[float, float]]] = None
     
     def contains(self, position: Position) -> bool:
         """Check if a position is within this zone."""
-        return (self.x_min <= position.x <= self.x_max and
-                self.y_min <= position.y <= self.y_max and
-                self.z_min <= position.z <= self.z_max)
+        in_box = (self.x_min <= position.x <= self.x_max and
+                  self.y_min <= position.y <= self.y_max and
+                  self.z_min <= position.z <= self.z_max)
+        if not in_box or self.polygon is None:
+            return in_box
+        return point_in_polygon(position.x, position.y, self.polygon)
+
+
+def point_in_polygon(x: float, y: float, polygon: List[Tuple[float, float]]) -> bool:
+    """Even-odd ray casting test for a single point."""
+    inside = False
+    ax, ay = polygon[-1]
+    for bx, by in polygon:
+        if (ay > y) != (by > y) and x < ax + (y - ay) * (bx - ax) / (by - ay):
+            inside = not inside
+        ax, ay = bx, by
+    return inside
 
 
 @dataclass
@@ -52,6 +75,12 @@ class Tag:
     rssi: int = -70
     last_update: Optional[datetime] = None
     zone_id: Optional[str] = None
+    estimated_position: Optional[Position] = None
+    movement: str = 'random_walk'
+    # Set by the optional Kalman stage: (vx, vy, vz) and 1-sigma uncertainties
+    velocity: Optional[Tuple[float, float, float]] = None
+    position_std: Optional[float] = None
+    velocity_std: Optional[float] = None
 
 
 @dataclass
@@ -65,27 +94,44 @@ class LocationUpdate:
     heading: float
     battery: int
     rssi: int
+    velocity: Optional[Dict[str, float]] = None
+    uncertainty: Optional[Dict[str, float]] = None
+    seq: Optional[int] = None  # per-topic sequence number, from 1
+    send_ns: Optional[int] = None  # publisher wall clock at send, ns since epoch
     
     def to_json(self) -> str:
-        """Convert to JSON string."""
-        return json.dumps(asdict(self))
+        """Convert to JSON string (filter and tracing fields only when present)."""
+        message = asdict(self)
+        for key in ('velocity', 'uncertainty', 'seq', 'send_ns'):
+            if message[key] is None:
+                del message[key]
+        return json.dumps(message)
     
     @classmethod
     def from_tag(cls, tag: Tag) -> 'LocationUpdate':
         """Create from Tag object."""
+        # Publish the sensor-layer (or filtered) estimate when there is one
+        position = tag.estimated_position or tag.position
+        velocity = uncertainty = None
+        if tag.velocity is not None:
+            vx, vy, vz = tag.velocity
+            velocity = {'x': round(vx, 2), 'y': round(vy, 2), 'z': round(vz, 2)}
+            uncertainty = {'position': round(tag.position_std, 3), 'velocity': round(tag.velocity_std, 3)}
         return cls(
             tag_id=tag.id,
             timestamp=datetime.utcnow().isoformat() + 'Z',
             location={
-                'x': round(tag.position.x, 2),
-                'y': round(tag.position.y, 2),
-                'z': round(tag.position.z, 2)
+                'x': round(position.x, 2),
+                'y': round(position.y, 2),
+                'z': round(position.z, 2)
             },
             zone_id=tag.zone_id,
             speed=round(tag.speed, 2),
             heading=round(tag.heading, 1),
             battery=tag.battery,
-            rssi=tag.rssi
+            rssi=tag.rssi,
+            velocity=velocity,
+            uncertainty=uncertainty
         )
 
 
@@ -104,6 +150,36 @@ class ZoneAlert:
         return json.dumps(asdict(self))
 
 
+@dataclass
+class ProximityEvent:
+    """Tag-to-tag proximity warning."""
+    rule_id: str
+    tag_id: str
+    other_tag_id: str
+    timestamp: str
+    event_type: str  # 'started', 'ongoing' or 'cleared'
+    distance: float
+    
+    def to_json(self) -> str:
+        """Convert to JSON string."""
+        return json.dumps(asdict(self))
+
+
+@dataclass
+class RuleEvent:
+    """Rule violation started or cleared for a tag."""
+    rule_id: str
+    tag_id: str
+    timestamp: str
+    event_type: str  # 'started' or 'cleared'
+    severity: str
+    zone_id: Optional[str]
+    
+    def to_json(self) -> str:
+        """Convert to JSON string."""
+        return json.dumps(asdict(self))
+
+
 @dataclass
 class SystemStatus:
     """System status message."""
@@ -0,0 +1,327 @@
+"""Graph-based movement models with precomputed routes."""
+
+import heapq
+import logging
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from .models import Tag, Zone
+
+
+# Movement models driven by the planner; 'random_walk' stays in the generator
+ROUTE_MODELS = ('waypoint', 'shuttle')
+MOVEMENT_MODELS = ('random_walk', 'idle') + ROUTE_MODELS
+
+# Arc-length gap inserted between packed routes so lookups never cross routes
+_ROUTE_GAP = 1.0
+
+
+class FacilityGraph:
+    """Waypoint graph of aisles and corridors with cached shortest paths."""
+
+    def __init__(self, waypoints: Dict[str, Tuple[float, float, float]],
+                 edges: Sequence[Sequence[str]]):
+        self.waypoints = dict(waypoints)
+        self.node_ids = list(self.waypoints)
+        self._coords = np.array([self.waypoints[n] for n in self.node_ids], dtype=float)
+        self._adjacency: Dict[str, List[Tuple[str, float]]] = {n: [] for n in self.node_ids}
+        self._predecessors: Dict[str, Dict[str, Optional[str]]] = {}
+
+        for edge in edges:
+            a, b = edge[0], edge[1]
+            if a not in self.waypoints or b not in self.waypoints:
+                raise ValueError(f"Edge references unknown waypoint: {a} - {b}")
+            weight = edge[2] if len(edge) > 2 else math.dist(self.waypoints[a], self.waypoints[b])
+            self._adjacency[a].append((b, weight))
+            self._adjacency[b].append((a, weight))
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'FacilityGraph':
+        """Create from the `rtls.facility` configuration section."""
+        waypoints = {
+            wp['id']: (wp['x'], wp['y'], wp.get('z', 0))
+            for wp in config.get('waypoints', [])
+        }
+        return cls(waypoints, config.get('edges', []))
+
+    def nearest(self, x: float, y: float) -> str:
+        """Get the waypoint closest to a point in the plane."""
+        d2 = (self._coords[:, 0] - x) ** 2 + (self._coords[:, 1] - y) ** 2
+        return self.node_ids[int(np.argmin(d2))]
+
+    def _shortest_path_tree(self, source: str) -> Dict[str, Optional[str]]:
+        """Run Dijkstra from a source once and cache the predecessor map."""
+        tree = self._predecessors.get(source)
+        if tree is not None:
+            return tree
+
+        dist = {source: 0.0}
+        tree = {source: None}
+        heap = [(0.0, source)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > dist[node]:
+                continue
+            for neighbor, weight in self._adjacency[node]:
+                nd = d + weight
+                if nd < dist.get(neighbor, math.inf):
+                    dist[neighbor] = nd
+                    tree[neighbor] = node
+                    heapq.heappush(heap, (nd, neighbor))
+
+        self._predecessors[source] = tree
+        return tree
+
+    def shortest_path(self, source: str, target: str) -> Optional[List[str]]:
+        """Get the waypoint sequence from source to target, or None if unreachable."""
+        tree = self._shortest_path_tree(source)
+        if target not in tree:
+            return None
+
+        path = [target]
+        while path[-1] != source:
+            path.append(tree[path[-1]])
+        path.reverse()
+        return path
+
+
+class RouteTable:
+    """Routes between waypoints packed into flat arrays for interpolation.
+
+    Every route occupies its own interval of a shared arc-length axis, so a
+    batch of (route, distance) pairs is resolved with one `searchsorted`.
+    """
+
+    def __init__(self, graph: FacilityGraph):
+        self.graph = graph
+        self._index: Dict[Tuple[str, str], int] = {}
+        self._polylines: List[np.ndarray] = []
+        self._packed = 0
+        self._base = 0.0
+
+        self.points = np.empty((0, 3))
+        self.arc = np.empty(0)
+        self.route_base = np.empty(0)
+        self.route_length = np.empty(0)
+        self.route_first = np.empty(0, dtype=int)
+        self.route_last_segment = np.empty(0, dtype=int)
+
+    def route(self, source: str, target: str) -> Optional[int]:
+        """Get the route index between two waypoints, building it on first use."""
+        key = (source, target)
+        if key in self._index:
+            return self._index[key]
+
+        path = self.graph.shortest_path(source, target)
+        if path is None:
+            return None
+        if len(path) == 1:
+            path = path * 2
+
+        self._index[key] = len(self._polylines)
+        self._polylines.append(np.array([self.graph.waypoints[n] for n in path], dtype=float))
+        return self._index[key]
+
+    def precompute(self, nodes: Sequence[str]):
+        """Build every route between a set of waypoints up front."""
+        for source in nodes:
+            for target in nodes:
+                self.route(source, target)
+        self.compile()
+
+    def compile(self):
+        """Append routes built since the last call to the packed arrays."""
+        if self._packed == len(self._polylines):
+            return
+
+        points, arc, bases, lengths, firsts, lasts = [], [], [], [], [], []
+        offset = len(self.points)
+        for polyline in self._polylines[self._packed:]:
+            seg = np.linalg.norm(np.diff(polyline, axis=0), axis=1)
+            cumulative = np.concatenate(([0.0], np.cumsum(seg)))
+            points.append(polyline)
+            arc.append(self._base + cumulative)
+            bases.append(self._base)
+            lengths.append(cumulative[-1])
+            firsts.append(offset)
+            lasts.append(offset + len(polyline) - 2)
+            self._base += cumulative[-1] + _ROUTE_GAP
+            offset += len(polyline)
+
+        self.points = np.concatenate([self.points] + points)
+        self.arc = np.concatenate([self.arc] + arc)
+        self.route_base = np.concatenate((self.route_base, bases))
+        self.route_length = np.concatenate((self.route_length, lengths))
+        self.route_first = np.concatenate((self.route_first, firsts)).astype(int)
+        self.route_last_segment = np.concatenate((self.route_last_segment, lasts)).astype(int)
+        self._packed = len(self._polylines)
+
+    def interpolate(self, routes: np.ndarray,
+                    distances: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Get positions and headings (degrees) at distances along routes."""
+        self.compile()
+        global_s = self.route_base[routes] + distances
+        segment = np.searchsorted(self.arc, global_s, side='right') - 1
+        segment = np.clip(segment, self.route_first[routes], self.route_last_segment[routes])
+
+        start = self.points[segment]
+        delta = self.points[segment + 1] - start
+        seg_len = self.arc[segment + 1] - self.arc[segment]
+        t = np.divide(global_s - self.arc[segment], seg_len,
+                      out=np.zeros_like(global_s), where=seg_len > 0)
+
+        positions = start + delta * t[:, None]
+        headings = np.degrees(np.arctan2(delta[:, 1], delta[:, 0])) % 360
+        return positions, headings
+
+
+class MovementPlanner:
+    """Advance route-following tags along precomputed routes in one batch."""
+
+    def __init__(self, graph: FacilityGraph, zones: List[Zone],
+                 zone_waypoints: Optional[Dict[str, str]] = None, seed: Optional[int] = None):
+        self.logger = logging.getLogger(__name__)
+        self.graph = graph
+        self.routes = RouteTable(graph)
+        self.rng = np.random.default_rng(seed)
+
+        self.zone_nodes: Dict[str, str] = {}
+        self.set_zones(zones, zone_waypoints)
+
+        self.tags: List[Tag] = []
+        self._ids = set()
+        self._plans: List[Dict] = []
+        self._nodes: List[str] = []
+        self._route = np.empty(0, dtype=int)
+        self._distance = np.empty(0)
+        self._speed = np.empty(0)
+        self._dwell = np.empty(0)
+
+    def set_zones(self, zones: List[Zone], zone_waypoints: Optional[Dict[str, str]] = None):
+        """Map zones to their shuttle stop waypoints."""
+        self.zone_nodes = {
+            zone.id: self.graph.nearest((zone.x_min + zone.x_max) / 2, (zone.y_min + zone.y_max) / 2)
+            for zone in zones
+        }
+        self.zone_nodes.update(zone_waypoints or {})
+
+    def __contains__(self, tag_id: str) -> bool:
+        return tag_id in self._ids
+
+    def add_tags(self, tags: Sequence[Tuple[Tag, Dict]]):
+        """Snap tags onto the graph and start them on their first route."""
+        routes = []
+        speeds = []
+        for tag, model in tags:
+            node = self.graph.nearest(tag.position.x, tag.position.y)
+            plan = dict(model)
+            if plan.get('waypoints'):
+                self.routes.precompute(plan['waypoints'])
+            if plan['type'] == 'shuttle':
+                plan['stop_nodes'] = [self.zone_nodes[stop] for stop in plan['stops']]
+                plan['stop_index'] = 0
+                # Precompute the whole shuttle loop up front
+                loop = plan['stop_nodes'][1:] + plan['stop_nodes'][:1]
+                for a, b in zip(plan['stop_nodes'], loop):
+                    self.routes.route(a, b)
+
+            self.tags.append(tag)
+            self._ids.add(tag.id)
+            self._plans.append(plan)
+            self._nodes.append(node)
+            routes.append(self.routes.route(node, node))
+            speeds.append(plan.get('speed', 1.5))
+
+        self._route = np.concatenate((self._route, np.array(routes, dtype=int)))
+        self._distance = np.concatenate((self._distance, np.zeros(len(routes))))
+        self._speed = np.concatenate((self._speed, np.array(speeds, dtype=float)))
+        self._dwell = np.concatenate((self._dwell, np.zeros(len(routes))))
+
+    def add_tag(self, tag: Tag, model: Dict):
+        """Snap a single tag onto the graph."""
+        self.add_tags([(tag, model)])
+
+    def remove_tag(self, tag_id: str):
+        """Stop driving a tag."""
+        if tag_id not in self._ids:
+            return
+        keep = [i for i, tag in enumerate(self.tags) if tag.id != tag_id]
+        self._ids.discard(tag_id)
+        self.tags = [self.tags[i] for i in keep]
+        self._plans = [self._plans[i] for i in keep]
+        self._nodes = [self._nodes[i] for i in keep]
+        self._route = self._route[keep]
+        self._distance = self._distance[keep]
+        self._speed = self._speed[keep]
+        self._dwell = self._dwell[keep]
+
+    def _next_target(self, i: int) -> Optional[str]:
+        """Pick the next destination waypoint for a tag that arrived."""
+        plan = self._plans[i]
+        if plan['type'] == 'shuttle':
+            # `stop_index` is the stop to head for next, starting with the first
+            target = plan['stop_nodes'][plan['stop_index']]
+            plan['stop_index'] = (plan['stop_index'] + 1) % len(plan['stop_nodes'])
+            return target
+
+        candidates = plan.get('waypoints') or self.graph.node_ids
+        current = self._nodes[i]
+        target = candidates[self.rng.integers(len(candidates))]
+        if target == current:
+            # Redraw among the other nodes; none left means staying put
+            others = [node for node in candidates if node != current]
+            if not others:
+                return None
+            target = others[self.rng.integers(len(others))]
+        return target
+
+    def _start_dwell(self, i: int):
+        """Start dwelling at the current node and queue the next route."""
+        plan = self._plans[i]
+        dwell = plan.get('dwell', 0)
+        low, high = (dwell, dwell) if np.isscalar(dwell) else dwell
+        self._dwell[i] = self.rng.uniform(low, high) if high > low else low
+
+        target = self._next_target(i)
+        route = self.routes.route(self._nodes[i], target) if target else None
+        if route is None:
+            route = self.routes.route(self._nodes[i], self._nodes[i])
+        else:
+            self._nodes[i] = target
+        self._route[i] = route
+        self._distance[i] = 0.0
+
+    def advance(self, dt: float):
+        """Advance every driven tag by dt seconds and write back positions."""
+        if not self.tags:
+            return
+
+        self.routes.compile()
+        dwelling = self._dwell > 0
+        self._dwell[dwelling] -= dt
+        moving = ~dwelling
+        self._distance[moving] += self._speed[moving] * dt
+
+        length = self.routes.route_length[self._route]
+        arrived = moving & (self._distance >= length)
+        np.minimum(self._distance, length, out=self._distance)
+
+        positions, headings = self.routes.interpolate(self._route, self._distance)
+
+        for i in np.flatnonzero(arrived):
+            self._start_dwell(i)
+
+        # Write back in one pass over plain Python lists
+        underway = (moving & ~arrived).tolist()
+        speeds = self._speed.tolist()
+        for tag, (x, y, z), heading, speed, active in zip(
+                self.tags, positions.tolist(), headings.tolist(), speeds, underway):
+            tag.position.x = x
+            tag.position.y = y
+            tag.position.z = z
+            if active:
+                tag.speed = speed
+                tag.heading = heading
+            else:
+                tag.speed = 0.0
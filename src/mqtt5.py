@@ -0,0 +1,104 @@
+"""MQTT v5 publish properties and topic alias management."""
+
+import copy
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'binary': 'application/vnd.rtls.location+binary',
+    'heatmap': 'application/vnd.rtls.heatmap+binary'
+}
+
+
+def publish_properties(content_type: Optional[str] = None,
+                       expiry: Optional[int] = None,
+                       user_properties: Optional[List[Tuple[str, str]]] = None,
+                       topic_alias: Optional[int] = None) -> Properties:
+    """Build a PUBLISH property set."""
+    properties = Properties(PacketTypes.PUBLISH)
+    if content_type:
+        properties.ContentType = content_type
+    if expiry:
+        properties.MessageExpiryInterval = int(expiry)
+    for name, value in user_properties or []:
+        properties.UserProperty = (str(name), str(value))
+    if topic_alias:
+        properties.TopicAlias = topic_alias
+    return properties
+
+
+class TopicAliasTable:
+    """Per-connection topic aliases for hot topics.
+
+    Aliases are handed out first come, first served up to the smaller of the
+    configured and the broker's TopicAliasMaximum. The first publish on an
+    alias carries the full topic; later ones send an empty topic. The table
+    is cleared on every (re)connect because aliases are connection scoped.
+    """
+
+    def __init__(self, maximum: int = 0):
+        self.lock = threading.RLock()
+        self.maximum = maximum
+        self._aliases: Dict[str, Tuple[int, Properties]] = {}
+        self._established = set()
+
+    def reset(self, maximum: int):
+        """Start a new connection's alias space."""
+        with self.lock:
+            self.maximum = maximum
+            self._aliases = {}
+            self._established = set()
+
+    def resolve(self, topic: str, base: Properties) -> Tuple[str, Optional[Properties]]:
+        """Topic and properties to publish with; call with `lock` held.
+
+        Returns the full topic with aliased properties the first time, an
+        empty topic afterwards, or `(topic, None)` when no alias is free.
+        """
+        entry = self._aliases.get(topic)
+        if entry is None:
+            if len(self._aliases) >= self.maximum:
+                return topic, None
+            properties = copy.copy(base)
+            properties.TopicAlias = len(self._aliases) + 1
+            entry = self._aliases[topic] = (properties.TopicAlias, properties)
+
+        alias, properties = entry
+        if alias in self._established:
+            return '', properties
+        self._established.add(alias)
+        return topic, properties
+
+    def unestablish(self, topic: str):
+        """Send the full topic again next time (the last publish did not go out)."""
+        entry = self._aliases.get(topic)
+        if entry is not None:
+            self._established.discard(entry[0])
+
+    def topics(self) -> Dict[int, str]:
+        """Alias number to topic for the current connection."""
+        return {alias: topic for topic, (alias, _) in self._aliases.items()}
+
+
+def strip_queued_aliases(client, topics: Dict[int, str]):
+    """Make paho's queued messages safe to resend on a new connection.
+
+    paho resends unacknowledged QoS 1/2 messages after reconnecting with the
+    topic and properties they were first published with, but the broker
+    forgets aliases when the connection drops. Restore the full topic and
+    drop the alias from each queued message before paho resends it.
+    """
+    with client._out_message_mutex:
+        for message in client._out_messages.values():
+            properties = message.properties
+            if properties is None or not hasattr(properties, 'TopicAlias'):
+                continue
+            if not message.topic:
+                message._topic = topics[properties.TopicAlias].encode('utf-8')
+            message.properties = copy.copy(properties)
+            delattr(message.properties, 'TopicAlias')
@@ -1,11 +1,19 @@
 """MQTT client for publishing RTLS data."""
 
+import copy
 import json
 import logging
-from typing import Dict, List, Optional
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
 import paho.mqtt.client as mqtt
 
-from .models import LocationUpdate, ZoneAlert, SystemStatus, Tag
+from .models import LocationUpdate, ZoneAlert, SystemStatus, Tag, ProximityEvent, RuleEvent
+from .profiling import NULL_TIMER
+from .codec import LocationCodec, PAYLOAD_FORMATS
+from .spool import DiskSpool
+from .retained import RetainedRegistry, clear_topics
+from .mqtt5 import CONTENT_TYPES, TopicAliasTable, publish_properties, strip_queued_aliases
 
 
 class MQTTClient:
@@ -13,9 +21,60 @@ class MQTTClient:
     
     def __init__(self, config: Dict):
         self.config = config['mqtt']
-        self.client = mqtt.Client(client_id=self.config['client_id'])
+        self.protocol_v5 = str(self.config.get('protocol', '3.1.1')) == '5'
+        if self.protocol_v5:
+            self.client = mqtt.Client(client_id=self.config['client_id'], protocol=mqtt.MQTTv5)
+        else:
+            self.client = mqtt.Client(client_id=self.config['client_id'])
         self.logger = logging.getLogger(__name__)
+        self.owner = self
         self.connected = False
+        self.subscriptions: Dict[str, Callable] = {}
+        self.topic_prefix = self.config.get('topic_prefix', '')
+        self.timer = NULL_TIMER
+        self.qos = self.config.get('qos', 1)
+        # Optional publish/acknowledge timing hook (see ramp.AckProbe)
+        self.ack_probe = None
+        
+        # Location payload encoding
+        self.payload_format = self.config.get('payload_format', 'json')
+        if self.payload_format not in PAYLOAD_FORMATS:
+            raise ValueError(f"Unknown payload_format {self.payload_format!r}, "
+                             f"expected one of {', '.join(PAYLOAD_FORMATS)}")
+        self.codec = LocationCodec() if self.payload_format == 'binary' else None
+        
+        # Optional per-topic sequence numbers and send timestamps on location updates
+        self.sequence = self.config.get('sequence', False)
+        self._sequences: Dict[str, int] = {}
+        
+        # MQTT v5 per-message properties and topic aliases for location topics
+        v5_config = self.config.get('v5', {})
+        self.properties = self._init_properties(v5_config) if self.protocol_v5 else None
+        self.aliases = TopicAliasTable()
+        self.topic_alias_maximum = v5_config.get('topic_alias_maximum', 0) if self.protocol_v5 else 0
+        
+        # Rendered per-tag and per-zone topics, built once per id
+        self._location_topics: Dict[str, str] = {}
+        self._zone_topics: Dict[str, str] = {}
+        
+        # Optional disk spool for outages, replayed at a bounded rate
+        spool_config = self.config.get('spool', {})
+        self.spool = self._init_spool(spool_config)
+        self.drain_rate = spool_config.get('drain_rate', 500)
+        self._drain_budget = 0.0
+        
+        # Every topic holding a retained message, optionally kept across runs
+        retained_config = self.config.get('retained', {})
+        self.retained = self._init_retained(retained_config)
+        self.clear_inflight = retained_config.get('clear_inflight', 1000)
+        self.clear_timeout = retained_config.get('clear_timeout', 30.0)
+        
+        # Bound paho's in-memory queue (0 = unlimited) and QoS>0 in-flight window, back off reconnects
+        self.client.max_queued_messages_set(self.config.get('max_queued_messages', 0))
+        self.max_inflight_messages = self.config.get('max_inflight_messages', 20)
+        self.client.max_inflight_messages_set(self.max_inflight_messages)
+        reconnect = self.config.get('reconnect', {})
+        self.client.reconnect_delay_set(reconnect.get('min_delay', 1), reconnect.get('max_delay', 60))
         
         # Set callbacks
         self.client.on_connect = self._on_connect
@@ -29,24 +88,195 @@ class MQTTClient:
                 self.config['password']
             )
     
-    def _on_connect(self, client, userdata, flags, rc):
+    def _init_spool(self, spool_config: Dict) -> Optional[DiskSpool]:
+        """Open the optional disk spool, one directory per client ID."""
+        if not spool_config.get('enabled', False):
+            return None
+        return DiskSpool(
+            Path(spool_config.get('directory', 'spool')) / self.config['client_id'],
+            segment_bytes=spool_config.get('segment_bytes', 4 << 20),
+            max_bytes=spool_config.get('max_bytes', 256 << 20)
+        )
+    
+    def _init_retained(self, retained_config: Dict) -> RetainedRegistry:
+        """Track retained topics in memory, or in a journal per client ID when persisted."""
+        if not retained_config.get('persist', False):
+            return RetainedRegistry()
+        directory = Path(retained_config.get('directory', 'state'))
+        return RetainedRegistry(directory / f"{self.config['client_id']}.retained")
+    
+    def _init_properties(self, v5_config: Dict) -> Dict[str, object]:
+        """Build the v5 PUBLISH properties for each message kind once."""
+        user_properties = list(v5_config.get('user_properties', {}).items())
+        codec = 'rtls-location/1' if self.payload_format == 'binary' else 'json'
+        properties = {
+            'location': publish_properties(
+                CONTENT_TYPES[self.payload_format],
+                v5_config.get('location_expiry'),
+                user_properties + [('schema', 'location'), ('codec', codec)]
+            )
+        }
+        properties['heatmap'] = publish_properties(
+            CONTENT_TYPES['heatmap'], None,
+            user_properties + [('schema', 'heatmap'), ('codec', 'rtls-heatmap/1')]
+        )
+        for kind in ('zone', 'alert', 'proximity', 'rule', 'status', 'analytics'):
+            properties[kind] = publish_properties(
+                CONTENT_TYPES['json'], None, user_properties + [('schema', kind), ('codec', 'json')]
+            )
+        return properties
+    
+    @property
+    def connected(self) -> bool:
+        """Connection state, shared with prefixed views."""
+        return self.owner._connected
+    
+    @connected.setter
+    def connected(self, value: bool):
+        self.owner._connected = value
+    
+    def _on_connect(self, client, userdata, flags, rc, properties=None):
         """Callback for when client connects to broker."""
         if rc == 0:
             self.connected = True
+            if self.protocol_v5:
+                # Aliases are connection scoped: unalias queued resends, then start over
+                broker_maximum = getattr(properties, 'TopicAliasMaximum', 0)
+                with self.aliases.lock:
+                    strip_queued_aliases(client, self.aliases.topics())
+                    self.aliases.reset(min(self.topic_alias_maximum, broker_maximum))
             self.logger.info(f"Connected to MQTT broker at {self.config['broker']}:{self.config['port']}")
+            
+            # Restore subscriptions after (re)connecting
+            for topic in self.subscriptions:
+                client.subscribe(topic, qos=self.qos)
         else:
             self.logger.error(f"Failed to connect, return code {rc}")
     
-    def _on_disconnect(self, client, userdata, rc):
+    def _on_disconnect(self, client, userdata, rc, properties=None):
         """Callback for when client disconnects from broker."""
         self.connected = False
         if rc != 0:
             self.logger.warning(f"Unexpected disconnection, return code {rc}")
+            if self.spool is not None:
+                self.logger.warning("Spooling outbound messages to disk until the broker is back")
     
     def _on_publish(self, client, userdata, mid):
         """Callback for when a message is published."""
+        if self.ack_probe is not None:
+            self.ack_probe.acked(mid)
         self.logger.debug(f"Message {mid} published")
     
+    def with_prefix(self, topic_prefix: str) -> 'MQTTClient':
+        """Get a view that shares this connection but publishes under a topic prefix."""
+        view = copy.copy(self)
+        view.topic_prefix = topic_prefix
+        view.codec = LocationCodec() if self.codec else None
+        view._location_topics = {}
+        view._zone_topics = {}
+        return view
+    
+    def _topic(self, topic: str) -> str:
+        """Apply the topic prefix."""
+        return self.topic_prefix + topic
+    
+    def _location_topic(self, tag_id: str) -> str:
+        """Cached location topic for a tag."""
+        topic = self._location_topics.get(tag_id)
+        if topic is None:
+            topic = self._location_topics[tag_id] = self._topic(f"rtls/location/{tag_id}")
+        return topic
+    
+    def _zone_topic(self, zone_id: str) -> str:
+        """Cached occupancy topic for a zone."""
+        topic = self._zone_topics.get(zone_id)
+        if topic is None:
+            topic = self._zone_topics[zone_id] = self._topic(f"rtls/zone/{zone_id}/tags")
+        return topic
+    
+    def forget_topics(self, tag_ids: List[str] = (), zone_ids: List[str] = ()):
+        """Drop cached topics of removed tags and zones."""
+        for tag_id in tag_ids:
+            self._location_topics.pop(tag_id, None)
+        for zone_id in zone_ids:
+            self._zone_topics.pop(zone_id, None)
+    
+    def _publish(self, topic: str, payload, retain: bool, kind: Optional[str] = None) -> bool:
+        """Hand one message to paho, or to the spool while the broker is unreachable."""
+        if retain:
+            if payload:
+                self.retained.add(topic)
+            else:
+                self.retained.discard(topic)
+        
+        spool = self.spool
+        if spool is not None and not self.connected:
+            spool.append(topic, payload, self.qos, retain)
+            return True
+        
+        with self.timer.stage('paho_publish'):
+            if self.properties is None or kind is None:
+                result = self.client.publish(topic, payload, qos=self.qos, retain=retain)
+            else:
+                result = self._publish_v5(topic, payload, retain, kind)
+        
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            if self.ack_probe is not None:
+                self.ack_probe.sent(result.mid)
+            # A live retained message supersedes anything spooled for the topic
+            if spool is not None and retain and spool.pending:
+                spool.mark_published(topic)
+            return True
+        if spool is not None and result.rc in (mqtt.MQTT_ERR_NO_CONN, mqtt.MQTT_ERR_QUEUE_SIZE):
+            spool.append(topic, payload, self.qos, retain)
+            return True
+        return False
+    
+    def _publish_v5(self, topic: str, payload, retain: bool, kind: str):
+        """Publish with v5 properties, using a topic alias for location topics."""
+        properties = self.properties[kind]
+        if kind == 'location' and self.aliases.maximum:
+            with self.aliases.lock:
+                publish_topic, alias_properties = self.aliases.resolve(topic, properties)
+                if alias_properties is not None:
+                    result = self.client.publish(publish_topic, payload, qos=self.qos,
+                                                 retain=retain, properties=alias_properties)
+                    if result.rc != mqtt.MQTT_ERR_SUCCESS and publish_topic:
+                        self.aliases.unestablish(topic)
+                    return result
+        
+        return self.client.publish(topic, payload, qos=self.qos, retain=retain, properties=properties)
+    
+    def _replay(self, topic: str, payload: bytes, qos: int, retain: bool) -> bool:
+        """Publish one spooled message."""
+        return self.client.publish(topic, payload, qos=qos, retain=retain).rc == mqtt.MQTT_ERR_SUCCESS
+    
+    def service_spool(self, dt: float) -> int:
+        """Flush the spool and, while connected, replay up to `drain_rate * dt` messages."""
+        self.retained.flush()
+        spool = self.spool
+        if spool is None:
+            return 0
+        spool.flush()
+        if not self.connected or not spool.pending:
+            self._drain_budget = 0.0
+            return 0
+        
+        self._drain_budget += self.drain_rate * dt
+        limit = int(self._drain_budget)
+        self._drain_budget -= limit
+        sent = spool.drain(self._replay, limit)
+        
+        if not spool.pending:
+            self.logger.info(f"Spool drained ({spool.coalesced} superseded retained messages skipped, "
+                             f"{spool.dropped} dropped over the size limit)")
+        return sent
+    
+    def queue_depth(self) -> int:
+        """Messages paho holds that the broker has not acknowledged (in flight or queued)."""
+        # paho has no public accessor for its outgoing message table
+        return len(getattr(self.client, '_out_messages', ()))
+    
     def connect(self) -> bool:
         """Connect to MQTT broker."""
         try:
@@ -58,7 +288,6 @@ class MQTTClient:
             self.client.loop_start()
             
             # Wait for connection
-            import time
             timeout = 5
             while not self.connected and timeout > 0:
                 time.sleep(0.1)
@@ -75,24 +304,36 @@ class MQTTClient:
         self.client.loop_stop()
         self.client.disconnect()
         self.connected = False
+        if self.spool is not None:
+            self.spool.close()
+        self.retained.close()
+    
+    def subscribe(self, topic: str, callback: Callable):
+        """Subscribe to a control topic; callback receives the paho message."""
+        topic = self._topic(topic)
+        self.subscriptions[topic] = callback
+        self.client.message_callback_add(topic, lambda client, userdata, message: callback(message))
+        if self.connected:
+            self.client.subscribe(topic, qos=self.qos)
+    
+    def clear_retained(self, topic: str) -> bool:
+        """Remove the retained message on a single topic."""
+        return self._publish(self._topic(topic), "", retain=True)
     
     def publish_location(self, location: LocationUpdate) -> bool:
         """Publish location update."""
-        topic = f"rtls/location/{location.tag_id}"
-        payload = location.to_json()
-        
-        result = self.client.publish(
-            topic,
-            payload,
-            qos=self.config.get('qos', 1),
-            retain=True
-        )
+        topic = self._location_topic(location.tag_id)
+        if self.sequence:
+            location.seq = self._sequences[topic] = self._sequences.get(topic, 0) + 1
+            location.send_ns = time.time_ns()
+        with self.timer.stage('encode'):
+            payload = self.codec.encode(location) if self.codec else location.to_json()
         
-        return result.rc == mqtt.MQTT_ERR_SUCCESS
+        return self._publish(topic, payload, retain=True, kind='location')
     
     def publish_zone_tags(self, zone_id: str, tags: List[Tag]) -> bool:
         """Publish list of tags in a zone."""
-        topic = f"rtls/zone/{zone_id}/tags"
+        topic = self._zone_topic(zone_id)
         
         tag_list = [
             {
@@ -104,56 +345,94 @@ class MQTTClient:
             for tag in tags
         ]
         
-        payload = json.dumps({
-            'zone_id': zone_id,
-            'tag_count': len(tags),
-            'tags': tag_list
-        })
-        
-        result = self.client.publish(
-            topic,
-            payload,
-            qos=self.config.get('qos', 1),
-            retain=True
-        )
+        with self.timer.stage('encode'):
+            payload = json.dumps({
+                'zone_id': zone_id,
+                'tag_count': len(tags),
+                'tags': tag_list
+            })
         
-        return result.rc == mqtt.MQTT_ERR_SUCCESS
+        return self._publish(topic, payload, retain=True, kind='zone')
     
     def publish_alert(self, alert: ZoneAlert) -> bool:
         """Publish zone transition alert."""
-        topic = "rtls/alerts"
-        payload = alert.to_json()
-        
-        result = self.client.publish(
-            topic,
-            payload,
-            qos=self.config.get('qos', 1),
-            retain=False
-        )
+        topic = self._topic("rtls/alerts")
+        with self.timer.stage('encode'):
+            payload = alert.to_json()
+        
+        return self._publish(topic, payload, retain=False, kind='alert')
+    
+    def publish_proximity(self, event: ProximityEvent) -> bool:
+        """Publish tag-to-tag proximity event."""
+        topic = self._topic("rtls/proximity")
+        with self.timer.stage('encode'):
+            payload = event.to_json()
+        
+        return self._publish(topic, payload, retain=False, kind='proximity')
+    
+    def publish_rule_event(self, event: RuleEvent) -> bool:
+        """Publish a rule violation event."""
+        topic = self._topic("rtls/rules")
+        with self.timer.stage('encode'):
+            payload = event.to_json()
         
-        return result.rc == mqtt.MQTT_ERR_SUCCESS
+        return self._publish(topic, payload, retain=False, kind='rule')
+    
+    def publish_heatmap(self, zone_id: str, frame: bytes) -> bool:
+        """Publish a binary zone occupancy heatmap frame."""
+        topic = self._topic(f"rtls/heatmap/{zone_id}")
+        return self._publish(topic, frame, retain=True, kind='heatmap')
+    
+    def publish_analytics(self, rollup: Dict) -> bool:
+        """Publish the zone dwell and flow rollup."""
+        topic = self._topic("rtls/analytics/zones")
+        with self.timer.stage('encode'):
+            payload = json.dumps(rollup)
+        
+        return self._publish(topic, payload, retain=True, kind='analytics')
     
     def publish_status(self, status: SystemStatus) -> bool:
         """Publish system status."""
-        topic = "rtls/status"
-        payload = status.to_json()
-        
-        result = self.client.publish(
-            topic,
-            payload,
-            qos=self.config.get('qos', 1),
-            retain=True
-        )
+        topic = self._topic("rtls/status")
+        with self.timer.stage('encode'):
+            payload = status.to_json()
         
-        return result.rc == mqtt.MQTT_ERR_SUCCESS
+        return self._publish(topic, payload, retain=True, kind='status')
     
-    def clear_retained_messages(self):
-        """Clear all retained messages by publishing empty payloads."""
-        topics = [
-            "rtls/status",
-            "rtls/location/+",
-            "rtls/zone/+/tags"
-        ]
+    def clear_retained_messages(self) -> int:
+        """Clear every retained topic this client (or an earlier run) published under its prefix.
+        
+        Empty retained payloads are pipelined at QoS 1 with up to
+        `retained.clear_inflight` unacknowledged at once. Returns the number
+        of topics cleared; topics not acknowledged in time stay registered.
+        """
+        topics = sorted(topic for topic in self.retained.topics if topic.startswith(self.topic_prefix))
+        if not topics:
+            return 0
+        if not self.connected:
+            self.logger.warning(f"Not connected, leaving {len(topics)} retained topics in place")
+            return 0
+        
+        spool = self.spool
+        start = time.monotonic()
+        self.client.max_inflight_messages_set(max(self.clear_inflight, self.max_inflight_messages))
+        try:
+            cleared = clear_topics(lambda topic: self.client.publish(topic, b"", qos=1, retain=True),
+                                   topics, self.clear_inflight, self.clear_timeout)
+        finally:
+            self.client.max_inflight_messages_set(self.max_inflight_messages)
+        
+        for topic in cleared:
+            self.retained.discard(topic)
+            # Nothing spooled for the topic may bring the old state back
+            if spool is not None and spool.pending:
+                spool.mark_published(topic)
+        self.retained.flush()
         
-        for topic in topics:
-            self.client.publish(topic, "", qos=1, retain=True)
\ No newline at end of file
+        elapsed = time.monotonic() - start
+        if len(cleared) < len(topics):
+            self.logger.warning(f"Cleared {len(cleared)} of {len(topics)} retained topics "
+                                f"before the {self.clear_timeout}s timeout")
+        else:
+            self.logger.info(f"Cleared {len(cleared)} retained topics in {elapsed:.2f}s")
+        return len(cleared)
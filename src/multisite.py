@@ -0,0 +1,76 @@
+"""Site configuration loading and pooled MQTT connections for multi-site runs."""
+
+import copy
+import logging
+from pathlib import Path
+from typing import Dict, List
+
+from .config_reload import load_yaml_config
+from .mqtt_client import MQTTClient
+
+
+def site_topic_prefix(site_id: str) -> str:
+    """Topic prefix for one site's messages."""
+    return f"site/{site_id}/"
+
+
+def load_site_configs(paths: List[str]) -> Dict[str, Dict]:
+    """Load site configs from YAML files and/or directories of YAML files.
+
+    The site id is taken from an optional `site.id` key, falling back to the
+    file name without extension.
+    """
+    files: List[Path] = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(p for p in path.iterdir() if p.suffix in ('.yaml', '.yml')))
+        elif path.exists():
+            files.append(path)
+        else:
+            raise FileNotFoundError(f"Site configuration not found: {path}")
+
+    sites: Dict[str, Dict] = {}
+    for file in files:
+        config = load_yaml_config(file)
+        if not isinstance(config, dict) or 'rtls' not in config:
+            raise ValueError(f"Site configuration without an rtls section: {file}")
+        site_id = str(config.get('site', {}).get('id', file.stem))
+        if site_id in sites:
+            raise ValueError(f"Duplicate site id {site_id!r} in {file}")
+        sites[site_id] = config
+    return sites
+
+
+class MQTTConnectionPool:
+    """A fixed number of broker connections shared by many sites.
+
+    Sites are assigned round-robin; each site publishes through a prefixed
+    view of its connection, so 40 sites over a pool of 4 open 4 sockets.
+    """
+
+    def __init__(self, config: Dict, size: int = 1):
+        if size < 1:
+            raise ValueError(f"Connection pool size must be at least 1, got {size}")
+        self.logger = logging.getLogger(__name__)
+        self.connections: List[MQTTClient] = []
+        for i in range(size):
+            connection_config = copy.deepcopy(config)
+            connection_config['mqtt']['client_id'] = f"{config['mqtt']['client_id']}-{i}"
+            self.connections.append(MQTTClient(connection_config))
+
+    def client_for(self, index: int, site_id: str) -> MQTTClient:
+        """Get the prefixed client for the site at a given position."""
+        connection = self.connections[index % len(self.connections)]
+        return connection.with_prefix(site_topic_prefix(site_id))
+
+    def connect(self) -> bool:
+        """Connect every pooled client."""
+        connected = [connection.connect() for connection in self.connections]
+        if not all(connected):
+            self.logger.error(f"Connected {sum(connected)} of {len(connected)} pooled MQTT clients")
+        return all(connected)
+
+    def disconnect(self):
+        """Disconnect every pooled client."""
+        for connection in self.connections:
+            connection.disconnect()
@@ -0,0 +1,220 @@
+"""Per-stage tick timing, cProfile/sampling capture and flamegraph output."""
+
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+PROFILE_MODES = ('stages', 'cprofile', 'sample')
+
+
+class _NullStage:
+    """Context manager that does nothing (profiling disabled)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """Times one entry of a named stage."""
+
+    __slots__ = ('timer', 'name')
+
+    def __init__(self, timer: 'StageTimer', name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.timer._stack.append([self.name, time.perf_counter(), 0.0])
+        return self
+
+    def __exit__(self, *exc):
+        timer = self.timer
+        name, start, children = timer._stack.pop()
+        elapsed = time.perf_counter() - start
+        path = tuple(frame[0] for frame in timer._stack) + (name,)
+
+        stats = timer.stats.get(path)
+        if stats is None:
+            stats = timer.stats[path] = [0, 0.0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] = max(stats[2], elapsed)
+        stats[3] += elapsed - children
+        if timer._stack:
+            timer._stack[-1][2] += elapsed
+        return False
+
+
+class StageTimer:
+    """Accumulate perf_counter timings of nested, named stages.
+
+    Stages nest by call structure, so `publish_location` inside `publish`
+    inside `tick` is recorded under the path `tick;publish;publish_location`.
+    A disabled timer hands out a shared no-op context manager.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        # path -> [calls, total seconds, max seconds, self seconds]
+        self.stats: Dict[Tuple[str, ...], List[float]] = {}
+        self._stack: List[list] = []
+
+    def stage(self, name: str):
+        """Context manager timing one stage."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def reset(self):
+        """Forget all recorded timings."""
+        self.stats = {}
+        self._stack = []
+
+    def summary(self, ticks: Optional[int] = None) -> str:
+        """Render a per-stage table sorted by call path."""
+        lines = [f"{'stage':<48} {'calls':>9} {'total ms':>10} {'self ms':>10} {'mean us':>9} {'max ms':>8}"]
+        if ticks:
+            lines[0] += f" {'ms/tick':>8}"
+        for path in sorted(self.stats):
+            calls, total, peak, own = self.stats[path]
+            name = '  ' * (len(path) - 1) + path[-1]
+            line = (f"{name:<48} {calls:>9} {total * 1e3:>10.2f} {own * 1e3:>10.2f} "
+                    f"{total / calls * 1e6:>9.1f} {peak * 1e3:>8.2f}")
+            if ticks:
+                line += f" {total * 1e3 / ticks:>8.3f}"
+            lines.append(line)
+        return '\n'.join(lines)
+
+    def collapsed(self) -> List[str]:
+        """Stage self-times in collapsed-stack format (microseconds)."""
+        return [
+            f"{';'.join(path)} {int(stats[3] * 1e6)}"
+            for path, stats in sorted(self.stats.items())
+            if int(stats[3] * 1e6) > 0
+        ]
+
+
+# Shared disabled timer used when profiling is off
+NULL_TIMER = StageTimer(enabled=False)
+
+
+class SamplingProfiler:
+    """Sample one thread's Python stack at a fixed interval.
+
+    Samples are kept as collapsed stacks (`module:function;...`) with counts,
+    ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start sampling in a daemon thread."""
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling."""
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        """Sampler thread loop."""
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def collapsed(self) -> List[str]:
+        """Samples in collapsed-stack format."""
+        return [f"{stack} {count}" for stack, count in self.samples.most_common()]
+
+
+class TickProfiler:
+    """Profile a fixed number of ticks and write the results to a directory.
+
+    Every mode records per-stage timings (`stages.txt`, `stages.folded`);
+    `cprofile` adds `cprofile.prof` and `cprofile.txt`, and `sample` adds a
+    function-level `samples.folded` flamegraph input.
+    """
+
+    def __init__(self, mode: str = 'stages', ticks: int = 100,
+                 output_dir: str = 'profile', interval: float = 0.005):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}, expected one of {', '.join(PROFILE_MODES)}")
+        self.mode = mode
+        self.ticks = ticks
+        self.output_dir = Path(output_dir)
+        self.timer = StageTimer()
+        self.logger = logging.getLogger(__name__)
+        self.completed = 0
+
+        self._cprofile = None
+        if mode == 'cprofile':
+            import cProfile
+            self._cprofile = cProfile.Profile()
+        self._sampler = SamplingProfiler(interval) if mode == 'sample' else None
+        self._finished = False
+
+    def start(self):
+        """Begin capturing on the calling (tick loop) thread."""
+        if self._cprofile:
+            self._cprofile.enable()
+        if self._sampler:
+            self._sampler.thread_id = threading.get_ident()
+            self._sampler.start()
+
+    def tick_done(self) -> bool:
+        """Count a finished tick; returns True once enough ticks were profiled."""
+        self.completed += 1
+        return self.ticks > 0 and self.completed >= self.ticks
+
+    def finish(self) -> Path:
+        """Stop capturing and write the reports (only once)."""
+        if self._finished:
+            return self.output_dir
+        self._finished = True
+        if self._cprofile:
+            self._cprofile.disable()
+        if self._sampler:
+            self._sampler.stop()
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        summary = self.timer.summary(self.completed)
+        (self.output_dir / 'stages.txt').write_text(summary + '\n')
+        (self.output_dir / 'stages.folded').write_text('\n'.join(self.timer.collapsed()) + '\n')
+
+        if self._cprofile:
+            import pstats
+            self._cprofile.dump_stats(str(self.output_dir / 'cprofile.prof'))
+            with open(self.output_dir / 'cprofile.txt', 'w') as f:
+                pstats.Stats(self._cprofile, stream=f).sort_stats('cumulative').print_stats(50)
+        if self._sampler:
+            (self.output_dir / 'samples.folded').write_text('\n'.join(self._sampler.collapsed()) + '\n')
+
+        self.logger.info(f"Profiled {self.completed} ticks, reports written to {self.output_dir}\n{summary}")
+        return self.output_dir
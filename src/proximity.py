@@ -0,0 +1,146 @@
+"""Tag-to-tag proximity detection with spatial hashing."""
+
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from .models import ProximityEvent
+
+
+# Half of the 3x3 neighbourhood: every unordered cell pair is visited once
+_HALF_NEIGHBORHOOD = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+
+def find_close_pairs(positions: np.ndarray,
+                     radius: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find all index pairs (i < j) within radius in the plane.
+
+    Points are hashed into square cells of side `radius`, sorted by cell key,
+    and each point is matched against its own and four neighbouring cells
+    through `searchsorted` ranges, so the work scales with the number of
+    nearby pairs rather than n^2.
+    """
+    n = len(positions)
+    empty = (np.empty(0, dtype=int), np.empty(0, dtype=int), np.empty(0))
+    if n < 2 or radius <= 0:
+        return empty
+
+    xy = positions[:, :2]
+    cells = np.floor(xy / radius).astype(np.int64)
+    cells -= cells.min(axis=0)
+    # Leave a spare row on both sides so cy - 1 and cy + 1 never alias
+    stride = cells[:, 1].max() + 3
+    cx, cy = cells[:, 0], cells[:, 1] + 1
+
+    keys = cx * stride + cy
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    firsts, seconds = [], []
+    for dx, dy in _HALF_NEIGHBORHOOD:
+        neighbor = (cx + dx) * stride + (cy + dy)
+        lo = np.searchsorted(sorted_keys, neighbor, side='left')
+        counts = np.searchsorted(sorted_keys, neighbor, side='right') - lo
+        total = int(counts.sum())
+        if total == 0:
+            continue
+
+        # Expand each point's [lo, hi) range of candidates without a loop
+        i = np.repeat(np.arange(n), counts)
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        j = order[starts + np.arange(total)]
+        if dx == 0 and dy == 0:
+            keep = i < j
+            i, j = i[keep], j[keep]
+        firsts.append(i)
+        seconds.append(j)
+
+    if not firsts:
+        return empty
+
+    i = np.concatenate(firsts)
+    j = np.concatenate(seconds)
+    distance = np.hypot(xy[i, 0] - xy[j, 0], xy[i, 1] - xy[j, 1])
+    close = distance <= radius
+    i, j = i[close], j[close]
+    # Normalise so the smaller index comes first
+    return np.minimum(i, j), np.maximum(i, j), distance[close]
+
+
+class ProximityMonitor:
+    """Turn per-rule close pairs into a started/ongoing/cleared event stream.
+
+    Pairs that stay close only repeat as `ongoing` every `ongoing_interval`
+    seconds, and not at all without one.
+    """
+
+    def __init__(self, config: Dict):
+        interval = config.get('ongoing_interval')
+        self.ongoing_interval = float(interval) if interval is not None else None
+        self.rules = [
+            {
+                'id': rule.get('id', f"{rule['types'][0]}_{rule['types'][1]}"),
+                'types': tuple(rule['types']),
+                'distance': float(rule['distance'])
+            }
+            for rule in config.get('rules', [])
+        ]
+        self._active: Dict[str, Dict[Tuple[str, str], float]] = {
+            rule['id']: {} for rule in self.rules
+        }
+        # Per rule: time each active pair was last reported
+        self._reported: Dict[str, Dict[Tuple[str, str], float]] = {
+            rule['id']: {} for rule in self.rules
+        }
+
+    def detect(self, tag_ids: Sequence[str], tag_types: Sequence[str],
+               positions: np.ndarray, timestamp: Optional[str] = None,
+               now: Optional[float] = None) -> List[ProximityEvent]:
+        """Evaluate all rules for the tick at `now` seconds (defaults to the monotonic clock)."""
+        timestamp = timestamp or datetime.utcnow().isoformat() + 'Z'
+        now = time.monotonic() if now is None else now
+        interval = self.ongoing_interval
+        types = np.asarray(tag_types, dtype=object)
+        events = []
+
+        for rule in self.rules:
+            type_a, type_b = rule['types']
+            members = np.flatnonzero((types == type_a) | (types == type_b))
+            i, j, distance = find_close_pairs(positions[members], rule['distance'])
+            i, j = members[i], members[j]
+
+            # Keep cross-type pairs only, oriented as (type_a, type_b)
+            if type_a != type_b:
+                forward = (types[i] == type_a) & (types[j] == type_b)
+                backward = (types[i] == type_b) & (types[j] == type_a)
+                keep = forward | backward
+                i, j = np.where(forward, i, j)[keep], np.where(forward, j, i)[keep]
+                distance = distance[keep]
+
+            current = {
+                (tag_ids[a], tag_ids[b]): d
+                for a, b, d in zip(i.tolist(), j.tolist(), distance.tolist())
+            }
+            previous = self._active[rule['id']]
+            last = self._reported[rule['id']]
+            reported = {}
+
+            for pair, d in current.items():
+                if pair not in previous:
+                    event_type = 'started'
+                elif interval is not None and now - last[pair] >= interval:
+                    event_type = 'ongoing'
+                else:
+                    reported[pair] = last[pair]
+                    continue
+                reported[pair] = now
+                events.append(ProximityEvent(rule['id'], pair[0], pair[1], timestamp, event_type, round(d, 2)))
+            for (a, b), d in previous.items():
+                if (a, b) not in current:
+                    events.append(ProximityEvent(rule['id'], a, b, timestamp, 'cleared', round(d, 2)))
+
+            self._active[rule['id']] = current
+            self._reported[rule['id']] = reported
+
+        return events
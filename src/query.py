@@ -0,0 +1,216 @@
+"""Indexed queries over the current tag snapshot."""
+
+import itertools
+import math
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+
+from .snapshot import TagSnapshot
+
+
+class TagQueryIndex:
+    """Spatial, type, zone and threshold indexes over one snapshot.
+
+    The uniform grid is updated incrementally: each tick only the tags that
+    crossed a cell boundary are moved between buckets. Type and zone buckets
+    are rebuilt only when the tag set, tag types or zone assignment change,
+    and the battery/RSSI orderings are re-sorted only when those values changed.
+    """
+
+    def __init__(self, cell_size: float = 10.0):
+        self.cell_size = float(cell_size)
+        self.snapshot: Optional[TagSnapshot] = None
+        self._lock = threading.RLock()
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+        self._cell_of = np.empty((0, 2), dtype=np.int64)
+        self._by_type: Dict[str, np.ndarray] = {}
+        self._by_zone: Dict[Optional[str], np.ndarray] = {}
+        self._battery_order = np.empty(0, dtype=int)
+        self._battery_sorted = np.empty(0)
+        self._rssi_order = np.empty(0, dtype=int)
+        self._rssi_sorted = np.empty(0)
+
+    def update(self, snapshot: TagSnapshot):
+        """Bring the indexes up to date with a new snapshot."""
+        cells = np.floor(snapshot.positions[:, :2] / self.cell_size).astype(np.int64)
+        previous = self.snapshot
+
+        with self._lock:
+            if previous is None or previous.ids != snapshot.ids:
+                self._rebuild(snapshot, cells)
+            else:
+                self._update_cells(cells)
+                if not np.array_equal(previous.types, snapshot.types):
+                    self._by_type = self._group(snapshot.types)
+                if not np.array_equal(previous.zone_ids, snapshot.zone_ids):
+                    self._by_zone = self._group(snapshot.zone_ids)
+                if not np.array_equal(previous.battery, snapshot.battery):
+                    self._sort_battery(snapshot)
+                if not np.array_equal(previous.rssi, snapshot.rssi):
+                    self._sort_rssi(snapshot)
+            self.snapshot = snapshot
+
+    def _sort_battery(self, snapshot: TagSnapshot):
+        self._battery_order = np.argsort(snapshot.battery, kind='stable')
+        self._battery_sorted = snapshot.battery[self._battery_order]
+
+    def _sort_rssi(self, snapshot: TagSnapshot):
+        self._rssi_order = np.argsort(snapshot.rssi, kind='stable')
+        self._rssi_sorted = snapshot.rssi[self._rssi_order]
+
+    @staticmethod
+    def _group(values: np.ndarray) -> Dict[Any, np.ndarray]:
+        """Group row indices by value."""
+        groups: Dict[Any, List[int]] = {}
+        for row, value in enumerate(values.tolist()):
+            groups.setdefault(value, []).append(row)
+        return {value: np.array(rows, dtype=int) for value, rows in groups.items()}
+
+    def _rebuild(self, snapshot: TagSnapshot, cells: np.ndarray):
+        """Build every index from scratch (tag set changed)."""
+        self._cells = {}
+        for row, cell in enumerate(map(tuple, cells.tolist())):
+            self._cells.setdefault(cell, set()).add(row)
+        self._cell_of = cells
+        self._by_type = self._group(snapshot.types)
+        self._by_zone = self._group(snapshot.zone_ids)
+        self._sort_battery(snapshot)
+        self._sort_rssi(snapshot)
+
+    def _update_cells(self, cells: np.ndarray):
+        """Move only the tags whose grid cell changed."""
+        moved = np.flatnonzero(np.any(cells != self._cell_of, axis=1))
+        for row, old, new in zip(moved.tolist(), self._cell_of[moved].tolist(), cells[moved].tolist()):
+            bucket = self._cells[tuple(old)]
+            bucket.discard(row)
+            if not bucket:
+                del self._cells[tuple(old)]
+            self._cells.setdefault(tuple(new), set()).add(row)
+        self._cell_of = cells
+
+    def _rows_in_cells(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """Candidate rows from every grid cell overlapping a rectangle."""
+        cx0, cy0 = math.floor(x0 / self.cell_size), math.floor(y0 / self.cell_size)
+        cx1, cy1 = math.floor(x1 / self.cell_size), math.floor(y1 / self.cell_size)
+
+        # Large rectangles: walk the occupied cells instead of the whole range
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            buckets = [rows for (cx, cy), rows in self._cells.items()
+                       if cx0 <= cx <= cx1 and cy0 <= cy <= cy1]
+        else:
+            buckets = [self._cells[cell] for cell in itertools.product(range(cx0, cx1 + 1), range(cy0, cy1 + 1))
+                       if cell in self._cells]
+        return np.fromiter(itertools.chain.from_iterable(buckets), dtype=int)
+
+    def in_bbox(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """Rows of tags inside an axis-aligned rectangle."""
+        with self._lock:
+            rows = self._rows_in_cells(x0, y0, x1, y1)
+            xy = self.snapshot.positions[rows, :2]
+            keep = (xy[:, 0] >= x0) & (xy[:, 0] <= x1) & (xy[:, 1] >= y0) & (xy[:, 1] <= y1)
+            return np.sort(rows[keep])
+
+    def in_radius(self, x: float, y: float, radius: float) -> np.ndarray:
+        """Rows of tags within a radius of a point, nearest first."""
+        with self._lock:
+            rows = self._rows_in_cells(x - radius, y - radius, x + radius, y + radius)
+            d = np.hypot(self.snapshot.positions[rows, 0] - x, self.snapshot.positions[rows, 1] - y)
+            keep = d <= radius
+            return rows[keep][np.argsort(d[keep], kind='stable')]
+
+    def nearest(self, x: float, y: float, k: int) -> np.ndarray:
+        """Rows of the k tags nearest to a point, nearest first."""
+        with self._lock:
+            n = len(self.snapshot) if self.snapshot is not None else 0
+            k = min(k, n)
+            if k <= 0:
+                return np.empty(0, dtype=int)
+
+            # Grow square rings of cells until k candidates are found and the
+            # ring is wider than the k-th candidate distance
+            ring = 0
+            while True:
+                half = (ring + 1) * self.cell_size
+                rows = self._rows_in_cells(x - half, y - half, x + half, y + half)
+                if len(rows) >= k or len(rows) == n:
+                    d = np.hypot(self.snapshot.positions[rows, 0] - x,
+                                 self.snapshot.positions[rows, 1] - y)
+                    best = np.argsort(d, kind='stable')[:k]
+                    # Every tag within `half` of the point is a candidate
+                    if d[best[-1]] <= half or len(rows) == n:
+                        return rows[best]
+                ring = ring + 1 if ring < 4 else ring * 2
+
+    def by_type(self, tag_type: str) -> np.ndarray:
+        """Rows of tags of a type."""
+        with self._lock:
+            return self._by_type.get(tag_type, np.empty(0, dtype=int))
+
+    def by_zone(self, zone_id: Optional[str]) -> np.ndarray:
+        """Rows of tags in a zone."""
+        with self._lock:
+            return self._by_zone.get(zone_id, np.empty(0, dtype=int))
+
+    def battery_below(self, threshold: float) -> np.ndarray:
+        """Rows of tags with battery below a threshold, lowest first."""
+        with self._lock:
+            return self._battery_order[:np.searchsorted(self._battery_sorted, threshold, side='left')]
+
+    def rssi_below(self, threshold: float) -> np.ndarray:
+        """Rows of tags with RSSI below a threshold, weakest first."""
+        with self._lock:
+            return self._rssi_order[:np.searchsorted(self._rssi_sorted, threshold, side='left')]
+
+    def records(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        """JSON-ready records for rows of the indexed snapshot."""
+        return self.snapshot.to_records(np.asarray(rows, dtype=int))
+
+
+def _floats(value: str, count: int) -> List[float]:
+    """Parse a comma-separated list of numbers."""
+    values = [float(v) for v in value.split(',')]
+    if len(values) != count:
+        raise ValueError(f"Expected {count} comma-separated values, got {value!r}")
+    return values
+
+
+def handle_tags_query(index: TagQueryIndex, query: Dict[str, str]) -> Dict[str, Any]:
+    """Serve `GET /tags` for the JSON query endpoint.
+
+    Supported parameters: `bbox=x0,y0,x1,y1`, `near=x,y&radius=r`,
+    `type=`, `zone=`, `battery_below=` and `rssi_below=`.
+    """
+    with index._lock:
+        if index.snapshot is None:
+            return {'seq': None, 'tag_count': 0, 'tags': []}
+        rows = _select_rows(index, query)
+        return {'seq': index.snapshot.seq, 'tag_count': len(rows), 'tags': index.records(rows)}
+
+
+def _select_rows(index: TagQueryIndex, query: Dict[str, str]) -> np.ndarray:
+    """Dispatch `/tags` query parameters to an index lookup."""
+    if 'bbox' in query:
+        rows = index.in_bbox(*_floats(query['bbox'], 4))
+    elif 'near' in query:
+        rows = index.in_radius(*_floats(query['near'], 2), float(query['radius']))
+    elif 'type' in query:
+        rows = index.by_type(query['type'])
+    elif 'zone' in query:
+        rows = index.by_zone(query['zone'] or None)
+    elif 'battery_below' in query:
+        rows = index.battery_below(float(query['battery_below']))
+    elif 'rssi_below' in query:
+        rows = index.rssi_below(float(query['rssi_below']))
+    else:
+        rows = np.arange(len(index.snapshot))
+    return rows
+
+
+def handle_nearest_query(index: TagQueryIndex, query: Dict[str, str]) -> Dict[str, Any]:
+    """Serve `GET /tags/nearest?near=x,y&k=n` for the JSON query endpoint."""
+    with index._lock:
+        if index.snapshot is None:
+            return {'seq': None, 'tag_count': 0, 'tags': []}
+        rows = index.nearest(*_floats(query['near'], 2), int(query.get('k', 1)))
+        return {'seq': index.snapshot.seq, 'tag_count': len(rows), 'tags': index.records(rows)}
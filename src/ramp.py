@@ -0,0 +1,257 @@
+"""Capacity ramp: grow the tag population until the publisher or broker falls behind."""
+
+import copy
+import json
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .main import publish_tick
+from .mqtt_client import MQTTClient
+from .rtls_generator import RTLSGenerator
+
+
+DEFAULT_SLO = {
+    'tick_p99': 0.8,        # fraction of the update interval
+    'ack_p99_ms': 500.0,    # publish call to PUBACK
+    'max_queue_depth': 10000,
+    'min_rate_ratio': 0.95  # achieved / expected location reports per second
+}
+
+
+class AckProbe:
+    """Time from handing a message to paho until the broker acknowledged it.
+
+    Fed from `MQTTClient._publish` (message ids as sent) and the paho
+    `on_publish` callback, which can run first on the network thread, so
+    whichever side arrives second records the latency. With QoS 0 paho
+    reports a message once it is written to the socket, so the latency is
+    the client-side queueing delay only.
+
+    Acks whose send is never recorded (spool replays, messages sent before
+    the probe attached) are forgotten after `early_window` seconds.
+    """
+
+    def __init__(self, early_window: float = 1.0):
+        self.early_window = early_window
+        self._lock = threading.Lock()
+        self._sent: Dict[int, float] = {}
+        self._early: Dict[int, float] = {}
+        self.latencies: List[float] = []
+        self.count = 0
+
+    def sent(self, mid: int):
+        now = time.perf_counter()
+        with self._lock:
+            self.count += 1
+            acked = self._early.pop(mid, None)
+            if acked is not None:
+                self.latencies.append(max(0.0, acked - now))
+            else:
+                self._sent[mid] = now
+
+    def acked(self, mid: int):
+        now = time.perf_counter()
+        with self._lock:
+            sent = self._sent.pop(mid, None)
+            if sent is not None:
+                self.latencies.append(now - sent)
+            else:
+                self._early[mid] = now
+
+    @property
+    def pending(self) -> int:
+        """Messages sent but not acknowledged yet."""
+        return len(self._sent)
+
+    def collect(self) -> List[float]:
+        """Latencies recorded since the last call."""
+        cutoff = time.perf_counter() - self.early_window
+        with self._lock:
+            latencies, self.latencies = self.latencies, []
+            if self._early:
+                self._early = {mid: acked for mid, acked in self._early.items() if acked >= cutoff}
+        return latencies
+
+
+def synthetic_tags(config: Dict, count: int, seed: int = 0) -> List[Dict]:
+    """`count` tag configs spread uniformly over the configured zones.
+
+    Types cycle through those of the configured tags, so per-type movement
+    models and report rates apply to the synthetic population too.
+    """
+    rtls = config['rtls']
+    types = sorted({tag['type'] for tag in rtls.get('tags', [])}) or ['asset']
+    bounds = [RTLSGenerator._get_zone_bounds(zone) for zone in rtls['zones']]
+    rng = random.Random(seed)
+    tags = []
+    for i in range(count):
+        zone = bounds[i % len(bounds)]
+        tags.append({
+            'id': f"ramp_{i:06d}",
+            'name': f"Ramp {i}",
+            'type': types[i % len(types)],
+            'initial_position': {
+                'x': rng.uniform(zone['x_min'], zone['x_max']),
+                'y': rng.uniform(zone['y_min'], zone['y_max']),
+                'z': zone['z_min']
+            }
+        })
+    return tags
+
+
+def slo_breaches(step: Dict[str, Any], interval: float, slo: Dict[str, float]) -> List[str]:
+    """Human-readable SLO violations of one ramp step (empty when it passed)."""
+    breaches = []
+    if step['tick_p99_ms'] > slo['tick_p99'] * interval * 1e3:
+        breaches.append(f"tick p99 {step['tick_p99_ms']:.1f} ms > {slo['tick_p99'] * interval * 1e3:.0f} ms")
+    if step['ack_p99_ms'] is not None and step['ack_p99_ms'] > slo['ack_p99_ms']:
+        breaches.append(f"ack p99 {step['ack_p99_ms']:.1f} ms > {slo['ack_p99_ms']:.0f} ms")
+    if step['max_queue_depth'] > slo['max_queue_depth']:
+        breaches.append(f"queue depth {step['max_queue_depth']} > {slo['max_queue_depth']}")
+    if step['rate_ratio'] < slo['min_rate_ratio']:
+        breaches.append(f"publish rate {step['rate_ratio']:.0%} of expected < {slo['min_rate_ratio']:.0%}")
+    return breaches
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    return float(np.percentile(values, q)) * 1e3 if values else None
+
+
+class CapacityRamp:
+    """Step the synthetic tag population up at each update interval until an SLO breaks.
+
+    Each step runs the normal step-and-publish loop in real time for
+    `step_seconds`, ignoring the first `warmup_ticks` after the population
+    grew, and records tick duration, achieved publish rate, broker ack
+    latency and paho's queue depth.
+    """
+
+    def __init__(self, config: Dict, mqtt_client: MQTTClient, ramp_config: Optional[Dict] = None):
+        self.config = config
+        self.mqtt_client = mqtt_client
+        ramp_config = ramp_config if ramp_config is not None else config.get('ramp', {})
+        self.intervals = list(ramp_config.get('intervals', [config['rtls']['update_interval']]))
+        self.start_tags = ramp_config.get('start_tags', 1000)
+        self.step_tags = ramp_config.get('step_tags', 1000)
+        self.max_tags = ramp_config.get('max_tags', 100000)
+        self.step_seconds = ramp_config.get('step_seconds', 30.0)
+        self.warmup_ticks = ramp_config.get('warmup_ticks', 2)
+        self.slo = {**DEFAULT_SLO, **ramp_config.get('slo', {})}
+        if self.start_tags < 1 or self.step_tags < 1 or any(interval <= 0 for interval in self.intervals):
+            raise ValueError("Ramp start_tags, step_tags and intervals must be positive")
+        self.logger = logging.getLogger(__name__)
+        self.sleep = time.sleep
+
+    def _population(self, interval: float, count: int) -> Dict:
+        """Configuration with the synthetic tags and the interval under test."""
+        config = copy.deepcopy(self.config)
+        config['rtls']['update_interval'] = interval
+        config['rtls']['tags'] = synthetic_tags(self.config, count)
+        return config
+
+    def run_step(self, generator: RTLSGenerator, interval: float) -> Dict[str, Any]:
+        """Run one population size in real time and summarize it."""
+        client, probe = self.mqtt_client, self.mqtt_client.ack_probe
+        ticks = self.warmup_ticks + max(1, round(self.step_seconds / interval))
+        durations, reports, depth = [], 0, 0
+        sent_before, measure_start = probe.count, None
+
+        for tick in range(ticks):
+            if tick == self.warmup_ticks:
+                probe.collect()
+                sent_before, measure_start = probe.count, time.perf_counter()
+            start = time.perf_counter()
+            alerts = generator.step(interval)
+            publish_tick(client, generator, alerts, self.logger)
+            client.service_spool(interval)
+            duration = time.perf_counter() - start
+
+            if tick >= self.warmup_ticks:
+                durations.append(duration)
+                reports += len(generator.updated)
+                depth = max(depth, client.queue_depth())
+            self.sleep(max(0.0, interval - duration))
+
+        wall = time.perf_counter() - measure_start
+        expected = generator.rates.reports_per_second() if generator.rates else len(generator.tags) / interval
+        latencies = probe.collect()
+        return {
+            'tags': len(generator.tags),
+            'ticks': len(durations),
+            'tick_p50_ms': _percentile(durations, 50),
+            'tick_p99_ms': _percentile(durations, 99),
+            'tick_max_ms': max(durations) * 1e3,
+            'expected_reports_per_s': round(expected, 1),
+            'reports_per_s': round(reports / wall, 1),
+            'messages_per_s': round((probe.count - sent_before) / wall, 1),
+            'rate_ratio': reports / wall / expected if expected else 1.0,
+            'ack_p50_ms': _percentile(latencies, 50),
+            'ack_p99_ms': _percentile(latencies, 99),
+            'unacked': probe.pending,
+            'max_queue_depth': depth
+        }
+
+    def run_interval(self, interval: float) -> Dict[str, Any]:
+        """Ramp the population at one update interval until an SLO breaks or max_tags is reached."""
+        count = self.start_tags
+        generator = RTLSGenerator(self._population(interval, count))
+        steps, sustainable, breaches = [], None, []
+        while True:
+            step = self.run_step(generator, interval)
+            breaches = slo_breaches(step, interval, self.slo)
+            step['breaches'] = breaches
+            steps.append(step)
+            self.logger.info(
+                f"Ramp {interval}s x {step['tags']} tags: tick p99 {step['tick_p99_ms']:.1f} ms, "
+                f"{step['reports_per_s']}/{step['expected_reports_per_s']} reports/s, "
+                f"ack p99 {step['ack_p99_ms'] or 0:.1f} ms, queue {step['max_queue_depth']}"
+                + (f" - SLO breached: {'; '.join(breaches)}" if breaches else "")
+            )
+            if breaches:
+                break
+            sustainable = step
+            if count >= self.max_tags:
+                break
+            count = min(count + self.step_tags, self.max_tags)
+            generator.apply_config(self._population(interval, count))
+
+        return {
+            'interval': interval,
+            'sustainable_tags': sustainable['tags'] if sustainable else 0,
+            'sustainable_reports_per_s': sustainable['reports_per_s'] if sustainable else 0.0,
+            'limited_by': breaches or ['max_tags'],
+            'steps': steps
+        }
+
+    def run(self) -> Dict[str, Any]:
+        """Ramp every configured interval; returns the report."""
+        self.mqtt_client.ack_probe = AckProbe()
+        try:
+            results = [self.run_interval(interval) for interval in self.intervals]
+        finally:
+            self.mqtt_client.ack_probe = None
+        return {
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'broker': f"{self.mqtt_client.config['broker']}:{self.mqtt_client.config['port']}",
+            'qos': self.mqtt_client.qos,
+            'payload_format': self.mqtt_client.payload_format,
+            'slo': self.slo,
+            'results': results
+        }
+
+
+def write_report(report: Dict[str, Any], path: str) -> str:
+    """Write the JSON report and return a plain-text summary of it."""
+    Path(path).write_text(json.dumps(report, indent=2))
+    lines = [f"{'interval s':>10} {'tags':>8} {'reports/s':>10}  limited by"]
+    for result in report['results']:
+        lines.append(f"{result['interval']:>10g} {result['sustainable_tags']:>8} "
+                     f"{result['sustainable_reports_per_s']:>10}  {'; '.join(result['limited_by'])}")
+    return '\n'.join(lines)
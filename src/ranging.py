@@ -0,0 +1,143 @@
+"""Anchor-based ranging model with batched multilateration."""
+
+import logging
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+from .models import Zone
+
+
+RANGING_MODES = ('twr', 'tdoa')
+
+# Minimum anchors needed for a 2D fix (TDoA also solves the reference range)
+MIN_ANCHORS = {'twr': 3, 'tdoa': 4}
+
+
+class AnchorSet:
+    """Anchors of one zone with the solver matrices precomputed."""
+
+    def __init__(self, anchors: np.ndarray):
+        self.anchors = np.asarray(anchors, dtype=float)
+        xy = self.anchors[:, :2]
+        sq_norm = np.sum(xy ** 2, axis=1)
+
+        # TWR: subtract the mean equation so the system is linear in (x, y).
+        # The design matrix only depends on the anchors, so its
+        # pseudo-inverse is computed once and reused for every tick.
+        centered = xy - xy.mean(axis=0)
+        self._twr_pinv = np.linalg.pinv(-2.0 * centered)
+        self._twr_const = sq_norm - sq_norm.mean()
+
+        # TDoA: equations are taken relative to anchor 0
+        self._tdoa_geometry = 2.0 * (xy[1:] - xy[0])
+        self._tdoa_const = sq_norm[1:] - sq_norm[0]
+
+    def __len__(self) -> int:
+        return len(self.anchors)
+
+    def true_ranges(self, positions: np.ndarray) -> np.ndarray:
+        """Euclidean tag-to-anchor distances, shape (n_tags, n_anchors)."""
+        diff = positions[:, None, :] - self.anchors[None, :, :]
+        return np.sqrt(np.einsum('ijk,ijk->ij', diff, diff))
+
+    def _heights_sq(self, heights: np.ndarray) -> np.ndarray:
+        """Squared vertical tag-to-anchor offsets, shape (n_tags, n_anchors)."""
+        return (heights[:, None] - self.anchors[None, :, 2]) ** 2
+
+    def solve_twr(self, ranges: np.ndarray, heights: np.ndarray) -> np.ndarray:
+        """Solve (x, y) for a batch of two-way-ranging measurements."""
+        horizontal_sq = np.maximum(ranges ** 2 - self._heights_sq(heights), 0.0)
+        b = horizontal_sq - horizontal_sq.mean(axis=1, keepdims=True) - self._twr_const
+        return b @ self._twr_pinv.T
+
+    def solve_tdoa(self, range_diffs: np.ndarray, heights: np.ndarray) -> np.ndarray:
+        """Solve (x, y) for a batch of range differences relative to anchor 0."""
+        h_sq = self._heights_sq(heights)
+        n = range_diffs.shape[0]
+
+        # Unknowns are (x, y, r0); the r0 column depends on each tag's data
+        design = np.empty((n, len(self) - 1, 3))
+        design[:, :, :2] = self._tdoa_geometry
+        design[:, :, 2] = 2.0 * range_diffs
+        b = self._tdoa_const + h_sq[:, 1:] - h_sq[:, :1] - range_diffs ** 2
+
+        # Batched normal equations with a tiny ridge against degenerate rows
+        design_t = np.transpose(design, (0, 2, 1))
+        normal = design_t @ design + 1e-9 * np.eye(3)
+        rhs = design_t @ b[:, :, None]
+        return np.linalg.solve(normal, rhs)[:, :2, 0]
+
+
+class RangingModel:
+    """Simulate noisy anchor ranges and multilaterate them back to positions."""
+
+    def __init__(self, config: Dict, zones: List[Zone]):
+        self.logger = logging.getLogger(__name__)
+        self.mode = config.get('mode', 'twr')
+        if self.mode not in RANGING_MODES:
+            raise ValueError(f"Unknown ranging mode: {self.mode}")
+
+        self.noise_std = config.get('noise_std', 0.1)
+        self.nlos_probability = config.get('nlos_probability', 0.05)
+        self.nlos_bias = config.get('nlos_bias', 0.5)
+        self.rng = np.random.default_rng(config.get('seed'))
+        self.anchor_sets: Dict[str, AnchorSet] = {}
+        self.rebuild(zones)
+
+    def rebuild(self, zones: List[Zone]):
+        """Recompute per-zone solver matrices from the zone anchors."""
+        self.anchor_sets = {}
+        for zone in zones:
+            if not zone.anchors:
+                continue
+            if len(zone.anchors) < MIN_ANCHORS[self.mode]:
+                self.logger.warning(
+                    f"Zone {zone.id} has {len(zone.anchors)} anchors, "
+                    f"{MIN_ANCHORS[self.mode]} needed for {self.mode}; using true positions"
+                )
+                continue
+            self.anchor_sets[zone.id] = AnchorSet([
+                (a.position.x, a.position.y, a.position.z) for a in zone.anchors
+            ])
+
+    def measure(self, anchor_set: AnchorSet, positions: np.ndarray) -> np.ndarray:
+        """Generate noisy measurements for a batch of tags against one anchor set."""
+        ranges = anchor_set.true_ranges(positions)
+        ranges += self.rng.normal(0.0, self.noise_std, ranges.shape)
+
+        # Non-line-of-sight paths only ever make a range longer
+        if self.nlos_probability > 0:
+            nlos = self.rng.random(ranges.shape) < self.nlos_probability
+            ranges += nlos * self.rng.exponential(self.nlos_bias, ranges.shape)
+
+        if self.mode == 'tdoa':
+            return ranges[:, 1:] - ranges[:, :1]
+        return np.maximum(ranges, 0.0)
+
+    def solve(self, anchor_set: AnchorSet, measurements: np.ndarray,
+              heights: np.ndarray) -> np.ndarray:
+        """Multilaterate a batch of measurements into (x, y) estimates."""
+        if self.mode == 'tdoa':
+            return anchor_set.solve_tdoa(measurements, heights)
+        return anchor_set.solve_twr(measurements, heights)
+
+    def estimate(self, positions: np.ndarray,
+                 zone_ids: Sequence[Optional[str]]) -> np.ndarray:
+        """Estimate positions for all tags, grouped by the zone they are in.
+
+        Tags outside any instrumented zone keep their true position. The tag
+        height is treated as known, so only (x, y) are solved for.
+        """
+        estimates = positions.copy()
+        zone_ids = np.asarray(zone_ids, dtype=object)
+
+        for zone_id, anchor_set in self.anchor_sets.items():
+            mask = zone_ids == zone_id
+            if not mask.any():
+                continue
+
+            batch = positions[mask]
+            measurements = self.measure(anchor_set, batch)
+            estimates[mask, :2] = self.solve(anchor_set, measurements, batch[:, 2])
+
+        return estimates
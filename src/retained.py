@@ -0,0 +1,124 @@
+"""Registry of retained topics, so stale retained state can be cleared exactly."""
+
+import collections
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Set, TextIO
+
+import paho.mqtt.client as mqtt
+
+
+class RetainedRegistry:
+    """Set of topics that currently hold a retained message from this client.
+
+    Brokers do not accept wildcards in PUBLISH topics, so the only way to
+    clear retained state is to publish an empty retained payload to every
+    topic by name. The registry remembers those names. With a `path`, it is
+    kept as an append-only journal of `+topic`/`-topic` lines: only new and
+    cleared topics cost a write, and the file is compacted when opened and
+    closed, so a restarted publisher can still clear what an earlier run left.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self.logger = logging.getLogger(__name__)
+        self.topics: Set[str] = set()
+        self._journal: Optional[TextIO] = None
+        if self.path is not None:
+            self._load()
+            self._compact()
+
+    def __len__(self) -> int:
+        return len(self.topics)
+
+    def __contains__(self, topic: str) -> bool:
+        return topic in self.topics
+
+    def _load(self):
+        """Replay the journal left by an earlier run."""
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                op, topic = line[:1], line[1:].rstrip('\n')
+                if op == '+':
+                    self.topics.add(topic)
+                elif op == '-':
+                    self.topics.discard(topic)
+        self.logger.info(f"Loaded {len(self.topics)} retained topics from {self.path}")
+
+    def _compact(self):
+        """Rewrite the journal as one line per live topic and reopen it for appends."""
+        if self._journal is not None:
+            self._journal.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(self.path.name + '.tmp')
+        with open(temporary, 'w', encoding='utf-8') as f:
+            f.writelines(f"+{topic}\n" for topic in sorted(self.topics))
+        os.replace(temporary, self.path)
+        self._journal = open(self.path, 'a', encoding='utf-8')
+
+    def add(self, topic: str):
+        """Record a retained publish to a topic."""
+        if topic not in self.topics:
+            self.topics.add(topic)
+            if self._journal is not None:
+                self._journal.write(f"+{topic}\n")
+
+    def discard(self, topic: str):
+        """Record that a topic's retained message was cleared."""
+        if topic in self.topics:
+            self.topics.discard(topic)
+            if self._journal is not None:
+                self._journal.write(f"-{topic}\n")
+
+    def flush(self):
+        """Push journal writes to the file."""
+        if self._journal is not None:
+            self._journal.flush()
+
+    def close(self):
+        """Compact and close the journal."""
+        if self._journal is not None:
+            self._compact()
+            self._journal.close()
+            self._journal = None
+
+
+def clear_topics(publish: Callable[[str], mqtt.MQTTMessageInfo], topics: Iterable[str],
+                 max_inflight: int = 1000, timeout: float = 30.0) -> Set[str]:
+    """Publish empty retained payloads to `topics`, at most `max_inflight` unacknowledged at once.
+
+    `publish(topic)` sends one clear and returns paho's message info. Clears
+    are pipelined: a new one is sent as soon as the oldest in flight is
+    acknowledged, so the total time is about one round trip per
+    `max_inflight` topics. Returns the topics whose clear was acknowledged
+    before `timeout` seconds ran out.
+    """
+    deadline = time.monotonic() + timeout
+    window = collections.deque()
+    cleared = set()
+
+    def settle(info: mqtt.MQTTMessageInfo, topic: str) -> bool:
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            info.wait_for_publish(remaining)
+        if info.is_published():
+            cleared.add(topic)
+            return True
+        return False
+
+    for topic in topics:
+        while len(window) >= max_inflight:
+            if not settle(*window.popleft()):
+                return cleared
+        info = publish(topic)
+        if info.rc == mqtt.MQTT_ERR_SUCCESS:
+            window.append((info, topic))
+
+    while window:
+        if not settle(*window.popleft()):
+            break
+    return cleared
@@ -3,10 +3,24 @@
 import random
 import math
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, List, Dict, Optional, Set, Tuple
 import numpy as np
 
-from .models import Tag, Position, Zone, LocationUpdate, ZoneAlert
+from .models import Tag, Position, Zone, Anchor, LocationUpdate, ZoneAlert, ProximityEvent, RuleEvent
+from .ranging import RangingModel
+from .movement import FacilityGraph, MovementPlanner, MOVEMENT_MODELS, ROUTE_MODELS
+from .zone_index import ZoneIndex
+from .kernels import MovementKernel, kind_code
+from .proximity import ProximityMonitor
+from .snapshot import TagSnapshot
+from .query import TagQueryIndex
+from .scenarios import ScenarioEngine
+from .scheduler import RateScheduler
+from .heatmap import HeatmapMonitor
+from .analytics import ZoneAnalytics
+from .rules import RuleEngine
+from .kalman import KalmanFilter
+from .profiling import NULL_TIMER
 
 
 class RTLSGenerator:
@@ -14,55 +28,425 @@ class RTLSGenerator:
     
     def __init__(self, config: Dict):
         self.config = config
+        self.movement_config = config['rtls']['movement']
         self.zones = self._init_zones()
+        self.zone_index = ZoneIndex(self.zones, config['rtls'].get('zone_grid_resolution', 64))
+        self.tag_models: Dict[str, Dict] = {}
         self.tags = self._init_tags()
-        self.movement_config = config['rtls']['movement']
+        self.planner = self._init_planner()
+        self.kernel = self._init_kernel()
+        self.ranging = self._init_ranging()
+        self.kalman = self._init_kalman()
+        self.proximity = self._init_proximity()
+        self.proximity_events: List[ProximityEvent] = []
+        self.scenarios = self._init_scenarios()
+        self.rates = self._init_rates()
+        self.heatmaps = self._init_heatmaps()
+        self.updated: List[Tag] = []
+        self.changed_zones: Set[str] = set()
+        self._zones_dirty = True
+        self.tick = 0
+        self.elapsed = 0.0
+        self.analytics = self._init_analytics()
+        self.rules = self._init_rules()
+        self.rule_events: List[RuleEvent] = []
+        self.timer = NULL_TIMER
+        self._snapshot: Optional[TagSnapshot] = None
+        self.query_index = self._init_query_index()
         
-    def _init_zones(self) -> List[Zone]:
+    def _init_zones(self, rtls_config: Optional[Dict] = None) -> List[Zone]:
         """Initialize zones from configuration."""
         zones = []
-        for zone_config in self.config['rtls']['zones']:
+        for zone_config in (rtls_config or self.config['rtls'])['zones']:
+            bounds = self._get_zone_bounds(zone_config)
             zone = Zone(
                 id=zone_config['id'],
                 name=zone_config['name'],
-                x_min=zone_config['bounds']['x_min'],
-                x_max=zone_config['bounds']['x_max'],
-                y_min=zone_config['bounds']['y_min'],
-                y_max=zone_config['bounds']['y_max'],
-                z_min=zone_config['bounds']['z_min'],
-                z_max=zone_config['bounds']['z_max']
+                x_min=bounds['x_min'],
+                x_max=bounds['x_max'],
+                y_min=bounds['y_min'],
+                y_max=bounds['y_max'],
+                z_min=bounds['z_min'],
+                z_max=bounds['z_max'],
+                polygon=[tuple(v) for v in zone_config['polygon']] if 'polygon' in zone_config else None,
+                anchors=[
+                    Anchor(
+                        id=anchor['id'],
+                        position=Position(anchor['x'], anchor['y'], anchor.get('z', 0))
+                    )
+                    for anchor in zone_config.get('anchors', [])
+                ]
             )
             zones.append(zone)
         return zones
     
+    @staticmethod
+    def _get_zone_bounds(zone_config: Dict) -> Dict[str, float]:
+        """Get box bounds for a zone; polygon zones use their bounding box."""
+        if 'polygon' not in zone_config:
+            return zone_config['bounds']
+        
+        xs = [v[0] for v in zone_config['polygon']]
+        ys = [v[1] for v in zone_config['polygon']]
+        levels = zone_config.get('bounds', {})
+        return {
+            'x_min': min(xs),
+            'x_max': max(xs),
+            'y_min': min(ys),
+            'y_max': max(ys),
+            'z_min': levels.get('z_min', 0),
+            'z_max': levels.get('z_max', math.inf)
+        }
+    
+    def _init_kernel(self) -> Optional[MovementKernel]:
+        """Initialize the optional batched random-walk kernel."""
+        backend = self.movement_config.get('backend', 'python')
+        if backend == 'python':
+            return None
+        return MovementKernel(backend, self.movement_config, self.movement_config.get('seed'))
+    
+    def _init_ranging(self) -> Optional[RangingModel]:
+        """Initialize the optional anchor ranging sensor layer."""
+        ranging_config = self.config['rtls'].get('ranging', {})
+        if not ranging_config.get('enabled', False):
+            return None
+        return RangingModel(ranging_config, self.zones)
+    
+    def _init_kalman(self) -> Optional[KalmanFilter]:
+        """Initialize the optional constant-velocity Kalman smoothing stage."""
+        kalman_config = self.config['rtls'].get('kalman', {})
+        if not kalman_config.get('enabled', False):
+            return None
+        # Default to the ranging noise when positions come from the sensor layer
+        ranging_config = self.config['rtls'].get('ranging', {})
+        default_noise = ranging_config.get('noise_std', 0.1) if ranging_config.get('enabled', False) else 0.1
+        return KalmanFilter(
+            process_noise=kalman_config.get('process_noise', 0.5),
+            measurement_noise=kalman_config.get('measurement_noise', default_noise),
+            initial_velocity_std=kalman_config.get('initial_velocity_std', self.movement_config['max_speed'])
+        )
+    
+    def _init_proximity(self) -> Optional[ProximityMonitor]:
+        """Initialize optional tag-to-tag proximity detection."""
+        proximity_config = self.config['rtls'].get('proximity', {})
+        if not proximity_config.get('enabled', False):
+            return None
+        return ProximityMonitor(proximity_config)
+    
+    def _init_query_index(self) -> Optional[TagQueryIndex]:
+        """Initialize the per-tick maintained query index."""
+        query_config = self.config['rtls'].get('query', {})
+        if not query_config.get('enabled', False):
+            return None
+        return TagQueryIndex(query_config.get('cell_size', 10.0))
+    
+    def _init_scenarios(self) -> Optional[ScenarioEngine]:
+        """Initialize the optional scheduled anomaly scenarios."""
+        scenario_config = self.config['rtls'].get('scenarios', {})
+        if not scenario_config.get('enabled', False):
+            return None
+        return ScenarioEngine(scenario_config, self.movement_config['max_speed'])
+    
+    def _init_heatmaps(self) -> Optional[HeatmapMonitor]:
+        """Initialize optional trails and zone occupancy heatmaps."""
+        heatmap_config = self.config['rtls'].get('heatmaps', {})
+        if not heatmap_config.get('enabled', False):
+            return None
+        return HeatmapMonitor(heatmap_config, self.zones)
+    
+    def _init_analytics(self) -> Optional[ZoneAnalytics]:
+        """Initialize optional zone dwell and flow analytics."""
+        analytics_config = self.config['rtls'].get('analytics', {})
+        if not analytics_config.get('enabled', False):
+            return None
+        analytics = ZoneAnalytics(analytics_config, [zone.id for zone in self.zones])
+        analytics.seed([(tag.id, tag.zone_id) for tag in self.tags.values()], self.elapsed)
+        return analytics
+    
+    def _init_rules(self) -> Optional[RuleEngine]:
+        """Initialize optional config-declared tag rules."""
+        rules_config = self.config['rtls'].get('rules', {})
+        if not rules_config.get('enabled', False):
+            return None
+        return RuleEngine(rules_config)
+    
+    def _init_rates(self) -> Optional[RateScheduler]:
+        """Initialize optional per-tag report rates."""
+        rates_config = self.config['rtls'].get('rates', {})
+        if not rates_config.get('enabled', False):
+            return None
+        
+        rates = RateScheduler(
+            self.config['rtls']['update_interval'],
+            slots=rates_config.get('wheel_slots', 256),
+            stagger=rates_config.get('stagger', True)
+        )
+        for tag_config in self.config['rtls']['tags']:
+            rates.add(tag_config['id'], self._get_update_interval(tag_config))
+        return rates
+    
+    def _get_update_interval(self, tag_config: Dict, rtls_config: Optional[Dict] = None) -> float:
+        """Resolve a tag's report interval (per-tag, then per-type, then global)."""
+        rtls_config = rtls_config or self.config['rtls']
+        types = rtls_config.get('rates', {}).get('types', {})
+        interval = tag_config.get(
+            'update_interval',
+            types.get(tag_config['type'], rtls_config['update_interval'])
+        )
+        if interval <= 0:
+            raise ValueError(f"Update interval for {tag_config['id']} must be positive")
+        return interval
+    
     def _init_tags(self) -> Dict[str, Tag]:
         """Initialize tags from configuration."""
         tags = {}
         for tag_config in self.config['rtls']['tags']:
-            position = Position(
-                x=tag_config['initial_position']['x'],
-                y=tag_config['initial_position']['y'],
-                z=tag_config['initial_position'].get('z', 0)
-            )
+            model = self._get_movement_model(tag_config)
+            tags[tag_config['id']] = self._create_tag(tag_config, model, self.zones)
+            self.tag_models[tag_config['id']] = model
             
-            tag = Tag(
-                id=tag_config['id'],
-                name=tag_config['name'],
-                type=tag_config['type'],
-                position=position,
-                battery=tag_config.get('battery', 100),
-                heading=random.uniform(0, 360)
-            )
+        return tags
+    
+    def _create_tag(self, tag_config: Dict, model: Dict, zones: List[Zone]) -> Tag:
+        """Create a tag at its configured initial position in one of `zones`."""
+        position = Position(
+            x=tag_config['initial_position']['x'],
+            y=tag_config['initial_position']['y'],
+            z=tag_config['initial_position'].get('z', 0)
+        )
+        
+        tag = Tag(
+            id=tag_config['id'],
+            name=tag_config['name'],
+            type=tag_config['type'],
+            position=position,
+            battery=tag_config.get('battery', 100),
+            heading=random.uniform(0, 360),
+            movement=model['type']
+        )
+        
+        # Set initial zone
+        tag.zone_id = self._get_current_zone(position, zones)
+        return tag
+    
+    def _get_movement_model(self, tag_config: Dict) -> Dict:
+        """Resolve the movement model for a tag (per-tag, then per-type)."""
+        models = self.movement_config.get('models', {})
+        model = tag_config.get('movement', models.get(tag_config['type'], 'random_walk'))
+        if isinstance(model, str):
+            model = {'type': model}
+        
+        if model['type'] not in MOVEMENT_MODELS:
+            raise ValueError(f"Unknown movement model for {tag_config['id']}: {model['type']}")
+        return model
+    
+    def _init_planner(self) -> Optional[MovementPlanner]:
+        """Initialize route-following movement over the facility graph."""
+        route_tags = [
+            (tag, self.tag_models[tag.id])
+            for tag in self.tags.values()
+            if tag.movement in ROUTE_MODELS
+        ]
+        if not route_tags:
+            return None
+        
+        facility_config = self.config['rtls'].get('facility', {})
+        if not facility_config.get('waypoints'):
+            raise ValueError("Route-following movement models require rtls.facility waypoints")
+        
+        planner = MovementPlanner(
+            FacilityGraph.from_config(facility_config),
+            self.zones,
+            zone_waypoints=self._get_zone_waypoints(),
+            seed=self.movement_config.get('seed')
+        )
+        planner.add_tags(route_tags)
+        return planner
+    
+    def _get_zone_waypoints(self) -> Dict[str, str]:
+        """Get explicit shuttle stop waypoints configured on zones."""
+        return {
+            zone_config['id']: zone_config['waypoint']
+            for zone_config in self.config['rtls']['zones']
+            if 'waypoint' in zone_config
+        }
+    
+    def apply_config(self, config: Dict) -> Dict[str, List[str]]:
+        """Apply a new configuration incrementally, keeping live tag state.
+        
+        Tags and zones are diffed by ID. Live tags keep their position,
+        battery and signal; only the indexes affected by a change are rebuilt.
+        """
+        old_rtls = self.config['rtls']
+        new_rtls = config['rtls']
+        old_zones = {z['id']: z for z in old_rtls['zones']}
+        new_zones = {z['id']: z for z in new_rtls['zones']}
+        old_tags = {t['id']: t for t in old_rtls['tags']}
+        new_tags = {t['id']: t for t in new_rtls['tags']}
+        
+        changes = {
+            'zones_added': [z for z in new_zones if z not in old_zones],
+            'zones_removed': [z for z in old_zones if z not in new_zones],
+            'zones_changed': [z for z in new_zones if z in old_zones and new_zones[z] != old_zones[z]],
+            'tags_added': [t for t in new_tags if t not in old_tags],
+            'tags_removed': [t for t in old_tags if t not in new_tags],
+            'tags_changed': [t for t in new_tags if t in old_tags and new_tags[t] != old_tags[t]]
+        }
+        resolution = new_rtls.get('zone_grid_resolution', 64)
+        zones_dirty = (
+            list(old_zones) != list(new_zones)
+            or changes['zones_changed']
+            or resolution != self.zone_index.resolution
+        )
+        
+        # Build everything that can fail before touching any running state
+        self.movement_config = new_rtls['movement']
+        try:
+            new_models = {tag_id: self._get_movement_model(c) for tag_id, c in new_tags.items()}
+            kernel = self._init_kernel() if new_rtls['movement'] != old_rtls['movement'] else self.kernel
+            if new_rtls.get('rates', {}).get('enabled', False):
+                for tag_config in new_tags.values():
+                    self._get_update_interval(tag_config, new_rtls)
+            if (any(m['type'] in ROUTE_MODELS for m in new_models.values())
+                    and not new_rtls.get('facility', {}).get('waypoints')):
+                raise ValueError("Route-following movement models require rtls.facility waypoints")
             
-            # Set initial zone
-            tag.zone_id = self._get_current_zone(position)
-            tags[tag_config['id']] = tag
+            # Zones: rebuild the index, reusing prepared polygons that did not change
+            zones, zone_index = self.zones, self.zone_index
+            if zones_dirty:
+                zones = self._init_zones(new_rtls)
+                cache = self.zone_index.polygons if resolution == self.zone_index.resolution else None
+                zone_index = ZoneIndex(zones, resolution, cache=cache)
             
-        return tags
+            added_tags = {
+                tag_id: self._create_tag(new_tags[tag_id], new_models[tag_id], zones)
+                for tag_id in changes['tags_added']
+            }
+            renamed = {tag_id: (new_tags[tag_id]['name'], new_tags[tag_id]['type'])
+                       for tag_id in changes['tags_changed']}
+        except (KeyError, TypeError, ValueError):
+            self.movement_config = old_rtls['movement']
+            raise
+        
+        self.config = config
+        if zones_dirty:
+            self.zones = zones
+            self.zone_index = zone_index
+            self._zones_dirty = True
+            if self.planner:
+                self.planner.set_zones(self.zones, self._get_zone_waypoints())
+        
+        # Tags: remove, add, and update changed tags in place
+        planner_pending = []
+        for tag_id in changes['tags_removed']:
+            del self.tags[tag_id]
+            self.tag_models.pop(tag_id, None)
+            if self.planner:
+                self.planner.remove_tag(tag_id)
+        
+        for tag_id, tag in added_tags.items():
+            self.tags[tag_id] = tag
+            self.tag_models[tag_id] = new_models[tag_id]
+            if tag.movement in ROUTE_MODELS:
+                planner_pending.append(tag)
+        
+        for tag_id, (name, tag_type) in renamed.items():
+            tag = self.tags[tag_id]
+            tag.name = name
+            tag.type = tag_type
+        
+        # Models can change through rtls.movement.models without the tag's own entry changing
+        for tag_id, tag in self.tags.items():
+            if tag_id not in added_tags and new_models[tag_id] != self.tag_models[tag_id]:
+                if self.planner:
+                    self.planner.remove_tag(tag_id)
+                tag.movement = new_models[tag_id]['type']
+                self.tag_models[tag_id] = new_models[tag_id]
+                if tag.movement in ROUTE_MODELS:
+                    planner_pending.append(tag)
+        
+        self.kernel = kernel
+        
+        # Routes: only rebuild the planner when the facility graph changed
+        facility_changed = new_rtls.get('facility') != old_rtls.get('facility')
+        if facility_changed or (planner_pending and self.planner is None):
+            self.planner = self._init_planner()
+        elif planner_pending:
+            self.planner.add_tags([(tag, self.tag_models[tag.id]) for tag in planner_pending])
+        
+        # Sensor stages
+        if new_rtls.get('ranging') != old_rtls.get('ranging'):
+            self.ranging = self._init_ranging()
+        elif zones_dirty and self.ranging:
+            self.ranging.rebuild(self.zones)
+        
+        if new_rtls.get('kalman') != old_rtls.get('kalman') or (
+                self.kalman and new_rtls.get('ranging') != old_rtls.get('ranging')):
+            self.kalman = self._init_kalman()
+            for tag in self.tags.values():
+                tag.velocity = tag.position_std = tag.velocity_std = None
+                if not self.ranging:
+                    tag.estimated_position = None
+        elif self.kalman:
+            for tag_id in changes['tags_removed']:
+                self.kalman.remove(tag_id)
+        
+        # Without a Kalman filter nothing refills old ranging estimates
+        if new_rtls.get('ranging') != old_rtls.get('ranging') and not self.kalman:
+            for tag in self.tags.values():
+                tag.estimated_position = None
+        
+        if new_rtls.get('proximity') != old_rtls.get('proximity'):
+            self.proximity = self._init_proximity()
+            self.proximity_events = []
+        
+        if new_rtls.get('scenarios') != old_rtls.get('scenarios'):
+            self.scenarios = self._init_scenarios()
+            if self.scenarios:
+                self.scenarios.skip_until(self.elapsed)
+        
+        # Report rates: rebuild on a new tick length, otherwise reschedule changed tags
+        if (new_rtls.get('rates') != old_rtls.get('rates')
+                or new_rtls['update_interval'] != old_rtls['update_interval']):
+            self.rates = self._init_rates()
+        elif self.rates:
+            for tag_id in changes['tags_removed']:
+                self.rates.remove(tag_id)
+            for tag_id in changes['tags_added'] + changes['tags_changed']:
+                self.rates.add(tag_id, self._get_update_interval(new_tags[tag_id]))
+        
+        if new_rtls.get('heatmaps') != old_rtls.get('heatmaps'):
+            self.heatmaps = self._init_heatmaps()
+        elif self.heatmaps:
+            if zones_dirty:
+                self.heatmaps.grids.set_zones(self.zones)
+            for tag_id in changes['tags_removed']:
+                self.heatmaps.trails.remove(tag_id)
+        
+        if new_rtls.get('analytics') != old_rtls.get('analytics'):
+            self.analytics = self._init_analytics()
+        elif self.analytics:
+            if zones_dirty:
+                self.analytics.set_zones([zone.id for zone in self.zones])
+            for tag_id in changes['tags_removed']:
+                self.analytics.forget(tag_id)
+            self.analytics.seed(
+                [(tag_id, self.tags[tag_id].zone_id) for tag_id in changes['tags_added']], self.elapsed
+            )
+        
+        if new_rtls.get('rules') != old_rtls.get('rules'):
+            self.rules = self._init_rules()
+            self.rule_events = []
+        
+        if new_rtls.get('query') != old_rtls.get('query'):
+            self.query_index = self._init_query_index()
+        self._snapshot = None
+        
+        return changes
     
-    def _get_current_zone(self, position: Position) -> Optional[str]:
+    def _get_current_zone(self, position: Position, zones: Optional[List[Zone]] = None) -> Optional[str]:
         """Get the zone ID containing the position."""
-        for zone in self.zones:
+        for zone in self.zones if zones is None else zones:
             if zone.contains(position):
                 return zone.id
         return None
@@ -76,6 +460,15 @@ class RTLSGenerator:
     
     def update_tag_position(self, tag: Tag, dt: float) -> Optional[ZoneAlert]:
         """Update tag position with realistic movement."""
+        self._update_tag_state(tag, dt)
+        
+        # Check for zone transitions
+        alert = self._check_zone_transition(tag, self._get_current_zone(tag.position))
+        tag.last_update = datetime.utcnow()
+        return alert
+    
+    def _update_tag_state(self, tag: Tag, dt: float):
+        """Update battery, signal and movement for one tag."""
         # Update battery (slow drain)
         if random.random() < 0.001:
             tag.battery = max(0, tag.battery - 1)
@@ -83,8 +476,11 @@ class RTLSGenerator:
         # Update RSSI with some noise
         tag.rssi = max(-90, min(-40, tag.rssi + random.randint(-5, 5)))
         
-        # Movement logic based on tag type
-        if tag.type == 'asset':
+        # Movement logic based on tag type; route-following tags are
+        # advanced in batch by the planner and idle tags stay put
+        if tag.movement != 'random_walk':
+            pass
+        elif tag.type == 'asset':
             # Assets move rarely
             if random.random() < 0.01:
                 self._move_tag(tag, dt, max_speed=1.0)
@@ -94,9 +490,9 @@ class RTLSGenerator:
         else:  # person
             # People move at moderate speeds
             self._move_tag(tag, dt, max_speed=2.0)
-        
-        # Check for zone transitions
-        new_zone_id = self._get_current_zone(tag.position)
+    
+    def _check_zone_transition(self, tag: Tag, new_zone_id: Optional[str]) -> Optional[ZoneAlert]:
+        """Record the tag's new zone and build an alert if it changed."""
         alert = None
         
         if new_zone_id != tag.zone_id:
@@ -129,7 +525,6 @@ class RTLSGenerator:
             
             tag.zone_id = new_zone_id
         
-        tag.last_update = datetime.utcnow()
         return alert
     
     def _move_tag(self, tag: Tag, dt: float, max_speed: float):
@@ -157,6 +552,13 @@ class RTLSGenerator:
         # Boundary checking - bounce off walls
         for zone in self.zones:
             if zone.contains(tag.position):
+                if zone.polygon is not None:
+                    # Turn back at polygon walls instead of crossing them
+                    if not zone.contains(Position(new_x, new_y, tag.position.z)):
+                        tag.heading = (tag.heading + 180) % 360
+                        new_x, new_y = tag.position.x, tag.position.y
+                    break
+                
                 if new_x <= zone.x_min or new_x >= zone.x_max:
                     tag.heading = (180 - tag.heading) % 360
                     new_x = max(zone.x_min, min(zone.x_max, new_x))
@@ -175,6 +577,267 @@ class RTLSGenerator:
             tag.position.z += random.uniform(-0.1, 0.1)
             tag.position.z = max(0, min(2, tag.position.z))
     
+    def step(self, dt: float) -> List[ZoneAlert]:
+        """Advance tags by one tick and run the enabled sensor stages.
+        
+        With report rates enabled only the tags due this tick are stepped
+        (each by the time since its last report), classified and ranged;
+        they are listed in `updated` for publishing.
+        """
+        timer = self.timer
+        if self.planner:
+            with timer.stage('planner'):
+                self.planner.advance(dt)
+        
+        if self.rates:
+            with timer.stage('schedule'):
+                due = self.rates.advance()
+                tags = [self.tags[tag_id] for tag_id, _ in due]
+                tag_dts = [ticks * dt for _, ticks in due]
+        else:
+            tags = list(self.tags.values())
+            tag_dts = [dt] * len(tags)
+        
+        zone_rows = None
+        with timer.stage('tag_state'):
+            if self.kernel:
+                positions, old_rows, zone_rows = self._step_kernel(tags, tag_dts)
+            else:
+                for tag, tag_dt in zip(tags, tag_dts):
+                    self._update_tag_state(tag, tag_dt)
+        
+        if self.scenarios:
+            with timer.stage('scenarios'):
+                self._apply_scenarios(list(self.tags.values()), dt)
+            # Scenario events can move tags after the kernel classified them
+            zone_rows = None
+        
+        # Classify the stepped tags into zones in one batch
+        with timer.stage('zones'):
+            self.changed_zones = {zone.id for zone in self.zones} if self._zones_dirty else set()
+            self._zones_dirty = False
+            now = datetime.utcnow()
+            for tag in tags:
+                tag.last_update = now
+            if self.kernel:
+                # Only tags whose zone row changed can raise an alert
+                if zone_rows is None:
+                    positions = self._positions(tags)
+                    zone_rows = self.zone_index.classify(positions)
+                zone_ids = self.zone_index.zone_ids + [None]
+                moved = [(tags[i], zone_ids[zone_rows[i]]) for i in np.flatnonzero(zone_rows != old_rows).tolist()]
+            else:
+                positions = self._positions(tags)
+                moved = zip(tags, self.zone_index.classify_ids(positions))
+            alerts = []
+            transitions = []
+            for tag, zone_id in moved:
+                if zone_id != tag.zone_id:
+                    self.changed_zones.update(z for z in (tag.zone_id, zone_id) if z is not None)
+                    transitions.append((tag.id, tag.zone_id, zone_id))
+                alert = self._check_zone_transition(tag, zone_id)
+                if alert:
+                    alerts.append(alert)
+        
+        if self.proximity:
+            with timer.stage('proximity'):
+                all_tags = list(self.tags.values())
+                self.proximity_events = self.proximity.detect(
+                    [tag.id for tag in all_tags],
+                    [tag.type for tag in all_tags],
+                    positions if self.rates is None else self.get_positions(),
+                    now=self.elapsed + dt
+                )
+        
+        measured = None
+        if self.ranging:
+            with timer.stage('ranging'):
+                measured = self.apply_ranging(tags)
+        
+        if self.kalman:
+            with timer.stage('kalman'):
+                self._apply_kalman(tags, self._positions(tags) if measured is None else measured, tag_dts)
+        
+        self.updated = tags
+        self.tick += 1
+        self.elapsed += dt
+        if self.heatmaps:
+            with timer.stage('heatmaps'):
+                self._update_heatmaps(tags, dt)
+        if self.analytics:
+            with timer.stage('analytics'):
+                self.analytics.update(transitions, self.elapsed, dt)
+        if self.rules:
+            with timer.stage('rules'):
+                self.rule_events = self.rules.evaluate(self.snapshot(), self.elapsed)
+        if self.query_index:
+            with timer.stage('query_index'):
+                self.query_index.update(self.snapshot())
+        
+        return alerts
+    
+    def _step_kernel(self, tags: List[Tag], tag_dts: List[float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Step tags through the batched kernel and write the results back.
+        
+        Returns the new positions, the zone rows the tags were in before
+        the step (-2 for a zone that no longer exists) and after it.
+        """
+        rows = {zone_id: k for k, zone_id in enumerate(self.zone_index.zone_ids)}
+        rows[None] = -1
+        old_rows = np.array([rows.get(tag.zone_id, -2) for tag in tags], dtype=np.int64)
+        state = {
+            'positions': self._positions(tags),
+            'heading': np.array([tag.heading for tag in tags], dtype=float),
+            'speed': np.array([tag.speed for tag in tags], dtype=float),
+            'battery': np.array([tag.battery for tag in tags], dtype=np.int64),
+            'rssi': np.array([tag.rssi for tag in tags], dtype=np.int64),
+            'kind': np.array([kind_code(tag.type, tag.movement) for tag in tags], dtype=np.int64)
+        }
+        zone_rows = self.kernel.step(state, np.asarray(tag_dts, dtype=float), self.zone_index)
+        
+        columns = [*state['positions'].T.tolist()] + [
+            state[key].tolist() for key in ('heading', 'speed', 'battery', 'rssi')
+        ]
+        for tag, x, y, z, heading, speed, battery, rssi in zip(tags, *columns):
+            position = tag.position
+            position.x = x
+            position.y = y
+            position.z = z
+            tag.heading = heading
+            tag.speed = speed
+            tag.battery = battery
+            tag.rssi = rssi
+        return state['positions'], old_rows, zone_rows
+    
+    def _update_heatmaps(self, tags: List[Tag], dt: float):
+        """Feed published positions into the trails and occupancy grids."""
+        snapshot = self.snapshot()
+        # Without report rates the stepped tags are all tags in snapshot order;
+        # the scheduler returns due tags in its own order
+        if self.rates is None:
+            reported = snapshot.positions
+        else:
+            published = [tag.estimated_position or tag.position for tag in tags]
+            reported = np.array([(p.x, p.y, p.z) for p in published], dtype=float).reshape(-1, 3)
+        self.heatmaps.update(
+            [tag.id for tag in tags], reported,
+            snapshot.positions, self.zone_index.classify(snapshot.positions),
+            self.elapsed, dt
+        )
+    
+    def _apply_scenarios(self, tags: List[Tag], dt: float):
+        """Apply scenario events due this tick and write back changed tags."""
+        events = self.scenarios.due(self.elapsed, dt)
+        if not events:
+            return
+        
+        state = {
+            'types': np.array([tag.type for tag in tags], dtype=object),
+            'zone_ids': np.array([tag.zone_id for tag in tags], dtype=object),
+            'positions': self._positions(tags),
+            'battery': np.array([tag.battery for tag in tags], dtype=int),
+            'rssi': np.array([tag.rssi for tag in tags], dtype=int),
+            'speed': np.array([tag.speed for tag in tags], dtype=float)
+        }
+        changed = self.scenarios.apply(self.elapsed, dt, state, events)
+        
+        for column in ('battery', 'rssi', 'speed'):
+            if column in changed:
+                rows = changed[column]
+                for row, value in zip(rows.tolist(), state[column][rows].tolist()):
+                    setattr(tags[row], column, value)
+        if 'positions' in changed:
+            rows = changed['positions']
+            for row, (x, y, _) in zip(rows.tolist(), state['positions'][rows].tolist()):
+                tags[row].position.x = x
+                tags[row].position.y = y
+    
+    @staticmethod
+    def _positions(tags: Iterable[Tag]) -> np.ndarray:
+        """True positions of the given tags as an (n, 3) array."""
+        # Gathering per column avoids building a tuple per tag
+        positions = [tag.position for tag in tags]
+        return np.array(
+            [[p.x for p in positions], [p.y for p in positions], [p.z for p in positions]],
+            dtype=float
+        ).T.reshape(-1, 3)
+    
+    def get_positions(self) -> np.ndarray:
+        """Get true positions of all tags as an (n, 3) array in tag order."""
+        return self._positions(self.tags.values())
+    
+    def apply_ranging(self, tags: Optional[List[Tag]] = None) -> np.ndarray:
+        """Replace published positions with multilaterated anchor estimates."""
+        if tags is None:
+            tags = list(self.tags.values())
+        if not tags:
+            return np.empty((0, 3))
+        
+        estimates = self.ranging.estimate(
+            self._positions(tags),
+            [tag.zone_id for tag in tags]
+        )
+        for tag, (x, y, z) in zip(tags, estimates.tolist()):
+            tag.estimated_position = Position(x, y, z)
+        return estimates
+    
+    def _apply_kalman(self, tags: List[Tag], measured: np.ndarray, tag_dts: List[float]):
+        """Filter the measured positions and publish the filtered state."""
+        if not tags:
+            return
+        positions, velocities, position_std, velocity_std = self.kalman.update(
+            [tag.id for tag in tags], measured, np.array(tag_dts)
+        )
+        for tag, (x, y, z), velocity, p_std, v_std in zip(
+                tags, positions.tolist(), velocities.tolist(), position_std.tolist(), velocity_std.tolist()):
+            tag.estimated_position = Position(x, y, z)
+            tag.velocity = tuple(velocity)
+            tag.position_std = p_std
+            tag.velocity_std = v_std
+    
+    def snapshot(self) -> TagSnapshot:
+        """Get a columnar snapshot of all tags, built at most once per tick."""
+        if self._snapshot is None or self._snapshot.seq != self.tick:
+            self._snapshot = TagSnapshot.from_tags(self.tags.values(), self.tick)
+        return self._snapshot
+    
+    def _query(self) -> TagQueryIndex:
+        """Get a query index that reflects the current tick."""
+        if self.query_index is None:
+            self.query_index = TagQueryIndex()
+        if self.query_index.snapshot is None or self.query_index.snapshot.seq != self.tick:
+            self.query_index.update(self.snapshot())
+        return self.query_index
+    
+    def _tags_for_rows(self, rows: np.ndarray) -> List[Tag]:
+        """Map index rows back to Tag objects."""
+        ids = self.query_index.snapshot.ids
+        return [self.tags[ids[row]] for row in rows.tolist() if ids[row] in self.tags]
+    
+    def get_tags_in_bbox(self, x_min: float, y_min: float, x_max: float, y_max: float) -> List[Tag]:
+        """Get all tags inside a rectangle."""
+        return self._tags_for_rows(self._query().in_bbox(x_min, y_min, x_max, y_max))
+    
+    def get_tags_in_radius(self, x: float, y: float, radius: float) -> List[Tag]:
+        """Get all tags within a radius of a point, nearest first."""
+        return self._tags_for_rows(self._query().in_radius(x, y, radius))
+    
+    def get_nearest_tags(self, x: float, y: float, k: int = 1) -> List[Tag]:
+        """Get the k tags nearest to a point, nearest first."""
+        return self._tags_for_rows(self._query().nearest(x, y, k))
+    
+    def get_tags_by_type(self, tag_type: str) -> List[Tag]:
+        """Get all tags of a type."""
+        return self._tags_for_rows(self._query().by_type(tag_type))
+    
+    def get_low_battery_tags(self, threshold: int = 15) -> List[Tag]:
+        """Get tags with battery below a threshold, lowest first."""
+        return self._tags_for_rows(self._query().battery_below(threshold))
+    
+    def get_weak_signal_tags(self, threshold: int = -85) -> List[Tag]:
+        """Get tags with RSSI below a threshold, weakest first."""
+        return self._tags_for_rows(self._query().rssi_below(threshold))
+    
     def get_location_update(self, tag_id: str) -> Optional[LocationUpdate]:
         """Get current location update for a tag."""
         tag = self.tags.get(tag_id)
@@ -0,0 +1,277 @@
+"""Config-declared tag rules compiled into vectorized NumPy predicates."""
+
+import ast
+import operator
+from datetime import datetime
+from functools import reduce
+from typing import Callable, Dict, List, Tuple
+import numpy as np
+
+from .models import RuleEvent
+from .snapshot import TagSnapshot
+
+
+NUMERIC_FIELDS = ('x', 'y', 'z', 'speed', 'heading', 'battery', 'rssi', 'dwell')
+STRING_FIELDS = ('id', 'type', 'zone')
+
+_COMPARE = {
+    ast.Eq: operator.eq, ast.NotEq: operator.ne,
+    ast.Lt: operator.lt, ast.LtE: operator.le,
+    ast.Gt: operator.gt, ast.GtE: operator.ge,
+    ast.Is: operator.eq, ast.IsNot: operator.ne
+}
+_ARITHMETIC = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+
+State = Dict[str, np.ndarray]
+Compiled = Tuple[Callable[[State], object], str]
+
+
+def _kind(value) -> str:
+    """Type class of a literal: 'num', 'str' or 'none'."""
+    if value is None:
+        return 'none'
+    if isinstance(value, str):
+        return 'str'
+    if isinstance(value, (int, float)):
+        return 'num'
+    raise ValueError(f"Unsupported literal {value!r}")
+
+
+def _compile_node(node: ast.AST, source: str) -> Compiled:
+    """Compile one expression node into a function of the state columns."""
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile_predicate(value, source) for value in node.values]
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        return (lambda state: reduce(combine, (part(state) for part in parts))), 'bool'
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        operand = _compile_predicate(node.operand, source)
+        return (lambda state: ~operand(state)), 'bool'
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        operand, kind = _compile_node(node.operand, source)
+        if kind != 'num':
+            raise ValueError(f"Cannot negate a {kind} in rule {source!r}")
+        return (lambda state: -operand(state)), 'num'
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+        (left, left_kind), (right, right_kind) = _compile_node(node.left, source), _compile_node(node.right, source)
+        if left_kind != 'num' or right_kind != 'num':
+            raise ValueError(f"Arithmetic needs numbers in rule {source!r}")
+        op = _ARITHMETIC[type(node.op)]
+        return (lambda state: op(left(state), right(state))), 'num'
+
+    if isinstance(node, ast.Compare):
+        return _compile_compare(node, source), 'bool'
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name in NUMERIC_FIELDS:
+            return (lambda state: state[name]), 'num'
+        if name in STRING_FIELDS:
+            return (lambda state: state[name]), 'str'
+        raise ValueError(f"Unknown field {name!r} in rule {source!r}, expected one of "
+                         f"{', '.join(NUMERIC_FIELDS + STRING_FIELDS)}")
+
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return (lambda state: value), _kind(value)
+
+    raise ValueError(f"Unsupported syntax {type(node).__name__} in rule {source!r}")
+
+
+def _compile_predicate(node: ast.AST, source: str) -> Callable[[State], np.ndarray]:
+    """Compile a node that must evaluate to a boolean mask."""
+    function, kind = _compile_node(node, source)
+    if kind != 'bool':
+        raise ValueError(f"Expected a condition, got a {kind} value in rule {source!r}")
+    return function
+
+
+def _compile_compare(node: ast.Compare, source: str) -> Callable[[State], np.ndarray]:
+    """Compile a (possibly chained) comparison, including `in` lists."""
+    tests = []
+    left = _compile_node(node.left, source)
+    for op, comparator in zip(node.ops, node.comparators):
+        if isinstance(op, (ast.In, ast.NotIn)):
+            if not isinstance(comparator, (ast.List, ast.Tuple, ast.Set)):
+                raise ValueError(f"`in` needs a literal list in rule {source!r}")
+            options = [_compile_node(element, source) for element in comparator.elts]
+            for _, kind in options:
+                _check_kinds(left[1], kind, source)
+            tests.append(_membership(left[0], [function for function, _ in options], isinstance(op, ast.NotIn)))
+            continue
+
+        if type(op) not in _COMPARE:
+            raise ValueError(f"Unsupported comparison in rule {source!r}")
+        right = _compile_node(comparator, source)
+        _check_kinds(left[1], right[1], source)
+        if isinstance(op, (ast.Is, ast.IsNot)) and right[1] != 'none':
+            raise ValueError(f"`is` only compares with None in rule {source!r}")
+        if 'num' not in (left[1], right[1]) and type(op) not in (ast.Eq, ast.NotEq, ast.Is, ast.IsNot):
+            raise ValueError(f"Only == and != apply to text fields in rule {source!r}")
+        tests.append(_comparison(_COMPARE[type(op)], left[0], right[0]))
+        left = right
+
+    return lambda state: reduce(np.logical_and, (test(state) for test in tests))
+
+
+def _check_kinds(left: str, right: str, source: str):
+    """Reject comparisons between numbers and text."""
+    kinds = {left, right} - {'none'}
+    if len(kinds) > 1 or 'bool' in kinds:
+        raise ValueError(f"Cannot compare {left} with {right} in rule {source!r}")
+
+
+def _comparison(op, left, right) -> Callable[[State], np.ndarray]:
+    return lambda state: np.asarray(op(left(state), right(state)), dtype=bool)
+
+
+def _membership(left, options, negate: bool) -> Callable[[State], np.ndarray]:
+    def test(state):
+        values = left(state)
+        mask = reduce(np.logical_or, (np.asarray(values == option(state), dtype=bool) for option in options))
+        return ~mask if negate else mask
+    return test
+
+
+def compile_rule(expression: str) -> Callable[[State], np.ndarray]:
+    """Compile a rule expression such as `type == 'vehicle' and speed > 3`.
+
+    Expressions use Python syntax restricted to field names, literals,
+    comparisons (including chained ones and `in [...]`), `and`/`or`/`not`
+    and basic arithmetic. The result maps a dict of state columns to a
+    boolean mask over all tags.
+    """
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Invalid rule {expression!r}: {e.msg}") from None
+    predicate = _compile_predicate(tree.body, expression)
+    return lambda state: np.broadcast_to(predicate(state), state['x'].shape)
+
+
+class RuleEngine:
+    """Evaluate all configured rules over all tags once per tick.
+
+    A rule fires (`started`) for a tag once its condition has held for
+    `for` seconds, and `cleared` once it stops holding. `dwell` is the
+    time the tag has spent in its current zone.
+    """
+
+    def __init__(self, config: Dict):
+        self.rules = []
+        for rule in config.get('rules', []):
+            if 'id' not in rule or 'when' not in rule:
+                raise ValueError(f"Rules need an id and a `when` expression: {rule!r}")
+            self.rules.append({
+                'id': rule['id'],
+                'when': rule['when'],
+                'predicate': compile_rule(rule['when']),
+                'hold': float(rule.get('for', 0.0)),
+                'severity': rule.get('severity', 'warning')
+            })
+        ids = [rule['id'] for rule in self.rules]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Rule ids must be unique")
+
+        self._ids: List[str] = []
+        self._id_array = np.empty(0, dtype=object)
+        self._zones = np.empty(0, dtype=object)
+        self._zone_since = np.empty(0)
+        # Per rule: time the condition started holding (NaN when it does not) and firing state
+        self._holding = np.empty((len(self.rules), 0))
+        self._active = np.zeros((len(self.rules), 0), dtype=bool)
+
+    def _align(self, ids: List[str], now: float) -> List[Tuple[int, int]]:
+        """Carry per-tag state over to a new tag order.
+
+        Returns the (rule, old row) pairs that were active for tags no longer
+        present, so their violations can be cleared.
+        """
+        if ids == self._ids:
+            return []
+        previous = {tag_id: row for row, tag_id in enumerate(self._ids)}
+        rows = np.array([previous.get(tag_id, -1) for tag_id in ids], dtype=int)
+        known = rows >= 0
+        kept = np.zeros(len(self._ids), dtype=bool)
+        kept[rows[known]] = True
+        dropped = np.argwhere(self._active & ~kept)
+
+        zones = np.full(len(ids), None, dtype=object)
+        zones[known] = self._zones[rows[known]]
+        zone_since = np.full(len(ids), now)
+        zone_since[known] = self._zone_since[rows[known]]
+        holding = np.full((len(self.rules), len(ids)), np.nan)
+        holding[:, known] = self._holding[:, rows[known]]
+        active = np.zeros((len(self.rules), len(ids)), dtype=bool)
+        active[:, known] = self._active[:, rows[known]]
+
+        self._ids = list(ids)
+        self._id_array = np.array(ids, dtype=object)
+        self._zones, self._zone_since, self._holding, self._active = zones, zone_since, holding, active
+        return [tuple(pair) for pair in dropped.tolist()]
+
+    def evaluate(self, snapshot: TagSnapshot, now: float) -> List[RuleEvent]:
+        """Evaluate every rule on a snapshot taken at simulated time `now`."""
+        old_ids, old_zones = self._ids, self._zones
+        removed = self._align(snapshot.ids, now)
+        timestamp = datetime.utcnow().isoformat() + 'Z'
+        # Tags removed while breaking a rule are cleared with their last zone
+        events = [
+            RuleEvent(
+                rule_id=self.rules[k]['id'],
+                tag_id=old_ids[row],
+                timestamp=timestamp,
+                event_type='cleared',
+                severity=self.rules[k]['severity'],
+                zone_id=old_zones[row]
+            )
+            for k, row in removed
+        ]
+        moved = self._zones != snapshot.zone_ids
+        self._zone_since[moved] = now
+        self._zones = snapshot.zone_ids
+
+        state = {
+            'id': self._id_array,
+            'type': snapshot.types,
+            'zone': snapshot.zone_ids,
+            'x': snapshot.positions[:, 0],
+            'y': snapshot.positions[:, 1],
+            'z': snapshot.positions[:, 2],
+            'speed': snapshot.speed,
+            'heading': snapshot.heading,
+            'battery': snapshot.battery,
+            'rssi': snapshot.rssi,
+            'dwell': now - self._zone_since
+        }
+
+        for k, rule in enumerate(self.rules):
+            mask = rule['predicate'](state)
+            holding = self._holding[k]
+            holding[mask & np.isnan(holding)] = now
+            holding[~mask] = np.nan
+
+            firing = mask & (now - holding >= rule['hold'])
+            active = self._active[k]
+            for event_type, rows in (('started', np.flatnonzero(firing & ~active)),
+                                     ('cleared', np.flatnonzero(active & ~firing))):
+                for row in rows.tolist():
+                    events.append(RuleEvent(
+                        rule_id=rule['id'],
+                        tag_id=snapshot.ids[row],
+                        timestamp=timestamp,
+                        event_type=event_type,
+                        severity=rule['severity'],
+                        zone_id=snapshot.zone_ids[row]
+                    ))
+            self._active[k] = firing
+        return events
+
+    def active(self, rule_id: str) -> List[str]:
+        """Tags currently violating a rule."""
+        for k, rule in enumerate(self.rules):
+            if rule['id'] == rule_id:
+                return [self._ids[row] for row in np.flatnonzero(self._active[k]).tolist()]
+        raise KeyError(rule_id)
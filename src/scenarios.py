@@ -0,0 +1,149 @@
+"""Scheduled anomaly scenarios applied as vectorized masks over all tags."""
+
+import logging
+import math
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+
+
+SCENARIO_EVENTS = ('low_battery', 'weak_signal', 'fast_movement', 'teleport')
+
+
+def _value_range(value: Union[float, Sequence[float]]) -> tuple:
+    """Accept a scalar or a [low, high] pair."""
+    if isinstance(value, (list, tuple)):
+        low, high = value
+        return low, high
+    return value, value
+
+
+class ScenarioEngine:
+    """Apply scheduled anomaly events to the tag population each tick.
+
+    Each event has a start time `at` (seconds of simulated time) and either
+    fires once or, with `duration`, applies on every tick of its window.
+    Tags are selected by `types`, `zone` and a `fraction`, or per tick with
+    Poisson `rate` (events per tag per second). Selection and the new values
+    are computed on whole columns; only the selected rows are written back.
+    """
+
+    def __init__(self, config: Dict, max_speed: float = 5.0):
+        self.logger = logging.getLogger(__name__)
+        self.rng = np.random.default_rng(config.get('seed'))
+        self.max_speed = max_speed
+        self.events = [self._parse_event(event, index) for index, event in enumerate(config.get('events', []))]
+        ids = [event['id'] for event in self.events]
+        duplicates = sorted({event_id for event_id in ids if ids.count(event_id) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate scenario event ids: {', '.join(duplicates)}")
+        self._fired = set()
+        self._active = set()
+
+    @staticmethod
+    def _parse_event(event: Dict, index: int = 0) -> Dict:
+        """Validate and normalise one event definition.
+
+        Without an explicit `id` the event's position in the list keeps the
+        default `type@at#index` unique.
+        """
+        if event.get('type') not in SCENARIO_EVENTS:
+            raise ValueError(f"Unknown scenario event type {event.get('type')!r}, "
+                             f"expected one of {', '.join(SCENARIO_EVENTS)}")
+        parsed = {
+            'id': event.get('id', f"{event['type']}@{event.get('at', 0)}#{index}"),
+            'type': event['type'],
+            'at': float(event.get('at', 0)),
+            'duration': float(event['duration']) if 'duration' in event else None,
+            'types': list(event.get('types', [])),
+            'zone': event.get('zone'),
+            'fraction': float(event.get('fraction', 1.0)),
+            'rate': float(event['rate']) if 'rate' in event else None,
+            'battery': _value_range(event.get('battery', [5, 15])),
+            'rssi': _value_range(event.get('rssi', [-90, -85])),
+            'speed_factor': float(event.get('speed_factor', 2.0)),
+            'distance': float(event.get('distance', 20.0))
+        }
+        if not 0.0 <= parsed['fraction'] <= 1.0:
+            raise ValueError(f"Scenario event {parsed['id']} fraction must be within [0, 1]")
+        return parsed
+
+    def skip_until(self, elapsed: float):
+        """Mark one-shot events scheduled before `elapsed` as already fired."""
+        for event in self.events:
+            if event['duration'] is None and event['at'] < elapsed:
+                self._fired.add(event['id'])
+
+    def due(self, elapsed: float, dt: float) -> List[Dict]:
+        """Events that apply on the tick ending at `elapsed + dt`."""
+        now = elapsed + dt
+        due = []
+        for event in self.events:
+            if event['duration'] is None:
+                if event['id'] not in self._fired and event['at'] <= now:
+                    self._fired.add(event['id'])
+                    self.logger.info(f"Scenario event {event['id']} fired")
+                    due.append(event)
+                continue
+
+            active = event['at'] <= now < event['at'] + event['duration']
+            if active and event['id'] not in self._active:
+                self._active.add(event['id'])
+                self.logger.info(f"Scenario event {event['id']} started")
+            elif not active and event['id'] in self._active:
+                self._active.discard(event['id'])
+                self.logger.info(f"Scenario event {event['id']} ended")
+            if active:
+                due.append(event)
+        return due
+
+    def _select(self, event: Dict, state: Dict[str, np.ndarray], dt: float) -> np.ndarray:
+        """Rows of the tags an event applies to on this tick."""
+        n = len(state['types'])
+        mask = np.ones(n, dtype=bool)
+        if event['types']:
+            mask &= np.isin(state['types'], event['types'])
+        if event['zone'] is not None:
+            mask &= state['zone_ids'] == event['zone']
+
+        if event['rate'] is not None:
+            probability = 1.0 - math.exp(-event['rate'] * dt)
+        else:
+            probability = event['fraction']
+        if probability < 1.0:
+            mask &= self.rng.random(n) < probability
+        return np.flatnonzero(mask)
+
+    def apply(self, elapsed: float, dt: float, state: Dict[str, np.ndarray],
+              events: Optional[List[Dict]] = None) -> Dict[str, np.ndarray]:
+        """Apply due events to the state columns in place.
+
+        `state` holds `types`, `zone_ids`, `positions`, `battery`, `rssi` and
+        `speed`. Returns the rows changed per column.
+        """
+        events = self.due(elapsed, dt) if events is None else events
+        changed: Dict[str, List[np.ndarray]] = {}
+
+        for event in events:
+            rows = self._select(event, state, dt)
+            if len(rows) == 0:
+                continue
+
+            if event['type'] == 'low_battery':
+                low, high = event['battery']
+                state['battery'][rows] = self.rng.integers(low, high + 1, len(rows))
+                column = 'battery'
+            elif event['type'] == 'weak_signal':
+                low, high = event['rssi']
+                state['rssi'][rows] = self.rng.integers(low, high + 1, len(rows))
+                column = 'rssi'
+            elif event['type'] == 'fast_movement':
+                state['speed'][rows] = self.max_speed * event['speed_factor']
+                column = 'speed'
+            else:
+                angle = self.rng.uniform(0, 2 * np.pi, len(rows))
+                state['positions'][rows, 0] += event['distance'] * np.cos(angle)
+                state['positions'][rows, 1] += event['distance'] * np.sin(angle)
+                column = 'positions'
+            changed.setdefault(column, []).append(rows)
+
+        return {column: np.unique(np.concatenate(rows)) for column, rows in changed.items()}
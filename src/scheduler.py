@@ -0,0 +1,102 @@
+"""Per-tag report scheduling on a hashed timing wheel."""
+
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+
+class RateScheduler:
+    """Decide which tags report on each tick.
+
+    Every tag has a report period in whole ticks. Tags sit in the wheel slot
+    of their next report; slots are `slots` ticks apart, and periods longer
+    than the wheel wait out extra revolutions. Advancing one tick only
+    touches the tags in the current slot, so the cost per tick follows the
+    number of reports, not the number of tags. First reports are staggered
+    over each tag's period so tags with the same rate do not report in bursts.
+    """
+
+    def __init__(self, tick: float, slots: int = 256, stagger: bool = True):
+        if tick <= 0:
+            raise ValueError("Scheduler tick must be positive")
+        self.tick = tick
+        self.slots = slots
+        self.stagger = stagger
+        self.now = 0
+        self._cursor = 0
+        self._wheel: List[List[list]] = [[] for _ in range(slots)]
+        # tag id -> [tag id, period, rounds left, last report tick, live]
+        self._entries: Dict[str, list] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, tag_id: str) -> bool:
+        return tag_id in self._entries
+
+    def period_ticks(self, interval: float) -> int:
+        """Whole ticks between reports for an interval in seconds."""
+        return max(1, round(interval / self.tick))
+
+    def interval(self, tag_id: str) -> Optional[float]:
+        """Effective report interval of a tag in seconds."""
+        entry = self._entries.get(tag_id)
+        return entry[1] * self.tick if entry else None
+
+    def _place(self, entry: list, delay: int):
+        """Put an entry in the slot `delay` (>= 1) ticks ahead."""
+        entry[2] = (delay - 1) // self.slots
+        self._wheel[(self._cursor + delay) % self.slots].append(entry)
+
+    def add(self, tag_id: str, interval: float):
+        """Schedule a tag (or reschedule it with a new interval)."""
+        previous = self._entries.get(tag_id)
+        period = self.period_ticks(interval)
+        if previous is not None:
+            if previous[1] == period:
+                return
+            previous[4] = False
+
+        if previous is not None:
+            # Keep the report cadence: the next report is one new period after the last
+            last = previous[3]
+            delay = max(1, last + period - self.now)
+        elif self.stagger:
+            delay = 1 + zlib.crc32(tag_id.encode('utf-8')) % period
+            last = self.now + delay - period
+        else:
+            delay = 1
+            last = self.now + 1 - period
+
+        entry = [tag_id, period, 0, last, True]
+        self._entries[tag_id] = entry
+        self._place(entry, delay)
+
+    def remove(self, tag_id: str):
+        """Stop scheduling a tag."""
+        entry = self._entries.pop(tag_id, None)
+        if entry is not None:
+            entry[4] = False
+
+    def advance(self) -> List[Tuple[str, int]]:
+        """Move one tick forward; returns (tag id, ticks since its last report) per due tag."""
+        self.now += 1
+        self._cursor = (self._cursor + 1) % self.slots
+        bucket = self._wheel[self._cursor]
+        self._wheel[self._cursor] = []
+
+        due = []
+        for entry in bucket:
+            if not entry[4]:
+                continue
+            if entry[2] > 0:
+                entry[2] -= 1
+                self._wheel[self._cursor].append(entry)
+                continue
+            due.append((entry[0], self.now - entry[3]))
+            entry[3] = self.now
+            self._place(entry, entry[1])
+        return due
+
+    def reports_per_second(self) -> float:
+        """Expected location reports per second over all scheduled tags."""
+        return sum(1.0 / (entry[1] * self.tick) for entry in self._entries.values())
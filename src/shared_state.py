@@ -0,0 +1,295 @@
+"""Latest tag state in shared memory for readers on the same host."""
+
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .snapshot import TagSnapshot
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'RTLSSHM1'
+VERSION = 1
+
+HEADER = np.dtype([
+    ('magic', 'S8'), ('version', '<u4'), ('capacity', '<u4'), ('catalog_bytes', '<u8'),
+    # Seqlock counter: odd while the writer switches slots
+    ('seq', '<u8'), ('active', '<u4'), ('count', '<u4'),
+    ('tick', '<u8'), ('elapsed', '<f8'), ('time_ns', '<i8')
+])
+SLOT_HEADER = np.dtype([('generation', '<u8'), ('catalog_length', '<u8')])
+
+# Per-slot columns: name, dtype, values per tag
+COLUMNS = (
+    ('positions', '<f8', 3), ('speed', '<f8', 1), ('heading', '<f8', 1),
+    ('battery', '<i4', 1), ('rssi', '<i4', 1), ('zone', '<i4', 1), ('type', '<i4', 1)
+)
+
+
+def _align(size: int) -> int:
+    return (size + 63) & ~63
+
+
+def segment_size(capacity: int, catalog_bytes: int) -> int:
+    """Bytes needed for the header and both slots."""
+    return _align(HEADER.itemsize) + 2 * _slot_size(capacity, catalog_bytes)
+
+
+def _slot_size(capacity: int, catalog_bytes: int) -> int:
+    size = _align(SLOT_HEADER.itemsize)
+    for _, dtype, width in COLUMNS:
+        size += _align(capacity * width * np.dtype(dtype).itemsize)
+    return size + _align(catalog_bytes)
+
+
+class _Layout:
+    """numpy views of the header and the two slots of a segment."""
+
+    def __init__(self, buf, capacity: int, catalog_bytes: int):
+        self.header = np.ndarray((), HEADER, buffer=buf)
+        self.slots: List[Dict[str, np.ndarray]] = []
+        offset = _align(HEADER.itemsize)
+        for _ in range(2):
+            slot = {'meta': np.ndarray((), SLOT_HEADER, buffer=buf, offset=offset)}
+            offset += _align(SLOT_HEADER.itemsize)
+            for name, dtype, width in COLUMNS:
+                shape = (capacity, width) if width > 1 else (capacity,)
+                slot[name] = np.ndarray(shape, dtype, buffer=buf, offset=offset)
+                offset += _align(capacity * width * np.dtype(dtype).itemsize)
+            slot['catalog'] = np.ndarray((catalog_bytes,), np.uint8, buffer=buf, offset=offset)
+            offset += _align(catalog_bytes)
+            self.slots.append(slot)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing segment without taking ownership of it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Before Python 3.13 attaching also registers the segment with the
+    # resource tracker, which would unlink it when this process exits
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class _CodeTable:
+    """Integer codes for a column of names, reusing the last result while the column is unchanged."""
+
+    def __init__(self, codes: Optional[Dict] = None):
+        self.names: List[str] = []
+        self.codes: Dict = dict(codes or {})
+        self._values: Optional[List] = None
+        self._result: Optional[np.ndarray] = None
+
+    def encode(self, values: List) -> np.ndarray:
+        """Codes for `values`; unseen names are appended to `names`."""
+        if values != self._values:
+            lookup = self.codes.__getitem__
+            try:
+                self._result = np.fromiter(map(lookup, values), np.int32, len(values))
+            except KeyError:
+                for value in values:
+                    if value not in self.codes:
+                        self.codes[value] = len(self.names)
+                        self.names.append(value)
+                self._result = np.fromiter(map(lookup, values), np.int32, len(values))
+            self._values = values
+        return self._result
+
+
+class SharedStateWriter:
+    """Publish the latest tag snapshot into a seqlock-protected double buffer.
+
+    Each tick the columns go into the slot readers are not pointed at; then
+    the header is switched to that slot between two increments of `seq`
+    (odd while switching). A reader that saw the same even `seq` before and
+    after copying a slot got a consistent snapshot, since a slot is only
+    rewritten after the header has moved away from it. Tag IDs, zone IDs
+    and types are stored once per change in a JSON catalog per slot; the
+    columns hold integer zone and type codes.
+    """
+
+    def __init__(self, name: str, capacity: int, catalog_bytes: Optional[int] = None):
+        self.name = name
+        self.capacity = capacity
+        self.catalog_bytes = catalog_bytes or capacity * 64 + 65536
+        size = segment_size(capacity, self.catalog_bytes)
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a publisher that did not shut down cleanly
+            logger.warning(f"Replacing stale shared state segment {name}")
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        self.layout = _Layout(self.shm.buf, capacity, self.catalog_bytes)
+        header = self.layout.header
+        header['magic'] = MAGIC
+        header['version'] = VERSION
+        header['capacity'] = capacity
+        header['catalog_bytes'] = self.catalog_bytes
+
+        self._ids: List[str] = []
+        self._zones = _CodeTable({None: -1})
+        self._types = _CodeTable()
+        self._generation = 1
+        self._truncated = False
+        logger.info(f"Exporting tag state to shared memory {name} ({size / 1e6:.1f} MB, {capacity} tags)")
+
+    def _write_catalog(self, slot: Dict[str, np.ndarray]):
+        blob = json.dumps({'ids': self._ids, 'zones': self._zones.names, 'types': self._types.names}).encode()
+        if len(blob) > self.catalog_bytes:
+            raise ValueError(f"Shared state catalog needs {len(blob)} bytes, "
+                             f"only {self.catalog_bytes} reserved; raise shared_state.catalog_bytes")
+        slot['catalog'][:len(blob)] = np.frombuffer(blob, dtype=np.uint8)
+        slot['meta']['catalog_length'] = len(blob)
+        slot['meta']['generation'] = self._generation
+
+    def publish(self, snapshot: TagSnapshot, elapsed: float = 0.0):
+        """Make a snapshot the one readers see."""
+        n = min(len(snapshot), self.capacity)
+        if n < len(snapshot) and not self._truncated:
+            logger.warning(f"Shared state holds {self.capacity} tags; {len(snapshot) - n} are not exported")
+            self._truncated = True
+        ids = snapshot.ids[:n]
+        known = len(self._zones.names) + len(self._types.names)
+        zones = self._zones.encode(snapshot.zone_ids[:n].tolist())
+        types = self._types.encode(snapshot.types[:n].tolist())
+        if ids != self._ids or len(self._zones.names) + len(self._types.names) != known:
+            self._ids = ids
+            self._generation += 1
+
+        header = self.layout.header
+        active = 1 - int(header['active'])
+        slot = self.layout.slots[active]
+        if int(slot['meta']['generation']) != self._generation:
+            self._write_catalog(slot)
+        slot['positions'][:n] = snapshot.positions[:n]
+        slot['speed'][:n] = snapshot.speed[:n]
+        slot['heading'][:n] = snapshot.heading[:n]
+        slot['battery'][:n] = snapshot.battery[:n]
+        slot['rssi'][:n] = snapshot.rssi[:n]
+        slot['zone'][:n] = zones
+        slot['type'][:n] = types
+
+        seq = int(header['seq'])
+        header['seq'] = seq + 1
+        header['active'] = active
+        header['count'] = n
+        header['tick'] = snapshot.seq
+        header['elapsed'] = elapsed
+        header['time_ns'] = time.time_ns()
+        header['seq'] = seq + 2
+
+    def close(self):
+        """Remove the segment; attached readers keep their mapping until they close."""
+        self.layout = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+class SharedStateReader:
+    """Read consistent tag snapshots exported by a `SharedStateWriter`."""
+
+    def __init__(self, name: str = 'rtls_state'):
+        self.name = name
+        self.shm = _attach(name)
+        header = np.ndarray((), HEADER, buffer=self.shm.buf)
+        if header['magic'] != MAGIC or int(header['version']) != VERSION:
+            del header
+            self.shm.close()
+            raise ValueError(f"{name} is not an RTLS shared state segment")
+        self.layout = _Layout(self.shm.buf, int(header['capacity']), int(header['catalog_bytes']))
+        self.retries = 0
+        self._generation = 0
+        self._ids: List[str] = []
+        self._zones = np.array([None], dtype=object)
+        self._types = np.array([], dtype=object)
+
+    @property
+    def tick(self) -> int:
+        """Tick of the snapshot currently exported."""
+        return int(self.layout.header['tick'])
+
+    def read_arrays(self, timeout: float = 1.0) -> Dict[str, Any]:
+        """Copy out the current columns, retrying reads torn by the writer.
+
+        Zones and types stay integer codes into `zone_names` and
+        `type_names` (zone -1 is no zone); rows follow `ids`.
+        """
+        header = self.layout.header
+        deadline = None
+        while True:
+            seq = int(header['seq'])
+            if not seq & 1:
+                n = int(header['count'])
+                tick = int(header['tick'])
+                time_ns = int(header['time_ns'])
+                slot = self.layout.slots[int(header['active'])]
+                generation = int(slot['meta']['generation'])
+                columns = {name: slot[name][:n].copy() for name, _, _ in COLUMNS}
+                blob = None
+                if generation != self._generation:
+                    blob = slot['catalog'][:int(slot['meta']['catalog_length'])].tobytes()
+                if int(header['seq']) == seq:
+                    break
+            self.retries += 1
+            if deadline is None:
+                deadline = time.monotonic() + timeout
+            elif time.monotonic() > deadline:
+                raise TimeoutError(f"No consistent read of {self.name} within {timeout} s")
+
+        if blob is not None:
+            catalog = json.loads(blob)
+            self._ids = catalog['ids']
+            # Zone code -1 (no zone) indexes the trailing None
+            self._zones = np.array(catalog['zones'] + [None], dtype=object)
+            self._types = np.array(catalog['types'], dtype=object)
+            self._generation = generation
+
+        columns.update(tick=tick, time_ns=time_ns, ids=self._ids)
+        return columns
+
+    @property
+    def zone_names(self) -> np.ndarray:
+        """Zone IDs by code, with None last so code -1 maps to it."""
+        return self._zones
+
+    @property
+    def type_names(self) -> np.ndarray:
+        """Tag types by code."""
+        return self._types
+
+    def read(self, timeout: float = 1.0) -> TagSnapshot:
+        """Copy out the current state as a `TagSnapshot`."""
+        columns = self.read_arrays(timeout)
+        timestamp = datetime.fromtimestamp(columns['time_ns'] / 1e9, timezone.utc).replace(tzinfo=None)
+        return TagSnapshot(
+            seq=columns['tick'],
+            timestamp=timestamp.isoformat() + 'Z',
+            ids=columns['ids'],
+            types=self._types[columns['type']],
+            zone_ids=self._zones[columns['zone']],
+            positions=columns['positions'],
+            speed=columns['speed'],
+            heading=columns['heading'],
+            battery=columns['battery'],
+            rssi=columns['rssi']
+        )
+
+    def close(self):
+        """Detach from the segment."""
+        self.layout = None
+        self.shm.close()
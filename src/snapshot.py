@@ -0,0 +1,76 @@
+"""Columnar snapshots of tag state for bulk consumers."""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, List, Dict, Any, Optional
+import numpy as np
+
+from .models import Tag
+
+
+@dataclass
+class TagSnapshot:
+    """State of all tags at one tick, stored as parallel arrays."""
+    seq: int
+    timestamp: str
+    ids: List[str]
+    types: np.ndarray
+    zone_ids: np.ndarray
+    positions: np.ndarray
+    speed: np.ndarray
+    heading: np.ndarray
+    battery: np.ndarray
+    rssi: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_tags(cls, tags: Iterable[Tag], seq: int,
+                  timestamp: Optional[str] = None) -> 'TagSnapshot':
+        """Build from Tag objects, using the published (estimated) position."""
+        tags = list(tags)
+        # Gather per column rather than building a tuple per tag
+        published = [tag.estimated_position or tag.position for tag in tags]
+        positions = np.array(
+            [[p.x for p in published], [p.y for p in published], [p.z for p in published]], dtype=float
+        ).T.reshape(-1, 3)
+
+        return cls(
+            seq=seq,
+            timestamp=timestamp or datetime.utcnow().isoformat() + 'Z',
+            ids=[tag.id for tag in tags],
+            types=np.array([tag.type for tag in tags], dtype=object),
+            zone_ids=np.array([tag.zone_id for tag in tags], dtype=object),
+            positions=positions,
+            speed=np.array([tag.speed for tag in tags], dtype=float),
+            heading=np.array([tag.heading for tag in tags], dtype=float),
+            battery=np.array([tag.battery for tag in tags], dtype=int),
+            rssi=np.array([tag.rssi for tag in tags], dtype=int)
+        )
+
+    def to_records(self, indices: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Convert selected rows into JSON-ready dictionaries."""
+        if indices is None:
+            indices = np.arange(len(self))
+        positions = np.round(self.positions[indices], 2).tolist()
+        speed = np.round(self.speed[indices], 2).tolist()
+        heading = np.round(self.heading[indices], 1).tolist()
+        battery = self.battery[indices].tolist()
+        rssi = self.rssi[indices].tolist()
+
+        return [
+            {
+                'tag_id': self.ids[i],
+                'type': self.types[i],
+                'zone_id': self.zone_ids[i],
+                'x': p[0],
+                'y': p[1],
+                'z': p[2],
+                'speed': s,
+                'heading': h,
+                'battery': b,
+                'rssi': r
+            }
+            for i, p, s, h, b, r in zip(indices.tolist(), positions, speed, heading, battery, rssi)
+        ]
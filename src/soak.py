@@ -0,0 +1,377 @@
+"""Accelerated-time soak test of the publisher with memory growth tracking."""
+
+import copy
+import logging
+import multiprocessing
+import os
+import selectors
+import socket
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import yaml
+
+from .config_reload import load_yaml_config
+
+
+# Packet types the broker stand-in answers
+CONNECT, PUBLISH, PUBREL, SUBSCRIBE, PINGREQ, DISCONNECT = 1, 3, 6, 8, 12, 14
+
+
+def _encode_length(length: int) -> bytes:
+    """MQTT variable-length remaining length."""
+    encoded = bytearray()
+    while True:
+        length, digit = divmod(length, 128)
+        encoded.append(digit | (0x80 if length else 0))
+        if not length:
+            return bytes(encoded)
+
+
+class BrokerStandIn:
+    """Minimal MQTT 3.1.1/5 broker that acknowledges everything and keeps nothing.
+
+    It answers CONNECT, PUBLISH (QoS 0-2), SUBSCRIBE and PINGREQ so a real
+    paho client runs its normal code paths, but stores no messages, so its
+    own memory stays flat. `down()` drops every client and refuses new
+    connections until `up()`, which is how outages are injected.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.host = host
+        self.port = port
+        self.is_up = True
+        self.stats = {'connects': 0, 'refused': 0, 'publishes': 0, 'bytes': 0, 'drops': 0}
+        self._selector = selectors.DefaultSelector()
+        self._clients: Dict[socket.socket, list] = {}
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind((host, port))
+        self._listener.listen(128)
+        self._listener.setblocking(False)
+        self.port = self._listener.getsockname()[1]
+        self._selector.register(self._listener, selectors.EVENT_READ, None)
+
+    def down(self):
+        """Drop all clients and refuse connections."""
+        self.is_up = False
+        for sock in list(self._clients):
+            self._close(sock)
+            self.stats['drops'] += 1
+
+    def up(self):
+        """Accept connections again."""
+        self.is_up = True
+
+    def _close(self, sock: socket.socket):
+        self._selector.unregister(sock)
+        self._clients.pop(sock, None)
+        sock.close()
+
+    def poll(self, timeout: float = 0.5):
+        """Serve whatever is ready within `timeout` seconds."""
+        for key, _ in self._selector.select(timeout):
+            if key.data is None:
+                sock, _ = self._listener.accept()
+                if not self.is_up:
+                    sock.close()
+                    self.stats['refused'] += 1
+                    continue
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                # [receive buffer, protocol level]
+                self._clients[sock] = [bytearray(), 4]
+                self._selector.register(sock, selectors.EVENT_READ, 'client')
+                continue
+
+            sock = key.fileobj
+            try:
+                data = sock.recv(1 << 16)
+            except OSError:
+                data = b''
+            if not data:
+                self._close(sock)
+                continue
+            state = self._clients[sock]
+            state[0] += data
+            if not self._serve(sock, state):
+                self._close(sock)
+
+    def _serve(self, sock: socket.socket, state: list) -> bool:
+        """Answer every complete packet in the buffer; False closes the connection."""
+        buffer = state[0]
+        position, replies, keep = 0, bytearray(), True
+        while keep and len(buffer) - position >= 2:
+            length, multiplier, index = 0, 1, position + 1
+            while index < len(buffer):
+                byte = buffer[index]
+                length += (byte & 0x7f) * multiplier
+                multiplier *= 128
+                index += 1
+                if not byte & 0x80:
+                    break
+            else:
+                break
+            if index + length > len(buffer):
+                break
+
+            packet_type, flags = buffer[position] >> 4, buffer[position] & 0x0f
+            body = bytes(buffer[index:index + length])
+            position = index + length
+            v5 = state[1] == 5
+
+            if packet_type == CONNECT:
+                state[1] = body[6]
+                self.stats['connects'] += 1
+                replies += b'\x20\x03\x00\x00\x00' if state[1] == 5 else b'\x20\x02\x00\x00'
+            elif packet_type == PUBLISH:
+                self.stats['publishes'] += 1
+                self.stats['bytes'] += length
+                qos = (flags >> 1) & 3
+                if qos:
+                    topic_length = (body[0] << 8) | body[1]
+                    packet_id = body[2 + topic_length:4 + topic_length]
+                    replies += (b'\x40\x02' if qos == 1 else b'\x50\x02') + packet_id
+            elif packet_type == PUBREL:
+                replies += b'\x70\x02' + body[:2]
+            elif packet_type == SUBSCRIBE:
+                offset = 2
+                if v5:
+                    # Skip the properties (their length is a varint, a single byte when empty)
+                    offset += 1 + body[2]
+                filters = 0
+                while offset < len(body):
+                    offset += 2 + ((body[offset] << 8) | body[offset + 1]) + 1
+                    filters += 1
+                payload = body[:2] + (b'\x00' if v5 else b'') + b'\x00' * filters
+                replies += b'\x90' + _encode_length(len(payload)) + payload
+            elif packet_type == PINGREQ:
+                replies += b'\xd0\x00'
+            elif packet_type == DISCONNECT:
+                keep = False
+
+        del buffer[:position]
+        if replies:
+            try:
+                sock.sendall(replies)
+            except OSError:
+                return False
+        return keep
+
+    def close(self):
+        """Close every socket."""
+        for sock in list(self._clients):
+            self._close(sock)
+        self._selector.close()
+        self._listener.close()
+
+
+def _serve_broker(ready, control):
+    """Broker stand-in process: serve until told to stop, obeying down/up/stats commands."""
+    broker = BrokerStandIn()
+    ready.send(broker.port)
+    while True:
+        broker.poll(0.05)
+        while control.poll():
+            command = control.recv()
+            if command == 'stop':
+                broker.close()
+                control.send(broker.stats)
+                return
+            if command == 'down':
+                broker.down()
+            elif command == 'up':
+                broker.up()
+            elif command == 'stats':
+                control.send(dict(broker.stats))
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process (peak size where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def growth_per_hour(hours: List[float], values: List[float]) -> float:
+    """Least-squares slope of `values` over `hours`; 0 with fewer than two samples."""
+    if len(hours) < 2 or max(hours) == min(hours):
+        return 0.0
+    return float(np.polyfit(hours, values, 1)[0])
+
+
+class SoakHarness:
+    """Run an `RTLSPublisher` against a broker stand-in for hours of simulated time.
+
+    Ticks run back to back, or `speedup` times faster than real time, so
+    hours of publishing take minutes. The broker runs in its own process
+    so only the publisher's memory is measured. Every `sample_interval`
+    simulated seconds the harness records RSS, tracemalloc's traced memory
+    and paho's queue depth, and compares a tracemalloc snapshot against the
+    one taken when `warmup` ended. Every `disconnect_every` seconds the
+    broker drops the client for `outage` seconds. The soak fails when RSS
+    grows by more than `max_growth_mb_per_hour` per simulated hour after
+    warmup.
+    """
+
+    def __init__(self, config_path: str, soak_config: Optional[Dict] = None):
+        self.config_path = config_path
+        self.config = load_yaml_config(config_path)
+        soak_config = soak_config if soak_config is not None else self.config.get('soak', {})
+        self.duration = soak_config.get('hours', 4.0) * 3600
+        self.speedup = soak_config.get('speedup', 0)
+        self.sample_interval = soak_config.get('sample_interval', 300.0)
+        self.warmup = soak_config.get('warmup', 600.0)
+        self.disconnect_every = soak_config.get('disconnect_every', 1800.0)
+        self.outage = soak_config.get('outage', 60.0)
+        self.max_growth = soak_config.get('max_growth_mb_per_hour', 5.0)
+        self.top = soak_config.get('top', 10)
+        self.frames = soak_config.get('tracemalloc_frames', 1)
+        if self.warmup >= self.duration:
+            raise ValueError("Soak warmup must be shorter than the soak duration")
+        self.logger = logging.getLogger(__name__)
+
+    def _publisher_config(self, port: int) -> Dict:
+        """The configuration under test, pointed at the broker stand-in."""
+        config = copy.deepcopy(self.config)
+        mqtt_config = config['mqtt']
+        mqtt_config.update(broker='127.0.0.1', port=port, client_id=f"{mqtt_config['client_id']}_soak")
+        # paho waits out its reconnect delay in real time; keep it short under accelerated time
+        mqtt_config['reconnect'] = {'min_delay': 0.1, 'max_delay': 1}
+        config.pop('live_feed', None)
+        config.get('reload', {})['enabled'] = False
+        return config
+
+    def _top_sites(self, snapshot: tracemalloc.Snapshot, baseline: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+        """Allocation sites that grew most since the baseline snapshot."""
+        key = 'traceback' if self.frames > 1 else 'lineno'
+        # Leave out the measurement's own allocations
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        snapshot, baseline = snapshot.filter_traces(ignore), baseline.filter_traces(ignore)
+        sites = []
+        for stat in snapshot.compare_to(baseline, key)[:self.top]:
+            sites.append({
+                'site': ' <- '.join(f"{frame.filename}:{frame.lineno}" for frame in stat.traceback),
+                'size_diff_kb': round(stat.size_diff / 1024, 1),
+                'size_kb': round(stat.size / 1024, 1),
+                'count_diff': stat.count_diff
+            })
+        return sites
+
+    def run(self) -> Dict[str, Any]:
+        """Run the soak and return its report (`passed` tells whether memory stayed flat)."""
+        from .main import RTLSPublisher
+
+        context = multiprocessing.get_context()
+        ready, ready_child = context.Pipe()
+        control, control_child = context.Pipe()
+        broker = context.Process(target=_serve_broker, args=(ready_child, control_child), daemon=True)
+        broker.start()
+        port = ready.recv()
+
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = Path(directory) / 'soak.yaml'
+            config_path.write_text(yaml.safe_dump(self._publisher_config(port)))
+            tracemalloc.start(self.frames)
+            try:
+                publisher = RTLSPublisher(str(config_path))
+                report = self._soak(publisher, control)
+            finally:
+                tracemalloc.stop()
+                control.send('stop')
+                broker_stats = control.recv() if control.poll(5) else {}
+                broker.join(5)
+        report['broker'] = broker_stats
+        return report
+
+    def _soak(self, publisher, control) -> Dict[str, Any]:
+        """The tick loop: publish, inject outages, sample memory."""
+        client = publisher.mqtt_client
+        if not client.connect():
+            raise RuntimeError("Could not connect to the broker stand-in")
+        interval = publisher.update_interval
+        ticks = int(round(self.duration / interval))
+        sample_every = max(1, int(round(self.sample_interval / interval)))
+        warmup_ticks = int(round(self.warmup / interval))
+        outage_every = int(round(self.disconnect_every / interval)) if self.disconnect_every else 0
+        outage_ticks = max(1, int(round(self.outage / interval)))
+
+        samples, outages, baseline, top_sites = [], 0, None, []
+        real_start = time.time()
+        publisher.running = True
+        self.logger.info(f"Soaking {len(publisher.rtls_generator.tags)} tags for {self.duration / 3600:g} "
+                         f"simulated hours ({ticks} ticks)")
+        try:
+            for tick in range(1, ticks + 1):
+                if not publisher.running:
+                    break
+                start = time.time()
+                publisher.run_tick()
+
+                if outage_every and tick % outage_every == 0:
+                    control.send('down')
+                    outages += 1
+                    self.logger.info(f"Broker outage {outages} at {tick * interval / 3600:.2f} h")
+                elif outage_every and tick > outage_ticks and (tick - outage_ticks) % outage_every == 0:
+                    control.send('up')
+                    # paho reconnects in real time; pause simulated time so outages last `outage`
+                    deadline = time.time() + 10.0
+                    while not client.connected and time.time() < deadline:
+                        time.sleep(0.01)
+
+                if tick == max(1, warmup_ticks):
+                    baseline = tracemalloc.take_snapshot()
+                if tick % sample_every == 0 or tick == ticks:
+                    traced, _ = tracemalloc.get_traced_memory()
+                    sample = {
+                        'hours': round(tick * interval / 3600, 4),
+                        'rss_mb': round(rss_bytes() / 2 ** 20, 2),
+                        'traced_mb': round(traced / 2 ** 20, 2),
+                        'queue_depth': client.queue_depth(),
+                        'spooled': client.spool.pending if client.spool else 0,
+                        'connected': client.connected
+                    }
+                    samples.append(sample)
+                    if baseline is not None and tick > warmup_ticks:
+                        top_sites = self._top_sites(tracemalloc.take_snapshot(), baseline)
+                    self.logger.info(
+                        f"Soak {sample['hours']:.2f} h: RSS {sample['rss_mb']} MB, traced {sample['traced_mb']} MB, "
+                        f"queue {sample['queue_depth']}" + (f", top growth {top_sites[0]['site']} "
+                                                            f"+{top_sites[0]['size_diff_kb']} KB" if top_sites else "")
+                    )
+
+                if self.speedup > 0:
+                    time.sleep(max(0.0, interval / self.speedup - (time.time() - start)))
+        finally:
+            control.send('up')
+            if publisher.running:
+                publisher.stop()
+
+        measured = [sample for sample in samples if sample['hours'] * 3600 > self.warmup]
+        hours = [sample['hours'] for sample in measured]
+        rss_growth = growth_per_hour(hours, [sample['rss_mb'] for sample in measured])
+        traced_growth = growth_per_hour(hours, [sample['traced_mb'] for sample in measured])
+        passed = rss_growth <= self.max_growth
+        self.logger.log(logging.INFO if passed else logging.ERROR,
+                        f"Soak {'passed' if passed else 'FAILED'}: RSS {rss_growth:+.2f} MB/h, "
+                        f"traced {traced_growth:+.2f} MB/h (limit {self.max_growth} MB/h)")
+        return {
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'passed': passed,
+            'simulated_hours': round(samples[-1]['hours'], 3) if samples else 0.0,
+            'real_seconds': round(time.time() - real_start, 1),
+            'tags': len(publisher.rtls_generator.tags),
+            'outages': outages,
+            'rss_growth_mb_per_hour': round(rss_growth, 3),
+            'traced_growth_mb_per_hour': round(traced_growth, 3),
+            'max_growth_mb_per_hour': self.max_growth,
+            'top_allocation_growth': top_sites,
+            'samples': samples
+        }
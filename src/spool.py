@@ -0,0 +1,237 @@
+"""Disk-backed spool for outbound MQTT messages during broker outages."""
+
+import logging
+import struct
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+
+
+# crc32, payload length, topic length, qos, retain
+RECORD_HEADER = struct.Struct('<IIHBB')
+
+Position = Tuple[int, int]
+
+
+class DiskSpool:
+    """Bounded, segmented append-only log of messages awaiting delivery.
+
+    Records are appended to numbered segment files and replayed oldest
+    first. Retained messages are coalesced on replay: only the newest spooled
+    record per topic is sent, and none at all if the topic was published
+    live after it was spooled. Fully replayed segments are deleted, and when
+    the spool exceeds `max_bytes` the oldest segment is dropped.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 4 << 20, max_bytes: int = 256 << 20):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(__name__)
+
+        self.pending = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self._bytes = 0
+        self._records: Dict[int, int] = {}
+        self._sizes: Dict[int, int] = {}
+        self._latest: Dict[str, Position] = {}
+        self._live: Dict[str, Position] = {}
+
+        self.segments: List[int] = self._recover()
+        self._read_segment = self.segments[0] if self.segments else 0
+        self._read_offset = 0
+        self._read_count = 0
+        self._reader: Optional[BinaryIO] = None
+
+        self._write_segment = (self.segments[-1] + 1) if self.segments else 0
+        self._write_offset = 0
+        self._writer = self._open_segment(self._write_segment)
+
+    def _path(self, segment: int) -> Path:
+        """File holding one segment."""
+        return self.directory / f"{segment:010d}.spool"
+
+    def _open_segment(self, segment: int) -> BinaryIO:
+        """Start a new segment for writing."""
+        self.segments.append(segment)
+        self._records[segment] = 0
+        self._sizes[segment] = 0
+        return open(self._path(segment), 'ab')
+
+    @staticmethod
+    def _read_record(f: BinaryIO) -> Optional[Tuple[str, bytes, int, bool, int]]:
+        """Read one record, or None at the end of the file or a torn record."""
+        header = f.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            return None
+        crc, payload_len, topic_len, qos, retain = RECORD_HEADER.unpack(header)
+        body = f.read(topic_len + payload_len)
+        if len(body) < topic_len + payload_len or zlib.crc32(body) != crc:
+            return None
+        topic = body[:topic_len].decode('utf-8')
+        return topic, body[topic_len:], qos, bool(retain), RECORD_HEADER.size + len(body)
+
+    def _recover(self) -> List[int]:
+        """Index segments left by a previous run, truncating torn tails."""
+        segments = sorted(int(path.stem) for path in self.directory.glob('*.spool'))
+        for segment in segments:
+            path = self._path(segment)
+            offset = records = 0
+            with open(path, 'rb') as f:
+                while True:
+                    record = self._read_record(f)
+                    if record is None:
+                        break
+                    topic, _, _, retain, size = record
+                    if retain:
+                        self._latest[topic] = (segment, offset)
+                    offset += size
+                    records += 1
+            if offset < path.stat().st_size:
+                self.logger.warning(f"Truncating torn record at {path}:{offset}")
+                with open(path, 'r+b') as f:
+                    f.truncate(offset)
+            self._records[segment] = records
+            self._sizes[segment] = offset
+            self._bytes += offset
+            self.pending += records
+
+        if self.pending:
+            self.logger.info(f"Recovered {self.pending} spooled messages from {self.directory}")
+        return segments
+
+    def append(self, topic: str, payload: Union[str, bytes, bytearray, None], qos: int, retain: bool):
+        """Spool one outbound message."""
+        if payload is None:
+            payload = b''
+        elif isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        body = topic.encode('utf-8') + bytes(payload)
+        header = RECORD_HEADER.pack(zlib.crc32(body), len(payload), len(body) - len(payload), qos, retain)
+
+        if retain:
+            self._latest[topic] = (self._write_segment, self._write_offset)
+        self._writer.write(header)
+        self._writer.write(body)
+        size = len(header) + len(body)
+        self._write_offset += size
+        self._records[self._write_segment] += 1
+        self._sizes[self._write_segment] += size
+        self._bytes += size
+        self.pending += 1
+
+        if self._write_offset >= self.segment_bytes:
+            self._writer.close()
+            self._write_segment += 1
+            self._write_offset = 0
+            self._writer = self._open_segment(self._write_segment)
+        while self._bytes > self.max_bytes and len(self.segments) > 1:
+            self._drop_oldest()
+
+    def _drop_oldest(self):
+        """Discard the oldest segment to stay within the size bound."""
+        segment = self.segments.pop(0)
+        unread = self._records.pop(segment)
+        if segment == self._read_segment:
+            unread -= self._read_count
+            self._close_reader()
+            self._read_segment, self._read_offset, self._read_count = self.segments[0], 0, 0
+        self._bytes -= self._sizes.pop(segment)
+        self.pending -= unread
+        self.dropped += unread
+        self._path(segment).unlink(missing_ok=True)
+        self.logger.warning(f"Spool over {self.max_bytes} bytes, dropped {unread} oldest messages")
+
+    def mark_published(self, topic: str):
+        """Record that a retained topic was just published live.
+
+        Spooled retained messages for the topic are now stale and are skipped.
+        """
+        self._live[topic] = (self._write_segment, self._write_offset)
+
+    def flush(self):
+        """Flush buffered appends to the operating system."""
+        self._writer.flush()
+
+    def _close_reader(self):
+        """Close the replay file handle."""
+        if self._reader:
+            self._reader.close()
+            self._reader = None
+
+    def _next_record(self) -> Optional[Tuple[Position, str, bytes, int, bool, int]]:
+        """Read the record at the replay cursor, moving past finished segments."""
+        while True:
+            at_writer = self._read_segment == self._write_segment
+            if at_writer and self._read_offset >= self._write_offset:
+                return None
+            if self._reader is None:
+                self._reader = open(self._path(self._read_segment), 'rb')
+            self._reader.seek(self._read_offset)
+            record = self._read_record(self._reader)
+            if record is not None:
+                return ((self._read_segment, self._read_offset),) + record
+            if at_writer:
+                return None
+
+            # Finished (or torn) segment: delete it and continue with the next
+            self._close_reader()
+            segment = self.segments.pop(0)
+            self.pending -= self._records.pop(segment) - self._read_count
+            self._bytes -= self._sizes.pop(segment)
+            self._path(segment).unlink(missing_ok=True)
+            self._read_segment, self._read_offset, self._read_count = self.segments[0], 0, 0
+
+    def _advance(self, size: int):
+        """Move the replay cursor past one record."""
+        self._read_offset += size
+        self._read_count += 1
+        self.pending -= 1
+
+        # Delete a fully replayed segment right away so a restart does not replay it
+        segment = self._read_segment
+        if segment != self._write_segment and self._read_count == self._records[segment]:
+            self._close_reader()
+            self.segments.pop(0)
+            del self._records[segment]
+            self._bytes -= self._sizes.pop(segment)
+            self._path(segment).unlink(missing_ok=True)
+            self._read_segment, self._read_offset, self._read_count = self.segments[0], 0, 0
+
+    def drain(self, publish: Callable[[str, bytes, int, bool], bool], limit: int) -> int:
+        """Replay up to `limit` messages; stops early if `publish` fails.
+
+        Returns the number of messages sent.
+        """
+        self.flush()
+        sent = 0
+        while sent < limit and self.pending > 0:
+            record = self._next_record()
+            if record is None:
+                break
+            position, topic, payload, qos, retain, size = record
+
+            if retain and (self._latest.get(topic) != position
+                           or self._live.get(topic, (-1, -1)) > position):
+                self._advance(size)
+                self.coalesced += 1
+                continue
+
+            if not publish(topic, payload, qos, retain):
+                break
+            self._advance(size)
+            if retain:
+                del self._latest[topic]
+            sent += 1
+
+        if self.pending == 0:
+            self._live.clear()
+            self._latest.clear()
+        return sent
+
+    def close(self):
+        """Flush and close the spool files."""
+        self._writer.close()
+        self._close_reader()
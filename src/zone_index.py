@@ -0,0 +1,176 @@
+"""Prepared spatial index for batched zone classification."""
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from .models import Zone
+
+
+# Grid cell states for a rasterized polygon
+_OUTSIDE = 0
+_INSIDE = 1
+_BOUNDARY = 2
+
+
+def _crossings(px: np.ndarray, py: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Even-odd ray test of points against per-point edge lists.
+
+    `edges` has shape (n_points, n_edges, 4) holding (ax, ay, bx, by); padding
+    rows are NaN and never count as a crossing.
+    """
+    ax, ay, bx, by = edges[..., 0], edges[..., 1], edges[..., 2], edges[..., 3]
+    py = py[:, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        spans = (ay > py) != (by > py)
+        x_cross = ax + (py - ay) * (bx - ax) / (by - ay)
+        hits = spans & (px[:, None] < x_cross)
+    return (np.count_nonzero(hits, axis=1) % 2) == 1
+
+
+class PolygonIndex:
+    """Grid-rasterized polygon with per-row edge buckets.
+
+    Cells entirely inside or outside the polygon answer directly; points in
+    boundary cells run an exact crossing test against only the edges that
+    overlap their grid row.
+    """
+
+    def __init__(self, vertices: Sequence[Tuple[float, float]], resolution: int = 64):
+        self.vertices = np.asarray(vertices, dtype=float)
+        xs, ys = self.vertices[:, 0], self.vertices[:, 1]
+        self.x_min, self.x_max = xs.min(), xs.max()
+        self.y_min, self.y_max = ys.min(), ys.max()
+        self.nx = self.ny = max(1, int(resolution))
+        self.cell_w = max(self.x_max - self.x_min, 1e-9) / self.nx
+        self.cell_h = max(self.y_max - self.y_min, 1e-9) / self.ny
+
+        edges = np.column_stack((self.vertices, np.roll(self.vertices, -1, axis=0)))
+        self._row_edges = self._bucket_edges(edges)
+        self._cells = self._rasterize(edges)
+
+    def _bucket_edges(self, edges: np.ndarray) -> np.ndarray:
+        """Group edges by the grid rows their y-extent overlaps."""
+        lo = self._row(np.minimum(edges[:, 1], edges[:, 3]))
+        hi = self._row(np.maximum(edges[:, 1], edges[:, 3]))
+        rows: List[List[int]] = [[] for _ in range(self.ny)]
+        for e, (r0, r1) in enumerate(zip(lo.tolist(), hi.tolist())):
+            for r in range(r0, r1 + 1):
+                rows[r].append(e)
+
+        width = max(1, max(len(r) for r in rows))
+        buckets = np.full((self.ny, width, 4), np.nan)
+        for r, members in enumerate(rows):
+            buckets[r, :len(members)] = edges[members]
+        return buckets
+
+    def _rasterize(self, edges: np.ndarray) -> np.ndarray:
+        """Classify every grid cell as inside, outside or boundary."""
+        cells = np.zeros((self.ny, self.nx), dtype=np.uint8)
+
+        # Cells touched by an edge (sampled at half-cell steps, then dilated
+        # by one cell so clipped corners are never misclassified)
+        step = min(self.cell_w, self.cell_h) / 2
+        touched = np.zeros_like(cells, dtype=bool)
+        for ax, ay, bx, by in edges.tolist():
+            samples = max(2, int(math.hypot(bx - ax, by - ay) / step) + 2)
+            t = np.linspace(0.0, 1.0, samples)
+            touched[self._row(ay + t * (by - ay)), self._col(ax + t * (bx - ax))] = True
+        padded = np.pad(touched, 1)
+        boundary = np.zeros_like(touched)
+        for dy in (0, 1, 2):
+            for dx in (0, 1, 2):
+                boundary |= padded[dy:dy + self.ny, dx:dx + self.nx]
+
+        # Every other cell is uniformly in or out: test its centre
+        rows, cols = np.nonzero(~boundary)
+        cx = self.x_min + (cols + 0.5) * self.cell_w
+        cy = self.y_min + (rows + 0.5) * self.cell_h
+        inside = _crossings(cx, cy, self._row_edges[rows])
+        cells[rows, cols] = np.where(inside, _INSIDE, _OUTSIDE)
+        cells[boundary] = _BOUNDARY
+        return cells
+
+    def _row(self, y: np.ndarray) -> np.ndarray:
+        return np.clip(((y - self.y_min) / self.cell_h).astype(int), 0, self.ny - 1)
+
+    def _col(self, x: np.ndarray) -> np.ndarray:
+        return np.clip(((x - self.x_min) / self.cell_w).astype(int), 0, self.nx - 1)
+
+    def contains(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Check a batch of points against the polygon."""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        result = np.zeros(x.shape, dtype=bool)
+        in_bbox = np.flatnonzero(
+            (x >= self.x_min) & (x <= self.x_max) & (y >= self.y_min) & (y <= self.y_max)
+        )
+        if len(in_bbox) == 0:
+            return result
+
+        rows = self._row(y[in_bbox])
+        state = self._cells[rows, self._col(x[in_bbox])]
+        result[in_bbox] = state == _INSIDE
+
+        edge_case = state == _BOUNDARY
+        if edge_case.any():
+            idx = in_bbox[edge_case]
+            result[idx] = _crossings(x[idx], y[idx], self._row_edges[rows[edge_case]])
+        return result
+
+
+class ZoneIndex:
+    """Classify batches of positions into zones, first match wins.
+
+    Box zones are answered by bounds comparisons alone; polygon zones refine
+    their bounding-box candidates through a prepared `PolygonIndex`.
+    """
+
+    def __init__(self, zones: List[Zone], resolution: int = 64,
+                 cache: Optional[Dict[str, PolygonIndex]] = None):
+        self.zones = list(zones)
+        self.resolution = resolution
+        self.zone_ids = [zone.id for zone in self.zones]
+        self.bounds = np.array(
+            [(z.x_min, z.x_max, z.y_min, z.y_max, z.z_min, z.z_max) for z in self.zones],
+            dtype=float
+        ).reshape(-1, 6)
+
+        # Polygon indexes are reused for unchanged zones when rebuilding
+        cache = cache or {}
+        self.polygons: Dict[str, PolygonIndex] = {}
+        for zone in self.zones:
+            if zone.polygon is None:
+                continue
+            cached = cache.get(zone.id)
+            if cached is not None and np.array_equal(cached.vertices, np.asarray(zone.polygon, dtype=float)):
+                self.polygons[zone.id] = cached
+            else:
+                self.polygons[zone.id] = PolygonIndex(zone.polygon, resolution)
+
+    def classify(self, positions: np.ndarray) -> np.ndarray:
+        """Get the index of the zone containing each position, or -1."""
+        n = len(positions)
+        if n == 0 or not self.zones:
+            return np.full(n, -1, dtype=int)
+
+        x, y, z = positions[:, 0], positions[:, 1], positions[:, 2]
+        b = self.bounds
+        hits = ((x >= b[:, 0:1]) & (x <= b[:, 1:2]) &
+                (y >= b[:, 2:3]) & (y <= b[:, 3:4]) &
+                (z >= b[:, 4:5]) & (z <= b[:, 5:6]))
+
+        for k, zone in enumerate(self.zones):
+            polygon = self.polygons.get(zone.id)
+            if polygon is None:
+                continue
+            candidates = np.flatnonzero(hits[k])
+            if len(candidates):
+                hits[k, candidates] = polygon.contains(x[candidates], y[candidates])
+
+        first = np.argmax(hits, axis=0)
+        return np.where(hits[first, np.arange(n)], first, -1)
+
+    def classify_ids(self, positions: np.ndarray) -> List[Optional[str]]:
+        """Get the zone ID containing each position, or None."""
+        return [self.zone_ids[k] if k >= 0 else None for k in self.classify(positions).tolist()]
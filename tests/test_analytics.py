@@ -0,0 +1,112 @@
+"""Tests for streaming zone dwell and flow analytics."""
+
+import copy
+import json
+import numpy as np
+import pytest
+
+from src.analytics import OUTSIDE, DwellHistogram, ZoneAnalytics, percentiles
+
+
+def test_histogram_percentiles_within_bucket_error():
+    """Log buckets answer percentiles within the bucket growth error."""
+    rng = np.random.default_rng(0)
+    dwells = rng.lognormal(4.0, 1.0, 20000)
+    histogram = DwellHistogram(1)
+    for dwell in dwells.tolist():
+        histogram.add(0, dwell)
+
+    estimate = percentiles(histogram.counts, histogram.values, [50, 90, 99])[0]
+    exact = np.percentile(dwells, [50, 90, 99])
+    assert np.all(np.abs(estimate / exact - 1) < 0.1)
+    assert histogram.bucket(0.2) == 0
+    assert histogram.bucket(1e9) == histogram.buckets - 1
+    assert np.isnan(percentiles(np.zeros((1, 4), dtype=int), np.arange(4.0), [50])[0, 0])
+
+
+def test_dwell_flow_and_transitions():
+    """Exits record dwell from the entry time; flows count per minute of window."""
+    analytics = ZoneAnalytics({'window': 600, 'slots': 10, 'publish_interval': 30}, ['dock', 'aisle'])
+    analytics.seed([('t1', 'dock'), ('t2', None)], 0.0)
+
+    analytics.update([('t1', 'dock', 'aisle'), ('t2', None, 'dock')], 60.0, 1.0)
+    analytics.update([('t2', 'dock', None)], 180.0, 1.0)
+    rollup = analytics.rollup(300.0)
+
+    dock = rollup['zones']['dock']
+    assert dock['occupancy'] == 0
+    assert dock['exits_per_min'] == pytest.approx(0.4)
+    assert dock['entries_per_min'] == pytest.approx(0.2)
+    assert dock['dwell_seconds']['count'] == 2
+    assert dock['dwell_seconds']['mean'] == pytest.approx(90.0)
+    assert rollup['zones']['aisle']['occupancy'] == 1
+    assert rollup['zones']['aisle']['dwell_seconds']['p50'] is None
+    assert rollup['transitions'] == {'dock': {'aisle': 1, OUTSIDE: 1}, OUTSIDE: {'dock': 1}}
+    json.dumps(rollup)
+
+
+def test_window_rolls_off_old_slots():
+    """Counts older than the window are cleared; occupancy is kept."""
+    analytics = ZoneAnalytics({'window': 60, 'slots': 6}, ['a'])
+    analytics.update([('t1', None, 'a')], 5.0, 1.0)
+    assert analytics.rollup(5.0)['zones']['a']['entries_per_min'] == pytest.approx(6.0)
+
+    analytics.update([], 100.0, 1.0)
+    rollup = analytics.rollup(100.0)
+    assert rollup['zones']['a']['entries_per_min'] == 0
+    assert rollup['zones']['a']['occupancy'] == 1
+    assert rollup['window_seconds'] == 60
+
+
+def test_rollup_cadence_and_zone_reload():
+    """Rollups come due every publish_interval; reloads keep surviving zones."""
+    analytics = ZoneAnalytics({'publish_interval': 2.0}, ['a', 'b'])
+    due = []
+    for tick in range(4):
+        analytics.update([('t1', None, 'a')] if tick == 0 else [], float(tick), 1.0)
+        due.append(analytics.rollup_due)
+    assert due == [False, True, False, True]
+
+    analytics.seed([('t2', 'b')], 4.0)
+    analytics.set_zones(['c', 'a'])
+
+    assert analytics.rollup(4.0)['zones']['a']['occupancy'] == 1
+    assert analytics.rollup(4.0)['transitions'] == {OUTSIDE: {'a': 1}}
+    assert 't2' not in analytics.entered
+
+    analytics.forget('t1')
+    assert analytics.occupancy.sum() == 0
+
+
+def test_generator_feeds_analytics():
+    """The generator records exits and entries even when both happen in one tick."""
+    from src.rtls_generator import RTLSGenerator
+    bounds = {'y_min': 0, 'y_max': 10, 'z_min': 0, 'z_max': 5}
+    config = {
+        'rtls': {
+            'update_interval': 1.0,
+            'movement': {'max_speed': 5.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'analytics': {'enabled': True, 'publish_interval': 2},
+            'zones': [{'id': 'a', 'name': 'A', 'bounds': dict(bounds, x_min=0, x_max=10)},
+                      {'id': 'b', 'name': 'B', 'bounds': dict(bounds, x_min=10.5, x_max=20)}],
+            'tags': [{'id': 't1', 'name': 'T1', 'type': 'asset', 'movement': 'idle',
+                      'initial_position': {'x': 5, 'y': 5}}]
+        }
+    }
+    generator = RTLSGenerator(config)
+    assert generator.analytics.entered == {'t1': ('a', 0.0)}
+
+    generator.step(1.0)
+    generator.tags['t1'].position.x = 15
+    generator.step(1.0)
+
+    rollup = generator.analytics.rollup(generator.elapsed)
+    assert generator.analytics.rollup_due
+    assert rollup['transitions'] == {'a': {'b': 1}}
+    assert rollup['zones']['a']['dwell_seconds']['count'] == 1
+
+    config = copy.deepcopy(config)
+    config['rtls']['tags'].append({'id': 't2', 'name': 'T2', 'type': 'asset', 'movement': 'idle',
+                                   'initial_position': {'x': 1, 'y': 1}})
+    generator.apply_config(config)
+    assert generator.analytics.entered['t2'] == ('a', 2.0)
@@ -0,0 +1,102 @@
+"""Tests for the command line interface and lazy package imports."""
+
+import json
+import subprocess
+import sys
+import pytest
+import yaml
+from unittest.mock import Mock, patch
+
+from src import cli
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    """A small valid configuration file."""
+    config = {
+        'mqtt': {'broker': 'localhost', 'port': 1883, 'client_id': 'cli_test', 'qos': 1},
+        'rtls': {
+            'update_interval': 0.5,
+            'movement': {'max_speed': 2.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'zones': [{'id': 'dock', 'name': 'Dock', 'bounds': {
+                'x_min': 0, 'x_max': 20, 'y_min': 0, 'y_max': 20, 'z_min': 0, 'z_max': 5}}],
+            'tags': [{'id': 'forklift', 'name': 'Forklift', 'type': 'vehicle',
+                      'initial_position': {'x': 5, 'y': 5}}]
+        }
+    }
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump(config))
+    return path
+
+
+def test_package_import_is_lazy():
+    """Importing the package or the CLI loads neither paho nor NumPy."""
+    code = ("import sys, src, src.cli; "
+            "assert 'numpy' not in sys.modules and 'paho' not in sys.modules; "
+            "assert src.Tag.__name__ == 'Tag' and 'paho' not in sys.modules; "
+            "src.MQTTClient; assert 'paho' in sys.modules")
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def test_unknown_package_attribute():
+    """Unknown names still raise AttributeError."""
+    import src
+    with pytest.raises(AttributeError):
+        src.NotAThing
+
+
+def test_default_command_is_run(config_path):
+    """Bare options are routed to `run`, as `python -m src.main -c` expects."""
+    args = cli.build_parser().parse_args(['run', '-c', str(config_path), '--profile'])
+    assert args.handler is cli.cmd_run
+    assert args.profile == 'stages'
+
+    with patch('src.main.RTLSPublisher') as publisher:
+        assert cli.main(['-c', str(config_path)]) == 0
+    publisher.assert_called_once_with(str(config_path), None)
+    publisher.return_value.start.assert_called_once()
+
+
+def test_validate(config_path, tmp_path, capsys):
+    """Valid configs pass; structural problems are reported."""
+    assert cli.main(['validate', str(config_path)]) == 0
+    assert 'OK' in capsys.readouterr().out
+
+    bad = yaml.safe_load(config_path.read_text())
+    bad['rtls']['tags'].append(dict(bad['rtls']['tags'][0]))
+    bad['rtls']['tags'][0]['movement'] = 'teleporting'
+    bad['mqtt']['protocol'] = 4
+    bad_path = tmp_path / 'bad.yaml'
+    bad_path.write_text(yaml.safe_dump(bad))
+
+    assert cli.main(['validate', str(bad_path)]) == 1
+    out = capsys.readouterr().out
+    assert 'duplicate tag ids: forklift' in out
+    assert 'mqtt.protocol' in out
+
+    del bad['rtls']['tags'][1]
+    bad['mqtt']['protocol'] = 5
+    assert any('teleporting' in error for error in cli.validate_config(bad))
+
+
+def test_bench(config_path, capsys):
+    """Bench scales the tag population and prints stage timings."""
+    assert cli.main(['bench', '-c', str(config_path), '--ticks', '3', '--tags', '50',
+                     '--payload-format', 'binary']) == 0
+    out = capsys.readouterr().out
+    assert '50 tags, 3 ticks' in out
+    assert 'encode' in out
+
+
+def test_record_and_replay(config_path, tmp_path):
+    """A recording replays the same messages through the MQTT client."""
+    recording = tmp_path / 'run.jsonl.gz'
+    assert cli.main(['record', '-c', str(config_path), '-o', str(recording), '--ticks', '4']) == 0
+
+    with patch('src.mqtt_client.MQTTClient.connect', return_value=True), \
+            patch('src.mqtt_client.MQTTClient.disconnect'), \
+            patch('src.mqtt_client.MQTTClient._publish', return_value=True) as publish:
+        assert cli.main(['replay', str(recording), '-c', str(config_path), '--speed', '0']) == 0
+
+    topics = [call[0][0] for call in publish.call_args_list]
+    assert topics.count('rtls/location/forklift') == 4
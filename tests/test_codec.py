@@ -0,0 +1,67 @@
+"""Tests for the binary location codec."""
+
+import pytest
+
+from src.codec import LocationCodec, LOCATION_HEADER
+from src.models import LocationUpdate
+
+
+@pytest.fixture
+def location():
+    """Sample location update."""
+    return LocationUpdate(
+        tag_id='tag_001',
+        timestamp='2024-05-01T12:30:45.123456Z',
+        location={'x': 12.34, 'y': -5.5, 'z': 1.25},
+        zone_id='warehouse_a',
+        speed=1.75,
+        heading=270.5,
+        battery=87,
+        rssi=-72
+    )
+
+
+def test_round_trip(location):
+    """Decoding restores every field."""
+    codec = LocationCodec()
+    payload = codec.encode(location)
+
+    assert isinstance(payload, bytes)
+    assert len(payload) == LOCATION_HEADER.size + len('tag_001') + len('warehouse_a')
+    assert LocationCodec.decode(payload) == location
+
+
+def test_round_trip_without_zone(location):
+    """A missing zone is distinct from an empty one."""
+    location.zone_id = None
+    assert LocationCodec.decode(LocationCodec().encode(location)).zone_id is None
+
+
+def test_buffer_is_reused_and_payloads_are_independent(location):
+    """Later encodes do not corrupt payloads already handed out."""
+    codec = LocationCodec()
+    buffer = codec.buffer
+    first = codec.encode(location)
+    location.tag_id = 'tag_002'
+    second = codec.encode(location)
+
+    assert codec.buffer is buffer
+    assert LocationCodec.decode(first).tag_id == 'tag_001'
+    assert LocationCodec.decode(second).tag_id == 'tag_002'
+
+
+def test_buffer_grows_for_large_messages(location):
+    """The buffer is enlarged when a message does not fit."""
+    codec = LocationCodec(capacity=16)
+    assert LocationCodec.decode(codec.encode(location)) == location
+    assert len(codec.buffer) >= LOCATION_HEADER.size
+
+
+def test_invalid_payloads(location):
+    """Foreign payloads and oversized ids are rejected."""
+    with pytest.raises(ValueError):
+        LocationCodec.decode(b'XX' + bytes(LOCATION_HEADER.size))
+
+    location.tag_id = 'x' * 300
+    with pytest.raises(ValueError):
+        LocationCodec().encode(location)
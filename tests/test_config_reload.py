@@ -0,0 +1,190 @@
+"""Tests for configuration hot reload."""
+
+import copy
+import pytest
+import yaml
+
+from src.config_reload import ConfigWatcher
+from src.models import LocationUpdate
+from src.rtls_generator import RTLSGenerator
+
+
+@pytest.fixture
+def config():
+    """Base configuration with two zones and two tags."""
+    return {
+        'rtls': {
+            'update_interval': 1.0,
+            'movement': {'max_speed': 5.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'zones': [
+                {
+                    'id': 'zone_1',
+                    'name': 'Zone 1',
+                    'polygon': [[0, 0], [50, 0], [50, 50], [0, 50]],
+                    'bounds': {'z_min': 0, 'z_max': 5}
+                },
+                {
+                    'id': 'zone_2',
+                    'name': 'Zone 2',
+                    'bounds': {'x_min': 50, 'x_max': 100, 'y_min': 0, 'y_max': 50, 'z_min': 0, 'z_max': 5}
+                }
+            ],
+            'tags': [
+                {'id': 'tag_001', 'name': 'Worker', 'type': 'person',
+                 'initial_position': {'x': 25, 'y': 25, 'z': 0}},
+                {'id': 'tag_002', 'name': 'Pallet', 'type': 'asset', 'movement': 'idle',
+                 'initial_position': {'x': 75, 'y': 25, 'z': 0}}
+            ]
+        }
+    }
+
+
+def test_apply_config_keeps_live_tag_state(config):
+    """Unchanged tags keep their simulated state across reloads."""
+    generator = RTLSGenerator(config)
+    generator.step(1.0)
+    tag = generator.tags['tag_001']
+    tag.position.x = 12.5
+    tag.battery = 42
+
+    new_config = copy.deepcopy(config)
+    new_config['rtls']['tags'][0]['name'] = 'Worker Renamed'
+    new_config['rtls']['tags'].append(
+        {'id': 'tag_003', 'name': 'New', 'type': 'asset', 'initial_position': {'x': 60, 'y': 10}}
+    )
+    changes = generator.apply_config(new_config)
+
+    assert changes['tags_added'] == ['tag_003']
+    assert changes['tags_changed'] == ['tag_001']
+    assert generator.tags['tag_001'] is tag
+    assert (tag.name, tag.position.x, tag.battery) == ('Worker Renamed', 12.5, 42)
+    assert generator.tags['tag_003'].zone_id == 'zone_2'
+
+
+def test_apply_config_removes_tags_and_zones(config):
+    """Removed tags and zones disappear from the running generator."""
+    generator = RTLSGenerator(config)
+    polygon_index = generator.zone_index.polygons['zone_1']
+
+    new_config = copy.deepcopy(config)
+    del new_config['rtls']['tags'][1]
+    del new_config['rtls']['zones'][1]
+    changes = generator.apply_config(new_config)
+
+    assert changes['tags_removed'] == ['tag_002']
+    assert changes['zones_removed'] == ['zone_2']
+    assert 'tag_002' not in generator.tags
+    assert [zone.id for zone in generator.zones] == ['zone_1']
+    # Unchanged polygon zones are not re-rasterized
+    assert generator.zone_index.polygons['zone_1'] is polygon_index
+
+
+def test_apply_config_rejects_invalid_models(config):
+    """Invalid configs are rejected without touching running state."""
+    generator = RTLSGenerator(config)
+
+    new_config = copy.deepcopy(config)
+    new_config['rtls']['tags'][0]['movement'] = 'teleport'
+    with pytest.raises(ValueError):
+        generator.apply_config(new_config)
+
+    assert generator.config is config
+    assert generator.tags['tag_001'].movement == 'random_walk'
+
+
+def test_apply_config_failing_part_way_changes_nothing(config):
+    """A reload that breaks while building tags leaves zones, index and tags as they were."""
+    generator = RTLSGenerator(config)
+    zones, zone_index = generator.zones, generator.zone_index
+
+    new_config = copy.deepcopy(config)
+    new_config['rtls']['zones'][1]['bounds']['x_max'] = 200
+    new_config['rtls']['tags'].append({'id': 'tag_003', 'name': 'New', 'type': 'asset'})
+    with pytest.raises(KeyError):
+        generator.apply_config(new_config)
+
+    assert generator.config is config
+    assert generator.zones is zones and generator.zone_index is zone_index
+    assert list(generator.tags) == ['tag_001', 'tag_002'] and 'tag_003' not in generator.tag_models
+
+    # A later valid reload still diffs against the config that is running
+    del new_config['rtls']['tags'][2]
+    changes = generator.apply_config(new_config)
+    assert changes['zones_changed'] == ['zone_2'] and generator.zones[1].x_max == 200
+
+
+def test_apply_config_switches_movement_model(config):
+    """Changing a tag's model moves it onto the route planner."""
+    generator = RTLSGenerator(config)
+
+    new_config = copy.deepcopy(config)
+    new_config['rtls']['facility'] = {
+        'waypoints': [{'id': 'w1', 'x': 10, 'y': 10}, {'id': 'w2', 'x': 40, 'y': 10}],
+        'edges': [['w1', 'w2']]
+    }
+    new_config['rtls']['tags'][0]['movement'] = {'type': 'waypoint', 'speed': 2.0}
+    generator.apply_config(new_config)
+
+    assert generator.planner is not None
+    assert 'tag_001' in generator.planner
+    generator.step(1.0)
+
+
+def test_apply_config_switches_type_models(config):
+    """Per-type models under rtls.movement.models apply to tags whose own entry is unchanged."""
+    generator = RTLSGenerator(config)
+
+    new_config = copy.deepcopy(config)
+    new_config['rtls']['movement']['models'] = {'person': 'idle'}
+    generator.apply_config(new_config)
+
+    assert generator.tags['tag_001'].movement == 'idle'
+    assert generator.tag_models['tag_001'] == {'type': 'idle'}
+
+
+def test_apply_config_disabling_ranging_publishes_true_positions(config):
+    """Turning ranging off drops the last estimates instead of publishing them forever."""
+    config['rtls']['ranging'] = {'enabled': True, 'noise_std': 0.5, 'nlos_probability': 0.0, 'seed': 1}
+    generator = RTLSGenerator(config)
+    generator.step(1.0)
+    tag = generator.tags['tag_001']
+    assert tag.estimated_position is not None
+
+    new_config = copy.deepcopy(config)
+    new_config['rtls']['ranging']['enabled'] = False
+    generator.apply_config(new_config)
+    generator.step(1.0)
+    location = LocationUpdate.from_tag(tag).location
+    assert (location['x'], location['y']) == (round(tag.position.x, 2), round(tag.position.y, 2))
+    assert generator.snapshot().positions[0].tolist() == [tag.position.x, tag.position.y, tag.position.z]
+
+
+def test_watcher_picks_up_file_changes(tmp_path, config):
+    """The watcher queues a parsed config once the file changes."""
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump(config))
+    watcher = ConfigWatcher(str(path))
+
+    assert watcher.check() is False
+    assert watcher.poll() is None
+
+    config['rtls']['update_interval'] = 0.5
+    path.write_text(yaml.safe_dump(config) + '\n')
+    assert watcher.check() is True
+    assert watcher.poll()['rtls']['update_interval'] == 0.5
+    assert watcher.poll() is None
+
+
+def test_watcher_forced_reload_and_bad_yaml(tmp_path, config):
+    """Forced reloads re-read the file; unparsable files are skipped."""
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump(config))
+    watcher = ConfigWatcher(str(path))
+
+    watcher.request_reload()
+    assert watcher.check() is True
+    watcher.poll()
+
+    path.write_text('rtls: [unclosed\n')
+    assert watcher.check() is False
+    assert watcher.poll() is None
@@ -0,0 +1,180 @@
+"""Tests for trail ring buffers and occupancy heatmaps."""
+
+import numpy as np
+import pytest
+
+from src.heatmap import (HEATMAP_HEADER, HeatmapMonitor, OccupancyGrids, TrailBuffer, decode_heatmap,
+                         encode_heatmap, handle_trails_query)
+from src.models import Zone
+
+
+def make_zone(zone_id, x_min, x_max, y_min, y_max):
+    """A box zone on the ground floor."""
+    return Zone(zone_id, zone_id, x_min, x_max, y_min, y_max, 0, 5)
+
+
+def test_trail_ring_buffer_wraps():
+    """Trails keep the newest samples oldest first and grow past the capacity."""
+    trails = TrailBuffer(length=3, capacity=2)
+    for t in range(5):
+        ids = ['a', 'b', 'c'] if t else ['a']
+        trails.record(ids, np.full((len(ids), 3), float(t)), float(t))
+
+    assert trails.trail('a')[:, 0].tolist() == [2.0, 3.0, 4.0]
+    assert trails.trail('c')[:, 1].tolist() == [2.0, 3.0, 4.0]
+    assert len(trails.samples) == 4
+    assert trails.trail('unknown').shape == (0, 4)
+
+    trails.remove('a')
+    trails.record(['d'], np.zeros((1, 3)), 9.0)
+    assert trails.rows['d'] == 0
+    assert trails.trail('d')[:, 0].tolist() == [9.0]
+
+
+def test_occupancy_accumulates_and_decays():
+    """Cells collect tag-seconds per zone and halve every half-life."""
+    zones = [make_zone('a', 0, 10, 0, 5), make_zone('b', 20, 24, 0, 4)]
+    grids = OccupancyGrids(zones, cell_size=1.0, half_life=10.0)
+    positions = np.array([[0.5, 0.5, 0], [0.6, 0.4, 0], [9.9, 4.9, 0], [21.5, 3.5, 0], [50, 50, 0]])
+    zone_index = np.array([0, 0, 0, 1, -1])
+
+    grids.update(positions, zone_index, 1.0)
+    a, b = grids.grid('a'), grids.grid('b')
+    assert a.shape == (5, 10) and b.shape == (4, 4)
+    assert a[0, 0] == pytest.approx(2.0)
+    assert a[4, 9] == pytest.approx(1.0)
+    assert b[3, 1] == pytest.approx(1.0)
+    assert grids.values.sum() == pytest.approx(4.0)
+
+    grids.update(positions[:0], zone_index[:0], 10.0)
+    assert a[0, 0] == pytest.approx(1.0)
+
+
+def test_set_zones_keeps_unchanged_history():
+    """Reloading zones keeps grids of zones whose layout did not change."""
+    grids = OccupancyGrids([make_zone('a', 0, 4, 0, 4), make_zone('b', 0, 4, 0, 4)])
+    grids.update(np.array([[1.5, 1.5, 0], [1.5, 1.5, 0]]), np.array([0, 1]), 1.0)
+
+    grids.set_zones([make_zone('b', 0, 4, 0, 4), make_zone('a', 0, 8, 0, 4)])
+
+    assert grids.grid('b')[1, 1] == pytest.approx(1.0)
+    assert grids.grid('a').sum() == 0
+
+
+def test_heatmap_frame_round_trip():
+    """Frames quantize to uint16 with a per-frame scale."""
+    grid = np.arange(12, dtype=float).reshape(3, 4) * 1.5
+    frame = encode_heatmap('dock', grid, 100.0, 10.0, 0.5, timestamp_us=123)
+
+    decoded = decode_heatmap(frame)
+    assert len(frame) == HEATMAP_HEADER.size + len('dock') + 2 * 12
+    assert decoded['zone_id'] == 'dock'
+    assert decoded['timestamp_us'] == 123
+    assert (decoded['x_min'], decoded['y_min'], decoded['cell_size']) == (100.0, 10.0, 0.5)
+    assert np.allclose(decoded['grid'], grid, atol=grid.max() / 65535)
+
+    with pytest.raises(ValueError):
+        decode_heatmap(b'XX' + frame[2:])
+
+
+def test_monitor_publish_cadence_and_trails_query():
+    """Frames become due every publish_interval; trails are served as JSON."""
+    monitor = HeatmapMonitor({'publish_interval': 2.0, 'trail_length': 4}, [make_zone('a', 0, 10, 0, 10)])
+    due = []
+    for tick in range(4):
+        position = np.array([[tick + 0.25, 1.0, 0.0]])
+        monitor.update(['t1'], position, position, np.array([0]), float(tick), 1.0)
+        due.append(monitor.frames_due)
+
+    assert due == [False, True, False, True]
+    assert handle_trails_query(monitor, {'tags': 't1'})['trails']['t1'][-1] == [3.0, 3.25, 1.0, 0.0]
+    assert list(handle_trails_query(monitor, {})['trails']) == ['t1']
+
+
+def test_generator_maintains_heatmaps():
+    """The generator feeds trails and grids each tick and resizes grids on zone reloads."""
+    import copy
+    from src.rtls_generator import RTLSGenerator
+    config = {
+        'rtls': {
+            'update_interval': 1.0,
+            'movement': {'max_speed': 5.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'heatmaps': {'enabled': True, 'cell_size': 2.0, 'publish_interval': 5},
+            'zones': [{'id': 'z', 'name': 'Z', 'bounds': {
+                'x_min': 0, 'x_max': 20, 'y_min': 0, 'y_max': 10, 'z_min': 0, 'z_max': 5}}],
+            'tags': [{'id': f"t{i}", 'name': 'T', 'type': 'asset', 'movement': 'idle',
+                      'initial_position': {'x': 1 + i, 'y': 1}} for i in range(4)]
+        }
+    }
+    generator = RTLSGenerator(config)
+    for _ in range(5):
+        generator.step(1.0)
+
+    grid = generator.heatmaps.grids.grid('z')
+    assert grid.shape == (5, 10)
+    assert grid.sum() == pytest.approx(4 * sum(0.5 ** (k / 300) for k in range(5)))
+    assert generator.heatmaps.frames_due
+    assert len(generator.heatmaps.trails.trail('t0')) == 5
+
+    config = copy.deepcopy(config)
+    config['rtls']['zones'][0]['bounds']['x_max'] = 40
+    del config['rtls']['tags'][0]
+    generator.apply_config(config)
+    assert generator.heatmaps.grids.grid('z').shape == (5, 20)
+    assert 't0' not in generator.heatmaps.trails.rows
+
+
+def test_generator_trails_follow_scheduled_tags():
+    """With report rates each trail records its own tag, whatever order the scheduler returns."""
+    from src.rtls_generator import RTLSGenerator
+    config = {
+        'rtls': {
+            'update_interval': 1.0,
+            'movement': {'max_speed': 5.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'heatmaps': {'enabled': True, 'cell_size': 2.0},
+            'rates': {'enabled': True, 'stagger': False, 'types': {'vehicle': 1, 'person': 2, 'asset': 2}},
+            'zones': [{'id': 'z', 'name': 'Z', 'bounds': {
+                'x_min': 0, 'x_max': 20, 'y_min': 0, 'y_max': 10, 'z_min': 0, 'z_max': 5}}],
+            'tags': [{'id': f"t{i}", 'name': 'T', 'type': ('vehicle', 'person', 'asset', 'person')[i],
+                      'movement': 'idle', 'initial_position': {'x': 1 + 4 * i, 'y': 1 + i}} for i in range(4)]
+        }
+    }
+    generator = RTLSGenerator(config)
+    for _ in range(4):
+        generator.step(1.0)
+
+    for tag_id, tag in generator.tags.items():
+        trail = generator.heatmaps.trails.trail(tag_id)
+        assert len(trail) and (trail[:, 1:] == [tag.position.x, tag.position.y, tag.position.z]).all()
+
+
+def test_publisher_clears_removed_zone_topics(tmp_path):
+    """A reload that removes a zone clears its retained occupancy and heatmap topics."""
+    import copy
+    from unittest.mock import Mock, patch
+    import yaml
+    from src.main import RTLSPublisher
+    zone = {'bounds': {'x_min': 0, 'x_max': 20, 'y_min': 0, 'y_max': 10, 'z_min': 0, 'z_max': 5}}
+    config = {
+        'mqtt': {'broker': 'localhost', 'port': 1883, 'client_id': 'test', 'qos': 1},
+        'rtls': {
+            'update_interval': 1.0,
+            'movement': {'max_speed': 5.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'heatmaps': {'enabled': True, 'cell_size': 2.0},
+            'zones': [dict(zone, id='a', name='A'), dict(zone, id='b', name='B')],
+            'tags': [{'id': 't0', 'name': 'T', 'type': 'asset', 'movement': 'idle',
+                      'initial_position': {'x': 1, 'y': 1}}]
+        }
+    }
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump(config))
+    with patch('src.main.MQTTClient.connect', return_value=True):
+        publisher = RTLSPublisher(str(path))
+
+    reloaded = copy.deepcopy(config)
+    del reloaded['rtls']['zones'][1]
+    publisher.config_watcher = Mock(poll=Mock(return_value=reloaded))
+    publisher.mqtt_client.clear_retained = Mock()
+    publisher._apply_config_reload()
+    cleared = [call.args[0] for call in publisher.mqtt_client.clear_retained.call_args_list]
+    assert cleared == ['rtls/zone/b/tags', 'rtls/heatmap/b']
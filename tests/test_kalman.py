@@ -0,0 +1,119 @@
+"""Tests for the batched Kalman smoothing stage."""
+
+import json
+import numpy as np
+import pytest
+
+from src.kalman import KalmanFilter
+from src.models import LocationUpdate
+
+
+def reference_step(x, P, z, dt, q, r):
+    """Textbook matrix form of one predict/update for a single axis."""
+    F = np.array([[1, dt], [0, 1]])
+    Q = q * np.array([[dt ** 4 / 4, dt ** 3 / 2], [dt ** 3 / 2, dt ** 2]])
+    H = np.array([[1.0, 0.0]])
+    x, P = F @ x, F @ P @ F.T + Q
+    K = P @ H.T / (H @ P @ H.T + r)
+    x = x + (K * (z - H @ x)).ravel()
+    P = (np.eye(2) - K @ H) @ P
+    return x, P
+
+
+def test_matches_matrix_reference():
+    """The batched closed form equals the matrix equations for every tag and axis."""
+    rng = np.random.default_rng(1)
+    kf = KalmanFilter(process_noise=0.7, measurement_noise=0.3, initial_velocity_std=2.0)
+    ids = ['a', 'b', 'c']
+    measurements = rng.normal(size=(3, 3))
+    kf.update(ids, measurements, np.ones(3))
+
+    states = [[(np.array([m, 0.0]), np.diag([0.09, 4.0])) for m in row] for row in measurements]
+    for _ in range(5):
+        dt = rng.uniform(0.1, 2.0, 3)
+        measurements = rng.normal(size=(3, 3))
+        positions, velocities, position_std, velocity_std = kf.update(ids, measurements, dt)
+        for i in range(3):
+            for axis in range(3):
+                x, P = reference_step(*states[i][axis], measurements[i, axis], dt[i], 0.49, 0.09)
+                states[i][axis] = (x, P)
+                assert positions[i, axis] == pytest.approx(x[0])
+                assert velocities[i, axis] == pytest.approx(x[1])
+                assert position_std[i] == pytest.approx(np.sqrt(P[0, 0]))
+                assert velocity_std[i] == pytest.approx(np.sqrt(P[1, 1]))
+
+
+def test_smooths_noise_and_estimates_velocity():
+    """A tag moving at constant velocity is tracked better than the raw measurements."""
+    rng = np.random.default_rng(0)
+    n, noise = 500, 0.5
+    kf = KalmanFilter(process_noise=0.05, measurement_noise=noise)
+    ids = [f"t{i}" for i in range(n)]
+    truth = np.zeros((n, 3))
+    velocity = np.tile([1.0, -0.5, 0.0], (n, 1))
+
+    errors = []
+    for step in range(60):
+        truth = truth + velocity * 0.5
+        measured = truth + rng.normal(0, noise, truth.shape)
+        positions, velocities, position_std, _ = kf.update(ids, measured, 0.5)
+        errors.append(np.abs(positions - truth).mean())
+
+    assert np.mean(errors[-10:]) < 0.5 * noise
+    assert np.allclose(velocities.mean(axis=0), [1.0, -0.5, 0.0], atol=0.05)
+    assert position_std[0] < noise
+
+
+def test_new_tags_and_removal():
+    """Unknown tags start at their measurement; removed rows are reused."""
+    kf = KalmanFilter(capacity=1)
+    kf.update(['a'], np.array([[1.0, 2.0, 3.0]]), 1.0)
+    positions, velocities, position_std, _ = kf.update(['a', 'b'], np.array([[1.0, 2.0, 3.0], [5.0, 5.0, 0.0]]), 1.0)
+
+    assert positions[1].tolist() == [5.0, 5.0, 0.0]
+    assert velocities[1].tolist() == [0.0, 0.0, 0.0]
+    assert position_std[1] == pytest.approx(0.1)
+    assert len(kf.p00) == 2
+
+    kf.remove('a')
+    kf.update(['c'], np.zeros((1, 3)), 1.0)
+    assert kf.rows['c'] == 0
+
+
+def test_location_json_omits_missing_filter_fields():
+    """Filter fields appear in the JSON payload only when the Kalman stage is on."""
+    location = LocationUpdate('t', 'now', {'x': 0, 'y': 0, 'z': 0}, None, 0.0, 0.0, 100, -60)
+    assert json.loads(location.to_json()) == {
+        'tag_id': 't', 'timestamp': 'now', 'location': {'x': 0, 'y': 0, 'z': 0},
+        'zone_id': None, 'speed': 0.0, 'heading': 0.0, 'battery': 100, 'rssi': -60
+    }
+    location.velocity = {'x': 1.0, 'y': 0.0, 'z': 0.0}
+    location.uncertainty = {'position': 0.05, 'velocity': 0.1}
+    assert json.loads(location.to_json())['uncertainty'] == {'position': 0.05, 'velocity': 0.1}
+
+
+def test_generator_publishes_filtered_state():
+    """With the stage on, location updates carry filtered position, velocity and uncertainty."""
+    from src.rtls_generator import RTLSGenerator
+    config = {
+        'rtls': {
+            'update_interval': 1.0,
+            'movement': {'max_speed': 5.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'kalman': {'enabled': True, 'measurement_noise': 0.2},
+            'zones': [],
+            'tags': [{'id': 'v', 'name': 'V', 'type': 'vehicle', 'initial_position': {'x': 0, 'y': 0}}]
+        }
+    }
+    generator = RTLSGenerator(config)
+    for _ in range(3):
+        generator.step(1.0)
+
+    location = generator.get_location_update('v')
+    assert set(location.velocity) == {'x', 'y', 'z'}
+    assert 0 < location.uncertainty['position'] < 0.2
+    assert generator.tags['v'].estimated_position is not None
+
+    generator.apply_config(dict(config, rtls=dict(config['rtls'], kalman={'enabled': False})))
+    assert generator.kalman is None
+    assert generator.get_location_update('v').velocity is None
+    assert generator.tags['v'].estimated_position is None
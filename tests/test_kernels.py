@@ -0,0 +1,128 @@
+"""Tests for the batched movement kernels."""
+
+import copy
+import logging
+
+import numpy as np
+import pytest
+
+from src import kernels
+from src.kernels import (DRAWS, KIND_ASSET, KIND_IDLE, KIND_PERSON, KIND_VEHICLE, MovementKernel, ZoneTable,
+                         kind_code, resolve_backend, walk_numpy)
+from src.models import Zone
+from src.rtls_generator import RTLSGenerator
+from src.zone_index import ZoneIndex
+
+
+ZONES = [
+    Zone('box', 'Box', 0, 20, 0, 20, 0, 5),
+    Zone('tri', 'Triangle', 30, 60, 0, 30, 0, float('inf'), polygon=[(30, 0), (60, 0), (60, 30)]),
+]
+
+
+def make_state(n, seed=1):
+    rng = np.random.default_rng(seed)
+    # Half the tags in the box, half in the lower-right part of the triangle
+    x = np.where(np.arange(n) % 2 == 0, rng.uniform(0.5, 19.5, n), rng.uniform(50, 59, n))
+    y = np.where(np.arange(n) % 2 == 0, rng.uniform(0.5, 19.5, n), rng.uniform(1, 9, n))
+    return {
+        'positions': np.column_stack((x, y, rng.uniform(0, 2, n))),
+        'heading': rng.uniform(0, 360, n),
+        'speed': rng.uniform(0, 2, n),
+        'battery': rng.integers(0, 100, n),
+        'rssi': rng.integers(-90, -40, n),
+        'kind': np.array([KIND_IDLE, KIND_ASSET, KIND_VEHICLE, KIND_PERSON, 4] * (n // 5), dtype=np.int64)
+    }
+
+
+def test_kind_codes():
+    assert kind_code('vehicle', 'random_walk') == KIND_VEHICLE
+    assert kind_code('robot', 'random_walk') == 4
+    assert kind_code('person', 'waypoint') == KIND_IDLE
+
+
+def test_backend_fallback(monkeypatch, caplog):
+    """Without Numba, numba and auto fall back to the NumPy kernel."""
+    monkeypatch.setattr(kernels, 'numba', None)
+    assert resolve_backend('auto') == 'numpy'
+    with caplog.at_level(logging.WARNING):
+        assert resolve_backend('numba') == 'numpy'
+    assert 'not installed' in caplog.text
+    with pytest.raises(ValueError):
+        resolve_backend('cuda')
+
+
+def test_fused_loop_matches_numpy():
+    """The per-tag loop the Numba backend compiles gives the NumPy kernel's results."""
+    n = 500
+    index = ZoneIndex(ZONES)
+    table = ZoneTable(index)
+    dt = np.full(n, 2.0)
+    # Asset move gate always open so every kind but idle moves
+    draws = np.random.default_rng(2).random((n, DRAWS))
+    draws[:, 2] = 0.0
+    params = (np.array([0.0, 1.0, 5.0, 2.0, 2.0]), 45.0, 0.5)
+
+    vectorized = make_state(n)
+    looped = make_state(n)
+    rows = walk_numpy(vectorized, dt, draws, *params, index)
+    loop_rows = np.empty(n, dtype=np.int64)
+    kernels._walk_loop(looped['positions'], looped['heading'], looped['speed'], looped['battery'],
+                       looped['rssi'], looped['kind'], dt, draws, *params,
+                       table.bounds, table.is_polygon, table.edges, table.edge_offsets, loop_rows)
+
+    for key in ('positions', 'heading', 'speed'):
+        np.testing.assert_allclose(looped[key], vectorized[key], atol=1e-9)
+    for key in ('battery', 'rssi'):
+        np.testing.assert_array_equal(looped[key], vectorized[key])
+    np.testing.assert_array_equal(loop_rows, rows)
+    assert not np.allclose(vectorized['positions'], make_state(n)['positions'])
+
+
+def test_kernel_keeps_tags_in_their_zones():
+    """Bouncing keeps every tag in the zone it started in."""
+    index = ZoneIndex(ZONES)
+    state = make_state(200)
+    kernel = MovementKernel('numpy', {'max_speed': 5.0, 'acceleration': 0.5, 'turn_rate': 45.0}, seed=3)
+    for _ in range(200):
+        rows = kernel.step(state, np.full(200, 1.0), index)
+    assert (rows == np.arange(200) % 2).all()
+    assert ((state['rssi'] >= -90) & (state['rssi'] <= -40)).all()
+
+
+def test_generator_numpy_backend():
+    """The generator steps through the kernel and raises alerts only for zone changes."""
+    config = {
+        'rtls': {
+            'update_interval': 1.0,
+            'movement': {'max_speed': 5.0, 'acceleration': 0.5, 'turn_rate': 45.0, 'backend': 'numpy', 'seed': 4},
+            'zones': [
+                {'id': 'box', 'name': 'Box', 'bounds': {'x_min': 0, 'x_max': 20, 'y_min': 0, 'y_max': 20,
+                                                        'z_min': 0, 'z_max': 5}},
+                {'id': 'tri', 'name': 'Triangle', 'polygon': [[30, 0], [60, 0], [60, 30]]}
+            ],
+            'tags': [
+                {'id': f't{i}', 'name': f'T{i}', 'type': ('vehicle', 'person', 'asset')[i % 3],
+                 'initial_position': {'x': 10 if i % 2 else 55, 'y': 5}}
+                for i in range(30)
+            ]
+        }
+    }
+    generator = RTLSGenerator(config)
+    assert generator.kernel.backend in ('numpy', 'numba')
+    for _ in range(20):
+        assert generator.step(1.0) == []
+    positions = generator.get_positions()
+    expected = generator.zone_index.classify_ids(positions)
+    assert [tag.zone_id for tag in generator.tags.values()] == expected
+    assert not np.allclose(positions[::3, :2], [[55, 5], [10, 5]] * 5)
+
+    # Moving a tag out of its zone between ticks raises one exit alert
+    generator.tags['t0'].position.x = 100
+    alerts = generator.step(1.0)
+    assert [(alert.tag_id, alert.event_type) for alert in alerts] == [('t0', 'exited')]
+
+    config = copy.deepcopy(config)
+    config['rtls']['movement']['backend'] = 'python'
+    generator.apply_config(config)
+    assert generator.kernel is None
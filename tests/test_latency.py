@@ -0,0 +1,101 @@
+"""Tests for sequenced location updates and the end-to-end latency tracker."""
+
+import json
+from unittest.mock import Mock
+
+import pytest
+
+from src.codec import LocationCodec
+from src.latency import LatencyTracker, parse_location
+from src.models import LocationUpdate
+from src.mqtt_client import MQTTClient
+
+
+def make_location(tag_id='t1'):
+    return LocationUpdate(tag_id=tag_id, timestamp='2024-01-01T00:00:00Z', location={'x': 1.0, 'y': 2.0, 'z': 0.0},
+                          zone_id=None, speed=0.0, heading=0.0, battery=90, rssi=-60)
+
+
+@pytest.mark.parametrize('payload_format', ['json', 'binary'])
+def test_client_sequences_per_topic(payload_format):
+    """With mqtt.sequence each location topic counts from 1 and carries a send time."""
+    client = MQTTClient({'mqtt': {'broker': 'localhost', 'port': 1883, 'client_id': 'seq_test',
+                                  'sequence': True, 'payload_format': payload_format}})
+    client.client = Mock()
+    client.client.publish.return_value = Mock(rc=0)
+    site = client.with_prefix('site/a/')
+    for tag_id in ('t1', 't2', 't1'):
+        client.publish_location(make_location(tag_id))
+    site.publish_location(make_location('t1'))
+
+    payloads = [(call.args[0], call.args[1]) for call in client.client.publish.call_args_list]
+    traces = [(topic, parse_location(payload.encode() if isinstance(payload, str) else payload))
+              for topic, payload in payloads]
+    assert [(topic, trace[0]) for topic, trace in traces] == [
+        ('rtls/location/t1', 1), ('rtls/location/t2', 1), ('rtls/location/t1', 2), ('site/a/rtls/location/t1', 1)]
+    assert all(trace[1] > 1.6e18 for _, trace in traces)
+
+
+def test_tracing_fields_are_optional():
+    """Without sequencing, JSON omits the fields and binary payloads keep their old size."""
+    location = make_location()
+    assert 'seq' not in json.loads(location.to_json())
+    plain = LocationCodec().encode(location)
+    assert parse_location(plain) is None and parse_location(location.to_json().encode()) is None
+
+    location.seq, location.send_ns = 7, 1_700_000_000_123_456_789
+    traced = LocationCodec().encode(location)
+    assert len(traced) == len(plain) + 12
+    decoded = LocationCodec.decode(traced)
+    assert (decoded.seq, decoded.send_ns, decoded.tag_id) == (7, 1_700_000_000_123_456_789, 't1')
+
+
+def test_loss_duplicates_reorders_and_restarts():
+    """Sequence anomalies are classified per topic."""
+    tracker = LatencyTracker()
+    for seq in (5, 6, 8, 9, 7, 9, 12):
+        tracker.observe('a', seq, None)
+    tracker.observe('b', 1, None)
+    summary = tracker.summary()
+    # 7 arrived late and was taken back out of the lost count; 10 and 11 are lost
+    assert (summary['received'], summary['lost'], summary['duplicates'], summary['reordered']) == (8, 2, 1, 1)
+
+    for seq in range(13, 100):
+        tracker.observe('a', seq, None)
+    tracker.observe('a', 1, None)
+    tracker.observe('a', 2, None)
+    assert tracker.report()['topics']['a']['restarts'] == 1
+    assert tracker.report()['topics']['a']['lost'] == 2
+
+
+def test_restart_inside_window():
+    """A short stream sent twice is a restart, not a run of duplicates."""
+    tracker = LatencyTracker()
+    for _ in range(2):
+        for seq in range(1, 31):
+            tracker.observe('a', seq, None)
+    summary = tracker.summary()
+    assert (summary['restarts'], summary['duplicates'], summary['lost'], summary['reordered']) == (1, 0, 0, 0)
+
+
+def test_latency_percentiles_and_exports():
+    """Percentiles land within one bucket and histograms export consistently."""
+    tracker = LatencyTracker()
+    for i in range(1000):
+        latency_ms = 2.0 if i < 990 else 100.0
+        tracker.observe(f"t{i % 10}", i // 10 + 1, 0, int(latency_ms * 1e6))
+    latency = tracker.summary()['latency_ms']
+    assert latency['p50'] == pytest.approx(2.0, rel=0.2)
+    assert latency['p99.9'] == pytest.approx(100.0, rel=0.2)
+
+    report = tracker.report()
+    assert sum(report['histogram']['counts']) == 1000
+    assert len(report['histogram']['le_ms']) == len(report['histogram']['counts'])
+    assert report['topics']['t3']['received'] == 100
+
+    text = tracker.prometheus()
+    assert 'rtls_e2e_latency_seconds_bucket{le="+Inf"} 1000' in text
+    assert 'rtls_e2e_latency_seconds_count 1000' in text
+    assert 'rtls_e2e_lost_total 0' in text
+    buckets = [int(line.split()[-1]) for line in text.splitlines() if line.startswith('rtls_e2e_latency_seconds_bucket')]
+    assert buckets == sorted(buckets)
@@ -0,0 +1,124 @@
+"""Tests for the embedded live feed server."""
+
+import copy
+import json
+import socket
+import time
+from unittest.mock import Mock, patch
+import pytest
+import numpy as np
+import yaml
+
+from src.live_feed import FeedFilter, LiveFeedServer, websocket_accept, websocket_frame
+from src.main import RTLSPublisher
+from src.snapshot import TagSnapshot
+from src.models import Tag, Position
+
+
+@pytest.fixture
+def snapshot():
+    """Three tags across two zones."""
+    tags = [
+        Tag('t1', 'Worker', 'person', Position(5, 5), zone_id='zone_1'),
+        Tag('t2', 'Forklift', 'vehicle', Position(40, 5), zone_id='zone_1'),
+        Tag('t3', 'Pallet', 'asset', Position(80, 20), zone_id='zone_2')
+    ]
+    return TagSnapshot.from_tags(tags, seq=1)
+
+
+def test_filter_by_zone_type_and_viewport(snapshot):
+    """Filters combine zone, type and bounding box."""
+    assert FeedFilter(zones=['zone_1']).select(snapshot).tolist() == [0, 1]
+    assert FeedFilter(types=['asset', 'person']).select(snapshot).tolist() == [0, 2]
+    assert FeedFilter(bbox=(0, 0, 50, 10)).select(snapshot).tolist() == [0, 1]
+    assert FeedFilter(zones=['zone_1'], types=['vehicle']).select(snapshot).tolist() == [1]
+
+
+def test_filter_from_query_caps_rate():
+    """Client rates are capped by the server maximum."""
+    feed_filter = FeedFilter.from_query({'zones': 'a,b', 'bbox': '0,0,10,10', 'rate': '50'}, 10.0)
+
+    assert feed_filter.zones == ('a', 'b')
+    assert feed_filter.bbox == (0, 0, 10, 10)
+    assert feed_filter.rate == 10.0
+
+    with pytest.raises(ValueError):
+        FeedFilter.from_query({'bbox': '0,0,10'}, 10.0)
+
+
+def test_websocket_helpers():
+    """Handshake accept key and frame lengths follow RFC 6455."""
+    assert websocket_accept('dGhlIHNhbXBsZSBub25jZQ==') == 's3pPLMBiTxaQ9kYGzzhZRbK+xOo='
+    assert websocket_frame(b'hi')[:2] == b'\x81\x02'
+    assert websocket_frame(b'x' * 300)[:4] == b'\x81\x7e\x01\x2c'
+
+
+def test_sse_stream_and_routes(snapshot):
+    """SSE clients receive filtered frames; JSON routes are served."""
+    server = LiveFeedServer({'host': '127.0.0.1', 'port': 0})
+    server.add_route('/ping', lambda query: {'pong': query.get('n')})
+    server.add_route('/off', lambda query: None)
+    server.start()
+    try:
+        with socket.create_connection(('127.0.0.1', server.port), timeout=5) as sock:
+            sock.sendall(b'GET /ping?n=3 HTTP/1.1\r\nHost: x\r\n\r\n')
+            response = sock.makefile('rb').read().decode()
+            assert response.startswith('HTTP/1.1 200')
+            assert json.loads(response.split('\r\n\r\n', 1)[1]) == {'pong': '3'}
+
+        with socket.create_connection(('127.0.0.1', server.port), timeout=5) as sock:
+            sock.sendall(b'GET /off HTTP/1.1\r\nHost: x\r\n\r\n')
+            assert sock.makefile('rb').read().decode().startswith('HTTP/1.1 404')
+
+        with socket.create_connection(('127.0.0.1', server.port), timeout=5) as sock:
+            sock.sendall(b'GET /events?types=vehicle HTTP/1.1\r\nHost: x\r\n\r\n')
+            stream = sock.makefile('rb')
+            while stream.readline().strip():
+                pass
+
+            time.sleep(0.1)
+            server.publish(snapshot)
+            line = stream.readline()
+            frame = json.loads(line[len(b'data: '):])
+            assert frame['seq'] == 1
+            assert [tag['tag_id'] for tag in frame['tags']] == ['t2']
+    finally:
+        server.stop()
+
+
+def test_publisher_routes_follow_reloads(tmp_path):
+    """Query routes answer from whatever index the generator holds after a reload."""
+    config = {
+        'mqtt': {'broker': 'localhost', 'port': 1883, 'client_id': 'test', 'qos': 1},
+        'rtls': {
+            'update_interval': 1.0,
+            'movement': {'max_speed': 2.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'zones': [],
+            'tags': [{'id': 't1', 'name': 'T1', 'type': 'person', 'initial_position': {'x': 1, 'y': 1}}]
+        }
+    }
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump(config))
+    with patch('src.main.MQTTClient.connect', return_value=True):
+        publisher = RTLSPublisher(str(path))
+    assert publisher.live_feed is None
+
+    # Enabling queries on reload creates the server and serves the new index
+    enabled = copy.deepcopy(config)
+    enabled['rtls']['query'] = {'enabled': True}
+    publisher.config_watcher = Mock(poll=Mock(return_value=enabled))
+    publisher._apply_config_reload()
+    routes = publisher.live_feed.routes
+    assert routes['/trails']({}) is None
+    publisher.rtls_generator.step(1.0)
+    assert routes['/tags']({'type': 'person'})['tag_count'] == 1
+
+    # A replaced index is picked up, a disabled one answers 404
+    resized = copy.deepcopy(enabled)
+    resized['rtls']['query']['cell_size'] = 5.0
+    publisher.config_watcher.poll.return_value = resized
+    publisher._apply_config_reload()
+    assert routes['/tags']({})['seq'] is None
+    publisher.config_watcher.poll.return_value = copy.deepcopy(config)
+    publisher._apply_config_reload()
+    assert publisher.rtls_generator.query_index is None and routes['/tags']({}) is None
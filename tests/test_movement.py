@@ -0,0 +1,193 @@
+"""Tests for graph-based movement models."""
+
+import pytest
+import numpy as np
+
+from src.movement import FacilityGraph, RouteTable, MovementPlanner
+from src.rtls_generator import RTLSGenerator
+from src.models import Tag, Position, Zone
+
+
+@pytest.fixture
+def graph():
+    """Square aisle loop with one diagonal shortcut."""
+    return FacilityGraph(
+        {
+            'a': (0, 0, 0),
+            'b': (10, 0, 0),
+            'c': (10, 10, 0),
+            'd': (0, 10, 0),
+            'e': (50, 50, 0)
+        },
+        [('a', 'b'), ('b', 'c'), ('c', 'd'), ('d', 'a'), ('a', 'c', 100)]
+    )
+
+
+@pytest.fixture
+def zones():
+    """Two zones with centres near waypoints a and c."""
+    return [
+        Zone('zone_a', 'Zone A', -1, 1, -1, 1, 0, 5),
+        Zone('zone_c', 'Zone C', 9, 11, 9, 11, 0, 5)
+    ]
+
+
+def test_shortest_path(graph):
+    """Dijkstra honours explicit edge weights."""
+    assert graph.shortest_path('a', 'c') in (['a', 'b', 'c'], ['a', 'd', 'c'])
+    assert graph.shortest_path('a', 'a') == ['a']
+    assert graph.shortest_path('a', 'e') is None
+
+
+def test_nearest(graph):
+    """Nearest waypoint lookup."""
+    assert graph.nearest(9, 1) == 'b'
+
+
+def test_route_interpolation(graph):
+    """Positions are interpolated along the packed route polylines."""
+    table = RouteTable(graph)
+    ab = table.route('a', 'b')
+    bd = table.route('b', 'd')
+
+    positions, headings = table.interpolate(
+        np.array([ab, ab, bd, bd]),
+        np.array([5.0, 10.0, 5.0, 15.0])
+    )
+
+    np.testing.assert_allclose(positions[0], [5, 0, 0])
+    np.testing.assert_allclose(positions[1], [10, 0, 0])
+    assert headings[0] == pytest.approx(0.0)
+    assert table.route_length[bd] == pytest.approx(20.0)
+
+
+def test_shuttle_cycles_between_zones(graph, zones):
+    """Shuttles travel the precomputed loop and dwell at each stop."""
+    planner = MovementPlanner(graph, zones, seed=0)
+    tag = Tag('t1', 'Shuttle', 'vehicle', Position(0.5, 0.5))
+    planner.add_tag(tag, {'type': 'shuttle', 'stops': ['zone_a', 'zone_c'], 'speed': 2.0, 'dwell': 3})
+
+    # Snapped onto waypoint a, then starts dwelling
+    planner.advance(1.0)
+    assert (tag.position.x, tag.position.y) == (0, 0)
+    assert tag.speed == 0.0
+
+    visited = set()
+    for _ in range(40):
+        planner.advance(1.0)
+        visited.add((round(tag.position.x), round(tag.position.y)))
+
+    assert (10, 10) in visited
+    assert (0, 0) in visited
+
+
+def test_shuttle_starts_with_first_stop(graph, zones):
+    """The first stop is the first destination, not skipped."""
+    planner = MovementPlanner(graph, zones, seed=0)
+    tag = Tag('t1', 'Shuttle', 'vehicle', Position(10, 10))
+    planner.add_tag(tag, {'type': 'shuttle', 'stops': ['zone_a', 'zone_c'], 'speed': 2.0})
+
+    planner.advance(1.0)
+    assert planner._nodes == ['a']
+    # Ten seconds along the 20 m aisle to a
+    for _ in range(10):
+        planner.advance(1.0)
+    assert (round(tag.position.x), round(tag.position.y)) == (0, 0)
+
+
+def test_waypoints_without_other_nodes_stay_put(graph, zones):
+    """Duplicate waypoints leave a tag dwelling where it is instead of redrawing forever."""
+    planner = MovementPlanner(graph, zones, seed=0)
+    tag = Tag('t1', 'Walker', 'person', Position(0, 0))
+    planner.add_tag(tag, {'type': 'waypoint', 'waypoints': ['a', 'a'], 'speed': 1.0})
+
+    for _ in range(3):
+        planner.advance(1.0)
+    assert (tag.position.x, tag.position.y) == (0, 0)
+
+
+def test_remove_tag(graph, zones):
+    """Removed tags are no longer advanced."""
+    planner = MovementPlanner(graph, zones, seed=0)
+    tag = Tag('t1', 'Walker', 'person', Position(0, 0))
+    planner.add_tag(tag, {'type': 'waypoint', 'speed': 1.0})
+
+    planner.remove_tag('t1')
+
+    assert 't1' not in planner
+    planner.advance(1.0)
+
+
+def test_generator_models():
+    """Per-type and per-tag models are resolved by the generator."""
+    config = {
+        'rtls': {
+            'update_interval': 1.0,
+            'movement': {
+                'max_speed': 5.0,
+                'acceleration': 0.5,
+                'turn_rate': 45.0,
+                'seed': 1,
+                'models': {'vehicle': {'type': 'waypoint', 'speed': 3.0}}
+            },
+            'facility': {
+                'waypoints': [
+                    {'id': 'w1', 'x': 5, 'y': 5},
+                    {'id': 'w2', 'x': 45, 'y': 5}
+                ],
+                'edges': [['w1', 'w2']]
+            },
+            'zones': [
+                {
+                    'id': 'zone_1',
+                    'name': 'Zone 1',
+                    'bounds': {
+                        'x_min': 0, 'x_max': 50,
+                        'y_min': 0, 'y_max': 50,
+                        'z_min': 0, 'z_max': 5
+                    }
+                }
+            ],
+            'tags': [
+                {
+                    'id': 'tag_001',
+                    'name': 'Forklift',
+                    'type': 'vehicle',
+                    'initial_position': {'x': 6, 'y': 6, 'z': 0}
+                },
+                {
+                    'id': 'tag_002',
+                    'name': 'Pallet',
+                    'type': 'asset',
+                    'movement': 'idle',
+                    'initial_position': {'x': 20, 'y': 20, 'z': 0}
+                }
+            ]
+        }
+    }
+    generator = RTLSGenerator(config)
+    assert generator.tags['tag_001'].movement == 'waypoint'
+    assert generator.tags['tag_002'].movement == 'idle'
+
+    for _ in range(5):
+        generator.step(1.0)
+
+    forklift = generator.tags['tag_001']
+    assert forklift.position.y == pytest.approx(5)
+    assert forklift.position.x > 5
+    assert (generator.tags['tag_002'].position.x, generator.tags['tag_002'].position.y) == (20, 20)
+
+
+def test_route_models_require_facility():
+    """Route models without a facility graph are a configuration error."""
+    config = {
+        'rtls': {
+            'movement': {'models': {'person': 'waypoint'}},
+            'zones': [],
+            'tags': [
+                {'id': 't', 'name': 'T', 'type': 'person', 'initial_position': {'x': 0, 'y': 0}}
+            ]
+        }
+    }
+    with pytest.raises(ValueError):
+        RTLSGenerator(config)
@@ -0,0 +1,126 @@
+"""Tests for MQTT v5 properties and topic aliases."""
+
+import pytest
+from unittest.mock import MagicMock, Mock
+import paho.mqtt.client as mqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from src.mqtt5 import TopicAliasTable, publish_properties, strip_queued_aliases
+from src.mqtt_client import MQTTClient
+from src.models import LocationUpdate, SystemStatus
+
+
+@pytest.fixture
+def v5_client():
+    """v5 client with a mocked paho connection."""
+    client = MQTTClient({'mqtt': {
+        'broker': 'localhost', 'port': 1883, 'client_id': 'v5_test', 'qos': 1,
+        'protocol': 5,
+        'v5': {'topic_alias_maximum': 2, 'location_expiry': 30, 'user_properties': {'site': 'north'}}
+    }})
+    client.client = MagicMock()
+    client.client.publish.return_value = Mock(rc=0)
+    return client
+
+
+def connack(maximum):
+    """CONNACK properties announcing a broker topic alias maximum."""
+    properties = Properties(PacketTypes.CONNACK)
+    properties.TopicAliasMaximum = maximum
+    return properties
+
+
+def location(tag_id):
+    """Location update for a tag."""
+    return LocationUpdate(tag_id, '2024-01-01T00:00:00Z', {'x': 1, 'y': 2, 'z': 0}, None, 0, 0, 90, -60)
+
+
+def test_alias_table_assigns_and_establishes():
+    """First publish carries the topic, later ones only the alias."""
+    table = TopicAliasTable(1)
+    base = publish_properties('application/json')
+
+    topic, properties = table.resolve('a', base)
+    assert (topic, properties.TopicAlias) == ('a', 1)
+    assert table.resolve('a', base) == ('', properties)
+    assert table.resolve('b', base) == ('b', None)
+    assert not hasattr(base, 'TopicAlias')
+
+    table.unestablish('a')
+    assert table.resolve('a', base)[0] == 'a'
+    table.reset(5)
+    assert table.topics() == {}
+
+
+def test_v5_location_publishes_use_aliases_and_expiry(v5_client):
+    """Location topics are aliased up to the negotiated maximum."""
+    v5_client._on_connect(v5_client.client, None, {}, 0, connack(10))
+    assert v5_client.aliases.maximum == 2
+
+    for tag_id in ['t1', 't1', 't2', 't3']:
+        v5_client.publish_location(location(tag_id))
+
+    calls = v5_client.client.publish.call_args_list
+    assert [call[0][0] for call in calls] == ['rtls/location/t1', '', 'rtls/location/t2', 'rtls/location/t3']
+    properties = [call[1]['properties'] for call in calls]
+    assert properties[0].TopicAlias == properties[1].TopicAlias == 1
+    assert properties[2].TopicAlias == 2
+    assert not hasattr(properties[3], 'TopicAlias')
+    assert properties[3].MessageExpiryInterval == 30
+    assert properties[3].ContentType == 'application/json'
+    assert ('site', 'north') in properties[3].UserProperty
+    assert ('schema', 'location') in properties[3].UserProperty
+
+
+def test_broker_without_alias_support(v5_client):
+    """No aliases are used when the broker does not announce any."""
+    v5_client._on_connect(v5_client.client, None, {}, 0, Properties(PacketTypes.CONNACK))
+    v5_client.publish_location(location('t1'))
+    v5_client.publish_location(location('t1'))
+
+    assert [call[0][0] for call in v5_client.client.publish.call_args_list] == ['rtls/location/t1'] * 2
+
+
+def test_other_messages_carry_content_type(v5_client):
+    """Status and other JSON messages get properties but no alias or expiry."""
+    v5_client.publish_status(SystemStatus('2024-01-01T00:00:00Z', 1, 1.0, True, 'ok'))
+    properties = v5_client.client.publish.call_args[1]['properties']
+
+    assert properties.ContentType == 'application/json'
+    assert ('schema', 'status') in properties.UserProperty
+    assert not hasattr(properties, 'MessageExpiryInterval')
+
+
+def test_reconnect_strips_aliases_from_queued_messages():
+    """Unacknowledged aliased messages are resent with their full topic."""
+    paho = mqtt.Client(client_id='strip_test', protocol=mqtt.MQTTv5)
+    table = TopicAliasTable(5)
+    base = publish_properties('application/json', 60)
+    first_topic, first_properties = table.resolve('rtls/location/t1', base)
+    second_topic, second_properties = table.resolve('rtls/location/t1', base)
+
+    for mid, (topic, properties) in enumerate([(first_topic, first_properties),
+                                               (second_topic, second_properties)], start=1):
+        message = mqtt.MQTTMessage(mid, topic.encode('utf-8'))
+        message.properties = properties
+        paho._out_messages[mid] = message
+
+    strip_queued_aliases(paho, table.topics())
+
+    for message in paho._out_messages.values():
+        assert message.topic == 'rtls/location/t1'
+        assert not hasattr(message.properties, 'TopicAlias')
+        assert message.properties.MessageExpiryInterval == 60
+    # The shared alias properties are left untouched
+    assert first_properties.TopicAlias == 1
+
+
+def test_v311_is_unchanged():
+    """Without protocol 5 no properties are sent."""
+    client = MQTTClient({'mqtt': {'broker': 'localhost', 'port': 1883, 'client_id': 'v3', 'qos': 1}})
+    client.client = Mock()
+    client.client.publish.return_value = Mock(rc=0)
+    client.publish_location(location('t1'))
+
+    assert 'properties' not in client.client.publish.call_args[1]
@@ -6,7 +6,7 @@ from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime
 
 from src.mqtt_client import MQTTClient
-from src.models import LocationUpdate, ZoneAlert, SystemStatus, Tag, Position
+from src.models import LocationUpdate, ZoneAlert, SystemStatus, Tag, Position, ProximityEvent
 
 
 @pytest.fixture
@@ -105,6 +105,31 @@ def test_publish_alert(mqtt_client):
     )
 
 
+def test_publish_proximity(mqtt_client):
+    """Test publishing proximity event."""
+    mqtt_client.client = Mock()
+    mqtt_client.client.publish.return_value = Mock(rc=0)
+    
+    event = ProximityEvent(
+        rule_id='forklift_person',
+        tag_id='tag_001',
+        other_tag_id='tag_002',
+        timestamp=datetime.utcnow().isoformat() + 'Z',
+        event_type='started',
+        distance=3.2
+    )
+    
+    result = mqtt_client.publish_proximity(event)
+    
+    assert result is True
+    mqtt_client.client.publish.assert_called_once_with(
+        'rtls/proximity',
+        event.to_json(),
+        qos=1,
+        retain=False
+    )
+
+
 def test_publish_zone_tags(mqtt_client):
     """Test publishing zone occupancy."""
     mqtt_client.client = Mock()
@@ -176,4 +201,42 @@ def test_disconnect(mqtt_client):
     
     mqtt_client.client.loop_stop.assert_called_once()
     mqtt_client.client.disconnect.assert_called_once()
-    assert mqtt_client.connected is False
\ No newline at end of file
+    assert mqtt_client.connected is False
+
+
+def test_location_topics_are_cached_per_prefix(mqtt_client):
+    """Topics are rendered once per tag and views keep their own cache."""
+    mqtt_client.client = Mock()
+    mqtt_client.client.publish.return_value = Mock(rc=0)
+    view = mqtt_client.with_prefix('site/a/')
+    location = LocationUpdate('tag_001', '2024-01-01T00:00:00Z', {'x': 1, 'y': 2, 'z': 0}, None, 0, 0, 90, -60)
+
+    mqtt_client.publish_location(location)
+    mqtt_client.publish_location(location)
+    view.publish_location(location)
+
+    topics = [call[0][0] for call in mqtt_client.client.publish.call_args_list]
+    assert topics == ['rtls/location/tag_001', 'rtls/location/tag_001', 'site/a/rtls/location/tag_001']
+    assert topics[0] is topics[1]
+
+    mqtt_client.forget_topics(['tag_001'])
+    assert 'tag_001' not in mqtt_client._location_topics
+
+
+def test_binary_payload_format(config):
+    """Location updates can be published in the binary encoding."""
+    from src.codec import LocationCodec
+    config['mqtt']['payload_format'] = 'binary'
+    client = MQTTClient(config)
+    client.client = Mock()
+    client.client.publish.return_value = Mock(rc=0)
+    location = LocationUpdate('tag_001', '2024-01-01T00:00:00.500000Z', {'x': 1.5, 'y': 2.0, 'z': 0.0},
+                              'zone_1', 0.5, 90.0, 80, -60)
+
+    assert client.publish_location(location) is True
+    payload = client.client.publish.call_args[0][1]
+    assert LocationCodec.decode(payload) == location
+
+    config['mqtt']['payload_format'] = 'protobuf'
+    with pytest.raises(ValueError):
+        MQTTClient(config)
@@ -0,0 +1,103 @@
+"""Tests for multi-site configuration loading and pooled publishing."""
+
+import pytest
+import yaml
+from unittest.mock import Mock
+
+from src.multisite import MQTTConnectionPool, load_site_configs, site_topic_prefix
+from src.models import SystemStatus
+
+
+def site_config(interval=1.0, site_id=None):
+    """Minimal site configuration."""
+    config = {
+        'rtls': {
+            'update_interval': interval,
+            'movement': {'max_speed': 2.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'zones': [
+                {'id': 'dock', 'name': 'Dock', 'bounds': {'x_min': 0, 'x_max': 10, 'y_min': 0, 'y_max': 10,
+                                                          'z_min': 0, 'z_max': 5}}
+            ],
+            'tags': [
+                {'id': 'tag_1', 'name': 'Tag 1', 'type': 'asset', 'movement': 'idle',
+                 'initial_position': {'x': 5, 'y': 5}}
+            ]
+        }
+    }
+    if site_id:
+        config['site'] = {'id': site_id}
+    return config
+
+
+@pytest.fixture
+def mqtt_config():
+    """Base broker configuration."""
+    return {'mqtt': {'broker': 'localhost', 'port': 1883, 'client_id': 'rtls', 'qos': 1}}
+
+
+@pytest.fixture
+def site_dir(tmp_path):
+    """Directory with two site configs."""
+    sites = tmp_path / 'sites'
+    sites.mkdir()
+    (sites / 'north.yaml').write_text(yaml.safe_dump(site_config()))
+    (sites / 'other.yml').write_text(yaml.safe_dump(site_config(2.0, site_id='south')))
+    (sites / 'README.txt').write_text('not a site')
+    return sites
+
+
+def test_load_site_configs(site_dir):
+    """Site ids come from site.id or the file name."""
+    sites = load_site_configs([str(site_dir)])
+
+    assert list(sites) == ['north', 'south']
+    assert sites['south']['rtls']['update_interval'] == 2.0
+
+
+def test_load_site_configs_rejects_duplicates(site_dir):
+    """The same site id may not be loaded twice."""
+    with pytest.raises(ValueError):
+        load_site_configs([str(site_dir), str(site_dir / 'north.yaml')])
+
+    with pytest.raises(FileNotFoundError):
+        load_site_configs([str(site_dir / 'missing.yaml')])
+
+
+def test_pool_shares_connections_round_robin(mqtt_config):
+    """Sites are spread over the pool and publish under their own prefix."""
+    pool = MQTTConnectionPool(mqtt_config, size=2)
+    for connection in pool.connections:
+        connection.client = Mock()
+        connection.client.publish.return_value = Mock(rc=0)
+
+    clients = [pool.client_for(i, f"site_{i}") for i in range(3)]
+    assert [c.config['client_id'] for c in pool.connections] == ['rtls-0', 'rtls-1']
+    assert clients[0].client is clients[2].client is pool.connections[0].client
+    assert clients[0].topic_prefix == site_topic_prefix('site_0') == 'site/site_0/'
+
+    status = SystemStatus('2024-01-01T00:00:00Z', 1, 1.0, True, 'ok')
+    clients[2].publish_status(status)
+    assert pool.connections[0].client.publish.call_args[0][0] == 'site/site_2/rtls/status'
+
+
+def test_multi_site_tick_respects_site_intervals(tmp_path, site_dir, mqtt_config):
+    """Each site is stepped at its own rate inside the shared loop."""
+    from src.main import MultiSitePublisher
+
+    base = tmp_path / 'base.yaml'
+    base.write_text(yaml.safe_dump({**mqtt_config, 'sites': {'pool_size': 1}}))
+    publisher = MultiSitePublisher(str(base), [str(site_dir)])
+    connection = publisher.pool.connections[0]
+    connection.client = Mock()
+    connection.client.publish.return_value = Mock(rc=0)
+    for site in publisher.sites:
+        site.mqtt_client.client = connection.client
+
+    assert publisher.update_interval == 1.0
+    for _ in range(4):
+        publisher.tick()
+
+    assert [site.generator.tick for site in publisher.sites] == [4, 2]
+    topics = {call[0][0] for call in connection.client.publish.call_args_list}
+    assert 'site/north/rtls/location/tag_1' in topics
+    assert 'site/south/rtls/zone/dock/tags' in topics
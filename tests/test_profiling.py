@@ -0,0 +1,114 @@
+"""Tests for tick profiling."""
+
+import time
+import pytest
+import yaml
+from unittest.mock import Mock, patch
+
+from src.profiling import NULL_TIMER, SamplingProfiler, StageTimer, TickProfiler
+
+
+def test_stage_timer_nests_paths_and_self_time():
+    """Nested stages record full paths and subtract child time."""
+    timer = StageTimer()
+    for _ in range(2):
+        with timer.stage('tick'):
+            with timer.stage('step'):
+                time.sleep(0.002)
+            with timer.stage('publish'):
+                pass
+
+    assert set(timer.stats) == {('tick',), ('tick', 'step'), ('tick', 'publish')}
+    calls, total, peak, own = timer.stats[('tick',)]
+    assert calls == 2
+    assert own < total
+    assert timer.stats[('tick', 'step')][1] >= 0.004
+
+    collapsed = timer.collapsed()
+    assert any(line.startswith('tick;step ') for line in collapsed)
+    assert 'step' in timer.summary(ticks=2)
+
+
+def test_null_timer_records_nothing():
+    """The shared disabled timer is a no-op."""
+    with NULL_TIMER.stage('tick'):
+        pass
+    assert NULL_TIMER.stats == {}
+
+
+def busy_loop(seconds):
+    """Spin the CPU for a while."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampling_profiler_collects_stacks():
+    """The sampler attributes samples to the running function."""
+    sampler = SamplingProfiler(interval=0.001)
+    sampler.start()
+    busy_loop(0.1)
+    sampler.stop()
+
+    lines = sampler.collapsed()
+    assert lines
+    assert any('busy_loop' in line for line in lines)
+
+
+@pytest.mark.parametrize('mode, extra', [
+    ('stages', []),
+    ('cprofile', ['cprofile.prof', 'cprofile.txt']),
+    ('sample', ['samples.folded'])
+])
+def test_tick_profiler_writes_reports(tmp_path, mode, extra):
+    """Each mode writes the stage summary plus its own capture."""
+    profiler = TickProfiler(mode, ticks=2, output_dir=str(tmp_path), interval=0.001)
+    profiler.start()
+    for _ in range(2):
+        with profiler.timer.stage('tick'):
+            busy_loop(0.01)
+        done = profiler.tick_done()
+    profiler.finish()
+
+    assert done
+    for name in ['stages.txt', 'stages.folded'] + extra:
+        assert (tmp_path / name).exists()
+
+
+def test_invalid_mode():
+    """Unknown profiling modes are rejected."""
+    with pytest.raises(ValueError):
+        TickProfiler('perf')
+
+
+def test_publisher_profiles_stages(tmp_path):
+    """A profiled publisher stops after N ticks and reports each stage."""
+    from src.main import RTLSPublisher
+    config = {
+        'mqtt': {'broker': 'localhost', 'port': 1883, 'client_id': 'test', 'qos': 1},
+        'rtls': {
+            'update_interval': 0.01,
+            'movement': {'max_speed': 2.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'zones': [],
+            'tags': [{'id': 't1', 'name': 'T1', 'type': 'person',
+                      'initial_position': {'x': 1, 'y': 1}}]
+        }
+    }
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump(config))
+
+    profiler = TickProfiler('stages', ticks=3, output_dir=str(tmp_path / 'profile'))
+    with patch('src.main.MQTTClient.connect', return_value=True), \
+            patch('src.main.MQTTClient.disconnect'):
+        publisher = RTLSPublisher(str(path), profiler)
+        publisher.mqtt_client.client = Mock()
+        publisher.mqtt_client.client.publish.return_value = Mock(rc=0)
+        publisher.start()
+
+    assert profiler.completed == 3
+    stats = profiler.timer.stats
+    assert stats[('tick',)][0] == 3
+    assert ('tick', 'step', 'tag_state') in stats
+    assert ('tick', 'publish', 'locations', 'publish_location', 'encode') in stats
+    assert ('tick', 'publish', 'locations', 'publish_location', 'paho_publish') in stats
+    assert (tmp_path / 'profile' / 'stages.folded').exists()
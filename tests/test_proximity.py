@@ -0,0 +1,83 @@
+"""Tests for spatial-hash proximity detection."""
+
+import pytest
+import numpy as np
+
+from src.proximity import find_close_pairs, ProximityMonitor
+
+
+def brute_force_pairs(positions, radius):
+    """Reference O(n^2) pair search."""
+    pairs = set()
+    for i in range(len(positions)):
+        for j in range(i + 1, len(positions)):
+            if np.hypot(*(positions[i, :2] - positions[j, :2])) <= radius:
+                pairs.add((i, j))
+    return pairs
+
+
+def test_find_close_pairs_matches_brute_force():
+    """Spatial hashing finds exactly the brute-force pairs."""
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(-20, 80, (400, 3))
+
+    i, j, distance = find_close_pairs(positions, 4.0)
+
+    assert set(zip(i.tolist(), j.tolist())) == brute_force_pairs(positions, 4.0)
+    assert np.all(distance <= 4.0)
+    assert len(set(zip(i.tolist(), j.tolist()))) == len(i)
+
+
+def test_find_close_pairs_degenerate_inputs():
+    """Empty and single-point inputs produce no pairs."""
+    assert len(find_close_pairs(np.empty((0, 3)), 1.0)[0]) == 0
+    assert len(find_close_pairs(np.zeros((1, 3)), 1.0)[0]) == 0
+
+
+@pytest.fixture
+def monitor():
+    """Forklift/pedestrian rule."""
+    return ProximityMonitor({
+        'rules': [{'id': 'forklift_person', 'types': ['vehicle', 'person'], 'distance': 5.0}]
+    })
+
+
+def test_monitor_event_lifecycle(monitor):
+    """Pairs start, continue and clear across ticks."""
+    ids = ['p1', 'v1', 'v2']
+    types = ['person', 'vehicle', 'vehicle']
+
+    events = monitor.detect(ids, types, np.array([[0, 0, 0], [3, 0, 0], [4, 0, 0]], dtype=float))
+    # Vehicle-vehicle pairs are ignored; pairs are oriented (vehicle, person)
+    assert {(e.tag_id, e.other_tag_id, e.event_type) for e in events} == {
+        ('v1', 'p1', 'started'),
+        ('v2', 'p1', 'started')
+    }
+
+    # Without an ongoing interval pairs that stay close are not repeated
+    events = monitor.detect(ids, types, np.array([[0, 0, 0], [3, 0, 0], [40, 0, 0]], dtype=float))
+    assert {(e.tag_id, e.event_type) for e in events} == {('v2', 'cleared')}
+
+    events = monitor.detect(ids, types, np.array([[0, 0, 0], [30, 0, 0], [40, 0, 0]], dtype=float))
+    assert [(e.tag_id, e.event_type) for e in events] == [('v1', 'cleared')]
+
+
+def test_monitor_ongoing_interval():
+    """Pairs that stay close repeat as `ongoing` at most every ongoing_interval seconds."""
+    monitor = ProximityMonitor({
+        'ongoing_interval': 5,
+        'rules': [{'id': 'forklift_person', 'types': ['vehicle', 'person'], 'distance': 5.0}]
+    })
+    positions = np.array([[0, 0, 0], [3, 0, 0]], dtype=float)
+    kinds = [[e.event_type for e in monitor.detect(['p1', 'v1'], ['person', 'vehicle'], positions, now=t)]
+             for t in range(12)]
+    assert kinds == [['started']] + [[]] * 4 + [['ongoing']] + [[]] * 4 + [['ongoing'], []]
+
+
+def test_monitor_event_json(monitor):
+    """Events serialise for the rtls/proximity topic."""
+    events = monitor.detect(['p1', 'v1'], ['person', 'vehicle'],
+                            np.array([[0, 0, 0], [0, 2, 0]], dtype=float))
+
+    assert '"rule_id": "forklift_person"' in events[0].to_json()
+    assert events[0].distance == 2.0
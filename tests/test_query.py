@@ -0,0 +1,131 @@
+"""Tests for the indexed tag query API."""
+
+import pytest
+import numpy as np
+
+from src.query import TagQueryIndex, handle_tags_query, handle_nearest_query
+from src.snapshot import TagSnapshot
+from src.models import Tag, Position
+
+
+def make_snapshot(positions, seq=1, battery=None, rssi=None):
+    """Snapshot of tags at the given positions."""
+    tags = [
+        Tag(f't{i}', f'Tag {i}', ('person', 'vehicle', 'asset')[i % 3], Position(x, y),
+            battery=battery[i] if battery else 100, rssi=rssi[i] if rssi else -70,
+            zone_id='zone_1' if x < 50 else None)
+        for i, (x, y) in enumerate(positions)
+    ]
+    return TagSnapshot.from_tags(tags, seq=seq)
+
+
+@pytest.fixture
+def positions():
+    """Random tag positions."""
+    return np.random.default_rng(0).uniform(0, 100, (2000, 2)).tolist()
+
+
+@pytest.fixture
+def index(positions):
+    """Index over the random positions."""
+    index = TagQueryIndex(cell_size=7.0)
+    index.update(make_snapshot(positions))
+    return index
+
+
+def test_bbox_and_radius_match_brute_force(index, positions):
+    """Spatial lookups agree with a linear scan."""
+    xy = np.array(positions)
+
+    expected = np.flatnonzero((xy[:, 0] >= 10) & (xy[:, 0] <= 35) & (xy[:, 1] >= 60) & (xy[:, 1] <= 62))
+    assert index.in_bbox(10, 60, 35, 62).tolist() == expected.tolist()
+
+    d = np.hypot(xy[:, 0] - 50, xy[:, 1] - 50)
+    assert sorted(index.in_radius(50, 50, 12).tolist()) == np.flatnonzero(d <= 12).tolist()
+
+
+def test_nearest_matches_brute_force(index, positions):
+    """Nearest-K agrees with a full sort, including far-away query points."""
+    xy = np.array(positions)
+    for x, y in [(50, 50), (0, 0), (500, -300)]:
+        d = np.hypot(xy[:, 0] - x, xy[:, 1] - y)
+        assert index.nearest(x, y, 5).tolist() == np.argsort(d, kind='stable')[:5].tolist()
+
+
+def test_incremental_update_moves_only_changed_cells(index, positions):
+    """Moving tags between ticks keeps the grid consistent."""
+    moved = [list(p) for p in positions]
+    moved[0] = [99.0, 99.0]
+    index.update(make_snapshot(moved, seq=2))
+
+    assert 0 in index.in_bbox(98, 98, 100, 100).tolist()
+    assert 0 not in index.in_bbox(positions[0][0] - 0.1, positions[0][1] - 0.1,
+                                  positions[0][0] + 0.1, positions[0][1] + 0.1).tolist()
+
+
+def test_type_zone_and_threshold_queries():
+    """Type, zone, battery and RSSI lookups."""
+    index = TagQueryIndex()
+    index.update(make_snapshot(
+        [(10, 10), (20, 20), (60, 60), (70, 70)],
+        battery=[90, 10, 14, 50],
+        rssi=[-60, -88, -70, -86]
+    ))
+
+    assert index.by_type('vehicle').tolist() == [1]
+    assert index.by_zone('zone_1').tolist() == [0, 1]
+    assert index.battery_below(15).tolist() == [1, 2]
+    assert index.rssi_below(-85).tolist() == [1, 3]
+
+
+def test_type_change_regroups():
+    """A tag whose type changes in place moves to its new type bucket."""
+    index = TagQueryIndex()
+    snapshot = make_snapshot([(10, 10), (20, 20), (60, 60)])
+    index.update(snapshot)
+    retyped = make_snapshot([(10, 10), (20, 20), (60, 60)], seq=2)
+    retyped.types[0] = 'vehicle'
+    index.update(retyped)
+
+    assert index.by_type('vehicle').tolist() == [0, 1]
+    assert index.by_type('person').tolist() == []
+
+
+def test_json_handlers(index):
+    """The HTTP handlers dispatch query parameters to the index."""
+    result = handle_tags_query(index, {'bbox': '0,0,10,10'})
+    assert result['seq'] == 1
+    assert result['tag_count'] == len(result['tags'])
+    assert all(0 <= tag['x'] <= 10 for tag in result['tags'])
+
+    result = handle_nearest_query(index, {'near': '50,50', 'k': '3'})
+    assert result['tag_count'] == 3
+
+    with pytest.raises(ValueError):
+        handle_tags_query(index, {'bbox': '1,2,3'})
+
+
+def test_generator_query_surface():
+    """RTLSGenerator answers queries from the index."""
+    from src.rtls_generator import RTLSGenerator
+    config = {
+        'rtls': {
+            'movement': {'max_speed': 5.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'query': {'enabled': True, 'cell_size': 5.0},
+            'zones': [],
+            'tags': [
+                {'id': 't1', 'name': 'A', 'type': 'asset', 'movement': 'idle', 'battery': 5,
+                 'initial_position': {'x': 1, 'y': 1}},
+                {'id': 't2', 'name': 'B', 'type': 'vehicle', 'movement': 'idle',
+                 'initial_position': {'x': 30, 'y': 30}}
+            ]
+        }
+    }
+    generator = RTLSGenerator(config)
+    generator.step(1.0)
+
+    assert [tag.id for tag in generator.get_nearest_tags(29, 29, 1)] == ['t2']
+    assert [tag.id for tag in generator.get_tags_in_bbox(0, 0, 10, 10)] == ['t1']
+    assert [tag.id for tag in generator.get_tags_in_radius(0, 0, 2)] == ['t1']
+    assert [tag.id for tag in generator.get_tags_by_type('vehicle')] == ['t2']
+    assert [tag.id for tag in generator.get_low_battery_tags(15)] == ['t1']
@@ -0,0 +1,126 @@
+"""Tests for the capacity ramp load test."""
+
+import json
+from collections import OrderedDict
+from unittest.mock import Mock
+
+import pytest
+
+from src.mqtt_client import MQTTClient
+from src.ramp import AckProbe, CapacityRamp, DEFAULT_SLO, slo_breaches, synthetic_tags, write_report
+
+
+@pytest.fixture
+def config():
+    """Two zones and two tag types."""
+    box = {'x_min': 0, 'x_max': 10, 'y_min': 0, 'y_max': 10, 'z_min': 0, 'z_max': 5}
+    return {
+        'mqtt': {'broker': 'localhost', 'port': 1883, 'client_id': 'ramp_test', 'qos': 1},
+        'rtls': {
+            'update_interval': 1.0,
+            'movement': {'max_speed': 2.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'zones': [
+                {'id': 'dock', 'name': 'Dock', 'bounds': box},
+                {'id': 'yard', 'name': 'Yard', 'polygon': [[20, 0], [40, 0], [40, 10]]}
+            ],
+            'tags': [
+                {'id': 'forklift', 'name': 'Forklift', 'type': 'vehicle', 'initial_position': {'x': 5, 'y': 5}},
+                {'id': 'worker', 'name': 'Worker', 'type': 'person', 'initial_position': {'x': 2, 'y': 2}}
+            ]
+        }
+    }
+
+
+class UnackedPaho:
+    """paho stand-in that accepts every publish and never acknowledges one."""
+
+    def __init__(self):
+        self._out_messages = OrderedDict()
+
+    def publish(self, topic, payload=None, qos=0, retain=False, properties=None):
+        mid = len(self._out_messages) + 1
+        self._out_messages[mid] = topic
+        return Mock(rc=0, mid=mid)
+
+
+def test_synthetic_tags(config):
+    """Synthetic tags sit inside the zones, cycle the configured types and grow by appending."""
+    tags = synthetic_tags(config, 100)
+    assert len({tag['id'] for tag in tags}) == 100
+    assert {tag['type'] for tag in tags} == {'person', 'vehicle'}
+    for tag in tags[::2]:
+        assert 0 <= tag['initial_position']['x'] <= 10
+    for tag in tags[1::2]:
+        assert 20 <= tag['initial_position']['x'] <= 40
+    assert synthetic_tags(config, 150)[:100] == tags
+
+
+def test_slo_breaches():
+    """Each SLO is checked against the step's measurements."""
+    step = {'tick_p99_ms': 100.0, 'ack_p99_ms': None, 'max_queue_depth': 0, 'rate_ratio': 1.0}
+    assert slo_breaches(step, 1.0, DEFAULT_SLO) == []
+    step.update(tick_p99_ms=900.0, ack_p99_ms=800.0, max_queue_depth=20000, rate_ratio=0.5)
+    breaches = slo_breaches(step, 1.0, DEFAULT_SLO)
+    assert [breach.split()[0] for breach in breaches] == ['tick', 'ack', 'queue', 'publish']
+
+
+def test_ack_probe_handles_either_order():
+    """Acknowledgements that beat the send bookkeeping still count."""
+    probe = AckProbe()
+    probe.sent(1)
+    probe.acked(1)
+    probe.acked(2)
+    probe.sent(2)
+    probe.sent(3)
+    assert len(probe.collect()) == 2
+    assert probe.pending == 1 and probe.count == 3
+    assert probe.collect() == []
+
+
+def test_ack_probe_forgets_unmatched_acks():
+    """Acks without a recorded send do not pile up over a run."""
+    probe = AckProbe(early_window=0.0)
+    for mid in range(100):
+        probe.acked(mid)
+    probe.collect()
+    assert probe._early == {}
+    probe.sent(5)
+    assert probe.collect() == [] and probe.pending == 1
+
+
+def test_client_feeds_probe(config):
+    """Publishes and paho's on_publish callback reach the probe."""
+    client = MQTTClient(config)
+    client.client = UnackedPaho()
+    client.ack_probe = AckProbe()
+    client.clear_retained('rtls/status')
+    assert client.queue_depth() == 1 and client.ack_probe.pending == 1
+    client._on_publish(None, None, 1)
+    assert client.ack_probe.pending == 0 and len(client.ack_probe.latencies) == 1
+
+
+def test_ramp_stops_at_breach(config, tmp_path):
+    """The population grows until the queue depth SLO breaks; the last passing step is reported."""
+    client = MQTTClient(config)
+    client.client = UnackedPaho()
+    client.connected = True
+    ramp = CapacityRamp(config, client, {
+        'intervals': [0.5], 'start_tags': 10, 'step_tags': 10, 'max_tags': 1000,
+        'step_seconds': 1.0, 'warmup_ticks': 1,
+        'slo': {'max_queue_depth': 150, 'min_rate_ratio': 0.0, 'tick_p99': 100.0}
+    })
+    ramp.sleep = lambda seconds: None
+    report = ramp.run()
+
+    result = report['results'][0]
+    steps = result['steps']
+    assert [step['tags'] for step in steps] == [10 * (i + 1) for i in range(len(steps))]
+    assert all(not step['breaches'] for step in steps[:-1])
+    assert 'queue depth' in steps[-1]['breaches'][0]
+    assert result['sustainable_tags'] == steps[-2]['tags']
+    assert steps[0]['ticks'] == 2 and steps[0]['expected_reports_per_s'] == 20.0
+    assert client.ack_probe is None
+
+    summary = write_report(report, str(tmp_path / 'ramp.json'))
+    assert json.loads((tmp_path / 'ramp.json').read_text())['results'][0]['interval'] == 0.5
+    assert 'queue depth' in summary
@@ -0,0 +1,146 @@
+"""Tests for anchor ranging and multilateration."""
+
+import pytest
+import numpy as np
+
+from src.ranging import AnchorSet, RangingModel
+from src.rtls_generator import RTLSGenerator
+from src.models import Anchor, Position, Zone
+
+
+ANCHORS = [(0, 0, 3), (50, 0, 3), (50, 50, 3), (0, 50, 3)]
+
+
+@pytest.fixture
+def zone():
+    """Zone with four corner anchors."""
+    return Zone(
+        id='zone_1',
+        name='Zone 1',
+        x_min=0, x_max=50,
+        y_min=0, y_max=50,
+        z_min=0, z_max=5,
+        anchors=[Anchor(f'a{i}', Position(*xyz)) for i, xyz in enumerate(ANCHORS)]
+    )
+
+
+@pytest.fixture
+def positions():
+    """Batch of tag positions inside the zone."""
+    rng = np.random.default_rng(0)
+    return np.column_stack([
+        rng.uniform(1, 49, 500),
+        rng.uniform(1, 49, 500),
+        rng.uniform(0, 2, 500)
+    ])
+
+
+def test_twr_exact_ranges_recover_positions(positions):
+    """Noise-free TWR ranges solve back to the true positions."""
+    anchor_set = AnchorSet(ANCHORS)
+    ranges = anchor_set.true_ranges(positions)
+
+    estimates = anchor_set.solve_twr(ranges, positions[:, 2])
+
+    np.testing.assert_allclose(estimates, positions[:, :2], atol=1e-6)
+
+
+def test_tdoa_exact_ranges_recover_positions(positions):
+    """Noise-free TDoA range differences solve back to the true positions."""
+    anchor_set = AnchorSet(ANCHORS + [(25, 55, 3)])
+    ranges = anchor_set.true_ranges(positions)
+
+    estimates = anchor_set.solve_tdoa(ranges[:, 1:] - ranges[:, :1], positions[:, 2])
+
+    np.testing.assert_allclose(estimates, positions[:, :2], atol=1e-4)
+
+
+def test_noisy_estimates_stay_close(zone, positions):
+    """Measurement noise produces bounded estimation error."""
+    model = RangingModel({'noise_std': 0.1, 'nlos_probability': 0.0, 'seed': 1}, [zone])
+
+    estimates = model.estimate(positions, ['zone_1'] * len(positions))
+
+    error = np.linalg.norm(estimates[:, :2] - positions[:, :2], axis=1)
+    assert np.median(error) < 0.3
+    # Height is treated as known
+    np.testing.assert_array_equal(estimates[:, 2], positions[:, 2])
+
+
+def test_nlos_bias_lengthens_ranges(zone, positions):
+    """NLOS bias never shortens a range."""
+    model = RangingModel(
+        {'noise_std': 0.0, 'nlos_probability': 1.0, 'nlos_bias': 1.0, 'seed': 2},
+        [zone]
+    )
+    anchor_set = model.anchor_sets['zone_1']
+
+    measured = model.measure(anchor_set, positions)
+
+    assert np.all(measured >= anchor_set.true_ranges(positions))
+
+
+def test_tags_outside_instrumented_zones_pass_through(zone, positions):
+    """Tags without anchor coverage keep their true position."""
+    model = RangingModel({'seed': 3}, [zone])
+
+    estimates = model.estimate(positions, [None] * len(positions))
+
+    np.testing.assert_array_equal(estimates, positions)
+
+
+def test_too_few_anchors_disables_zone(zone):
+    """Zones below the anchor minimum are skipped."""
+    zone.anchors = zone.anchors[:3]
+    model = RangingModel({'mode': 'tdoa'}, [zone])
+    assert 'zone_1' not in model.anchor_sets
+
+
+def test_invalid_mode():
+    """Unknown ranging modes are rejected."""
+    with pytest.raises(ValueError):
+        RangingModel({'mode': 'aoa'}, [])
+
+
+def test_generator_publishes_estimate():
+    """Generator step fills the estimated position used for publishing."""
+    config = {
+        'rtls': {
+            'update_interval': 1.0,
+            'movement': {'max_speed': 5.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'ranging': {'enabled': True, 'noise_std': 0.05, 'nlos_probability': 0.0, 'seed': 4},
+            'zones': [
+                {
+                    'id': 'zone_1',
+                    'name': 'Zone 1',
+                    'bounds': {
+                        'x_min': 0, 'x_max': 50,
+                        'y_min': 0, 'y_max': 50,
+                        'z_min': 0, 'z_max': 5
+                    },
+                    'anchors': [
+                        {'id': f'a{i}', 'x': x, 'y': y, 'z': z}
+                        for i, (x, y, z) in enumerate(ANCHORS)
+                    ]
+                }
+            ],
+            'tags': [
+                {
+                    'id': 'tag_001',
+                    'name': 'Test Tag',
+                    'type': 'person',
+                    'initial_position': {'x': 25, 'y': 25, 'z': 0}
+                }
+            ]
+        }
+    }
+    generator = RTLSGenerator(config)
+
+    generator.step(1.0)
+
+    tag = generator.tags['tag_001']
+    assert tag.estimated_position is not None
+    assert tag.estimated_position.distance_to(tag.position) < 1.0
+
+    location = generator.get_location_update('tag_001')
+    assert location.location['x'] == round(tag.estimated_position.x, 2)
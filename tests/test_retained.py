@@ -0,0 +1,125 @@
+"""Tests for the retained topic registry and bulk clearing."""
+
+import threading
+import time
+from unittest.mock import Mock
+
+import paho.mqtt.client as mqtt
+import pytest
+
+from src.models import SystemStatus
+from src.mqtt_client import MQTTClient
+from src.retained import RetainedRegistry, clear_topics
+
+
+class FakeBroker:
+    """Acknowledges publishes from a background thread after a small delay."""
+
+    def __init__(self, latency: float = 0.001, lose=()):
+        self.latency = latency
+        self.lose = set(lose)
+        self.outstanding = 0
+        self.max_outstanding = 0
+        self.received = []
+        self._lock = threading.Lock()
+
+    def max_inflight_messages_set(self, inflight):
+        pass
+
+    def publish(self, topic, payload=b"", qos=0, retain=False, properties=None):
+        info = mqtt.MQTTMessageInfo(len(self.received) + 1)
+        info.rc = mqtt.MQTT_ERR_SUCCESS
+        with self._lock:
+            self.received.append((topic, payload, qos, retain))
+            self.outstanding += 1
+            self.max_outstanding = max(self.max_outstanding, self.outstanding)
+        if topic not in self.lose:
+            threading.Timer(self.latency, self._ack, (info,)).start()
+        return info
+
+    def _ack(self, info):
+        with self._lock:
+            self.outstanding -= 1
+        info._set_as_published()
+
+
+@pytest.fixture
+def client():
+    """Connected client publishing to a fake broker."""
+    client = MQTTClient({'mqtt': {'broker': 'localhost', 'port': 1883, 'client_id': 'retained_test',
+                                  'retained': {'clear_inflight': 8, 'clear_timeout': 2.0}}})
+    client.client = Mock(wraps=FakeBroker())
+    client.connected = True
+    return client
+
+
+def test_registry_journal_survives_restart(tmp_path):
+    """Adds and clears are journaled and compacted on reopen."""
+    path = tmp_path / 'state' / 'pub.retained'
+    registry = RetainedRegistry(path)
+    for topic in ('rtls/location/a', 'rtls/location/b', 'rtls/status'):
+        registry.add(topic)
+    registry.add('rtls/location/a')
+    registry.discard('rtls/location/b')
+    registry.flush()
+    # Not closed, as after a crash: the journal still holds every change
+    assert path.read_text().splitlines() == [
+        '+rtls/location/a', '+rtls/location/b', '+rtls/status', '-rtls/location/b']
+
+    reopened = RetainedRegistry(path)
+    assert reopened.topics == {'rtls/location/a', 'rtls/status'}
+    assert path.read_text().splitlines() == ['+rtls/location/a', '+rtls/status']
+    reopened.close()
+
+
+def test_client_tracks_retained_topics(client):
+    """Retained publishes register their topic, empty payloads and plain messages do not."""
+    client.publish_status(SystemStatus(timestamp='t', active_tags=1, update_rate=1.0,
+                                       broker_connected=True, message='ok'))
+    client.publish_heatmap('dock', b'frame')
+    client.with_prefix('site/a/').publish_analytics({'zones': {}})
+    client._publish('rtls/alerts', '{}', retain=False)
+    assert client.retained.topics == {'rtls/status', 'rtls/heatmap/dock', 'site/a/rtls/analytics/zones'}
+
+    client.clear_retained('rtls/heatmap/dock')
+    assert 'rtls/heatmap/dock' not in client.retained
+
+
+def test_clear_is_exact_and_bounded(client):
+    """Every registered topic gets an empty retained QoS 1 publish, never more than the window in flight."""
+    topics = {f"rtls/location/tag_{i}" for i in range(200)}
+    for topic in topics:
+        client.retained.add(topic)
+
+    assert client.clear_retained_messages() == 200
+    broker = client.client._mock_wraps
+    assert {topic for topic, *_ in broker.received} == topics
+    assert all(payload == b"" and qos == 1 and retain for _, payload, qos, retain in broker.received)
+    assert not any('+' in topic for topic, *_ in broker.received)
+    assert broker.max_outstanding <= 8
+    assert len(client.retained) == 0
+    # paho's own in-flight limit is restored afterwards
+    client.client.max_inflight_messages_set.assert_called_with(20)
+
+
+def test_clear_respects_prefix_and_timeout(client):
+    """A prefixed view clears only its topics; unacknowledged clears stay registered."""
+    client.retained.add('site/a/rtls/status')
+    client.retained.add('site/b/rtls/status')
+    assert client.with_prefix('site/a/').clear_retained_messages() == 1
+    assert client.retained.topics == {'site/b/rtls/status'}
+
+    client.client = Mock(wraps=FakeBroker(lose={'site/b/rtls/status'}))
+    client.clear_timeout = 0.05
+    assert client.clear_retained_messages() == 0
+    assert client.retained.topics == {'site/b/rtls/status'}
+
+
+def test_clear_topics_pipelines():
+    """With 1 ms acknowledgements, 5000 clears take far less than one round trip each."""
+    broker = FakeBroker(latency=0.001)
+    start = time.monotonic()
+    cleared = clear_topics(lambda topic: broker.publish(topic, b"", 1, True),
+                           (f"t/{i}" for i in range(5000)), max_inflight=500)
+    assert len(cleared) == 5000
+    assert time.monotonic() - start < 5.0
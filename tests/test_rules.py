@@ -0,0 +1,137 @@
+"""Tests for compiled tag rules."""
+
+import numpy as np
+import pytest
+
+from src.rules import RuleEngine, compile_rule
+from src.snapshot import TagSnapshot
+
+
+def make_snapshot(zones, speed=None, battery=None, rssi=None, types=None):
+    """A snapshot of len(zones) tags."""
+    n = len(zones)
+    return TagSnapshot(
+        seq=0,
+        timestamp='2024-01-01T00:00:00Z',
+        ids=[f"t{i}" for i in range(n)],
+        types=np.array(types or ['vehicle'] * n, dtype=object),
+        zone_ids=np.array(zones, dtype=object),
+        positions=np.arange(n * 3, dtype=float).reshape(n, 3),
+        speed=np.array(speed if speed is not None else [0.0] * n, dtype=float),
+        heading=np.zeros(n),
+        battery=np.array(battery if battery is not None else [100] * n),
+        rssi=np.array(rssi if rssi is not None else [-60] * n)
+    )
+
+
+@pytest.fixture
+def state():
+    return {
+        'id': np.array(['a', 'b', 'c', 'd'], dtype=object),
+        'type': np.array(['vehicle', 'person', 'vehicle', 'asset'], dtype=object),
+        'zone': np.array(['office', 'office', None, 'dock'], dtype=object),
+        'x': np.array([0.0, 5.0, 10.0, 15.0]),
+        'speed': np.array([4.0, 1.0, 6.0, 0.0]),
+        'battery': np.array([10, 50, 90, 12]),
+        'rssi': np.array([-90, -70, -60, -88])
+    }
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ("type == 'vehicle' and speed > 3 and zone == 'office'", [True, False, False, False]),
+    ("battery < 15 and rssi < -85", [True, False, False, True]),
+    ("zone is None or type in ['asset', 'person']", [False, True, True, True]),
+    ("not (zone != 'dock')", [False, False, False, True]),
+    ("2 < x * 0.5 <= 5", [False, True, True, False]),
+    ("speed * 3.6 > 20 or id == 'b'", [False, True, True, False]),
+    ("type not in ('vehicle',)", [False, True, False, True]),
+    ("1 < 2", [True, True, True, True]),
+])
+def test_compiled_masks(state, expression, expected):
+    """Expressions compile to boolean masks over all tags."""
+    assert compile_rule(expression)(state).tolist() == expected
+
+
+@pytest.mark.parametrize('expression', [
+    "speed > 'fast'",
+    "type > 'a'",
+    "speed",
+    "__import__('os').system('true')",
+    "color == 'red'",
+    "speed is 3",
+    "speed >",
+    "type in zone",
+])
+def test_invalid_rules_rejected(expression):
+    """Unknown fields, type mismatches and non-expression syntax are rejected at compile time."""
+    with pytest.raises(ValueError):
+        compile_rule(expression)
+
+
+def test_engine_events_hold_and_dwell():
+    """Rules fire after `for` seconds, clear when false, and track zone dwell."""
+    engine = RuleEngine({'rules': [
+        {'id': 'failing', 'when': 'battery < 15', 'for': 10},
+        {'id': 'loiter', 'when': "zone == 'dock' and dwell > 60", 'severity': 'critical'}
+    ]})
+
+    assert engine.evaluate(make_snapshot(['dock', None], battery=[10, 90]), 0.0) == []
+    assert engine.evaluate(make_snapshot(['dock', 'dock'], battery=[10, 90]), 5.0) == []
+
+    events = engine.evaluate(make_snapshot(['dock', 'dock'], battery=[10, 90]), 61.0)
+    assert [(e.rule_id, e.tag_id, e.event_type) for e in events] == [
+        ('failing', 't0', 'started'), ('loiter', 't0', 'started')
+    ]
+    assert events[1].severity == 'critical' and events[1].zone_id == 'dock'
+    assert engine.active('loiter') == ['t0']
+
+    events = engine.evaluate(make_snapshot(['dock', 'dock'], battery=[50, 90]), 70.0)
+    assert [(e.rule_id, e.tag_id, e.event_type) for e in events] == [
+        ('failing', 't0', 'cleared'), ('loiter', 't1', 'started')
+    ]
+    assert engine.evaluate(make_snapshot(['dock', 'dock'], battery=[50, 90]), 71.0) == []
+
+
+def test_engine_keeps_state_when_tags_change():
+    """Per-tag state follows tag ids when tags are added or removed."""
+    engine = RuleEngine({'rules': [{'id': 'loiter', 'when': "zone == 'dock' and dwell >= 30"}]})
+    engine.evaluate(make_snapshot(['dock', 'dock']), 0.0)
+
+    snapshot = make_snapshot(['dock', 'dock', 'dock'])
+    snapshot.ids = ['t1', 'new', 't0']
+    events = engine.evaluate(snapshot, 30.0)
+
+    assert sorted(event.tag_id for event in events) == ['t0', 't1']
+    with pytest.raises(ValueError):
+        RuleEngine({'rules': [{'id': 'x', 'when': 'speed > 1'}, {'id': 'x', 'when': 'speed > 2'}]})
+
+
+def test_removed_tag_clears_its_violations():
+    """A tag removed while breaking a rule gets a `cleared` event."""
+    engine = RuleEngine({'rules': [{'id': 'fast', 'when': 'speed > 3'}]})
+    events = engine.evaluate(make_snapshot(['dock', 'yard'], speed=[1.0, 5.0]), 0.0)
+    assert [(e.tag_id, e.event_type) for e in events] == [('t1', 'started')]
+
+    snapshot = make_snapshot(['dock'], speed=[1.0])
+    events = engine.evaluate(snapshot, 1.0)
+    assert [(e.rule_id, e.tag_id, e.event_type, e.zone_id) for e in events] == [('fast', 't1', 'cleared', 'yard')]
+    assert engine.active('fast') == []
+
+
+def test_generator_evaluates_rules():
+    """The generator evaluates rules after each step."""
+    from src.rtls_generator import RTLSGenerator
+    generator = RTLSGenerator({
+        'rtls': {
+            'update_interval': 1.0,
+            'movement': {'max_speed': 5.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'rules': {'enabled': True, 'rules': [{'id': 'drained', 'when': 'battery < 20'}]},
+            'zones': [],
+            'tags': [{'id': 'a', 'name': 'A', 'type': 'asset', 'movement': 'idle', 'battery': 10,
+                      'initial_position': {'x': 0, 'y': 0}}]
+        }
+    })
+    generator.step(1.0)
+    assert [(e.rule_id, e.tag_id) for e in generator.rule_events] == [('drained', 'a')]
+    generator.step(1.0)
+    assert generator.rule_events == []
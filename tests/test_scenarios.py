@@ -0,0 +1,121 @@
+"""Tests for scheduled anomaly scenarios."""
+
+import pytest
+import numpy as np
+
+from src.scenarios import ScenarioEngine
+
+
+@pytest.fixture
+def state():
+    """Columns for 10k tags, half assets, a quarter in the loading dock."""
+    n = 10000
+    return {
+        'types': np.array(['asset', 'person'] * (n // 2), dtype=object),
+        'zone_ids': np.array(['loading_dock', None, None, None] * (n // 4), dtype=object),
+        'positions': np.zeros((n, 3)),
+        'battery': np.full(n, 100),
+        'rssi': np.full(n, -60),
+        'speed': np.zeros(n)
+    }
+
+
+def test_one_shot_event_fires_once(state):
+    """A timed battery drain hits about the requested fraction of assets once."""
+    engine = ScenarioEngine({'seed': 1, 'events': [
+        {'at': 300, 'type': 'low_battery', 'types': ['asset'], 'fraction': 0.1}
+    ]})
+
+    assert engine.apply(298.0, 1.0, state) == {}
+    changed = engine.apply(299.0, 1.0, state)['battery']
+
+    assert 400 < len(changed) < 600
+    assert set(state['types'][changed]) == {'asset'}
+    assert state['battery'][changed].max() <= 15
+    assert engine.apply(300.0, 1.0, state) == {}
+
+
+def test_windowed_event_applies_only_inside_zone_and_window(state):
+    """An RSSI dropout affects the zone only while the window is open."""
+    engine = ScenarioEngine({'events': [
+        {'at': 10, 'duration': 60, 'type': 'weak_signal', 'zone': 'loading_dock', 'rssi': -95}
+    ]})
+
+    assert engine.due(5.0, 1.0) == []
+    changed = engine.apply(30.0, 1.0, state)['rssi']
+    assert len(changed) == 2500
+    assert (state['rssi'][changed] == -95).all()
+    assert (np.delete(state['rssi'], changed) == -60).all()
+    assert engine.due(70.0, 1.0) == []
+
+
+def test_teleport_rate(state):
+    """Teleport glitches follow the configured per-tag rate and distance."""
+    engine = ScenarioEngine({'seed': 3, 'events': [
+        {'at': 0, 'duration': 100, 'type': 'teleport', 'rate': 0.01, 'distance': 20}
+    ]})
+
+    rows = engine.apply(0.0, 1.0, state)['positions']
+    assert 50 < len(rows) < 150
+    assert np.allclose(np.hypot(state['positions'][rows, 0], state['positions'][rows, 1]), 20)
+
+
+def test_events_sharing_type_and_time_both_fire(state):
+    """Default ids keep same-type events at the same time apart; explicit duplicates are rejected."""
+    engine = ScenarioEngine({'events': [
+        {'at': 300, 'type': 'low_battery', 'types': ['asset']},
+        {'at': 300, 'type': 'low_battery', 'types': ['person']}
+    ]})
+
+    assert len(engine.due(299.0, 1.0)) == 2
+    assert engine.due(300.0, 1.0) == []
+    with pytest.raises(ValueError):
+        ScenarioEngine({'events': [{'id': 'drain', 'at': 0, 'type': 'low_battery'},
+                                   {'id': 'drain', 'at': 5, 'type': 'weak_signal'}]})
+
+
+def test_invalid_events_are_rejected():
+    """Unknown event types and bad fractions fail at load time."""
+    with pytest.raises(ValueError):
+        ScenarioEngine({'events': [{'at': 0, 'type': 'meteor'}]})
+    with pytest.raises(ValueError):
+        ScenarioEngine({'events': [{'at': 0, 'type': 'low_battery', 'fraction': 2}]})
+
+
+def test_skip_until_suppresses_past_one_shots(state):
+    """Reloaded scenarios do not replay one-shot events already in the past."""
+    engine = ScenarioEngine({'events': [{'at': 5, 'type': 'low_battery'}]})
+    engine.skip_until(100.0)
+
+    assert engine.apply(100.0, 1.0, state) == {}
+
+
+def test_generator_applies_scenarios():
+    """RTLSGenerator writes scenario changes back to its tags."""
+    from src.rtls_generator import RTLSGenerator
+    config = {
+        'rtls': {
+            'movement': {'max_speed': 5.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'scenarios': {'enabled': True, 'events': [
+                {'at': 2, 'type': 'low_battery', 'types': ['asset'], 'battery': 7},
+                {'at': 1, 'type': 'teleport', 'types': ['vehicle'], 'distance': 50}
+            ]},
+            'zones': [],
+            'tags': [
+                {'id': 'a', 'name': 'A', 'type': 'asset', 'movement': 'idle',
+                 'initial_position': {'x': 0, 'y': 0}},
+                {'id': 'v', 'name': 'V', 'type': 'vehicle', 'movement': 'idle',
+                 'initial_position': {'x': 0, 'y': 0}}
+            ]
+        }
+    }
+    generator = RTLSGenerator(config)
+
+    generator.step(1.0)
+    assert generator.tags['a'].battery > 7
+    position = generator.tags['v'].position
+    assert np.hypot(position.x, position.y) == pytest.approx(50)
+
+    generator.step(1.0)
+    assert generator.tags['a'].battery == 7
+    assert generator.elapsed == 2.0
@@ -0,0 +1,109 @@
+"""Tests for per-tag report scheduling."""
+
+import copy
+import pytest
+
+from src.scheduler import RateScheduler
+
+
+def run(scheduler, ticks):
+    """Advance the scheduler; returns the tick numbers each tag reported on."""
+    reports = {}
+    for _ in range(ticks):
+        for tag_id, _ in scheduler.advance():
+            reports.setdefault(tag_id, []).append(scheduler.now)
+    return reports
+
+
+def test_tags_report_at_their_own_rate():
+    """Each tag reports once per period, including periods longer than the wheel."""
+    scheduler = RateScheduler(0.1, slots=8)
+    scheduler.add('fast', 0.1)
+    scheduler.add('vehicle', 0.5)
+    scheduler.add('asset', 3.0)
+
+    reports = run(scheduler, 300)
+
+    assert len(reports['fast']) == 300
+    assert len(reports['vehicle']) == 60
+    assert len(reports['asset']) == 10
+    assert {b - a for a, b in zip(reports['asset'], reports['asset'][1:])} == {30}
+    assert scheduler.interval('asset') == pytest.approx(3.0)
+    assert scheduler.reports_per_second() == pytest.approx(10 + 2 + 1 / 3)
+
+
+def test_first_reports_are_staggered():
+    """Tags sharing a rate are spread over the period instead of reporting together."""
+    scheduler = RateScheduler(1.0)
+    for i in range(1000):
+        scheduler.add(f"tag_{i}", 10.0)
+
+    counts = [len(scheduler.advance()) for _ in range(10)]
+
+    assert sum(counts) == 1000
+    assert max(counts) < 150
+
+
+def test_elapsed_ticks_and_no_stagger():
+    """Due tags carry the ticks since their last report."""
+    scheduler = RateScheduler(1.0, stagger=False)
+    scheduler.add('a', 3.0)
+
+    assert scheduler.advance() == [('a', 3)]
+    assert scheduler.advance() == []
+    assert scheduler.advance() == []
+    assert scheduler.advance() == [('a', 3)]
+
+
+def test_remove_and_reschedule():
+    """Removed tags stop reporting; a new interval keeps the last report as the reference."""
+    scheduler = RateScheduler(1.0, stagger=False)
+    scheduler.add('a', 4.0)
+    scheduler.add('b', 1.0)
+    assert run(scheduler, 1) == {'a': [1], 'b': [1]}
+
+    scheduler.remove('b')
+    scheduler.add('a', 2.0)
+
+    assert run(scheduler, 6) == {'a': [3, 5, 7]}
+    assert 'b' not in scheduler and len(scheduler) == 1
+
+
+def test_generator_steps_only_due_tags():
+    """With rates enabled the generator steps and reports just the due tags."""
+    from src.rtls_generator import RTLSGenerator
+    config = {
+        'rtls': {
+            'update_interval': 0.5,
+            'movement': {'max_speed': 5.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'rates': {'enabled': True, 'stagger': False, 'types': {'asset': 5.0}},
+            'zones': [{'id': 'z', 'name': 'Z', 'bounds': {
+                'x_min': 0, 'x_max': 100, 'y_min': 0, 'y_max': 100, 'z_min': 0, 'z_max': 5}}],
+            'tags': [
+                {'id': 'pallet', 'name': 'Pallet', 'type': 'asset',
+                 'initial_position': {'x': 10, 'y': 10}},
+                {'id': 'forklift', 'name': 'Forklift', 'type': 'vehicle',
+                 'initial_position': {'x': 20, 'y': 20}},
+                {'id': 'badge', 'name': 'Badge', 'type': 'person', 'update_interval': 1.0,
+                 'initial_position': {'x': 30, 'y': 30}}
+            ]
+        }
+    }
+    generator = RTLSGenerator(config)
+
+    reported = []
+    for _ in range(20):
+        generator.step(0.5)
+        reported.append([tag.id for tag in generator.updated])
+
+    assert sum(ids.count('forklift') for ids in reported) == 20
+    assert sum(ids.count('badge') for ids in reported) == 10
+    assert sum(ids.count('pallet') for ids in reported) == 2
+    # Zones are all published on the first tick, then only when occupancy changes
+    assert generator.changed_zones == set()
+
+    config = copy.deepcopy(config)
+    config['rtls']['tags'][1]['update_interval'] = 2.0
+    changes = generator.apply_config(config)
+    assert changes['tags_changed'] == ['forklift']
+    assert generator.rates.interval('forklift') == 2.0
@@ -0,0 +1,108 @@
+"""Tests for the shared-memory tag state export."""
+
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+from src.shared_state import SharedStateReader, SharedStateWriter
+from src.snapshot import TagSnapshot
+
+
+def make_snapshot(n, tick, zones=('dock', None, 'yard'), types=('vehicle', 'person')):
+    """Snapshot whose numeric columns all equal `tick`, so a torn read shows up as mixed values."""
+    value = float(tick)
+    return TagSnapshot(
+        seq=tick,
+        timestamp='2024-01-01T00:00:00Z',
+        ids=[f"t{i}" for i in range(n)],
+        types=np.array([types[i % len(types)] for i in range(n)], dtype=object),
+        zone_ids=np.array([zones[i % len(zones)] for i in range(n)], dtype=object),
+        positions=np.full((n, 3), value),
+        speed=np.full(n, value),
+        heading=np.full(n, value),
+        battery=np.full(n, tick, dtype=int),
+        rssi=np.full(n, -tick, dtype=int)
+    )
+
+
+@pytest.fixture
+def name(request):
+    return f"rtls_test_{os.getpid()}_{request.node.name[:20]}"
+
+
+def test_round_trip_and_catalog_changes(name):
+    """Readers see each published snapshot, including new names and fewer tags."""
+    writer = SharedStateWriter(name, capacity=100)
+    try:
+        reader = SharedStateReader(name)
+        assert len(reader.read()) == 0
+
+        writer.publish(make_snapshot(10, 1), elapsed=1.0)
+        snapshot = reader.read()
+        assert snapshot.seq == 1 and snapshot.ids == [f"t{i}" for i in range(10)]
+        assert snapshot.zone_ids.tolist()[:3] == ['dock', None, 'yard']
+        assert snapshot.types.tolist()[:2] == ['vehicle', 'person']
+        assert snapshot.positions.shape == (10, 3) and (snapshot.battery == 1).all()
+        assert snapshot.to_records(np.array([1]))[0]['zone_id'] is None
+
+        writer.publish(make_snapshot(4, 2, zones=('office',), types=('asset',)))
+        snapshot = reader.read()
+        assert len(snapshot) == 4 and snapshot.zone_ids.tolist() == ['office'] * 4
+        assert snapshot.types.tolist() == ['asset'] * 4 and (snapshot.rssi == -2).all()
+
+        arrays = reader.read_arrays()
+        assert reader.zone_names[arrays['zone']].tolist() == ['office'] * 4 and arrays['tick'] == 2
+        reader.close()
+    finally:
+        writer.close()
+
+
+def test_capacity_and_stale_segment(name):
+    """Rows beyond capacity are dropped and a leftover segment is replaced."""
+    stale = SharedStateWriter(name, capacity=10)
+    writer = SharedStateWriter(name, capacity=5)
+    try:
+        writer.publish(make_snapshot(8, 3))
+        reader = SharedStateReader(name)
+        assert reader.read().ids == [f"t{i}" for i in range(5)]
+        reader.close()
+    finally:
+        writer.close()
+        stale.shm.close()
+
+
+def _write_ticks(name, ready, done, ticks):
+    writer = SharedStateWriter(name, capacity=20000)
+    try:
+        ready.set()
+        for tick in range(1, ticks + 1):
+            writer.publish(make_snapshot(20000, tick))
+        done.wait(30)
+    finally:
+        writer.close()
+
+
+def test_reads_are_never_torn(name):
+    """A reader racing a writer in another process only ever sees whole ticks."""
+    ctx = multiprocessing.get_context('spawn')
+    ready, done = ctx.Event(), ctx.Event()
+    process = ctx.Process(target=_write_ticks, args=(name, ready, done, 300))
+    process.start()
+    try:
+        assert ready.wait(30)
+        reader = SharedStateReader(name)
+        ticks = []
+        while not ticks or ticks[-1] < 300:
+            snapshot = reader.read()
+            if len(snapshot):
+                tick = snapshot.seq
+                assert (snapshot.positions == tick).all() and (snapshot.speed == tick).all()
+                assert (snapshot.heading == tick).all() and (snapshot.rssi == -tick).all()
+                ticks.append(tick)
+        reader.close()
+        assert ticks == sorted(ticks)
+    finally:
+        done.set()
+        process.join(30)
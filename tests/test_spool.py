@@ -0,0 +1,140 @@
+"""Tests for the disk-backed outage spool."""
+
+import pytest
+from unittest.mock import Mock
+
+from src.spool import DiskSpool
+from src.mqtt_client import MQTTClient
+
+
+class Recorder:
+    """Collects replayed messages; can be told to fail."""
+
+    def __init__(self):
+        self.messages = []
+        self.fail = False
+
+    def __call__(self, topic, payload, qos, retain):
+        if self.fail:
+            return False
+        self.messages.append((topic, payload, qos, retain))
+        return True
+
+
+@pytest.fixture
+def spool(tmp_path):
+    """Spool with small segments."""
+    spool = DiskSpool(str(tmp_path / 'spool'), segment_bytes=200, max_bytes=10_000)
+    yield spool
+    spool.close()
+
+
+def test_replays_in_order_and_coalesces_retained(spool):
+    """Only the newest retained message per topic is replayed; events all are."""
+    for i in range(5):
+        spool.append('rtls/location/t1', f'{{"x": {i}}}', 1, True)
+        spool.append('rtls/alerts', f'alert {i}', 1, False)
+    spool.append('rtls/location/t2', b'\x01\x02', 0, True)
+
+    recorder = Recorder()
+    assert spool.drain(recorder, 100) == 7
+    assert [m[1] for m in recorder.messages] == [
+        b'alert 0', b'alert 1', b'alert 2', b'alert 3', b'{"x": 4}', b'alert 4', b'\x01\x02'
+    ]
+    assert recorder.messages[-1] == ('rtls/location/t2', b'\x01\x02', 0, True)
+    assert spool.pending == 0
+    assert spool.coalesced == 4
+
+
+def test_live_publish_supersedes_spooled_retained(spool):
+    """A retained topic published live after an outage is not replayed."""
+    spool.append('rtls/location/t1', 'old', 1, True)
+    spool.mark_published('rtls/location/t1')
+    spool.append('rtls/location/t2', 'old', 1, True)
+
+    recorder = Recorder()
+    spool.drain(recorder, 10)
+    assert [m[0] for m in recorder.messages] == ['rtls/location/t2']
+
+
+def test_rate_limit_and_failed_publish_keep_messages(spool):
+    """Drain respects the limit and resumes where a failed publish stopped."""
+    for i in range(10):
+        spool.append('rtls/alerts', str(i), 1, False)
+
+    recorder = Recorder()
+    assert spool.drain(recorder, 3) == 3
+    recorder.fail = True
+    assert spool.drain(recorder, 3) == 0
+    recorder.fail = False
+    assert spool.drain(recorder, 100) == 7
+    assert [int(m[1]) for m in recorder.messages] == list(range(10))
+
+
+def test_segments_rotate_and_are_deleted_after_replay(spool, tmp_path):
+    """Replayed segments are removed from disk."""
+    for i in range(50):
+        spool.append('rtls/alerts', 'x' * 20, 1, False)
+    assert len(list((tmp_path / 'spool').glob('*.spool'))) > 3
+
+    spool.drain(Recorder(), 1000)
+    assert len(list((tmp_path / 'spool').glob('*.spool'))) == 1
+
+
+def test_size_bound_drops_oldest(tmp_path):
+    """The oldest segments are dropped when the spool is full."""
+    spool = DiskSpool(str(tmp_path), segment_bytes=100, max_bytes=500)
+    for i in range(100):
+        spool.append('rtls/alerts', f'{i:04d}', 1, False)
+
+    assert spool.dropped > 0
+    assert spool.pending == 100 - spool.dropped
+    recorder = Recorder()
+    spool.drain(recorder, 1000)
+    assert recorder.messages[-1][1] == b'0099'
+    assert len(recorder.messages) == 100 - spool.dropped
+    spool.close()
+
+
+def test_recovers_after_restart_and_truncates_torn_tail(tmp_path):
+    """A new spool picks up unreplayed messages from a previous run."""
+    spool = DiskSpool(str(tmp_path))
+    spool.append('rtls/alerts', 'a', 1, False)
+    spool.append('rtls/location/t1', 'b', 1, True)
+    spool.close()
+    segment = next(tmp_path.glob('*.spool'))
+    with open(segment, 'ab') as f:
+        f.write(b'\x00\x01\x02')
+
+    spool = DiskSpool(str(tmp_path))
+    assert spool.pending == 2
+    recorder = Recorder()
+    spool.drain(recorder, 10)
+    assert [m[1] for m in recorder.messages] == [b'a', b'b']
+    spool.close()
+
+
+def test_client_spools_while_disconnected(tmp_path):
+    """MQTTClient spools during an outage and drains at the configured rate."""
+    client = MQTTClient({'mqtt': {
+        'broker': 'localhost', 'port': 1883, 'client_id': 'spool_test', 'qos': 1,
+        'spool': {'enabled': True, 'directory': str(tmp_path), 'drain_rate': 2}
+    }})
+    client.client = Mock()
+    client.client.publish.return_value = Mock(rc=0)
+    view = client.with_prefix('site/a/')
+
+    client.connected = False
+    for _ in range(3):
+        view.clear_retained('rtls/location/t1')
+        client.publish_alert(Mock(to_json=Mock(return_value='{}')))
+    client.client.publish.assert_not_called()
+    assert client.spool.pending == 6
+
+    client.connected = True
+    assert view.connected is True
+    assert client.service_spool(1.0) == 2
+    assert client.service_spool(10.0) == 2
+    topics = [call[0][0] for call in client.client.publish.call_args_list]
+    assert topics == ['rtls/alerts', 'rtls/alerts', 'site/a/rtls/location/t1', 'rtls/alerts']
+    client.spool.close()
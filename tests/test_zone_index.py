@@ -0,0 +1,111 @@
+"""Tests for polygon zones and the batched zone index."""
+
+import pytest
+import numpy as np
+
+from src.zone_index import PolygonIndex, ZoneIndex
+from src.rtls_generator import RTLSGenerator
+from src.models import Position, Zone, point_in_polygon
+
+
+L_SHAPE = [(0, 0), (30, 0), (30, 10), (10, 10), (10, 30), (0, 30)]
+DIAMOND = [(50, 40), (60, 50), (50, 60), (40, 50)]
+
+
+@pytest.fixture
+def zones():
+    """An L-shaped zone, a rotated square and a box zone."""
+    return [
+        Zone('l_zone', 'L Zone', 0, 30, 0, 30, 0, 5, polygon=L_SHAPE),
+        Zone('diamond', 'Diamond', 40, 60, 40, 60, 0, 5, polygon=DIAMOND),
+        Zone('box', 'Box', 0, 100, 0, 100, 0, 10)
+    ]
+
+
+def test_polygon_contains():
+    """Polygon zones reject points inside the bounding box but outside the shape."""
+    zone = Zone('l_zone', 'L Zone', 0, 30, 0, 30, 0, 5, polygon=L_SHAPE)
+
+    assert zone.contains(Position(5, 25, 1)) is True
+    assert zone.contains(Position(25, 5, 1)) is True
+    assert zone.contains(Position(20, 20, 1)) is False
+    assert zone.contains(Position(5, 25, 6)) is False
+
+
+def test_polygon_index_matches_exact_test():
+    """The rasterized index agrees with ray casting on random points."""
+    rng = np.random.default_rng(0)
+    index = PolygonIndex(DIAMOND, resolution=16)
+    x = rng.uniform(35, 65, 20000)
+    y = rng.uniform(35, 65, 20000)
+
+    expected = [point_in_polygon(px, py, DIAMOND) for px, py in zip(x, y)]
+
+    np.testing.assert_array_equal(index.contains(x, y), expected)
+
+
+def test_classify_first_match_wins(zones):
+    """Batched classification respects zone order and falls back to boxes."""
+    index = ZoneIndex(zones, resolution=32)
+    positions = np.array([
+        [5, 25, 1],     # L zone
+        [20, 20, 1],    # L bounding box only -> box
+        [50, 50, 1],    # diamond
+        [41, 41, 1],    # diamond bounding box only -> box
+        [200, 200, 0],  # nowhere
+    ], dtype=float)
+
+    assert index.classify_ids(positions) == ['l_zone', 'box', 'diamond', 'box', None]
+
+
+def test_classify_matches_per_zone_contains(zones):
+    """Batched classification agrees with Zone.contains."""
+    rng = np.random.default_rng(1)
+    positions = rng.uniform(-10, 110, (5000, 3)) * [1, 1, 0.1]
+    index = ZoneIndex(zones)
+
+    expected = []
+    for x, y, z in positions:
+        match = [zone.id for zone in zones if zone.contains(Position(x, y, z))]
+        expected.append(match[0] if match else None)
+
+    assert index.classify_ids(positions) == expected
+
+
+def test_rebuild_reuses_unchanged_polygons(zones):
+    """Unchanged polygon indexes are carried over on rebuild."""
+    index = ZoneIndex(zones)
+    rebuilt = ZoneIndex(zones, cache=index.polygons)
+
+    assert rebuilt.polygons['l_zone'] is index.polygons['l_zone']
+
+
+def test_generator_polygon_zone_config():
+    """Polygon zones are configured with vertices and a level range."""
+    config = {
+        'rtls': {
+            'movement': {'max_speed': 5.0, 'acceleration': 0.5, 'turn_rate': 45.0},
+            'zones': [
+                {
+                    'id': 'mezzanine',
+                    'name': 'Mezzanine',
+                    'polygon': L_SHAPE,
+                    'bounds': {'z_min': 0, 'z_max': 3}
+                }
+            ],
+            'tags': [
+                {'id': 't1', 'name': 'T1', 'type': 'asset', 'movement': 'idle',
+                 'initial_position': {'x': 5, 'y': 25}},
+                {'id': 't2', 'name': 'T2', 'type': 'asset', 'movement': 'idle',
+                 'initial_position': {'x': 20, 'y': 20}}
+            ]
+        }
+    }
+    generator = RTLSGenerator(config)
+    zone = generator.zones[0]
+    assert (zone.x_max, zone.y_max, zone.z_max) == (30, 30, 3)
+
+    generator.step(1.0)
+
+    assert generator.tags['t1'].zone_id == 'mezzanine'
+    assert generator.tags['t2'].zone_id is None